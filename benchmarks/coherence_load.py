@@ -0,0 +1,109 @@
+"""
+Multi-worker load test for data_service cache coherence
+
+Forks several workers sharing one data directory, each mixing reads and
+appointment bookings, then checks that no booking was lost and reports
+throughput and the cost of the per-read version check.
+
+Usage: python -m benchmarks.coherence_load [--workers 4] [--seconds 5] [--write-ratio 0.05]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from benchmarks.fixtures import use_data_dir
+from services import data_service
+
+def _seed(data_dir, appointments):
+    """Write a data set with the given number of appointments"""
+    data = {
+        "customers.json": {"customers": {"c1": {"id": "c1", "name": "Load Test", "phone": "+10000000000"}}},
+        "barbers.json": {"barbers": {"b1": {"id": "b1", "name": "Bench"}}},
+        "services.json": {"services": {"s1": {"id": "s1", "name": "Cut", "price": 20, "duration": 30}}},
+        "appointments.json": {"appointments": {
+            f"seed{i}": {"id": f"seed{i}", "customer_id": "c1", "barber_id": "b1", "service_id": "s1",
+                         "date": f"2024-01-{i % 28 + 1:02d}", "time": "10:00", "status": "scheduled"}
+            for i in range(appointments)
+        }}
+    }
+    for filename, content in data.items():
+        with open(os.path.join(data_dir, filename), "w") as f:
+            json.dump(content, f)
+
+def _worker(data_dir, seconds, write_ratio, results):
+    """Mix reads and bookings until the time is up"""
+    use_data_dir(data_dir)
+    rng = random.Random(os.getpid())
+    reads = writes = 0
+    read_time = 0.0
+    deadline = time.perf_counter() + seconds
+    
+    while time.perf_counter() < deadline:
+        if rng.random() < write_ratio:
+            data_service.create_appointment({
+                "customer_id": "c1", "barber_id": "b1", "service_id": "s1",
+                "date": f"2024-02-{rng.randint(1, 28):02d}", "time": "11:00", "status": "scheduled",
+                "worker": os.getpid(), "sequence": writes
+            })
+            writes += 1
+        else:
+            started = time.perf_counter()
+            data_service.get_appointment(f"seed{rng.randint(0, 99)}")
+            read_time += time.perf_counter() - started
+            reads += 1
+    
+    results.put({"pid": os.getpid(), "reads": reads, "writes": writes, "read_time": read_time})
+
+def _sync_overhead(iterations=200000):
+    """Microseconds the version check adds to a read when nothing changed"""
+    data_service._sync("appointments")
+    started = time.perf_counter()
+    for _ in range(iterations):
+        data_service._sync("appointments")
+    return (time.perf_counter() - started) / iterations * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--write-ratio", type=float, default=0.05)
+    parser.add_argument("--appointments", type=int, default=1000, help="Appointments seeded before the run")
+    args = parser.parse_args()
+    
+    data_dir = tempfile.mkdtemp(prefix="coherence-bench-")
+    try:
+        _seed(data_dir, args.appointments)
+        use_data_dir(data_dir)
+        
+        context = multiprocessing.get_context("fork")
+        results = context.Queue()
+        workers = [context.Process(target=_worker, args=(data_dir, args.seconds, args.write_ratio, results))
+                   for _ in range(args.workers)]
+        for worker in workers:
+            worker.start()
+        stats = [results.get() for _ in workers]
+        for worker in workers:
+            worker.join()
+        
+        with open(os.path.join(data_dir, "appointments.json")) as f:
+            stored = len(json.load(f)["appointments"]) - args.appointments
+        reads = sum(s["reads"] for s in stats)
+        writes = sum(s["writes"] for s in stats)
+        read_time = sum(s["read_time"] for s in stats)
+        
+        print(f"workers={args.workers} seconds={args.seconds} write_ratio={args.write_ratio}")
+        print(f"reads:  {reads} ({reads / args.seconds:.0f}/s), mean {read_time / max(reads, 1) * 1e6:.1f} us "
+              f"including reloads")
+        print(f"writes: {writes} ({writes / args.seconds:.1f}/s), stored {stored}, lost {writes - stored}")
+        print(f"version check when unchanged: {_sync_overhead():.2f} us per read")
+        return 0 if stored == writes else 1
+    finally:
+        shutil.rmtree(data_dir)
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,141 @@
+"""
+Data sets shared by the benchmarks: JSON data directories and in-memory SQL apps
+"""
+import json
+import os
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+from services import data_service
+
+BARBERS = 5
+SERVICES = 4
+FIRST_DAY = date(2024, 1, 1)
+SLOTS = [f"{hour:02d}:{minute:02d}" for hour in range(9, 17) for minute in (0, 30)]
+
+WORKING_HOURS = {
+    day: {"start": "09:00", "end": "17:00"}
+    for day in ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday")
+}
+WORKING_HOURS["sunday"] = None
+
+def use_data_dir(data_dir):
+    """Point data_service at a data directory and load it"""
+    for name in ("CUSTOMERS_FILE", "APPOINTMENTS_FILE", "BARBERS_FILE", "SERVICES_FILE"):
+        path = os.path.join(data_dir, os.path.basename(getattr(data_service, name)))
+        setattr(data_service, name, path)
+        data_service._file_locks[path] = data_service.threading.Lock()
+    data_service.initialize()
+
+def appointment_rows(count):
+    """
+    Deterministic appointments spread over barbers, days and half-hour slots
+
+    Every (day, slot, barber) combination is used once before any repeats,
+    so the number of appointments per day grows with count.
+
+    Returns:
+        list: Appointment dicts with string IDs 'a0', 'a1', ...
+    """
+    per_day = BARBERS * len(SLOTS)
+    rows = []
+    for i in range(count):
+        day, rest = divmod(i, per_day)
+        slot, barber = divmod(rest, BARBERS)
+        rows.append({
+            "id": f"a{i}", "customer_id": f"c{i % max(1, count // 4)}", "barber_id": f"b{barber}",
+            "service_id": f"s{i % SERVICES}", "date": (FIRST_DAY + timedelta(days=day)).isoformat(),
+            "time": SLOTS[slot], "duration": 30, "status": "scheduled"
+        })
+    return rows
+
+def generated_dataset(appointments, seed=42):
+    """
+    Synthetic shop from utils.dataset_generator with roughly the given number of appointments
+
+    25 barbers book about 90,000 appointments a year, so the history is
+    scaled to the requested size; the end date is fixed for repeatable runs.
+    """
+    from utils.dataset_generator import Dataset
+    return Dataset(seed=seed, barbers=25, customers=max(100, appointments // 5),
+                   years=max(appointments / 90000, 0.02), future_days=0, end_date=date(2025, 12, 31))
+
+def pick_targets(appointments):
+    """
+    Records the cases query: the busiest (day, barber) and an appointment from the middle
+
+    Args:
+        appointments: Iterable of appointment dicts with string dates
+
+    Returns:
+        dict: appointment_id, customer_id, service_id, barber_id and day
+    """
+    appointments = list(appointments)
+    middle = appointments[len(appointments) // 2]
+    day, barber_id = Counter((a["date"], a["barber_id"]) for a in appointments).most_common(1)[0][0]
+    return {"appointment_id": middle["id"], "customer_id": middle["customer_id"],
+            "service_id": middle["service_id"], "barber_id": barber_id, "day": day}
+
+def seed_json(data_dir, appointments, generated=False):
+    """Write a JSON data set with the given number of appointments"""
+    if generated:
+        from utils.dataset_generator import write_json
+        write_json(generated_dataset(appointments), data_dir)
+        return
+    rows = appointment_rows(appointments)
+    customers = {row["customer_id"] for row in rows} or {"c0"}
+    data = {
+        "customers.json": {"customers": {
+            cid: {"id": cid, "name": f"Customer {cid}", "phone": f"+1555{cid[1:]:0>7}"} for cid in customers
+        }},
+        "barbers.json": {"barbers": {
+            f"b{i}": {"id": f"b{i}", "name": f"Barber {i}", "working_hours": WORKING_HOURS} for i in range(BARBERS)
+        }},
+        "services.json": {"services": {
+            f"s{i}": {"id": f"s{i}", "name": f"Service {i}", "price": 20 + i, "duration": 30} for i in range(SERVICES)
+        }},
+        "appointments.json": {"appointments": {row["id"]: row for row in rows}}
+    }
+    for filename, content in data.items():
+        with open(os.path.join(data_dir, filename), "w") as f:
+            json.dump(content, f)
+
+def sql_app(appointments, generated=False):
+    """
+    Create an app on an in-memory SQLite database holding the given number of appointments
+
+    Returns:
+        Flask: App with its tables created and seeded
+    """
+    from app import create_app
+    from models.database import db, Customer, Barber, Service, Appointment
+
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite://", "TESTING": True,
+                      "METRICS_ENABLED": False, "TRACING_ENABLED": False}, bootstrap=["create_tables"])
+    if generated:
+        from utils.dataset_generator import load_sql
+        with app.app_context():
+            load_sql(generated_dataset(appointments))
+        return app
+
+    rows = appointment_rows(appointments)
+    now = datetime.utcnow()
+    with app.app_context():
+        customers = sorted({row["customer_id"] for row in rows})
+        db.session.execute(db.insert(Customer), [
+            {"id": cid, "name": f"Customer {cid}", "phone": f"+1555{cid[1:]:0>7}", "created_at": now} for cid in customers
+        ])
+        db.session.execute(db.insert(Barber), [
+            {"id": f"b{i}", "name": f"Barber {i}", "working_hours": WORKING_HOURS, "is_active": True, "created_at": now}
+            for i in range(BARBERS)
+        ])
+        db.session.execute(db.insert(Service), [
+            {"id": f"s{i}", "name": f"Service {i}", "price": 20 + i, "duration": 30, "created_at": now}
+            for i in range(SERVICES)
+        ])
+        if rows:
+            db.session.execute(db.insert(Appointment), [
+                dict(row, date=date.fromisoformat(row["date"]), created_at=now, updated_at=now) for row in rows
+            ])
+        db.session.commit()
+    return app
@@ -0,0 +1,253 @@
+"""
+Benchmark suite for the storage, availability, webhook parsing and serialization hot paths
+
+Times each case with timeit (best of several repeats) at every data set
+size, compares the results with a stored baseline and exits with status 1
+when a case got slower than the baseline by more than the threshold.
+Baselines are only comparable on the machine that recorded them, so none is
+committed. benchmarks/baseline.json is a local default: without it the run
+just reports timings. CI must record a baseline on its own runner (e.g. with
+--save-baseline on the main branch, kept as a build artifact) and pass it in
+with --baseline PATH; a --baseline file that does not exist fails the run
+instead of letting it pass without a comparison.
+
+Usage: python -m benchmarks.suite [--sizes 1000,10000,100000] [--filter json.] [--generated]
+       [--baseline PATH] [--save-baseline]
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import tempfile
+import timeit
+from contextlib import ExitStack
+from datetime import datetime
+
+from benchmarks import fixtures
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_SIZES = (1000, 10000, 100000)
+
+TWILIO_FORM = {
+    "SmsMessageSid": "SM0123456789abcdef", "NumMedia": "0", "ProfileName": "Ayşe Yılmaz",
+    "Body": "Hi, can I book a fade tomorrow at 3pm?", "From": "whatsapp:+905321234567",
+    "To": "whatsapp:+14155238886", "AccountSid": "AC0123456789abcdef", "ApiVersion": "2010-04-01"
+}
+META_JSON = {
+    "object": "whatsapp_business_account",
+    "entry": [{"id": "1234567890", "changes": [{"field": "messages", "value": {
+        "messaging_product": "whatsapp",
+        "metadata": {"display_phone_number": "15550001111", "phone_number_id": "1098765432"},
+        "contacts": [{"profile": {"name": "John Smith"}, "wa_id": "15551234567"}],
+        "messages": [{"from": "15551234567", "id": "wamid.HBgLMTU1NTEyMzQ1NjcVAgA", "timestamp": "1700000000",
+                      "type": "text", "text": {"body": "Can I cancel my appointment on Friday?"}}]
+    }}]}]
+}
+
+def measure(func, repeat=5, min_time=0.2):
+    """
+    Seconds per call of func, best of repeat runs of at least min_time / repeat each
+
+    Returns:
+        float: Fastest observed time per call
+    """
+    timer = timeit.Timer(func)
+    number, elapsed = timer.autorange()
+    target = min_time / repeat
+    if elapsed < target:
+        number = max(1, int(number * target / elapsed))
+    return min(timer.repeat(repeat, number)) / number
+
+def json_cases(size, stack, generated=False):
+    """data_service CRUD, availability and slot generation on a JSON data set"""
+    from controllers import whatsapp_controller
+    from services import data_service
+
+    data_dir = tempfile.mkdtemp(prefix="bench-json-")
+    stack.callback(shutil.rmtree, data_dir)
+    fixtures.seed_json(data_dir, size, generated)
+    fixtures.use_data_dir(data_dir)
+
+    targets = fixtures.pick_targets(data_service.get_appointments().values())
+    busy_day, barber_id = targets["day"], targets["barber_id"]
+    probe = {"n": 0}
+
+    def create_delete():
+        created = data_service.create_appointment({
+            "customer_id": targets["customer_id"], "barber_id": barber_id, "service_id": targets["service_id"],
+            "date": "2030-01-01", "time": "10:00", "duration": 30, "status": "scheduled"
+        })
+        data_service.delete_appointment(created["id"])
+
+    def update():
+        probe["n"] += 1
+        data_service.update_appointment(targets["appointment_id"], {"notes": f"note {probe['n']}"})
+
+    return {
+        "json.get_appointment": lambda: data_service.get_appointment(targets["appointment_id"]),
+        "json.get_appointments_by_date": lambda: data_service.get_appointments_by_date(busy_day),
+        "json.create_delete_appointment": create_delete,
+        "json.update_appointment": update,
+        "json.check_availability": lambda: data_service.check_availability(busy_day, "12:00", barber_id),
+        "json.available_slots": lambda: whatsapp_controller.get_available_slots(busy_day, barber_id),
+    }
+
+def sql_cases(size, stack, generated=False):
+    """db_service availability checks and the admin slot endpoint on a SQLite data set"""
+    from models.database import db, Appointment
+    from services import db_service
+
+    app = fixtures.sql_app(size, generated)
+    stack.enter_context(app.app_context())
+    rows = db.session.execute(db.select(Appointment.id, Appointment.customer_id, Appointment.service_id,
+                                        Appointment.barber_id, Appointment.date)).mappings()
+    targets = fixtures.pick_targets(dict(row, date=row["date"].isoformat()) for row in rows)
+    busy_day, barber_id = targets["day"], targets["barber_id"]
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["admin_logged_in"] = True
+        session["admin_last_activity"] = datetime.now().isoformat()
+    slots_url = f"/admin/get-available-slots?date={busy_day}&barber_id={barber_id}"
+
+    return {
+        "sql.check_availability": lambda: db_service.check_availability(busy_day, "12:00", barber_id),
+        "sql.check_availability_any_barber": lambda: db_service.check_availability(busy_day, "12:00"),
+        "sql.available_slots_request": lambda: client.get(slots_url),
+    }
+
+def parsing_cases(stack):
+    """Webhook payload parsing and model serialization, independent of data size"""
+    from flask import Flask, request
+    from controllers.webhook_controller import parse_whatsapp_webhook
+    from models.appointment import Appointment
+    from models.database import Appointment as AppointmentRow
+
+    app = Flask(__name__)
+    meta_body = json.dumps(META_JSON)
+    appointment = Appointment(**fixtures.appointment_rows(1)[0])
+    row = AppointmentRow(**dict(fixtures.appointment_rows(1)[0], date=fixtures.FIRST_DAY,
+                                created_at=datetime(2024, 1, 1), updated_at=datetime(2024, 1, 1)))
+
+    def parse(**request_args):
+        def run():
+            with app.test_request_context("/webhook/whatsapp", method="POST", **request_args):
+                return parse_whatsapp_webhook(request)
+        return run
+
+    return {
+        "webhook.parse_twilio_form": parse(data=TWILIO_FORM),
+        "webhook.parse_meta_json": parse(data=meta_body, content_type="application/json"),
+        "model.appointment_to_dict": appointment.to_dict,
+        "model.appointment_row_to_dict": row.to_dict,
+    }
+
+def run(sizes, name_filter=None, repeat=5, min_time=0.2, generated=False):
+    """
+    Run every case matching name_filter
+
+    Data set cases run on the dense fixture data, or with generated=True on
+    a synthetic shop from utils.dataset_generator (named '[size,generated]').
+
+    Returns:
+        dict: Case name (with '[size]' for sized cases) -> seconds per call
+    """
+    results = {}
+
+    def record(cases, suffix=""):
+        for name, func in cases.items():
+            key = name + suffix
+            if name_filter and name_filter not in key:
+                continue
+            results[key] = measure(func, repeat, min_time)
+            print(f"{key:<50} {_format_seconds(results[key]):>12}", flush=True)
+
+    with ExitStack() as stack:
+        record(parsing_cases(stack))
+    for size in sizes:
+        for factory in (json_cases, sql_cases):
+            with ExitStack() as stack:
+                record(factory(size, stack, generated), f"[{size},generated]" if generated else f"[{size}]")
+    return results
+
+def compare(results, baseline, threshold):
+    """
+    Cases slower than their baseline by more than threshold
+
+    Args:
+        results: Case name -> seconds per call
+        baseline: Case name -> baseline seconds per call
+        threshold: Allowed slowdown, e.g. 0.25 for 25%
+
+    Returns:
+        list: (name, baseline seconds, current seconds) for each regression
+    """
+    return [
+        (name, baseline[name], seconds) for name, seconds in sorted(results.items())
+        if name in baseline and seconds > baseline[name] * (1 + threshold)
+    ]
+
+def _format_seconds(seconds):
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds * 1e6:.2f} us"
+
+def _machine():
+    return {"python": platform.python_version(), "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine()}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="Comma-separated record counts for the data set cases")
+    parser.add_argument("--filter", help="Only run cases whose name contains this text")
+    parser.add_argument("--generated", action="store_true",
+                        help="Run the data set cases on synthetic shop data instead of the dense fixtures")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2, help="Seconds spent timing each case")
+    parser.add_argument("--baseline", help=f"Baseline file; required to exist when given (default {BASELINE_FILE})")
+    parser.add_argument("--threshold", type=float, default=float(os.environ.get("BENCH_THRESHOLD", "0.25")),
+                        help="Allowed slowdown against the baseline, e.g. 0.25 for 25%%")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    args = parser.parse_args()
+
+    baseline_file = args.baseline or BASELINE_FILE
+    if args.baseline and not args.save_baseline and not os.path.exists(args.baseline):
+        print(f"Baseline {args.baseline} does not exist; record one with --save-baseline")
+        return 2
+
+    # Keep request logging out of the timings and the output
+    logging.disable(logging.WARNING)
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    results = run(sizes, args.filter, args.repeat, args.min_time, args.generated)
+
+    stored = {}
+    if os.path.exists(baseline_file):
+        with open(baseline_file) as f:
+            stored = json.load(f)
+
+    if args.save_baseline:
+        # Keep baseline entries for cases that were not run this time
+        merged = dict(stored.get("results", {}), **results)
+        with open(baseline_file, "w") as f:
+            json.dump({"machine": _machine(), "saved_at": datetime.now().isoformat(timespec="seconds"),
+                       "results": merged}, f, indent=2, sort_keys=True)
+        print(f"Saved {len(results)} results to {baseline_file}")
+        return 0
+
+    if not stored:
+        print(f"No baseline at {baseline_file}; run with --save-baseline to record one")
+        return 0
+    if stored.get("machine") != _machine():
+        print(f"Warning: baseline was recorded on {stored.get('machine')}, timings may not be comparable")
+
+    regressions = compare(results, stored.get("results", {}), args.threshold)
+    for name, before, after in regressions:
+        print(f"REGRESSION {name}: {_format_seconds(before)} -> {_format_seconds(after)} "
+              f"(+{(after / before - 1) * 100:.0f}%)")
+    print(f"{len(results)} cases, {len(regressions)} regressions beyond {args.threshold * 100:.0f}%")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
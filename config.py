@@ -47,6 +47,62 @@ ADMIN_PASSWORD = os.environ.get("ADMIN_PASSWORD", "password")
 OPENAI_MODEL = "gpt-4o"  # the newest OpenAI model is "gpt-4o" which was released May 13, 2024.
 MAX_TOKENS = 500
 
+# Outbound HTTP client configuration (Twilio and OpenAI connection pools)
+TWILIO_HTTP_POOL_SIZE = int(os.environ.get("TWILIO_HTTP_POOL_SIZE", "10"))
+TWILIO_HTTP_TIMEOUT = float(os.environ.get("TWILIO_HTTP_TIMEOUT", "10"))
+TWILIO_HTTP_MAX_RETRIES = int(os.environ.get("TWILIO_HTTP_MAX_RETRIES", "2"))
+OPENAI_HTTP_POOL_SIZE = int(os.environ.get("OPENAI_HTTP_POOL_SIZE", "10"))
+OPENAI_HTTP_TIMEOUT = float(os.environ.get("OPENAI_HTTP_TIMEOUT", "30"))
+OPENAI_HTTP_KEEPALIVE_EXPIRY = float(os.environ.get("OPENAI_HTTP_KEEPALIVE_EXPIRY", "60"))
+OPENAI_MAX_RETRIES = int(os.environ.get("OPENAI_MAX_RETRIES", "2"))
+
 # WhatsApp API configuration
 WHATSAPP_API_VERSION = "v17.0"
 WHATSAPP_API_BASE_URL = f"https://graph.facebook.com/{WHATSAPP_API_VERSION}/{WHATSAPP_PHONE_NUMBER_ID}/messages"
+
+# Campaign sending (messages per second, and how often progress is checkpointed)
+CAMPAIGN_SEND_RATE = float(os.environ.get("CAMPAIGN_SEND_RATE", "5"))
+CAMPAIGN_BATCH_SIZE = int(os.environ.get("CAMPAIGN_BATCH_SIZE", "500"))
+CAMPAIGN_CHECKPOINT_EVERY = int(os.environ.get("CAMPAIGN_CHECKPOINT_EVERY", "50"))
+# Seconds without a heartbeat after which a 'running' campaign's sender is presumed dead
+CAMPAIGN_HEARTBEAT_TIMEOUT = int(os.environ.get("CAMPAIGN_HEARTBEAT_TIMEOUT", "120"))
+
+# Seconds that dashboard/settings counts are cached before being recomputed
+STATS_CACHE_TTL = int(os.environ.get("STATS_CACHE_TTL", "30"))
+
+# Seconds that analytics reports are cached per date range
+ANALYTICS_CACHE_TTL = int(os.environ.get("ANALYTICS_CACHE_TTL", "300"))
+
+# Appointment change feed: deletes are remembered this long, and database
+# changes are only served once they are this many seconds old so that
+# transactions still committing cannot be skipped
+CHANGE_FEED_TOMBSTONE_DAYS = int(os.environ.get("CHANGE_FEED_TOMBSTONE_DAYS", "30"))
+CHANGE_FEED_SETTLE_SECONDS = int(os.environ.get("CHANGE_FEED_SETTLE_SECONDS", "5"))
+
+# Request metrics at /admin/metrics; scrapers without an admin session send
+# "Authorization: Bearer <METRICS_TOKEN>" (token access is off when unset)
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "True").lower() == "true"
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
+# Per-request SQL query stats: one statement shape repeated this many times
+# in a request is reported as a likely N+1, and the X-Query-* debug headers
+# are added when QUERY_STATS_HEADERS is on
+N_PLUS_ONE_THRESHOLD = int(os.environ.get("N_PLUS_ONE_THRESHOLD", "10"))
+QUERY_STATS_HEADERS = os.environ.get("QUERY_STATS_HEADERS", str(DEBUG)).lower() == "true"
+
+# Tracing: requests (and the background work they start) taking at least
+# TRACE_SLOW_MS are kept, newest TRACE_BUFFER_SIZE only, for /admin/traces
+TRACING_ENABLED = os.environ.get("TRACING_ENABLED", "True").lower() == "true"
+TRACE_SLOW_MS = float(os.environ.get("TRACE_SLOW_MS", "1000"))
+TRACE_BUFFER_SIZE = int(os.environ.get("TRACE_BUFFER_SIZE", "100"))
+TRACE_MAX_SPANS = int(os.environ.get("TRACE_MAX_SPANS", "500"))
+
+# Logging goes through a queue to a background writer; LOG_FILE adds a
+# rotating file, and high-volume message logs keep one in LOG_SAMPLE_EVERY
+LOG_FILE = os.environ.get("LOG_FILE", "")
+LOG_SAMPLE_EVERY = int(os.environ.get("LOG_SAMPLE_EVERY", "10"))
+
+# On-demand sampling profiler (/admin/profile): longest allowed run and the
+# default time between stack samples
+PROFILER_MAX_SECONDS = float(os.environ.get("PROFILER_MAX_SECONDS", "300"))
+PROFILER_INTERVAL_MS = float(os.environ.get("PROFILER_INTERVAL_MS", "5"))
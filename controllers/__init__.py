@@ -1,25 +1,43 @@
 """
 Controllers package initialization
 """
+import importlib
+
 from flask import redirect, url_for
 
-def init_app(app):
-    # Import blueprints
-    from controllers.appointment_controller import appointment_bp
-    from controllers.customer_controller import customer_bp
-    from controllers.whatsapp_controller import whatsapp_bp
-    from controllers.admin_controller import admin_bp
-    from controllers.webhook_controller import webhook_bp
-    
-    # Register blueprints with the app
-    app.register_blueprint(appointment_bp)
-    app.register_blueprint(customer_bp)
-    app.register_blueprint(whatsapp_bp)
-    app.register_blueprint(admin_bp)
-    app.register_blueprint(webhook_bp)
+# Blueprint name -> (module, attribute); modules are imported only when registered
+BLUEPRINTS = {
+    'appointments': ('controllers.appointment_controller', 'appointment_bp'),
+    'customers': ('controllers.customer_controller', 'customer_bp'),
+    'whatsapp': ('controllers.whatsapp_controller', 'whatsapp_bp'),
+    'admin': ('controllers.admin_controller', 'admin_bp'),
+    'webhook': ('controllers.webhook_controller', 'webhook_bp')
+}
+
+def init_app(app, blueprints=None, timer=None):
+    """
+    Import and register blueprints with the app
+
+    Args:
+        app: Flask application
+        blueprints: Names from BLUEPRINTS to register, defaults to all of them
+        timer: Optional StartupTimer recording each import
+    """
+    names = list(BLUEPRINTS) if blueprints is None else list(blueprints)
+    unknown = set(names) - set(BLUEPRINTS)
+    if unknown:
+        raise ValueError(f"Unknown blueprints: {', '.join(sorted(unknown))}")
+
+    for name in names:
+        module_name, attribute = BLUEPRINTS[name]
+        if timer:
+            module = timer.step(f"import {module_name}", importlib.import_module, module_name)
+        else:
+            module = importlib.import_module(module_name)
+        app.register_blueprint(getattr(module, attribute))
     
     # Add root route
     @app.route('/')
     def index():
         """Redirect to admin login page"""
-        return redirect(url_for('admin.login'))
\ No newline at end of file
+        return redirect(url_for('admin.login'))
@@ -3,14 +3,16 @@ Controller for admin-related routes and functions
 """
 import logging
 import os
+import threading
 from functools import wraps
-from flask import Blueprint, request, jsonify, render_template, redirect, url_for, session, flash
+from flask import Blueprint, request, jsonify, render_template, redirect, url_for, session, flash, current_app, Response, stream_with_context
 from datetime import datetime, timedelta
 import json
 import hashlib
+import hmac
 
-from config import ADMIN_USERNAME, ADMIN_PASSWORD, SESSION_TIMEOUT, BUSINESS_NAME
-from services import data_service, db_service
+from config import ADMIN_USERNAME, ADMIN_PASSWORD, SESSION_TIMEOUT, BUSINESS_NAME, METRICS_TOKEN
+from services import data_service, db_service, delivery_service, campaign_service, stats_service, export_service, import_service, analytics_service, version_service, metrics_service, tracing_service, profiler_service
 from utils import validators, helpers
 
 logger = logging.getLogger(__name__)
@@ -18,6 +20,11 @@ logger = logging.getLogger(__name__)
 # Create blueprint
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 
+# Page sizes for the appointments list
+APPOINTMENTS_PER_PAGE = 50
+MAX_APPOINTMENTS_PER_PAGE = 200
+CUSTOMERS_PER_PAGE = 50
+
 # Admin authentication decorator
 def admin_required(f):
     @wraps(f)
@@ -75,64 +82,38 @@ def logout():
 @admin_required
 def dashboard():
     """Admin dashboard"""
-    # Get counts for dashboard
-    customers = db_service.get_customers()
-    appointments = db_service.get_appointments()
-    barbers = db_service.get_barbers()
-    services = db_service.get_services()
+    # Get counts for dashboard (cached COUNT queries)
+    totals = stats_service.get_totals()
     
-    # Get upcoming appointments (next 7 days)
+    # Get upcoming appointments (next 7 days) with customer, barber and service names in one query
     today = datetime.now().date()
     next_week = today + timedelta(days=7)
     
-    upcoming_appointments = {
-        k: v for k, v in appointments.items() 
-        if v.get('status') == 'scheduled' 
-        and today <= datetime.strptime(v.get('date', '2000-01-01'), '%Y-%m-%d').date() <= next_week
-    }
-    
-    # Sort upcoming appointments by date and time
-    sorted_appointments = sorted(
-        upcoming_appointments.items(),
-        key=lambda x: (x[1].get('date', ''), x[1].get('time', ''))
-    )
+    upcoming = db_service.get_upcoming_appointments(today, next_week)
+    sorted_appointments = [(appt['id'], appt) for appt in upcoming]
     
     # Group appointments by date for the calendar view
     calendar_appointments = {}
-    for appt_id, appt in sorted_appointments:
-        appt_date = appt.get('date')
-        if appt_date not in calendar_appointments:
-            calendar_appointments[appt_date] = []
-        
-        # Get customer, barber, and service details
-        customer = data_service.get_customer(appt.get('customer_id', ''))
-        barber = data_service.get_barber(appt.get('barber_id', ''))
-        service = data_service.get_service(appt.get('service_id', ''))
-        
-        calendar_appointments[appt_date].append({
-            'id': appt_id,
-            'time': appt.get('time', ''),
-            'customer_name': customer.get('name', 'Unknown') if customer else 'Unknown',
-            'barber_name': barber.get('name', 'Unknown') if barber else 'Unknown',
-            'service_name': service.get('name', 'Unknown') if service else 'Unknown',
+    for appt in upcoming:
+        calendar_appointments.setdefault(appt['date'], []).append({
+            'id': appt['id'],
+            'time': appt['time'] or '',
+            'customer_name': appt['customer_name'],
+            'barber_name': appt['barber_name'],
+            'service_name': appt['service_name'],
         })
     
     # Get counts by status
-    status_counts = {
-        'scheduled': len([a for a in appointments.values() if a.get('status') == 'scheduled']),
-        'completed': len([a for a in appointments.values() if a.get('status') == 'completed']),
-        'cancelled': len([a for a in appointments.values() if a.get('status') == 'cancelled']),
-        'no_show': len([a for a in appointments.values() if a.get('status') == 'no-show'])
-    }
+    status_counts = stats_service.get_status_counts()
     
     return render_template(
         'admin/index.html',
         title='Admin Dashboard',
         business_name=BUSINESS_NAME,
-        customer_count=len(customers),
-        appointment_count=len(appointments),
-        barber_count=len(barbers),
-        service_count=len(services),
+        customer_count=totals['customers'],
+        appointment_count=totals['appointments'],
+        barber_count=totals['barbers'],
+        service_count=totals['services'],
         upcoming_appointments=sorted_appointments[:10],  # Top 10 for dashboard
         calendar_appointments=calendar_appointments,
         status_counts=status_counts,
@@ -143,50 +124,31 @@ def dashboard():
 @admin_required
 def appointments():
     """Admin appointments page"""
-    # Get all appointments
-    all_appointments = data_service.get_appointments()
-    
     # Get filter parameters
     status = request.args.get('status')
     date = request.args.get('date')
     barber_id = request.args.get('barber_id')
+    cursor = request.args.get('cursor')
     
-    # Apply filters
-    filtered_appointments = all_appointments
-    if status:
-        filtered_appointments = {k: v for k, v in filtered_appointments.items() if v.get('status') == status}
-    if date:
-        filtered_appointments = {k: v for k, v in filtered_appointments.items() if v.get('date') == date}
-    if barber_id:
-        filtered_appointments = {k: v for k, v in filtered_appointments.items() if v.get('barber_id') == barber_id}
-    
-    # Sort appointments by date (newest first)
-    sorted_appointments = sorted(
-        filtered_appointments.items(),
-        key=lambda x: (x[1].get('date', ''), x[1].get('time', '')),
-        reverse=True
+    try:
+        per_page = int(request.args.get('per_page', APPOINTMENTS_PER_PAGE))
+    except ValueError:
+        per_page = APPOINTMENTS_PER_PAGE
+    per_page = max(1, min(per_page, MAX_APPOINTMENTS_PER_PAGE))
+    
+    if date and not validators.validate_date(date):
+        flash('Invalid date filter', 'warning')
+        date = None
+    
+    # Filtering, ordering (newest first) and paging happen in the data service
+    page = data_service.get_appointments_page(
+        status=status,
+        date=date,
+        barber_id=barber_id,
+        cursor=cursor,
+        limit=per_page
     )
     
-    # Prepare appointment data for display
-    appointment_data = []
-    for appt_id, appt in sorted_appointments:
-        # Get customer, barber, and service details
-        customer = data_service.get_customer(appt.get('customer_id', ''))
-        barber = data_service.get_barber(appt.get('barber_id', ''))
-        service = data_service.get_service(appt.get('service_id', ''))
-        
-        appointment_data.append({
-            'id': appt_id,
-            'date': appt.get('date', ''),
-            'time': appt.get('time', ''),
-            'status': appt.get('status', ''),
-            'customer': customer,
-            'barber': barber,
-            'service': service,
-            'created_at': appt.get('created_at', ''),
-            'updated_at': appt.get('updated_at', '')
-        })
-    
     # Get barbers for filter
     barbers = data_service.get_barbers()
     
@@ -194,7 +156,12 @@ def appointments():
         'admin/appointments.html',
         title='Manage Appointments',
         business_name=BUSINESS_NAME,
-        appointments=appointment_data,
+        appointments=page['items'],
+        next_cursor=page['next_cursor'],
+        total_count=page['total'],
+        total_is_estimate=page['total_is_estimate'],
+        is_first_page=not cursor,
+        per_page=per_page,
         barbers=barbers,
         current_status=status,
         current_date=date,
@@ -406,20 +373,29 @@ def delete_appointment(appointment_id):
 @admin_required
 def customers():
     """Admin customers page"""
-    # Get all customers
-    all_customers = data_service.get_customers()
+    search = request.args.get('search', '').strip()
     
-    # Sort customers by name
-    sorted_customers = sorted(
-        all_customers.items(),
-        key=lambda x: x[1].get('name', '').lower()
+    try:
+        page = max(1, int(request.args.get('page', 1)))
+    except ValueError:
+        page = 1
+    
+    # The search index keeps customers ordered by name, so no per-request sort
+    results = data_service.search_customers(
+        search,
+        limit=CUSTOMERS_PER_PAGE,
+        offset=(page - 1) * CUSTOMERS_PER_PAGE
     )
     
     return render_template(
         'admin/customers.html',
         title='Manage Customers',
         business_name=BUSINESS_NAME,
-        customers=sorted_customers
+        customers=[(customer.get('id'), customer) for customer in results['items']],
+        total_count=results['total'],
+        page=page,
+        has_next=results['next_offset'] is not None,
+        search=search
     )
 
 @admin_bp.route('/customers/create', methods=['GET', 'POST'])
@@ -1037,10 +1013,7 @@ def settings():
     webhook_url = f"{host_url}/webhook/whatsapp"
     
     # Get stats for system information
-    customer_count = len(db_service.get_customers())
-    appointment_count = len(db_service.get_appointments())
-    barber_count = len(db_service.get_barbers())
-    service_count = len(db_service.get_services())
+    totals = stats_service.get_totals()
     version = "1.0.0"  # App version
     data_dir = os.path.abspath('data')  # Data directory path
     
@@ -1055,14 +1028,267 @@ def settings():
         whatsapp_verify_token=whatsapp_verify_token,
         openai_api_key=openai_api_key,
         webhook_url=webhook_url,
-        customer_count=customer_count,
-        appointment_count=appointment_count,
-        barber_count=barber_count,
-        service_count=service_count,
+        customer_count=totals['customers'],
+        appointment_count=totals['appointments'],
+        barber_count=totals['barbers'],
+        service_count=totals['services'],
         version=version,
         data_dir=data_dir
     )
 
+@admin_bp.route('/stats', methods=['GET'])
+@admin_required
+def stats():
+    """Get cached totals, status breakdown and per-barber appointment counts as JSON"""
+    if request.args.get('refresh') == '1':
+        stats_service.invalidate()
+    
+    return jsonify({"status": "success", "data": stats_service.get_summary()})
+
+@admin_bp.route('/reports', methods=['GET'])
+@admin_required
+def reports():
+    """Revenue, chair utilization and no-show reports for a date range"""
+    start_date = request.args.get('start_date') or None
+    end_date = request.args.get('end_date') or None
+    granularity = request.args.get('granularity', 'day')
+    wants_json = request.args.get('format') == 'json'
+    
+    error = None
+    for value in (start_date, end_date):
+        if value and not validators.validate_date(value):
+            error = "Dates must be in YYYY-MM-DD format"
+    if granularity not in analytics_service.GRANULARITIES:
+        error = "Granularity must be day, week or month"
+    
+    if not error:
+        start = datetime.strptime(start_date, '%Y-%m-%d').date() if start_date else None
+        end = datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else None
+        if start and end and start > end:
+            error = "Start date must be before end date"
+    
+    if error:
+        if wants_json:
+            return jsonify({"status": "error", "message": error}), 400
+        flash(error, 'danger')
+        start, end, granularity = None, None, 'day'
+    
+    report = analytics_service.get_report(start, end, granularity, refresh=request.args.get('refresh') == '1')
+    
+    if wants_json:
+        return jsonify({"status": "success", "data": report})
+    
+    return render_template(
+        'admin/reports.html',
+        title='Reports',
+        business_name=BUSINESS_NAME,
+        report=report,
+        granularities=analytics_service.GRANULARITIES
+    )
+
+@admin_bp.route('/messaging')
+@admin_required
+def messaging():
+    """Admin WhatsApp delivery metrics page"""
+    try:
+        days = int(request.args.get('days', 7))
+    except ValueError:
+        days = 7
+    days = max(1, min(days, 90))
+    
+    metrics = delivery_service.get_delivery_metrics(days)
+    
+    # Show the overall row first, then message types alphabetically
+    overall = metrics.pop('all', None)
+    sorted_metrics = sorted(metrics.items())
+    
+    if request.args.get('format') == 'json':
+        return jsonify({"status": "success", "data": {"days": days, "overall": overall, "by_type": dict(sorted_metrics)}})
+    
+    return render_template(
+        'admin/messaging.html',
+        title='Messaging Metrics',
+        business_name=BUSINESS_NAME,
+        days=days,
+        overall=overall,
+        metrics=sorted_metrics
+    )
+
+@admin_bp.route('/campaigns', methods=['GET', 'POST'])
+@admin_required
+def campaigns():
+    """Admin campaigns page: list campaigns and create new ones"""
+    if request.method == 'POST':
+        name = request.form.get('name', '').strip()
+        message = request.form.get('message', '')
+        inactive_days = request.form.get('inactive_days', '').strip()
+        
+        errors = []
+        if not name:
+            errors.append('Campaign name is required')
+        message_error = campaign_service.validate_message(message)
+        if message_error:
+            errors.append(message_error)
+        if inactive_days and not inactive_days.isdigit():
+            errors.append('Inactive days must be a whole number')
+        
+        if errors:
+            for error in errors:
+                flash(error, 'danger')
+        else:
+            segment = {'include_never_visited': request.form.get('include_never_visited') == 'on'}
+            if inactive_days:
+                segment['inactive_days'] = int(inactive_days)
+            
+            campaign = db_service.create_campaign({'name': name, 'message': message, 'segment': segment})
+            if campaign:
+                flash(f'Campaign "{name}" created', 'success')
+                return redirect(url_for('admin.campaigns'))
+            flash('Failed to create campaign', 'danger')
+    
+    return render_template(
+        'admin/campaigns.html',
+        title='Campaigns',
+        business_name=BUSINESS_NAME,
+        campaigns=db_service.get_campaigns(),
+        form=request.form
+    )
+
+def _run_campaign_in_background(app, campaign_id):
+    """Run a campaign in its own thread with an application context"""
+    with app.app_context():
+        campaign_service.run_campaign(campaign_id)
+
+@admin_bp.route('/campaigns/<campaign_id>/start', methods=['POST'])
+@admin_required
+def start_campaign(campaign_id):
+    """Start or resume sending a campaign"""
+    campaign = db_service.get_campaign(campaign_id)
+    if not campaign:
+        flash('Campaign not found', 'danger')
+    elif campaign['status'] == 'completed' or (campaign['status'] == 'running' and not campaign_service.is_stalled(campaign)):
+        flash(f'Campaign is already {campaign["status"]}', 'warning')
+    else:
+        thread = threading.Thread(
+            target=tracing_service.wrap(_run_campaign_in_background, 'campaign.run'),
+            args=(current_app._get_current_object(), campaign_id),
+            daemon=True
+        )
+        thread.start()
+        flash(f'Campaign "{campaign["name"]}" started', 'success')
+    
+    return redirect(url_for('admin.campaigns'))
+
+@admin_bp.route('/campaigns/<campaign_id>/pause', methods=['POST'])
+@admin_required
+def pause_campaign(campaign_id):
+    """Pause a running campaign before its next message"""
+    if campaign_service.pause_campaign(campaign_id):
+        flash('Campaign will pause before its next message', 'success')
+    else:
+        flash('Campaign is not running', 'warning')
+    
+    return redirect(url_for('admin.campaigns'))
+
+@admin_bp.route('/campaigns/<campaign_id>/progress', methods=['GET'])
+@admin_required
+def campaign_progress(campaign_id):
+    """Get campaign progress as JSON"""
+    progress = campaign_service.get_progress(campaign_id)
+    if not progress:
+        return jsonify({"status": "error", "message": "Campaign not found"}), 404
+    
+    return jsonify({"status": "success", "data": progress})
+
+def _export_response(chunks, filename, export_format):
+    """Wrap export chunks in a streaming download response"""
+    mimetype = 'text/csv' if export_format == 'csv' else 'application/x-ndjson'
+    return Response(
+        stream_with_context(chunks),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename="{filename}.{export_format}"'}
+    )
+
+@admin_bp.route('/export/appointments.<export_format>', methods=['GET'])
+@admin_required
+def export_appointments(export_format):
+    """Stream appointments as CSV or NDJSON, filtered by date range and status"""
+    source = request.args.get('source', 'files')
+    start_date = request.args.get('start_date') or None
+    end_date = request.args.get('end_date') or None
+    status = request.args.get('status') or None
+    
+    if export_format not in export_service.EXPORT_FORMATS:
+        return jsonify({"status": "error", "message": "Format must be csv or ndjson"}), 400
+    if source not in export_service.EXPORT_SOURCES:
+        return jsonify({"status": "error", "message": "Source must be files or db"}), 400
+    for value in (start_date, end_date):
+        if value and not validators.validate_date(value):
+            return jsonify({"status": "error", "message": "Dates must be in YYYY-MM-DD format"}), 400
+    
+    chunks = export_service.export_appointments(export_format, source, start_date, end_date, status)
+    return _export_response(chunks, 'appointments', export_format)
+
+@admin_bp.route('/export/customers.<export_format>', methods=['GET'])
+@admin_required
+def export_customers(export_format):
+    """Stream customers as CSV or NDJSON"""
+    source = request.args.get('source', 'files')
+    
+    if export_format not in export_service.EXPORT_FORMATS:
+        return jsonify({"status": "error", "message": "Format must be csv or ndjson"}), 400
+    if source not in export_service.EXPORT_SOURCES:
+        return jsonify({"status": "error", "message": "Source must be files or db"}), 400
+    
+    chunks = export_service.export_customers(export_format, source)
+    return _export_response(chunks, 'customers', export_format)
+
+@admin_bp.route('/import/<entity>', methods=['POST'])
+@admin_required
+def import_data(entity):
+    """Bulk import customers or appointments from an uploaded CSV, JSON or NDJSON file"""
+    wants_json = request.args.get('format') == 'json'
+    upload = request.files.get('file')
+    target = request.form.get('target') or request.args.get('target', 'files')
+    redirect_to = url_for('admin.appointments' if entity == 'appointments' else 'admin.customers')
+    
+    def fail(message):
+        if wants_json:
+            return jsonify({"status": "error", "message": message}), 400
+        flash(message, 'danger')
+        return redirect(redirect_to)
+    
+    if entity not in ('customers', 'appointments'):
+        return fail("Entity must be customers or appointments")
+    if not upload or not upload.filename:
+        return fail("Please choose a file to import")
+    if target not in import_service.IMPORT_TARGETS:
+        return fail("Target must be files or db")
+    
+    import_format = request.form.get('import_format') or upload.filename.rsplit('.', 1)[-1].lower()
+    if import_format == 'jsonl':
+        import_format = 'ndjson'
+    if import_format not in import_service.IMPORT_FORMATS:
+        return fail("File must be CSV, JSON or NDJSON")
+    
+    rows = import_service.read_rows(upload.stream, import_format)
+    if entity == 'customers':
+        result = import_service.import_customers(rows, target)
+    else:
+        result = import_service.import_appointments(rows, target)
+    
+    if wants_json:
+        return jsonify(dict(result, status="success"))
+    
+    flash(f"Imported {result['imported']} of {result['total']} {entity} "
+          f"({result['duplicates']} duplicates, {result['failed']} failed)",
+          'success' if not result['failed'] else 'warning')
+    for error in result['errors'][:10]:
+        flash(f"Row {error['row']}: {'; '.join(error['errors'])}", 'danger')
+    if len(result['errors']) > 10:
+        flash(f"...and {result['duplicates'] + result['failed'] - 10} more rejected rows", 'danger')
+    return redirect(redirect_to)
+
 @admin_bp.route('/send-reminders', methods=['POST'])
 @admin_required
 def send_reminders():
@@ -1089,6 +1315,7 @@ def send_reminders():
             os.environ.get('TWILIO_PHONE_NUMBER')
         ])
         
+        reminders = []
         for appt_id, appt in appointments.items():
             if appt.get('status') == 'scheduled':
                 appt_date = appt.get('date')
@@ -1105,38 +1332,35 @@ def send_reminders():
                     service = db_service.get_service(service_id)
                     
                     if customer and barber and service:
-                        # Calculate reminder hours
-                        reminder_hours = 24 if appt_date == tomorrow_str else 2
-                        
-                        if has_whatsapp:
-                            try:
-                                # Import here to avoid circular imports
-                                from services import whatsapp_service
-                                
-                                # Send WhatsApp reminder
-                                result = whatsapp_service.send_appointment_reminder(
-                                    customer_phone=customer.get('phone'),
-                                    customer_name=customer.get('name'),
-                                    appointment_date=appt_date,
-                                    appointment_time=appt.get('time'),
-                                    barber_name=barber.get('name'),
-                                    service_name=service.get('name'),
-                                    reminder_hours=reminder_hours
-                                )
-                                
-                                if result.get('status') == 'success':
-                                    sent_count += 1
-                                    logger.info(f"Sent reminder for appointment {appt_id} to {customer.get('name')}")
-                                else:
-                                    error_count += 1
-                                    logger.error(f"Failed to send reminder for appointment {appt_id}: {result.get('error')}")
-                            except Exception as e:
-                                error_count += 1
-                                logger.error(f"Error sending WhatsApp reminder: {str(e)}")
-                        else:
-                            # WhatsApp not configured, just count them
-                            sent_count += 1
-                            logger.info(f"Would send reminder for appointment {appt_id} to {customer.get('name')} (WhatsApp not configured)")
+                        reminders.append({
+                            'appointment_id': appt_id,
+                            'customer_phone': customer.get('phone'),
+                            'customer_name': customer.get('name'),
+                            'appointment_date': appt_date,
+                            'appointment_time': appt.get('time'),
+                            'barber_name': barber.get('name'),
+                            'service_name': service.get('name'),
+                            'reminder_hours': 24 if appt_date == tomorrow_str else 2
+                        })
+        
+        if has_whatsapp:
+            # Import here to avoid circular imports
+            from services import whatsapp_service
+            
+            # Render every reminder in one pass, then send them
+            results = whatsapp_service.send_appointment_reminders(reminders)
+            for reminder, result in zip(reminders, results):
+                if result.get('status') == 'success':
+                    sent_count += 1
+                    logger.info(f"Sent reminder for appointment {reminder['appointment_id']} to {reminder['customer_name']}")
+                else:
+                    error_count += 1
+                    logger.error(f"Failed to send reminder for appointment {reminder['appointment_id']}: {result.get('error')}")
+        else:
+            # WhatsApp not configured, just count them
+            for reminder in reminders:
+                sent_count += 1
+                logger.info(f"Would send reminder for appointment {reminder['appointment_id']} to {reminder['customer_name']} (WhatsApp not configured)")
         
         if error_count > 0:
             flash(f'Sent {sent_count} reminders with {error_count} errors. Check logs for details.', 'warning')
@@ -1152,6 +1376,7 @@ def send_reminders():
 
 @admin_bp.route('/check-availability', methods=['GET'])
 @admin_required
+@version_service.conditional('appointments', 'barbers', version=db_service.table_version)
 def check_availability_ajax():
     """Check appointment availability (AJAX endpoint)"""
     date = request.args.get('date')
@@ -1178,6 +1403,7 @@ def check_availability_ajax():
 
 @admin_bp.route('/get-available-slots', methods=['GET'])
 @admin_required
+@version_service.conditional('appointments', 'barbers', version=db_service.table_version)
 def get_available_slots_ajax():
     """Get available appointment slots (AJAX endpoint)"""
     date = request.args.get('date')
@@ -1231,3 +1457,99 @@ def get_available_slots_ajax():
         "status": "success", 
         "data": {"slots": slots}
     })
+
+@admin_bp.route('/traces', methods=['GET'])
+@admin_required
+def traces():
+    """Slowest recent request traces"""
+    slow_traces = tracing_service.get_slow_traces()
+    for trace in slow_traces:
+        trace['started'] = datetime.fromtimestamp(trace['started_at']).strftime('%Y-%m-%d %H:%M:%S')
+    
+    if request.args.get('format') == 'json':
+        return jsonify({"status": "success", "data": slow_traces})
+    
+    return render_template(
+        'admin/traces.html',
+        title='Traces',
+        business_name=BUSINESS_NAME,
+        traces=slow_traces,
+        trace=None,
+        slow_ms=tracing_service.TRACE_SLOW_MS
+    )
+
+@admin_bp.route('/traces/<trace_id>', methods=['GET'])
+@admin_required
+def trace_detail(trace_id):
+    """Spans of one kept trace"""
+    trace = tracing_service.get_trace(trace_id)
+    if request.args.get('format') == 'json':
+        if not trace:
+            return jsonify({"status": "error", "message": "Trace not found"}), 404
+        return jsonify({"status": "success", "data": trace})
+    
+    if not trace:
+        flash('Trace not found; only recent slow traces are kept', 'warning')
+        return redirect(url_for('admin.traces'))
+    
+    return render_template(
+        'admin/traces.html',
+        title='Trace',
+        business_name=BUSINESS_NAME,
+        traces=None,
+        trace=trace,
+        slow_ms=tracing_service.TRACE_SLOW_MS
+    )
+
+@admin_bp.route('/profile', methods=['GET'])
+@admin_required
+def profile():
+    """Status of the running or last profiling session; ?format=collapsed for its stacks"""
+    profile_run = profiler_service.current()
+    if request.args.get('format') == 'collapsed':
+        if not profile_run:
+            return jsonify({"status": "error", "message": "No profile has been taken"}), 404
+        return Response(profile_run.collapsed(), mimetype='text/plain')
+    return jsonify({"status": "success", "data": profile_run.to_dict() if profile_run else None})
+
+@admin_bp.route('/profile/start', methods=['POST'])
+@admin_required
+def start_profile():
+    """Start sampling stacks for a number of seconds, optionally only for one endpoint"""
+    params = request.get_json(silent=True) or request.form
+    try:
+        profile_run = profiler_service.start(
+            seconds=params.get('seconds', 30),
+            interval_ms=params.get('interval_ms', profiler_service.PROFILER_INTERVAL_MS),
+            endpoint=params.get('endpoint'),
+            sample_rate=params.get('sample_rate', 1.0),
+            include_idle=str(params.get('include_idle', '')).lower() in ('1', 'true', 'yes')
+        )
+    except (TypeError, ValueError):
+        return jsonify({"status": "error", "message": "seconds, interval_ms and sample_rate must be numbers and endpoint a string"}), 400
+    
+    if not profile_run:
+        return jsonify({"status": "error", "message": "A profile is already running"}), 409
+    return jsonify({"status": "success", "data": profile_run.to_dict()})
+
+@admin_bp.route('/profile/stop', methods=['POST'])
+@admin_required
+def stop_profile():
+    """Stop the running profile early"""
+    profile_run = profiler_service.stop()
+    if not profile_run:
+        return jsonify({"status": "error", "message": "No profile is running"}), 404
+    return jsonify({"status": "success", "data": profile_run.to_dict()})
+
+@admin_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """Request metrics in the Prometheus text format"""
+    token = request.headers.get('Authorization', '')
+    if METRICS_TOKEN and hmac.compare_digest(token, f"Bearer {METRICS_TOKEN}"):
+        return Response(metrics_service.render(), mimetype='text/plain; version=0.0.4')
+    return _admin_metrics()
+
+@admin_required
+def _admin_metrics():
+    """Metrics for a logged-in admin"""
+    return Response(metrics_service.render(), mimetype='text/plain; version=0.0.4')
@@ -7,7 +7,7 @@ from datetime import datetime, timedelta
 import json
 
 from models.appointment import Appointment
-from services import data_service, whatsapp_service
+from services import data_service, db_service, whatsapp_service, version_service
 from utils import validators
 
 logger = logging.getLogger(__name__)
@@ -15,7 +15,12 @@ logger = logging.getLogger(__name__)
 # Create blueprint
 appointment_bp = Blueprint('appointment', __name__, url_prefix='/api/appointments')
 
+# Page sizes for the change feed
+CHANGES_PAGE_SIZE = 100
+MAX_CHANGES_PAGE_SIZE = 1000
+
 @appointment_bp.route('/', methods=['GET'])
+@version_service.conditional('appointments', version=data_service.shared_version)
 def get_appointments():
     """Get all appointments or filter by query parameters"""
     try:
@@ -44,7 +49,59 @@ def get_appointments():
         logger.error(f"Error getting appointments: {str(e)}")
         return jsonify({"status": "error", "message": str(e)}), 500
 
+def _changes_version(collections):
+    """Shared version of whichever backend the change feed request reads"""
+    if request.args.get('source') == 'db':
+        return db_service.table_version(collections)
+    return data_service.shared_version(collections)
+
+@appointment_bp.route('/changes', methods=['GET'])
+@version_service.conditional('appointments', version=_changes_version)
+def get_appointment_changes():
+    """
+    Get appointments changed since a cursor (incremental sync)
+    
+    Clients start without a cursor, apply each item (upsert, or remove when
+    'deleted' is true) and call again with next_cursor: right away while
+    has_more is true, then periodically. A 410 response means the cursor
+    expired: drop the local copy and start again without a cursor.
+    """
+    try:
+        cursor = request.args.get('cursor') or None
+        source = request.args.get('source', 'files')
+        
+        try:
+            limit = max(1, min(int(request.args.get('limit', CHANGES_PAGE_SIZE)), MAX_CHANGES_PAGE_SIZE))
+        except ValueError:
+            return jsonify({"status": "error", "message": "limit must be an integer"}), 400
+        if source not in ('files', 'db'):
+            return jsonify({"status": "error", "message": "source must be files or db"}), 400
+        
+        if source == 'db':
+            changes = db_service.get_appointment_changes(cursor, limit=limit)
+        else:
+            changes = data_service.get_appointment_changes(cursor, limit=limit)
+        
+        if changes['reset']:
+            return jsonify({
+                "status": "error",
+                "message": "Cursor is invalid or expired; sync again without a cursor",
+                "reset": True
+            }), 410
+        
+        return jsonify({
+            "status": "success",
+            "data": changes['items'],
+            "next_cursor": changes['next_cursor'],
+            "has_more": changes['has_more']
+        })
+        
+    except Exception as e:
+        logger.error(f"Error getting appointment changes: {str(e)}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+
 @appointment_bp.route('/<appointment_id>', methods=['GET'])
+@version_service.conditional('appointments', version=data_service.shared_version)
 def get_appointment(appointment_id):
     """Get a specific appointment by ID"""
     try:
@@ -367,23 +424,25 @@ def send_appointment_reminders():
             if v.get('date') == tomorrow_str
         }
         
-        sent_count = 0
+        reminders = []
         for appt_id, appt in tomorrow_appointments.items():
             customer = data_service.get_customer(appt.get('customer_id'))
             barber = data_service.get_barber(appt.get('barber_id'))
             service = data_service.get_service(appt.get('service_id'))
             
             if customer and 'phone' in customer and service and barber:
-                # Send reminder
-                whatsapp_service.send_appointment_reminder(
-                    customer['phone'],
-                    customer['name'],
-                    appt.get('date'),
-                    appt.get('time'),
-                    service['name'],
-                    barber['name']
-                )
-                sent_count += 1
+                reminders.append({
+                    'customer_phone': customer['phone'],
+                    'customer_name': customer['name'],
+                    'appointment_date': appt.get('date'),
+                    'appointment_time': appt.get('time'),
+                    'barber_name': barber['name'],
+                    'service_name': service['name']
+                })
+        
+        # Render every reminder in one pass, then send them
+        whatsapp_service.send_appointment_reminders(reminders)
+        sent_count = len(reminders)
         
         return jsonify({
             "status": "success", 
@@ -6,14 +6,23 @@ from flask import Blueprint, request, jsonify
 from datetime import datetime
 
 from models.customer import Customer
-from services import data_service, whatsapp_service
+from services import data_service, whatsapp_service, version_service
 
 logger = logging.getLogger(__name__)
 
 # Create blueprint
 customer_bp = Blueprint('customer', __name__, url_prefix='/api/customers')
 
+# Page sizes for customer search
+SEARCH_PAGE_SIZE = 20
+MAX_SEARCH_PAGE_SIZE = 100
+
+# Digits a phone lookup needs before it falls back to suffix matching: a full
+# national number, so a short or partial number never resolves to another customer
+PHONE_SUFFIX_MIN_DIGITS = 9
+
 @customer_bp.route('/', methods=['GET'])
+@version_service.conditional('customers', version=data_service.shared_version)
 def get_customers():
     """Get all customers"""
     try:
@@ -24,6 +33,32 @@ def get_customers():
         logger.error(f"Error getting customers: {str(e)}")
         return jsonify({"status": "error", "message": str(e)}), 500
 
+@customer_bp.route('/search', methods=['GET'])
+@version_service.conditional('customers', version=data_service.shared_version)
+def search_customers():
+    """Search customers by name prefix, fuzzy name or phone suffix (type-ahead)"""
+    try:
+        query = request.args.get('q', '')
+        
+        try:
+            limit = max(1, min(int(request.args.get('limit', SEARCH_PAGE_SIZE)), MAX_SEARCH_PAGE_SIZE))
+            offset = max(0, int(request.args.get('offset', 0)))
+        except ValueError:
+            return jsonify({"status": "error", "message": "limit and offset must be integers"}), 400
+        
+        results = data_service.search_customers(query, limit=limit, offset=offset)
+        
+        return jsonify({
+            "status": "success",
+            "data": results['items'],
+            "total": results['total'],
+            "next_offset": results['next_offset']
+        })
+        
+    except Exception as e:
+        logger.error(f"Error searching customers: {str(e)}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+
 @customer_bp.route('/<customer_id>', methods=['GET'])
 def get_customer(customer_id):
     """Get a specific customer by ID"""
@@ -53,6 +88,13 @@ def get_customer_by_phone(phone):
         if not customer and phone != clean_phone:
             customer = data_service.get_customer_by_phone(clean_phone)
         
+        # Fall back to the phone suffix index, which ignores formatting and
+        # country code differences, as long as the match is unambiguous
+        if not customer and len(clean_phone) >= PHONE_SUFFIX_MIN_DIGITS:
+            matches = data_service.search_customers(clean_phone, limit=2)
+            if matches['total'] == 1:
+                customer = matches['items'][0]
+        
         if not customer:
             return jsonify({"status": "error", "message": "Customer not found"}), 404
             
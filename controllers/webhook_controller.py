@@ -6,7 +6,8 @@ import os
 import json
 from flask import Blueprint, request, jsonify
 from config import BUSINESS_NAME
-from services import whatsapp_service, chatgpt_service, db_service
+from services import whatsapp_service, chatgpt_service, db_service, tracing_service
+from utils.logger import LazyJson, SAMPLED
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +36,81 @@ def verify_whatsapp_webhook():
         logger.warning('WhatsApp webhook verification failed')
         return jsonify({"status": "error", "message": "Verification failed"}), 403
 
+def parse_whatsapp_webhook(req):
+    """
+    Extract the text messages from a Twilio form or WhatsApp Cloud API JSON webhook
+    
+    Args:
+        req: Incoming Flask request
+        
+    Returns:
+        list: (phone_number, sender_name, message_text) tuples; empty if the
+        payload holds no text messages or is not recognized
+        
+    Raises:
+        ValueError: If a Cloud API payload is for another object type
+    """
+    # Check if the request has a JSON content type
+    if req.is_json:
+        data = req.json
+    else:
+        # If not JSON, try to parse from form data or raw data
+        data = {}
+        if req.form:
+            form = req.form
+            from_phone = form.get('From', '').replace('whatsapp:', '')
+            message_text = form.get('Body', '')
+            if from_phone and message_text:
+                # This is a direct Twilio SMS/WhatsApp POST
+                return [(from_phone, form.get('ProfileName', 'Customer'), message_text)]
+            
+            for key in form:
+                try:
+                    # Try to parse any JSON strings in the form
+                    data[key] = json.loads(form[key])
+                except ValueError:
+                    data[key] = form[key]
+        elif req.data:
+            # Try to parse raw data as JSON
+            try:
+                data = json.loads(req.data.decode('utf-8'))
+            except ValueError:
+                logger.warning("Could not parse request data as JSON")
+    
+    logger.info("Received WhatsApp webhook data: %s", LazyJson(data), extra=SAMPLED)
+    
+    # Handle direct Twilio webhook format
+    if 'Body' in data and 'From' in data:
+        return [(data['From'].replace('whatsapp:', ''), data.get('ProfileName', 'Customer'), data['Body'])]
+    
+    # Handle Facebook/WhatsApp API format
+    if data and 'object' in data:
+        if data['object'] != 'whatsapp_business_account':
+            raise ValueError("Invalid object type")
+        
+        messages = []
+        for entry in data.get('entry', []):
+            for change in entry.get('changes', []):
+                if change.get('field') != 'messages':
+                    continue
+                
+                value = change.get('value', {})
+                contact = value.get('contacts', [{}])[0]
+                for message in value.get('messages', []):
+                    # Only process text messages for now
+                    if message.get('type') != 'text':
+                        continue
+                    
+                    phone_number = contact.get('wa_id')
+                    message_text = message.get('text', {}).get('body', '')
+                    if phone_number and message_text:
+                        messages.append((phone_number, contact.get('profile', {}).get('name', 'Customer'), message_text))
+        return messages
+    
+    # If we get here, we didn't recognize the webhook format
+    logger.warning("Unrecognized webhook format: %s", LazyJson(data))
+    return []
+
 @webhook_bp.route('/whatsapp', methods=['POST'])
 def process_whatsapp_webhook():
     """
@@ -43,99 +119,78 @@ def process_whatsapp_webhook():
     This endpoint receives all incoming messages from WhatsApp
     """
     try:
-        # Check if the request has a JSON content type
-        if request.is_json:
-            data = request.json
-        else:
-            # If not JSON, try to parse from form data or raw data
-            data = {}
-            if request.form:
-                # Try to get data from form
-                for key in request.form:
-                    if key == 'Body':
-                        # This is likely a direct Twilio SMS/WhatsApp POST
-                        from_phone = request.form.get('From', '').replace('whatsapp:', '')
-                        sender_name = request.form.get('ProfileName', 'Customer')
-                        message_text = request.form.get('Body', '')
-                        
-                        # Process the message directly
-                        if from_phone and message_text:
-                            process_message(from_phone, sender_name, message_text)
-                            return jsonify({"status": "success"})
-                    try:
-                        # Try to parse any JSON strings in the form
-                        data[key] = json.loads(request.form[key])
-                    except:
-                        data[key] = request.form[key]
-            elif request.data:
-                # Try to parse raw data as JSON
-                try:
-                    data = json.loads(request.data.decode('utf-8'))
-                except:
-                    logger.warning("Could not parse request data as JSON")
+        try:
+            messages = parse_whatsapp_webhook(request)
+        except ValueError as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
         
-        logger.info(f"Received WhatsApp webhook data: {json.dumps(data)}")
+        for phone_number, sender_name, message_text in messages:
+            process_message(phone_number, sender_name, message_text)
         
-        # Handle direct Twilio webhook format
-        if 'Body' in data and 'From' in data:
-            from_phone = data['From'].replace('whatsapp:', '')
-            sender_name = data.get('ProfileName', 'Customer')
-            message_text = data['Body']
-            
-            # Process the message
-            process_message(from_phone, sender_name, message_text)
-            return jsonify({"status": "success"})
+        # Still return success for unrecognized payloads to avoid retries
+        return jsonify({"status": "success"})
+    
+    except Exception as e:
+        logger.error("Error processing WhatsApp webhook: %s", e)
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+@webhook_bp.route('/whatsapp/status', methods=['POST'])
+def process_whatsapp_status_callback():
+    """
+    Process Twilio message status callbacks
+    
+    Twilio posts MessageSid and MessageStatus (queued, sent, delivered, read,
+    failed, undelivered) here for every message sent with a status callback URL.
+    Requests without a valid X-Twilio-Signature are rejected.
+    """
+    try:
+        # Twilio signs the callback URL it was given; behind a proxy request.url may differ
+        url = whatsapp_service.TWILIO_STATUS_CALLBACK_URL or request.url
+        if not whatsapp_service.is_valid_twilio_request(url, request.form, request.headers.get('X-Twilio-Signature')):
+            logger.warning("Rejected WhatsApp status callback with an invalid signature")
+            return jsonify({"status": "error", "message": "Invalid signature"}), 403
         
-        # Handle Facebook/WhatsApp API format
-        if data and 'object' in data:
-            if data['object'] != 'whatsapp_business_account':
-                return jsonify({"status": "error", "message": "Invalid object type"}), 400
-                
-            # Process all entries
-            for entry in data.get('entry', []):
-                for change in entry.get('changes', []):
-                    if change.get('field') != 'messages':
-                        continue
-                        
-                    value = change.get('value', {})
-                    messages = value.get('messages', [])
-                    
-                    for message in messages:
-                        # Only process text messages for now
-                        if message.get('type') != 'text':
-                            continue
-                            
-                        # Get message details
-                        phone_number = value.get('contacts', [{}])[0].get('wa_id')
-                        sender_name = value.get('contacts', [{}])[0].get('profile', {}).get('name', 'Customer')
-                        message_text = message.get('text', {}).get('body', '')
-                        
-                        # Process the message
-                        if phone_number and message_text:
-                            process_message(phone_number, sender_name, message_text)
-            
-            # Return a 200 OK response to acknowledge receipt
-            return jsonify({"status": "success"})
+        message_sid = request.form.get('MessageSid')
+        message_status = request.form.get('MessageStatus')
+        
+        if not message_sid or not message_status:
+            return jsonify({"status": "error", "message": "MessageSid and MessageStatus are required"}), 400
         
-        # If we get here, we didn't recognize the webhook format
-        logger.warning(f"Unrecognized webhook format: {json.dumps(data)}")
-        return jsonify({"status": "success"})  # Still return success to avoid retries
+        recorded = db_service.record_message_status(
+            message_sid,
+            message_status.lower(),
+            error_code=request.form.get('ErrorCode')
+        )
+        
+        if not recorded:
+            logger.debug("Ignored status '%s' for message %s", message_status, message_sid)
+        
+        # Always acknowledge so Twilio does not retry the callback
+        return jsonify({"status": "success"})
     
     except Exception as e:
-        logger.error(f"Error processing WhatsApp webhook: {str(e)}")
+        logger.error("Error processing WhatsApp status callback: %s", e)
         return jsonify({"status": "error", "message": str(e)}), 500
 
 def process_message(phone_number, sender_name, message_text):
     """
     Process an incoming WhatsApp message and generate a response
     
+    All replies sent while handling the message are coalesced into as few
+    WhatsApp sends as possible.
+    
     Args:
         phone_number: Sender's phone number
         sender_name: Sender's name
         message_text: Message text
     """
+    with tracing_service.span('whatsapp.process_message'), whatsapp_service.message_turn():
+        _handle_message(phone_number, sender_name, message_text)
+
+def _handle_message(phone_number, sender_name, message_text):
+    """Handle a single incoming message; replies are queued in the current turn"""
     try:
-        logger.info(f"Processing message from {sender_name} ({phone_number}): {message_text}")
+        logger.info("Processing message from %s (%s): %s", sender_name, phone_number, message_text, extra=SAMPLED)
         
         # Check if customer exists, create if not
         customer = db_service.get_customer_by_phone(phone_number)
@@ -184,7 +239,7 @@ def process_message(phone_number, sender_name, message_text):
             whatsapp_service.send_whatsapp_message(phone_number, default_message)
     
     except Exception as e:
-        logger.error(f"Error processing message: {str(e)}")
+        logger.error("Error processing message: %s", e)
 
 def handle_booking_intent(phone_number, customer, analysis):
     """
@@ -196,7 +251,7 @@ def handle_booking_intent(phone_number, customer, analysis):
         analysis: Message analysis result from ChatGPT
     """
     # For now, just log the intent - you can expand this to actually create appointments
-    logger.info(f"Booking intent detected for {customer['name']}: {json.dumps(analysis)}")
+    logger.info("Booking intent detected for %s: %s", customer['name'], LazyJson(analysis))
     
     # Example of how to check for missing information
     if analysis['needs_followup']:
@@ -213,7 +268,7 @@ def handle_cancel_intent(phone_number, customer, analysis):
         analysis: Message analysis result from ChatGPT
     """
     # For now, just log the intent - you can expand this to actually cancel appointments
-    logger.info(f"Cancel intent detected for {customer['name']}: {json.dumps(analysis)}")
+    logger.info("Cancel intent detected for %s: %s", customer['name'], LazyJson(analysis))
     
     # Example of how to check for missing information
     if analysis['needs_followup']:
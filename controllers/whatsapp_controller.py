@@ -2,7 +2,6 @@
 Controller for handling WhatsApp webhook and message processing
 """
 import logging
-import json
 from flask import Blueprint, request, jsonify, abort
 from datetime import datetime, timedelta
 import re
@@ -11,6 +10,7 @@ from config import WHATSAPP_VERIFY_TOKEN, BUSINESS_HOURS, BUSINESS_NAME
 from services import data_service, whatsapp_service, chatgpt_service
 from models.customer import Customer
 from utils import validators
+from utils.logger import LazyJson, SAMPLED
 
 logger = logging.getLogger(__name__)
 
@@ -52,7 +52,7 @@ def process_webhook():
         # Get the JSON data from the request
         data = request.get_json()
         
-        logger.debug(f"Received webhook data: {json.dumps(data)}")
+        logger.debug("Received webhook data: %s", LazyJson(data))
         
         # Parse the message data
         message_data = whatsapp_service.parse_whatsapp_webhook(data)
@@ -67,14 +67,14 @@ def process_webhook():
         
         if message_data['content']['type'] == 'text':
             message_text = message_data['content']['text']
-            logger.info(f"Received message from {phone_number} ({sender_name}): {message_text}")
+            logger.info("Received message from %s (%s): %s", phone_number, sender_name, message_text, extra=SAMPLED)
             
             # Process the message and send a response
             process_message(phone_number, sender_name, message_text)
         else:
             # Handle non-text messages
             message_type = message_data['content']['type']
-            logger.info(f"Received {message_type} message from {phone_number} ({sender_name})")
+            logger.info("Received %s message from %s (%s)", message_type, phone_number, sender_name, extra=SAMPLED)
             
             # Send a response for unsupported message types
             whatsapp_service.send_message(
@@ -86,18 +86,26 @@ def process_webhook():
         return jsonify({"status": "success"}), 200
         
     except Exception as e:
-        logger.error(f"Error processing webhook: {str(e)}")
+        logger.error("Error processing webhook: %s", e)
         return jsonify({"status": "error", "message": str(e)}), 500
 
 def process_message(phone_number, sender_name, message_text):
     """
     Process an incoming WhatsApp message and generate a response
     
+    All replies sent while handling the message are coalesced into as few
+    WhatsApp sends as possible.
+    
     Args:
         phone_number: Sender's phone number
         sender_name: Sender's name
         message_text: Message text
     """
+    with whatsapp_service.message_turn():
+        _handle_message(phone_number, sender_name, message_text)
+
+def _handle_message(phone_number, sender_name, message_text):
+    """Handle a single incoming message; replies are queued in the current turn"""
     try:
         # Check if the user exists, create if not
         customer = data_service.get_customer_by_phone(phone_number)
@@ -156,7 +164,7 @@ def process_message(phone_number, sender_name, message_text):
         conversation_state[phone_number] = state
         
     except Exception as e:
-        logger.error(f"Error processing message: {str(e)}")
+        logger.error("Error processing message: %s", e)
         whatsapp_service.send_message(
             phone_number,
             "I'm sorry, I encountered an error while processing your request. Please try again later."
@@ -411,7 +419,7 @@ def process_booking_service(phone_number, customer, message_text, state):
                 # Re-send service options
                 whatsapp_service.send_available_services(phone_number, services)
     except Exception as e:
-        logger.error(f"Error processing booking service: {str(e)}")
+        logger.error("Error processing booking service: %s", e)
         whatsapp_service.send_message(
             phone_number,
             "I'm sorry, I encountered an error processing your service selection. Please try again."
@@ -493,7 +501,7 @@ def process_booking_date(phone_number, customer, message_text, state):
         whatsapp_service.send_available_slots(phone_number, formatted_date, available_slots)
         
     except Exception as e:
-        logger.error(f"Error processing booking date: {str(e)}")
+        logger.error("Error processing booking date: %s", e)
         whatsapp_service.send_message(
             phone_number,
             "I'm sorry, I encountered an error processing your date selection. Please try again."
@@ -605,7 +613,7 @@ def process_booking_time(phone_number, customer, message_text, state):
                 # Re-send available slots
                 whatsapp_service.send_available_slots(phone_number, state["data"]["date"], available_slots)
     except Exception as e:
-        logger.error(f"Error processing booking time: {str(e)}")
+        logger.error("Error processing booking time: %s", e)
         whatsapp_service.send_message(
             phone_number,
             "I'm sorry, I encountered an error processing your time selection. Please try again."
@@ -725,7 +733,7 @@ def process_booking_barber(phone_number, customer, message_text, state):
                 
                 whatsapp_service.send_message(phone_number, message)
     except Exception as e:
-        logger.error(f"Error processing booking barber: {str(e)}")
+        logger.error("Error processing booking barber: %s", e)
         whatsapp_service.send_message(
             phone_number,
             "I'm sorry, I encountered an error processing your barber selection. Please try again."
@@ -790,7 +798,7 @@ def process_booking_confirmation(phone_number, customer, message_upper, state):
                 "Please reply with 'CONFIRM' to book the appointment or 'CANCEL' to start over."
             )
     except Exception as e:
-        logger.error(f"Error processing booking confirmation: {str(e)}")
+        logger.error("Error processing booking confirmation: %s", e)
         whatsapp_service.send_message(
             phone_number,
             "I'm sorry, I encountered an error confirming your appointment. Please try again."
@@ -881,7 +889,7 @@ def process_cancel_select(phone_number, customer, message_text, state):
             
             whatsapp_service.send_message(phone_number, message)
     except Exception as e:
-        logger.error(f"Error processing cancel select: {str(e)}")
+        logger.error("Error processing cancel select: %s", e)
         whatsapp_service.send_message(
             phone_number,
             "I'm sorry, I encountered an error processing your appointment selection. Please try again."
@@ -957,7 +965,7 @@ def process_cancel_confirmation(phone_number, customer, message_upper, state):
                 "Please reply with 'YES' to confirm cancellation or 'NO' to keep the appointment."
             )
     except Exception as e:
-        logger.error(f"Error processing cancel confirmation: {str(e)}")
+        logger.error("Error processing cancel confirmation: %s", e)
         whatsapp_service.send_message(
             phone_number,
             "I'm sorry, I encountered an error cancelling your appointment. Please try again."
@@ -1018,7 +1026,7 @@ def process_with_chatgpt(phone_number, customer, message_text, state):
         state["history"].append({"role": "assistant", "content": response["text"]})
         
     except Exception as e:
-        logger.error(f"Error processing with ChatGPT: {str(e)}")
+        logger.error("Error processing with ChatGPT: %s", e)
         whatsapp_service.send_message(
             phone_number,
             "I'm sorry, I encountered an error processing your message. Please try sending a simple command like 'HELP'."
@@ -1060,5 +1068,5 @@ def get_available_slots(date, barber_id=None):
         return {"data": {"slots": slots}}
         
     except Exception as e:
-        logger.error(f"Error getting available slots: {str(e)}")
+        logger.error("Error getting available slots: %s", e)
         return {"data": {"slots": []}}
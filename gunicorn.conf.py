@@ -0,0 +1,27 @@
+"""
+Gunicorn configuration: preload the app in the master and fork workers from it
+"""
+import os
+import sys
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:5000")
+# Gunicorn's own default (WEB_CONCURRENCY, else 1): the WhatsApp booking flow
+# keeps conversation state in process memory, so more workers would split
+# one conversation across processes until that state is shared
+workers = int(os.environ.get("GUNICORN_WORKERS", os.environ.get("WEB_CONCURRENCY", 1)))
+
+# Load data once in the master so workers share its memory; --reload needs
+# each worker to import the code itself, so preloading is skipped then.
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1") != "0" and "--reload" not in sys.argv
+
+def when_ready(server):
+    """Freeze shared state in the master once the preloaded app is loaded"""
+    if server.cfg.preload_app:
+        from app import prepare_fork
+        prepare_fork(server.app.wsgi())
+
+def post_fork(server, worker):
+    """Give each worker its own database pool, API clients and ETag epoch"""
+    if server.cfg.preload_app:
+        from app import init_worker
+        init_worker(server.app.wsgi())
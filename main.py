@@ -2,18 +2,20 @@
 Main entry point for the Barber Appointment System
 """
 import logging
-from app import app
 import os
-from config import DEBUG
+from config import DEBUG, LOG_FILE, LOG_SAMPLE_EVERY
+from utils.logger import configure_logging
 
-# Configure logging
-logging.basicConfig(
+# Configure logging before the app is created so startup messages are kept
+configure_logging(
     level=logging.DEBUG if DEBUG else logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    log_file=LOG_FILE or None,
+    sample_every=LOG_SAMPLE_EVERY
 )
 
-# Import controllers to register routes
-from controllers import appointment_controller, customer_controller, whatsapp_controller, admin_controller
+from app import create_app
+
+app = create_app()
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 5000))
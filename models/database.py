@@ -3,6 +3,9 @@ Database models for the Barber Appointment System
 """
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
 import uuid
 
 # Initialize database
@@ -20,6 +23,10 @@ class Customer(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     last_visit = db.Column(db.DateTime, nullable=True)
     
+    __table_args__ = (
+        db.Index('ix_customers_last_visit', 'last_visit'),  # Campaign segments
+    )
+    
     # Relationship with appointments
     appointments = db.relationship('Appointment', backref='customer', lazy=True, cascade="all, delete-orphan")
     
@@ -117,6 +124,21 @@ class Appointment(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Indexes matching db_service access patterns; existing databases get them
+    # through utils.db_migrations
+    __table_args__ = (
+        # check_availability (date, time, status[, barber_id]) and date range scans
+        db.Index('ix_appointments_date_time_status_barber', 'date', 'time', 'status', 'barber_id'),
+        # Per-status lists ordered by date, e.g. upcoming scheduled appointments
+        db.Index('ix_appointments_status_date_time', 'status', 'date', 'time'),
+        # Appointments of a barber, ordered by date
+        db.Index('ix_appointments_barber_date_time', 'barber_id', 'date', 'time'),
+        # Appointments of a customer
+        db.Index('ix_appointments_customer_date', 'customer_id', 'date'),
+        # Change feed, in (updated_at, id) order
+        db.Index('ix_appointments_updated_at_id', 'updated_at', 'id'),
+    )
+    
     def to_dict(self):
         """Convert appointment object to dictionary"""
         return {
@@ -133,10 +155,147 @@ class Appointment(db.Model):
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
+class AppointmentTombstone(db.Model):
+    """Record of a deleted appointment, served by the appointment change feed"""
+    __tablename__ = 'appointment_tombstones'
+    
+    appointment_id = db.Column(db.String(36), primary_key=True)
+    deleted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_appointment_tombstones_deleted_at_id', 'deleted_at', 'appointment_id'),
+    )
+    
+    def to_dict(self):
+        """Convert tombstone object to dictionary"""
+        return {
+            'appointment_id': self.appointment_id,
+            'deleted_at': self.deleted_at.isoformat() if self.deleted_at else None
+        }
+
 class ConversationState(db.Model):
     """Conversation state model for WhatsApp interactions"""
     __tablename__ = 'conversation_states'
     
     phone_number = db.Column(db.String(20), primary_key=True)
     state = db.Column(db.JSON, nullable=False)
-    last_updated = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
\ No newline at end of file
+    last_updated = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class MessageDelivery(db.Model):
+    """Delivery tracking for an outbound WhatsApp message, one row per message"""
+    __tablename__ = 'message_deliveries'
+    
+    message_sid = db.Column(db.String(64), primary_key=True)
+    to_phone = db.Column(db.String(20), nullable=True)
+    message_type = db.Column(db.String(30), nullable=False, default='conversation')
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, sent, delivered, read, failed, undelivered
+    error_code = db.Column(db.String(10), nullable=True)
+    sent_at = db.Column(db.DateTime, default=datetime.utcnow)
+    delivered_at = db.Column(db.DateTime, nullable=True)
+    read_at = db.Column(db.DateTime, nullable=True)
+    failed_at = db.Column(db.DateTime, nullable=True)
+    
+    __table_args__ = (
+        db.Index('ix_message_deliveries_sent_at', 'sent_at'),  # Delivery metrics window
+    )
+    
+    def to_dict(self):
+        """Convert message delivery object to dictionary"""
+        return {
+            'message_sid': self.message_sid,
+            'to_phone': self.to_phone,
+            'message_type': self.message_type,
+            'status': self.status,
+            'error_code': self.error_code,
+            'sent_at': self.sent_at.isoformat() if self.sent_at else None,
+            'delivered_at': self.delivered_at.isoformat() if self.delivered_at else None,
+            'read_at': self.read_at.isoformat() if self.read_at else None,
+            'failed_at': self.failed_at.isoformat() if self.failed_at else None
+        }
+
+class Campaign(db.Model):
+    """Marketing campaign sent over WhatsApp to a segment of customers"""
+    __tablename__ = 'campaigns'
+    
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    name = db.Column(db.String(100), nullable=False)
+    message = db.Column(db.Text, nullable=False)  # Body with {name}/{first_name}/{business_name} placeholders
+    segment = db.Column(db.JSON, nullable=True)  # e.g. {"inactive_days": 42}
+    status = db.Column(db.String(20), default='draft')  # draft, running, paused, completed, failed
+    sent_count = db.Column(db.Integer, default=0)
+    failed_count = db.Column(db.Integer, default=0)
+    skipped_count = db.Column(db.Integer, default=0)
+    last_customer_id = db.Column(db.String(36), nullable=True)  # Checkpoint: last customer processed
+    run_token = db.Column(db.String(36), nullable=True)  # Owner of the current sending run, None when released
+    heartbeat_at = db.Column(db.DateTime, nullable=True)  # Last time the owning run checked in
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    completed_at = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        """Convert campaign object to dictionary"""
+        return {
+            'id': self.id,
+            'name': self.name,
+            'message': self.message,
+            'segment': self.segment,
+            'status': self.status,
+            'sent_count': self.sent_count or 0,
+            'failed_count': self.failed_count or 0,
+            'skipped_count': self.skipped_count or 0,
+            'last_customer_id': self.last_customer_id,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
+            'heartbeat_at': self.heartbeat_at.isoformat() if self.heartbeat_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+class TableVersion(db.Model):
+    """Write counter of a table, bumped in the same transaction as every ORM write to it"""
+    __tablename__ = 'table_versions'
+    
+    name = db.Column(db.String(30), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=True)
+
+# Tables whose writes bump their TableVersion row, read by db_service.table_version()
+VERSIONED_TABLES = ('appointments', 'barbers', 'services')
+
+def _bump_table_versions(connection, tables):
+    """Increment the counters of tables, creating missing rows"""
+    now = datetime.utcnow()
+    # A fixed order keeps concurrent writers to several tables from deadlocking
+    for name in sorted(tables):
+        if connection.dialect.name in ('postgresql', 'sqlite'):
+            insert = postgresql.insert if connection.dialect.name == 'postgresql' else sqlite.insert
+            connection.execute(insert(TableVersion.__table__).values(name=name, version=1, updated_at=now)
+                               .on_conflict_do_update(index_elements=['name'],
+                                                      set_={'version': TableVersion.version + 1, 'updated_at': now}))
+            continue
+        updated = connection.execute(TableVersion.__table__.update().where(TableVersion.name == name)
+                                     .values(version=TableVersion.version + 1, updated_at=now))
+        if not updated.rowcount:
+            connection.execute(TableVersion.__table__.insert().values(name=name, version=1, updated_at=now))
+
+@event.listens_for(Session, 'after_flush')
+def _bump_flushed_table_versions(session, flush_context):
+    """Bump the counters of versioned tables written by a flush"""
+    instances = list(session.new) + list(session.deleted) + [
+        obj for obj in session.dirty if session.is_modified(obj, include_collections=False)
+    ]
+    tables = {getattr(obj, '__tablename__', None) for obj in instances} & set(VERSIONED_TABLES)
+    if tables:
+        _bump_table_versions(session.connection(), tables)
+
+@event.listens_for(Session, 'do_orm_execute')
+def _bump_executed_table_versions(orm_execute_state):
+    """Bump the counter of a versioned table written by a bulk insert, update or delete"""
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    table = getattr(orm_execute_state.statement, 'table', None)
+    if getattr(table, 'name', None) in VERSIONED_TABLES:
+        _bump_table_versions(orm_execute_state.session.connection(), {table.name})
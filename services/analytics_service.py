@@ -0,0 +1,298 @@
+"""
+Analytics service computing revenue, chair utilization and no-show rates with NumPy
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, timedelta
+
+import numpy as np
+
+from config import ANALYTICS_CACHE_TTL
+from services import db_service
+
+logger = logging.getLogger(__name__)
+
+GRANULARITIES = ('day', 'week', 'month')
+DEFAULT_RANGE_DAYS = 30
+# Statuses that keep a chair busy for the appointment's duration
+OCCUPYING_STATUSES = ('scheduled', 'completed', 'no-show')
+DAYS_OF_WEEK = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+MINUTES_PER_DAY = 24 * 60
+
+# Reports cached per (start_date, end_date, granularity): key -> (expires_at, report)
+MAX_CACHED_REPORTS = 32
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+def _weekdays(days):
+    """Weekday numbers (Monday=0) of a datetime64[D] array; 1970-01-01 was a Thursday"""
+    return (days.astype(np.int64) + 3) % 7
+
+def _minute_of_day(value):
+    """Minutes since midnight of an 'H:MM' or 'HH:MM' string, or -1 if it is not a valid time"""
+    hours, _, minutes = str(value).strip().partition(':')
+    if not (hours.isdigit() and minutes.isdigit() and len(minutes) == 2):
+        return -1
+    hours, minutes = int(hours), int(minutes)
+    return hours * 60 + minutes if hours < 24 and minutes < 60 else -1
+
+def _minutes_of_day(times):
+    """Convert a sequence of time strings to minutes since midnight; invalid times become -1"""
+    return np.fromiter((_minute_of_day(value) for value in times), dtype=np.int64, count=len(times))
+
+def load_columns(start_date, end_date):
+    """
+    Load appointments in a date range as columnar arrays
+
+    Args:
+        start_date: First date to include (date object)
+        end_date: Last date to include (date object)
+
+    Returns:
+        dict: NumPy arrays 'date', 'start' (minute of day), 'duration', 'status',
+        'price', 'barber' and 'service' (indexes into 'barber_ids'/'service_ids')
+    """
+    rows = db_service.get_appointment_rows_for_analytics(start_date, end_date)
+    # Times are not validated on every write path; drop rows whose time can't be parsed
+    starts = _minutes_of_day([row[1] for row in rows])
+    if (starts < 0).any():
+        logger.warning(f"Skipping {int((starts < 0).sum())} appointments with invalid times in analytics")
+        rows = [row for row, start in zip(rows, starts) if start >= 0]
+        starts = starts[starts >= 0]
+    dates, times, durations, statuses, barber_ids, service_ids, prices = zip(*rows) if rows else ((),) * 7
+
+    barber_ids, barber_index = np.unique(np.array(barber_ids, dtype=str), return_inverse=True)
+    service_ids, service_index = np.unique(np.array(service_ids, dtype=str), return_inverse=True)
+
+    return {
+        'date': np.array(dates, dtype='datetime64[D]'),
+        'start': starts,
+        'duration': np.array(durations, dtype=np.int64),
+        'status': np.array(statuses, dtype=str),
+        'price': np.array(prices, dtype=np.float64),
+        'barber': barber_index,
+        'barber_ids': barber_ids,
+        'service': service_index,
+        'service_ids': service_ids
+    }
+
+def revenue_by(columns, key, names):
+    """
+    Revenue and appointment counts grouped by barber or service
+
+    Revenue counts completed appointments; booked revenue counts scheduled ones.
+
+    Args:
+        columns: Arrays from load_columns
+        key: 'barber' or 'service'
+        names: Display names keyed by ID
+
+    Returns:
+        list: Dicts per barber or service, highest revenue first
+    """
+    ids = columns[f'{key}_ids']
+    index = columns[key]
+    completed = columns['status'] == 'completed'
+    scheduled = columns['status'] == 'scheduled'
+
+    appointments = np.bincount(index, minlength=len(ids))
+    completed_count = np.bincount(index, weights=completed, minlength=len(ids))
+    revenue = np.bincount(index, weights=columns['price'] * completed, minlength=len(ids))
+    booked = np.bincount(index, weights=columns['price'] * scheduled, minlength=len(ids))
+
+    order = np.lexsort((ids, -revenue))
+    return [{
+        'id': str(ids[i]),
+        'name': names.get(str(ids[i]), 'Unknown'),
+        'appointments': int(appointments[i]),
+        'completed': int(completed_count[i]),
+        'revenue': round(float(revenue[i]), 2),
+        'booked_revenue': round(float(booked[i]), 2),
+        'average_ticket': round(float(revenue[i] / completed_count[i]), 2) if completed_count[i] else None
+    } for i in order]
+
+def _available_minutes(barbers, start_date, end_date):
+    """Chair minutes available at each minute of the day, summed over the range"""
+    days = np.arange(np.datetime64(start_date, 'D'), np.datetime64(end_date, 'D') + 1)
+    weekday_counts = np.bincount(_weekdays(days), minlength=7)
+
+    # +count at opening, -count at closing, then a cumulative sum
+    changes = np.zeros(MINUTES_PER_DAY + 1, dtype=np.int64)
+    for barber in barbers.values():
+        if barber.get('is_active') is False:
+            continue
+        for weekday, day_name in enumerate(DAYS_OF_WEEK):
+            hours = (barber.get('working_hours') or {}).get(day_name)
+            if not hours or not weekday_counts[weekday]:
+                continue
+            opens, closes = _minutes_of_day([hours['start'], hours['end']])
+            if opens >= 0 and closes > opens:
+                changes[opens] += weekday_counts[weekday]
+                changes[closes] -= weekday_counts[weekday]
+    return np.cumsum(changes)[:MINUTES_PER_DAY]
+
+def hourly_utilization(columns, barbers, start_date, end_date):
+    """
+    Share of available chair time booked, per hour of the day
+
+    Booked minutes are spread over every hour an appointment overlaps;
+    available minutes come from the barbers' working hours.
+
+    Args:
+        columns: Arrays from load_columns
+        barbers: Barber dicts keyed by ID
+        start_date: First date of the range (date object)
+        end_date: Last date of the range (date object)
+
+    Returns:
+        list: Dicts per hour with booked_minutes, available_minutes and utilization
+    """
+    occupying = np.isin(columns['status'], OCCUPYING_STATUSES)
+    starts = np.clip(columns['start'][occupying], 0, MINUTES_PER_DAY)
+    ends = np.clip(starts + columns['duration'][occupying], 0, MINUTES_PER_DAY)
+
+    # Chairs in use at each minute: +1 where an appointment starts, -1 where it ends
+    changes = (np.bincount(starts, minlength=MINUTES_PER_DAY + 1)
+               - np.bincount(ends, minlength=MINUTES_PER_DAY + 1))
+    booked = np.cumsum(changes)[:MINUTES_PER_DAY].reshape(24, 60).sum(axis=1)
+    available = _available_minutes(barbers, start_date, end_date).reshape(24, 60).sum(axis=1)
+
+    return [{
+        'hour': hour,
+        'booked_minutes': int(booked[hour]),
+        'available_minutes': int(available[hour]),
+        'utilization': round(float(booked[hour] / available[hour]), 4) if available[hour] else None
+    } for hour in range(24) if booked[hour] or available[hour]]
+
+def rates_over_time(columns, granularity='day'):
+    """
+    Cancellation and no-show rates per day, week or month
+
+    The no-show rate is measured against appointments that were not
+    cancelled, so cancellations do not dilute it.
+
+    Args:
+        columns: Arrays from load_columns
+        granularity: 'day', 'week' (starting Monday) or 'month'
+
+    Returns:
+        list: Dicts per period, oldest first
+    """
+    dates = columns['date']
+    if granularity == 'month':
+        periods = dates.astype('datetime64[M]')
+    elif granularity == 'week':
+        periods = dates - _weekdays(dates).astype('timedelta64[D]')
+    else:
+        periods = dates
+
+    periods, index = np.unique(periods, return_inverse=True)
+    status = columns['status']
+    total = np.bincount(index, minlength=len(periods))
+    completed = np.bincount(index, weights=status == 'completed', minlength=len(periods))
+    cancelled = np.bincount(index, weights=status == 'cancelled', minlength=len(periods))
+    no_show = np.bincount(index, weights=status == 'no-show', minlength=len(periods))
+    not_cancelled = total - cancelled
+
+    return [{
+        'period': str(periods[i]),
+        'appointments': int(total[i]),
+        'completed': int(completed[i]),
+        'cancelled': int(cancelled[i]),
+        'no_show': int(no_show[i]),
+        'cancellation_rate': round(float(cancelled[i] / total[i]), 4) if total[i] else None,
+        'no_show_rate': round(float(no_show[i] / not_cancelled[i]), 4) if not_cancelled[i] else None
+    } for i in range(len(periods))]
+
+def build_report(start_date, end_date, granularity='day'):
+    """
+    Compute every analytics aggregate for a date range
+
+    Args:
+        start_date: First date to include (date object)
+        end_date: Last date to include (date object)
+        granularity: Period used for rates over time
+
+    Returns:
+        dict: summary, revenue_by_barber, revenue_by_service, utilization and rates
+    """
+    started = time.perf_counter()
+    columns = load_columns(start_date, end_date)
+    barbers = db_service.get_barbers()
+    services = db_service.get_services()
+
+    utilization = hourly_utilization(columns, barbers, start_date, end_date)
+    status = columns['status']
+    completed = status == 'completed'
+    cancelled = int(np.count_nonzero(status == 'cancelled'))
+    no_show = int(np.count_nonzero(status == 'no-show'))
+    total = len(status)
+    revenue = float(columns['price'][completed].sum())
+    booked_minutes = sum(hour['booked_minutes'] for hour in utilization)
+    available_minutes = sum(hour['available_minutes'] for hour in utilization)
+
+    report = {
+        'start_date': start_date.isoformat(),
+        'end_date': end_date.isoformat(),
+        'granularity': granularity,
+        'summary': {
+            'appointments': total,
+            'completed': int(np.count_nonzero(completed)),
+            'cancelled': cancelled,
+            'no_show': no_show,
+            'revenue': round(revenue, 2),
+            'average_ticket': round(revenue / np.count_nonzero(completed), 2) if completed.any() else None,
+            'cancellation_rate': round(cancelled / total, 4) if total else None,
+            'no_show_rate': round(no_show / (total - cancelled), 4) if total - cancelled else None,
+            'utilization': round(booked_minutes / available_minutes, 4) if available_minutes else None
+        },
+        'revenue_by_barber': revenue_by(columns, 'barber', {k: v.get('name') for k, v in barbers.items()}),
+        'revenue_by_service': revenue_by(columns, 'service', {k: v.get('name') for k, v in services.items()}),
+        'utilization': utilization,
+        'rates': rates_over_time(columns, granularity),
+        'generated_at': time.time()
+    }
+
+    logger.info(f"Built analytics report for {start_date} to {end_date} over {total} appointments "
+                f"in {(time.perf_counter() - started) * 1000:.1f} ms")
+    return report
+
+def get_report(start_date=None, end_date=None, granularity='day', refresh=False):
+    """
+    Get the analytics report for a date range, cached for ANALYTICS_CACHE_TTL seconds
+
+    Args:
+        start_date: First date (date object), defaults to DEFAULT_RANGE_DAYS before end_date
+        end_date: Last date (date object), defaults to today
+        granularity: 'day', 'week' or 'month'
+        refresh: Recompute even if a cached report exists
+
+    Returns:
+        dict: Report from build_report
+    """
+    end_date = end_date or date.today()
+    start_date = start_date or end_date - timedelta(days=DEFAULT_RANGE_DAYS - 1)
+    key = (start_date, end_date, granularity)
+    now = time.monotonic()
+
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry and entry[0] > now and not refresh:
+            _cache.move_to_end(key)
+            return entry[1]
+
+    report = build_report(start_date, end_date, granularity)
+
+    with _cache_lock:
+        _cache[key] = (now + ANALYTICS_CACHE_TTL, report)
+        _cache.move_to_end(key)
+        while len(_cache) > MAX_CACHED_REPORTS:
+            _cache.popitem(last=False)
+    return report
+
+def invalidate():
+    """Drop every cached report"""
+    with _cache_lock:
+        _cache.clear()
@@ -0,0 +1,283 @@
+"""
+Campaign service for sending WhatsApp marketing messages to customer segments
+"""
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from config import (BUSINESS_NAME, CAMPAIGN_SEND_RATE, CAMPAIGN_BATCH_SIZE, CAMPAIGN_CHECKPOINT_EVERY,
+                    CAMPAIGN_HEARTBEAT_TIMEOUT)
+from services import db_service
+from utils.helpers import sanitize_phone
+
+logger = logging.getLogger(__name__)
+
+class _CampaignFields(dict):
+    """Template fields that leave unknown placeholders untouched"""
+    def __missing__(self, key):
+        return '{' + key + '}'
+
+def validate_message(message):
+    """
+    Check that a campaign message is a usable template
+
+    Args:
+        message: Message body with {name}, {first_name} or {business_name} placeholders
+
+    Returns:
+        str: Error message, or None if the template is valid
+    """
+    if not message or not message.strip():
+        return "Message is required"
+    try:
+        message.format_map(_CampaignFields())
+    except (ValueError, IndexError) as e:
+        return f"Invalid placeholder in message: {str(e)}"
+    return None
+
+def render_message(message, name):
+    """
+    Render a campaign message for one recipient
+
+    Args:
+        message: Message template
+        name: Customer's full name
+
+    Returns:
+        str: Personalized message
+    """
+    name = (name or '').strip()
+    return message.format_map(_CampaignFields(
+        name=name,
+        first_name=name.split(' ')[0] if name else '',
+        business_name=BUSINESS_NAME
+    ))
+
+def iter_recipients(segment, after_customer_id=None, batch_size=CAMPAIGN_BATCH_SIZE, seen_phones=None):
+    """
+    Stream unique recipients for a segment
+
+    Phones are compared after sanitize_phone, so '+90 555 123 4567' and
+    '+905551234567' are only messaged once. Customers without a usable phone
+    are yielded with a None phone so they can be counted as skipped.
+
+    Args:
+        segment: Segment filter passed to db_service.iter_campaign_recipients
+        after_customer_id: Resume after this customer ID
+        batch_size: Number of customers fetched per query
+        seen_phones: Set of sanitized phones already messaged; updated in place
+
+    Yields:
+        tuple: (customer_id, name, sanitized phone or None)
+    """
+    seen_phones = seen_phones if seen_phones is not None else set()
+
+    for customer_id, name, phone in db_service.iter_campaign_recipients(
+            segment, after_customer_id=after_customer_id, batch_size=batch_size):
+        phone = sanitize_phone(phone).lstrip('+')
+        if not phone or phone in seen_phones:
+            yield customer_id, name, None
+            continue
+        seen_phones.add(phone)
+        yield customer_id, name, phone
+
+def _seen_phones_until(segment, customer_id, batch_size):
+    """Rebuild the dedup set for customers processed before a checkpoint"""
+    seen_phones = set()
+    if customer_id:
+        for _, _, phone in db_service.iter_campaign_recipients(
+                segment, until_customer_id=customer_id, batch_size=batch_size):
+            phone = sanitize_phone(phone).lstrip('+')
+            if phone:
+                seen_phones.add(phone)
+    return seen_phones
+
+def _default_send(to_phone, message):
+    """Send a campaign message over WhatsApp"""
+    from services import whatsapp_service
+    return whatsapp_service.send_whatsapp_message(to_phone, message, message_type='campaign')
+
+def get_progress(campaign_id):
+    """
+    Get the progress of a campaign
+
+    Args:
+        campaign_id: Campaign ID
+
+    Returns:
+        dict: Campaign status and counters, or None if not found
+    """
+    campaign = db_service.get_campaign(campaign_id)
+    if not campaign:
+        return None
+
+    return {
+        'id': campaign['id'],
+        'status': campaign['status'],
+        'sent': campaign['sent_count'],
+        'failed': campaign['failed_count'],
+        'skipped': campaign['skipped_count'],
+        'processed': campaign['sent_count'] + campaign['failed_count'] + campaign['skipped_count'],
+        'last_customer_id': campaign['last_customer_id'],
+        'error': campaign['error']
+    }
+
+def is_stalled(campaign, timeout=CAMPAIGN_HEARTBEAT_TIMEOUT):
+    """
+    Check whether a 'running' campaign's sender stopped checking in
+
+    Args:
+        campaign: Campaign dict from db_service.get_campaign
+        timeout: Seconds without a heartbeat before the sender is presumed dead
+
+    Returns:
+        bool: True if the campaign is 'running' but can be taken over
+    """
+    if campaign['status'] != 'running':
+        return False
+    heartbeat_at = campaign.get('heartbeat_at')
+    return not heartbeat_at or datetime.fromisoformat(heartbeat_at) < datetime.utcnow() - timedelta(seconds=timeout)
+
+def pause_campaign(campaign_id):
+    """
+    Ask a running campaign to stop before its next message
+
+    Args:
+        campaign_id: Campaign ID
+
+    Returns:
+        bool: True if the campaign was running
+    """
+    campaign = db_service.get_campaign(campaign_id)
+    if not campaign or campaign['status'] != 'running':
+        return False
+    return db_service.update_campaign(campaign_id, {'status': 'paused'}) is not None
+
+def run_campaign(campaign_id, send_func=None, rate=CAMPAIGN_SEND_RATE, batch_size=CAMPAIGN_BATCH_SIZE,
+                 checkpoint_every=CAMPAIGN_CHECKPOINT_EVERY, progress_callback=None, sleep=time.sleep):
+    """
+    Send a campaign, resuming from its last checkpoint
+
+    Recipients are streamed from the database, deduplicated by phone and sent
+    at no more than `rate` messages per second. Counters and the last
+    processed customer ID are saved every `checkpoint_every` recipients; a
+    paused or crashed run picks up from there.
+
+    The run claims the campaign with a token of its own and checks that it
+    still owns it before every message, refreshing its heartbeat. It stops
+    as soon as the campaign is paused or taken over, and releases it when
+    it stops, so a restarted run never sends alongside the old one. A run
+    that crashed is taken over once its heartbeat is older than
+    CAMPAIGN_HEARTBEAT_TIMEOUT.
+
+    Args:
+        campaign_id: Campaign ID
+        send_func: Function called as send_func(phone, message); defaults to WhatsApp
+        rate: Maximum messages per second, or 0 for no limit
+        batch_size: Number of customers fetched per query
+        checkpoint_every: Number of recipients between progress saves
+        progress_callback: Optional function called with get_progress()-style dicts
+        sleep: Sleep function used for throttling
+
+    Returns:
+        dict: Final progress, or an error dict if the campaign could not be started
+    """
+    campaign = db_service.get_campaign(campaign_id)
+    if not campaign:
+        return {'status': 'error', 'error': 'Campaign not found'}
+
+    message_error = validate_message(campaign['message'])
+    if message_error:
+        return {'status': 'error', 'error': message_error}
+
+    run_token = str(uuid.uuid4())
+    if not db_service.claim_campaign(campaign_id, run_token):
+        if campaign['status'] == 'paused':
+            return {'status': 'error', 'error': 'Campaign is still stopping, try again shortly'}
+        return {'status': 'error', 'error': f"Campaign is {campaign['status']}"}
+
+    # Read the checkpoint again: the previous run may have saved it after the read above
+    campaign = db_service.get_campaign(campaign_id)
+    send_func = send_func or _default_send
+    interval = 1.0 / rate if rate else 0
+    segment = campaign['segment'] or {}
+
+    counters = {
+        'sent_count': campaign['sent_count'],
+        'failed_count': campaign['failed_count'],
+        'skipped_count': campaign['skipped_count'],
+        'last_customer_id': campaign['last_customer_id']
+    }
+
+    def checkpoint(extra=None):
+        campaign = db_service.update_campaign_run(campaign_id, run_token, dict(counters, **(extra or {})))
+        if not campaign:
+            return None
+        progress = get_progress(campaign_id)
+        if progress_callback and progress:
+            progress_callback(progress)
+        return progress
+
+    def stop():
+        progress = checkpoint({'run_token': None})
+        if progress is None:
+            logger.warning(f"Campaign {campaign_id} was taken over by another run, stopping")
+            return get_progress(campaign_id)
+        logger.info(f"Campaign {campaign_id} stopped with status {progress['status']}")
+        return progress
+
+    update = dict(counters, started_at=datetime.utcnow()) if not campaign['started_at'] else dict(counters)
+    db_service.update_campaign_run(campaign_id, run_token, update)
+    logger.info(f"Starting campaign {campaign_id} after customer {counters['last_customer_id']}")
+
+    try:
+        seen_phones = _seen_phones_until(segment, counters['last_customer_id'], batch_size)
+        next_send_at = 0.0
+        since_checkpoint = 0
+
+        for customer_id, name, phone in iter_recipients(
+                segment, counters['last_customer_id'], batch_size, seen_phones):
+            if phone is None:
+                counters['skipped_count'] += 1
+            else:
+                if interval:
+                    delay = next_send_at - time.monotonic()
+                    if delay > 0:
+                        sleep(delay)
+                    next_send_at = max(next_send_at, time.monotonic()) + interval
+
+                if not db_service.heartbeat_campaign(campaign_id, run_token):
+                    return stop()
+
+                try:
+                    result = send_func(phone, render_message(campaign['message'], name))
+                    ok = result.get('status') in ('success', 'queued')
+                except Exception as e:
+                    logger.error(f"Error sending campaign {campaign_id} message to {phone}: {str(e)}")
+                    ok = False
+
+                if ok:
+                    counters['sent_count'] += 1
+                else:
+                    counters['failed_count'] += 1
+
+            counters['last_customer_id'] = customer_id
+            since_checkpoint += 1
+
+            if since_checkpoint >= checkpoint_every:
+                since_checkpoint = 0
+                progress = checkpoint()
+                if not progress or progress['status'] != 'running':
+                    return stop()
+
+        progress = checkpoint({'status': 'completed', 'completed_at': datetime.utcnow(), 'run_token': None})
+        if progress is None:
+            logger.warning(f"Campaign {campaign_id} was taken over by another run before it completed")
+            return get_progress(campaign_id)
+        logger.info(f"Campaign {campaign_id} completed: {counters['sent_count']} sent, "
+                    f"{counters['failed_count']} failed, {counters['skipped_count']} skipped")
+        return progress
+    except Exception as e:
+        logger.error(f"Error running campaign {campaign_id}: {str(e)}")
+        return checkpoint({'status': 'failed', 'error': str(e), 'run_token': None}) or get_progress(campaign_id)
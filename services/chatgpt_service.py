@@ -1,18 +1,15 @@
 """
 ChatGPT service for natural language processing using OpenAI API
 """
-import os
 import json
 import logging
 from datetime import datetime, timedelta
-from openai import OpenAI
+from services import client_factory, tracing_service
+from utils.logger import SAMPLED
 
 logger = logging.getLogger(__name__)
 
-# Initialize OpenAI client
-OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
-client = OpenAI(api_key=OPENAI_API_KEY)
-
+@tracing_service.traced()
 def analyze_message(message, context=None):
     """
     Analyze a message using ChatGPT to determine intent and extract relevant information
@@ -69,22 +66,23 @@ def analyze_message(message, context=None):
         # Make API call to ChatGPT
         # the newest OpenAI model is "gpt-4o" which was released May 13, 2024.
         # do not change this unless explicitly requested by the user
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_message}
-            ],
-            response_format={"type": "json_object"}
-        )
+        with tracing_service.span('openai.chat.completions', model="gpt-4o"):
+            response = client_factory.get_openai_client().chat.completions.create(
+                model="gpt-4o",
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_message}
+                ],
+                response_format={"type": "json_object"}
+            )
         
         # Parse the response
         result = json.loads(response.choices[0].message.content)
-        logger.info(f"Message analysis result: {result}")
+        logger.info("Message analysis result: %s", result, extra=SAMPLED)
         return result
     
     except Exception as e:
-        logger.error(f"Error analyzing message with ChatGPT: {str(e)}")
+        logger.error("Error analyzing message with ChatGPT: %s", e)
         # Return a default response in case of error
         return {
             "intent": "other",
@@ -96,6 +94,7 @@ def analyze_message(message, context=None):
             "followup_question": "I'm sorry, I'm having trouble understanding. Could you please rephrase your request?"
         }
 
+@tracing_service.traced()
 def generate_response(analysis_result, customer_name=None, business_name=None):
     """
     Generate a natural language response based on the analysis result
@@ -141,21 +140,22 @@ def generate_response(analysis_result, customer_name=None, business_name=None):
         user_message = json.dumps(context)
         
         # Make API call to ChatGPT
-        response = client.chat.completions.create(
-            model="gpt-4o",  # the newest OpenAI model is "gpt-4o" which was released May 13, 2024.
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_message}
-            ]
-        )
+        with tracing_service.span('openai.chat.completions', model="gpt-4o"):
+            response = client_factory.get_openai_client().chat.completions.create(
+                model="gpt-4o",  # the newest OpenAI model is "gpt-4o" which was released May 13, 2024.
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_message}
+                ]
+            )
         
         # Get the generated response
         result = response.choices[0].message.content
-        logger.info(f"Generated response: {result}")
+        logger.info("Generated response: %s", result, extra=SAMPLED)
         return result
     
     except Exception as e:
-        logger.error(f"Error generating response with ChatGPT: {str(e)}")
+        logger.error("Error generating response with ChatGPT: %s", e)
         # Return a default response in case of error
         if customer_name:
             return f"Hello {customer_name}, I'm sorry, I'm having trouble processing your request. Please call our shop directly for assistance."
@@ -195,7 +195,7 @@ def process_whatsapp_message(message, customer_info=None, business_name=None):
             'response': response_text
         }
     except Exception as e:
-        logger.error(f"Error processing WhatsApp message with ChatGPT: {str(e)}")
+        logger.error("Error processing WhatsApp message with ChatGPT: %s", e)
         return {
             'status': 'error',
             'error': str(e)
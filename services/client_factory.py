@@ -0,0 +1,86 @@
+"""
+Lazy, thread-safe factories for the Twilio and OpenAI API clients
+"""
+import os
+import logging
+import threading
+
+from config import (
+    TWILIO_HTTP_POOL_SIZE, TWILIO_HTTP_TIMEOUT, TWILIO_HTTP_MAX_RETRIES,
+    OPENAI_HTTP_POOL_SIZE, OPENAI_HTTP_TIMEOUT, OPENAI_HTTP_KEEPALIVE_EXPIRY, OPENAI_MAX_RETRIES
+)
+
+logger = logging.getLogger(__name__)
+
+_clients = {}
+_lock = threading.Lock()
+
+def _get_or_create(name, factory):
+    """Return the cached client, creating it once under the lock if needed"""
+    client = _clients.get(name)
+    if client is None:
+        with _lock:
+            client = _clients.get(name)
+            if client is None:
+                client = factory()
+                _clients[name] = client
+                logger.info(f"Initialized {name} client")
+    return client
+
+def _create_twilio_client():
+    """Build a Twilio client backed by a pooled requests session"""
+    from requests.adapters import HTTPAdapter
+    from twilio.http.http_client import TwilioHttpClient
+    from twilio.rest import Client
+
+    http_client = TwilioHttpClient(pool_connections=True, timeout=TWILIO_HTTP_TIMEOUT)
+    # Every request goes to api.twilio.com, so a single host pool of the configured size is enough
+    http_client.session.mount("https://", HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=TWILIO_HTTP_POOL_SIZE,
+        max_retries=TWILIO_HTTP_MAX_RETRIES
+    ))
+
+    return Client(
+        os.environ.get("TWILIO_ACCOUNT_SID"),
+        os.environ.get("TWILIO_AUTH_TOKEN"),
+        http_client=http_client
+    )
+
+def _create_openai_client():
+    """Build an OpenAI client backed by a pooled keep-alive httpx client"""
+    import httpx
+    from openai import OpenAI, DefaultHttpxClient
+
+    http_client = DefaultHttpxClient(
+        limits=httpx.Limits(
+            max_connections=OPENAI_HTTP_POOL_SIZE,
+            max_keepalive_connections=OPENAI_HTTP_POOL_SIZE,
+            keepalive_expiry=OPENAI_HTTP_KEEPALIVE_EXPIRY
+        )
+    )
+
+    return OpenAI(
+        api_key=os.environ.get("OPENAI_API_KEY"),
+        http_client=http_client,
+        timeout=OPENAI_HTTP_TIMEOUT,
+        max_retries=OPENAI_MAX_RETRIES
+    )
+
+def get_twilio_client():
+    """Get the shared Twilio client, creating it on first use"""
+    return _get_or_create('twilio', _create_twilio_client)
+
+def get_openai_client():
+    """Get the shared OpenAI client, creating it on first use"""
+    return _get_or_create('openai', _create_openai_client)
+
+def reset_clients():
+    """
+    Drop all cached clients so they are rebuilt on next use
+
+    Call this in a forked worker: connection pools inherited from the parent
+    process must not be shared between processes.
+    """
+    with _lock:
+        _clients.clear()
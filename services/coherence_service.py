@@ -0,0 +1,101 @@
+"""
+Coherence service sharing data file versions between worker processes
+"""
+import logging
+import mmap
+import os
+import struct
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows runs a single process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+COLLECTIONS = ('customers', 'appointments', 'barbers', 'services')
+VERSIONS_FILENAME = '.versions'
+_COUNTER = struct.Struct('<Q')
+
+_instances = {}
+_instances_lock = threading.Lock()
+
+class SharedVersions:
+    """
+    Write counters per collection in a memory-mapped file next to the data files
+
+    Every process maps the same file, so checking whether another worker has
+    written a collection is a read from shared memory rather than a stat or a
+    file read. Writers hold an exclusive lock (a POSIX record lock across
+    processes plus a re-entrant lock across threads) while they reload, modify
+    and save a collection, and bump its counter before releasing it.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        size = _COUNTER.size * len(COLLECTIONS)
+        if os.fstat(fd).st_size < size:
+            os.ftruncate(fd, size)
+        self._fd = fd
+        self._map = mmap.mmap(fd, size)
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+
+    def _offset(self, collection):
+        return COLLECTIONS.index(collection) * _COUNTER.size
+
+    def get(self, collection):
+        """Get the shared write counter of a collection"""
+        return _COUNTER.unpack_from(self._map, self._offset(collection))[0]
+
+    def bump(self, collection):
+        """
+        Increment the shared counter of a collection; call while holding lock()
+
+        Returns:
+            int: The new counter value
+        """
+        version = self.get(collection) + 1
+        _COUNTER.pack_into(self._map, self._offset(collection), version)
+        return version
+
+    @contextmanager
+    def lock(self):
+        """Hold the exclusive write lock; re-entrant within a thread"""
+        with self._thread_lock:
+            if self._depth == 0 and fcntl:
+                # Record locks belong to the process, so forked workers sharing
+                # this descriptor still exclude each other
+                fcntl.lockf(self._fd, fcntl.LOCK_EX)
+            self._depth += 1
+            try:
+                yield self
+            finally:
+                self._depth -= 1
+                if self._depth == 0 and fcntl:
+                    fcntl.lockf(self._fd, fcntl.LOCK_UN)
+
+def get_shared_versions(data_dir):
+    """
+    Get the shared counters for a data directory, mapping the file on first use
+
+    Args:
+        data_dir: Directory holding the JSON data files
+
+    Returns:
+        SharedVersions: Counters shared by every process using data_dir
+    """
+    path = os.path.join(data_dir or '.', VERSIONS_FILENAME)
+    versions = _instances.get(path)
+    if versions is None:
+        with _instances_lock:
+            versions = _instances.get(path)
+            if versions is None:
+                os.makedirs(data_dir or '.', exist_ok=True)
+                versions = SharedVersions(path)
+                _instances[path] = versions
+                logger.info(f"Mapped shared data versions at {path}")
+    return versions
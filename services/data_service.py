@@ -1,12 +1,17 @@
 """
 Data service for managing data storage and retrieval from JSON files
 """
+import bisect
 import json
 import os
 import logging
 import time
 import threading
-from config import CUSTOMERS_FILE, APPOINTMENTS_FILE, BARBERS_FILE, SERVICES_FILE
+from datetime import datetime, timedelta
+from functools import wraps
+from config import CUSTOMERS_FILE, APPOINTMENTS_FILE, BARBERS_FILE, SERVICES_FILE, CHANGE_FEED_TOMBSTONE_DAYS
+from utils.helpers import encode_cursor, decode_cursor
+from services import coherence_service, search_service, version_service
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +23,36 @@ _data_cache = {
     "services": {}
 }
 
+# Customer search index, rebuilt whenever the customers cache is replaced
+_search_index = search_service.CustomerSearchIndex()
+_search_index_source = None
+
+# Appointment change log: sorted (updated_at, id) pairs for live and deleted
+# appointments, rebuilt whenever the appointments cache is replaced. Deleted
+# appointments are kept as tombstones (id -> deleted_at) in the appointments file.
+_change_index = []
+_change_stamps = {}
+_change_index_source = None
+_last_change_stamp = ""
+_change_lock = threading.RLock()
+
+# Admin list index: sorted (date, time, id) keys of live appointments, one list
+# per (status, barber_id) filter with None matching any value. Rebuilt whenever
+# the appointments cache is replaced and kept up to date by _record_change, under
+# _change_lock. _page_keys maps each ID to its key and the lists it is filed in.
+_page_index = {}
+_page_keys = {}
+_page_index_source = None
+
+# Set by freeze_catalog(): barbers and services are then kept as immutable
+# structures and every write replaces the collection instead of mutating it
+_catalog_frozen = False
+
+# Shared write counter last loaded per (versions file, collection). Workers
+# compare it with the counter in shared memory on every read and reload only
+# the collection another process has written since.
+_seen_versions = {}
+
 # File locks to prevent concurrent writes
 _file_locks = {
     CUSTOMERS_FILE: threading.Lock(),
@@ -35,6 +70,11 @@ def initialize():
         SERVICES_FILE: {"services": {}}
     }
     
+    # Read the counters first: a write landing while the files load is reloaded later
+    versions = _shared_versions()
+    for collection in coherence_service.COLLECTIONS:
+        _seen_versions[(versions.path, collection)] = versions.get(collection)
+    
     for file_path, default_data in files.items():
         if not os.path.exists(file_path):
             with open(file_path, 'w') as f:
@@ -49,6 +89,7 @@ def initialize():
                         _data_cache["customers"] = data.get("customers", {})
                     elif file_path == APPOINTMENTS_FILE:
                         _data_cache["appointments"] = data.get("appointments", {})
+                        _data_cache["deleted_appointments"] = data.get("deleted_appointments", {})
                     elif file_path == BARBERS_FILE:
                         _data_cache["barbers"] = data.get("barbers", {})
                     elif file_path == SERVICES_FILE:
@@ -59,6 +100,131 @@ def initialize():
                     json.dump(default_data, f, indent=2)
             except Exception as e:
                 logger.error(f"Error loading data from {file_path}: {str(e)}")
+    
+    # Cached collections were replaced, so responses tagged before are stale
+    for collection in _data_cache:
+        version_service.bump(collection)
+
+class FrozenDict(dict):
+    """
+    Read-only dict used for the frozen catalog
+
+    Still a dict, so JSON encoding, templates and .get() work unchanged;
+    copies (dict(), copy.deepcopy, pickle) come back as plain dicts.
+    """
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("Frozen catalog data cannot be modified")
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _readonly
+    __ior__ = _readonly
+
+    def __reduce__(self):
+        return (dict, (dict(self),))
+
+def _freeze(value):
+    """Recursively convert dicts to FrozenDict and lists to tuples"""
+    if isinstance(value, dict):
+        return FrozenDict((key, _freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+def freeze_catalog():
+    """
+    Freeze the cached barbers and services into immutable structures
+
+    Called in the gunicorn master before forking, so workers share the
+    catalog's memory pages instead of each loading and mutating a copy.
+    Writes still work: they replace the collection with a new frozen one.
+    """
+    global _catalog_frozen
+    for collection in ("barbers", "services"):
+        _data_cache[collection] = _freeze(_data_cache[collection])
+    _catalog_frozen = True
+    logger.info(f"Froze catalog: {len(_data_cache['barbers'])} barbers, {len(_data_cache['services'])} services")
+
+def _set_catalog(collection, items):
+    """Replace a catalog collection, keeping it frozen if freeze_catalog() was called"""
+    _data_cache[collection] = _freeze(items) if _catalog_frozen else items
+    return _data_cache[collection]
+
+def _collection_file(collection):
+    """Data file holding a collection"""
+    return {
+        "customers": CUSTOMERS_FILE,
+        "appointments": APPOINTMENTS_FILE,
+        "barbers": BARBERS_FILE,
+        "services": SERVICES_FILE
+    }[collection]
+
+def _shared_versions():
+    """Write counters shared with the other processes using the same data directory"""
+    return coherence_service.get_shared_versions(os.path.dirname(APPOINTMENTS_FILE))
+
+def _reload(collection, version):
+    """Replace a cached collection with the file's contents"""
+    data = _read_file(_collection_file(collection))
+    if collection not in data:
+        return
+    
+    if collection in ("barbers", "services"):
+        _set_catalog(collection, data[collection])
+    else:
+        _data_cache[collection] = data[collection]
+    if collection == "appointments":
+        _data_cache["deleted_appointments"] = data.get("deleted_appointments", {})
+    
+    _seen_versions[(_shared_versions().path, collection)] = version
+    version_service.bump(collection)
+    logger.debug(f"Reloaded {collection} written by another process (version {version})")
+
+def _sync(*collections):
+    """
+    Reload collections another process has written since this one loaded them
+    
+    Costs one read from shared memory per collection when nothing changed.
+    """
+    versions = _shared_versions()
+    for collection in collections:
+        key = (versions.path, collection)
+        current = versions.get(collection)
+        seen = _seen_versions.get(key)
+        if seen is None:
+            # First look at this data directory: the cache is what was loaded
+            _seen_versions[key] = current
+        elif seen != current:
+            _reload(collection, current)
+
+def _exclusive(*collections):
+    """
+    Decorator running a write under the cross-process write lock
+    
+    The collections are brought up to date first, so the write is applied
+    to the latest data and never overwrites another worker's changes.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with _shared_versions().lock():
+                _sync(*collections)
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def shared_version(collections):
+    """
+    Version of collections as every worker process sees it, for conditional GETs
+    
+    Args:
+        collections: Collection names
+        
+    Returns:
+        tuple: (shared write counters, None) in the form version_service.conditional expects
+    """
+    _sync(*collections)
+    versions = _shared_versions()
+    return tuple(versions.get(collection) for collection in collections), None
 
 def _read_file(file_path):
     """Read data from JSON file"""
@@ -70,40 +236,69 @@ def _read_file(file_path):
         return {}
 
 def _write_file(file_path, data):
-    """Write data to JSON file with locking for thread safety"""
-    with _file_locks[file_path]:
+    """Write data to JSON file with locking for thread and process safety"""
+    # The cache has already changed, whether or not the write succeeds
+    for collection in data:
+        version_service.bump(collection)
+    
+    versions = _shared_versions()
+    with versions.lock(), _file_locks[file_path]:
         try:
-            with open(file_path, 'w') as f:
+            # Write a temporary file and rename it, so other processes never read a partial file
+            temp_path = f"{file_path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w') as f:
                 json.dump(data, f, indent=2)
-            return True
+            os.replace(temp_path, file_path)
         except Exception as e:
             logger.error(f"Error writing to file {file_path}: {str(e)}")
             return False
+        
+        for collection in data:
+            if collection in coherence_service.COLLECTIONS:
+                _seen_versions[(versions.path, collection)] = versions.bump(collection)
+        return True
+
+def _get_search_index():
+    """Get the customer search index, rebuilding it if the customers cache was replaced"""
+    global _search_index_source
+    customers = _data_cache["customers"]
+    if _search_index_source is not customers:
+        _search_index.rebuild(
+            (cust_id, customer.get("name"), customer.get("phone"))
+            for cust_id, customer in customers.items()
+        )
+        _search_index_source = customers
+    return _search_index
 
 # Customer CRUD operations
 def get_customers():
     """Get all customers"""
+    _sync("customers")
     return _data_cache["customers"]
 
 def get_customer(customer_id):
     """Get a customer by ID"""
+    _sync("customers")
     return _data_cache["customers"].get(customer_id)
 
 def get_customer_by_phone(phone):
     """Get a customer by phone number"""
+    _sync("customers")
     for cust_id, customer in _data_cache["customers"].items():
         if customer.get("phone") == phone:
             return customer
     return None
 
+@_exclusive("customers")
 def create_customer(customer_data):
     """Create a new customer"""
     # Generate a new ID
-    customer_id = str(int(time.time() * 1000))
+    customer_id = _next_ids("customers", 1)[0]
     customer_data["id"] = customer_id
     
-    # Add to cache
+    # Add to cache and search index
     _data_cache["customers"][customer_id] = customer_data
+    _get_search_index().add(customer_id, customer_data.get("name"), customer_data.get("phone"))
     
     # Save to file
     file_data = {"customers": _data_cache["customers"]}
@@ -111,13 +306,16 @@ def create_customer(customer_data):
         return customer_data
     return None
 
+@_exclusive("customers")
 def update_customer(customer_id, customer_data):
     """Update an existing customer"""
     if customer_id not in _data_cache["customers"]:
         return None
     
-    # Update cache
+    # Update cache and search index
     _data_cache["customers"][customer_id].update(customer_data)
+    customer = _data_cache["customers"][customer_id]
+    _get_search_index().add(customer_id, customer.get("name"), customer.get("phone"))
     
     # Save to file
     file_data = {"customers": _data_cache["customers"]}
@@ -125,29 +323,118 @@ def update_customer(customer_id, customer_data):
         return _data_cache["customers"][customer_id]
     return None
 
+@_exclusive("customers")
 def delete_customer(customer_id):
     """Delete a customer"""
     if customer_id not in _data_cache["customers"]:
         return False
     
-    # Remove from cache
+    # Remove from cache and search index
     del _data_cache["customers"][customer_id]
+    _get_search_index().remove(customer_id)
     
     # Save to file
     file_data = {"customers": _data_cache["customers"]}
     return _write_file(CUSTOMERS_FILE, file_data)
 
+def _next_ids(collection, count):
+    """Generate count new timestamp-style IDs that do not collide with existing ones"""
+    next_id = int(time.time() * 1000)
+    existing = _data_cache[collection]
+    ids = []
+    while len(ids) < count:
+        if str(next_id) not in existing:
+            ids.append(str(next_id))
+        next_id += 1
+    return ids
+
+@_exclusive("customers")
+def bulk_create_customers(customers_data):
+    """
+    Create many customers with a single file write
+    
+    Args:
+        customers_data: List of customer dicts (already validated)
+        
+    Returns:
+        list: Created customer dicts, or None if the file could not be written
+    """
+    if not customers_data:
+        return []
+    
+    customers = _data_cache["customers"]
+    created = []
+    for customer_id, customer_data in zip(_next_ids("customers", len(customers_data)), customers_data):
+        customer_data["id"] = customer_id
+        customers[customer_id] = customer_data
+        _get_search_index().add(customer_id, customer_data.get("name"), customer_data.get("phone"))
+        created.append(customer_data)
+    
+    # Save to file once for the whole batch
+    file_data = {"customers": customers}
+    if _write_file(CUSTOMERS_FILE, file_data):
+        return created
+    return None
+
+def search_customers(query, limit=20, offset=0):
+    """
+    Search customers by name prefix, fuzzy name or phone suffix
+    
+    Args:
+        query: Search text; an empty query lists customers by name
+        limit: Maximum number of customers to return
+        offset: Number of matches to skip
+        
+    Returns:
+        dict: 'items' (customer dicts), 'total' and 'next_offset' (None on the last page)
+    """
+    _sync("customers")
+    customer_ids, total = _get_search_index().search(query, limit=limit, offset=offset)
+    customers = _data_cache["customers"]
+    
+    return {
+        "items": [customers[cust_id] for cust_id in customer_ids if cust_id in customers],
+        "total": total,
+        "next_offset": offset + limit if offset + limit < total else None
+    }
+
+def iter_customers_for_export(chunk_size=1000):
+    """
+    Iterate over customers for export in chunks
+    
+    The ID list is snapshotted up front, so customers created or deleted by
+    other requests while the export streams cannot break the iteration.
+    
+    Args:
+        chunk_size: Number of customers read per chunk
+        
+    Yields:
+        dict: Customer dict
+    """
+    _sync("customers")
+    customer_ids = list(_data_cache["customers"].keys())
+    
+    for start in range(0, len(customer_ids), chunk_size):
+        customers = _data_cache["customers"]
+        for cust_id in customer_ids[start:start + chunk_size]:
+            customer = customers.get(cust_id)
+            if customer is not None:
+                yield dict(customer, id=cust_id)
+
 # Appointment CRUD operations
 def get_appointments():
     """Get all appointments"""
+    _sync("appointments")
     return _data_cache["appointments"]
 
 def get_appointment(appointment_id):
     """Get an appointment by ID"""
+    _sync("appointments")
     return _data_cache["appointments"].get(appointment_id)
 
 def get_appointments_by_customer(customer_id):
     """Get all appointments for a customer"""
+    _sync("appointments")
     return {
         appt_id: appt for appt_id, appt in _data_cache["appointments"].items()
         if appt.get("customer_id") == customer_id
@@ -155,6 +442,7 @@ def get_appointments_by_customer(customer_id):
 
 def get_appointments_by_date(date):
     """Get all appointments for a specific date"""
+    _sync("appointments")
     return {
         appt_id: appt for appt_id, appt in _data_cache["appointments"].items()
         if appt.get("date") == date
@@ -162,150 +450,499 @@ def get_appointments_by_date(date):
 
 def get_appointments_by_barber(barber_id):
     """Get all appointments for a barber"""
+    _sync("appointments")
     return {
         appt_id: appt for appt_id, appt in _data_cache["appointments"].items()
         if appt.get("barber_id") == barber_id
     }
 
+def get_appointments_page(status=None, date=None, barber_id=None, cursor=None, limit=50):
+    """
+    Get one page of appointments, newest first, with keyset pagination
+    
+    Reads a sorted index kept up to date on every write, so a page costs
+    O(log n + limit) and the total is exact without scanning. Only the rows
+    on the page are copied and enriched with customer, barber and service names.
+    
+    Args:
+        status: Only include appointments with this status
+        date: Only include appointments on this date (YYYY-MM-DD)
+        barber_id: Only include appointments with this barber
+        cursor: next_cursor from the previous page, or None for the first page
+        limit: Maximum number of appointments on the page
+        
+    Returns:
+        dict: 'items' (appointment dicts), 'next_cursor' (None on the last page),
+        'total' and 'total_is_estimate'
+    """
+    _sync(*coherence_service.COLLECTIONS)
+    after = decode_cursor(cursor, 3)
+    
+    with _change_lock:
+        keys = _get_page_index().get((status or None, barber_id or None), [])
+        low, high = 0, len(keys)
+        if date:
+            # Keys sort by date first, so one date is a contiguous run
+            low = bisect.bisect_left(keys, (date,))
+            high = bisect.bisect_left(keys, (date + "\0",), low)
+        end = bisect.bisect_left(keys, tuple(after), low, high) if after else high
+        page = keys[max(low, end - limit - 1):end][::-1]
+        total = high - low
+        appointments = [(key, _data_cache["appointments"][key[2]]) for key in page[:limit]]
+    
+    has_more = len(page) > limit
+    page = page[:limit]
+    
+    items = []
+    for (_, _, appt_id), appt in appointments:
+        customer = _data_cache["customers"].get(appt.get("customer_id", ""))
+        barber = _data_cache["barbers"].get(appt.get("barber_id", ""))
+        service = _data_cache["services"].get(appt.get("service_id", ""))
+        
+        items.append({
+            "id": appt_id,
+            "date": appt.get("date", ""),
+            "time": appt.get("time", ""),
+            "status": appt.get("status", ""),
+            "customer_id": appt.get("customer_id"),
+            "barber_id": appt.get("barber_id"),
+            "service_id": appt.get("service_id"),
+            "customer_name": customer.get("name") if customer else None,
+            "barber_name": barber.get("name") if barber else None,
+            "service_name": service.get("name") if service else None,
+            "created_at": appt.get("created_at", ""),
+            "updated_at": appt.get("updated_at", "")
+        })
+    
+    return {
+        "items": items,
+        "next_cursor": encode_cursor(page[-1]) if has_more else None,
+        "total": total,
+        "total_is_estimate": False
+    }
+
+def iter_appointments_for_export(start_date=None, end_date=None, status=None, chunk_size=1000):
+    """
+    Iterate over appointments with customer, barber and service details for export
+    
+    Args:
+        start_date: First date to include (YYYY-MM-DD), or None
+        end_date: Last date to include (YYYY-MM-DD), or None
+        status: Only include appointments with this status
+        chunk_size: Number of appointments read per chunk
+        
+    Yields:
+        dict: Flat appointment row
+    """
+    _sync(*coherence_service.COLLECTIONS)
+    appointment_ids = list(_data_cache["appointments"].keys())
+    
+    for start in range(0, len(appointment_ids), chunk_size):
+        for appt_id in appointment_ids[start:start + chunk_size]:
+            appt = _data_cache["appointments"].get(appt_id)
+            if appt is None:
+                continue
+            
+            appt_date = appt.get("date") or ""
+            if start_date and appt_date < start_date:
+                continue
+            if end_date and appt_date > end_date:
+                continue
+            if status and appt.get("status") != status:
+                continue
+            
+            customer = _data_cache["customers"].get(appt.get("customer_id", "")) or {}
+            barber = _data_cache["barbers"].get(appt.get("barber_id", "")) or {}
+            service = _data_cache["services"].get(appt.get("service_id", "")) or {}
+            
+            yield {
+                "id": appt_id,
+                "date": appt.get("date"),
+                "time": appt.get("time"),
+                "duration": appt.get("duration"),
+                "status": appt.get("status"),
+                "customer_name": customer.get("name"),
+                "customer_phone": customer.get("phone"),
+                "barber_name": barber.get("name"),
+                "service_name": service.get("name"),
+                "service_price": service.get("price"),
+                "notes": appt.get("notes"),
+                "created_at": appt.get("created_at"),
+                "updated_at": appt.get("updated_at")
+            }
+
+def _deleted_appointments():
+    """Tombstones of deleted appointments, keyed by ID"""
+    return _data_cache.setdefault("deleted_appointments", {})
+
+def _save_appointments():
+    """Write appointments and their tombstones to the appointments file"""
+    file_data = {"appointments": _data_cache["appointments"], "deleted_appointments": _deleted_appointments()}
+    return _write_file(APPOINTMENTS_FILE, file_data)
+
+def _get_change_index():
+    """Get the appointment change index, rebuilding it if the appointments cache was replaced"""
+    global _change_index_source, _last_change_stamp
+    appointments = _data_cache["appointments"]
+    with _change_lock:
+        if _change_index_source is not appointments:
+            stamps = {appt_id: appt.get("updated_at") or appt.get("created_at") or ""
+                      for appt_id, appt in appointments.items()}
+            for appt_id, deleted_at in _deleted_appointments().items():
+                if appt_id not in stamps:
+                    stamps[appt_id] = deleted_at
+            _change_stamps.clear()
+            _change_stamps.update(stamps)
+            _change_index[:] = sorted((stamp, appt_id) for appt_id, stamp in stamps.items())
+            _last_change_stamp = max(_last_change_stamp, _change_index[-1][0] if _change_index else "")
+            _change_index_source = appointments
+    return _change_index
+
+def _page_key(appointment_id, appointment):
+    """Sort key of an appointment in the admin list index"""
+    return (appointment.get("date") or "", appointment.get("time") or "", str(appointment_id))
+
+def _page_filters(appointment):
+    """(status, barber_id) index lists an appointment belongs to"""
+    status, barber_id = appointment.get("status") or None, appointment.get("barber_id") or None
+    return tuple(dict.fromkeys([(None, None), (status, None), (None, barber_id), (status, barber_id)]))
+
+def _get_page_index():
+    """Get the admin list index, rebuilding it if the appointments cache was replaced"""
+    global _page_index_source
+    appointments = _data_cache["appointments"]
+    with _change_lock:
+        if _page_index_source is not appointments:
+            _page_index.clear()
+            _page_keys.clear()
+            for appt_id, appt in appointments.items():
+                key, filters = _page_key(appt_id, appt), _page_filters(appt)
+                _page_keys[appt_id] = (key, filters)
+                for page_filter in filters:
+                    _page_index.setdefault(page_filter, []).append(key)
+            for keys in _page_index.values():
+                keys.sort()
+            _page_index_source = appointments
+    return _page_index
+
+def _index_page(appointment_id):
+    """Re-file an appointment in the admin list index after it was written or deleted"""
+    index = _get_page_index()
+    old = _page_keys.pop(appointment_id, None)
+    if old is not None:
+        key, filters = old
+        for page_filter in filters:
+            keys = index[page_filter]
+            position = bisect.bisect_left(keys, key)
+            if position < len(keys) and keys[position] == key:
+                del keys[position]
+            if not keys:
+                del index[page_filter]
+    
+    appointment = _data_cache["appointments"].get(appointment_id)
+    if appointment is not None:
+        key, filters = _page_key(appointment_id, appointment), _page_filters(appointment)
+        _page_keys[appointment_id] = (key, filters)
+        for page_filter in filters:
+            bisect.insort(index.setdefault(page_filter, []), key)
+
+def _next_change_stamp():
+    """Current local time as an ISO timestamp, strictly after the previous change"""
+    global _last_change_stamp
+    stamp = datetime.now().isoformat(timespec='microseconds')
+    if stamp <= _last_change_stamp:
+        stamp = (datetime.fromisoformat(_last_change_stamp) + timedelta(microseconds=1)).isoformat(timespec='microseconds')
+    _last_change_stamp = stamp
+    return stamp
+
+def _record_change(appointment_id, deleted=False):
+    """
+    Move an appointment to the end of the change log and re-file it in the admin list index
+    
+    Must be called with _change_lock held, after the cache was changed, so
+    readers never see a change stamped earlier than one they already read.
+    """
+    index = _get_change_index()
+    old_stamp = _change_stamps.get(appointment_id)
+    if old_stamp is not None:
+        position = bisect.bisect_left(index, (old_stamp, appointment_id))
+        if position < len(index) and index[position] == (old_stamp, appointment_id):
+            del index[position]
+    
+    stamp = _next_change_stamp()
+    if deleted:
+        _deleted_appointments()[appointment_id] = stamp
+    else:
+        _deleted_appointments().pop(appointment_id, None)
+        _data_cache["appointments"][appointment_id]["updated_at"] = stamp
+    
+    _change_stamps[appointment_id] = stamp
+    index.append((stamp, appointment_id))
+    _index_page(appointment_id)
+
+def _tombstone_horizon():
+    """Deletes older than this are forgotten"""
+    return (datetime.now() - timedelta(days=CHANGE_FEED_TOMBSTONE_DAYS)).isoformat(timespec='microseconds')
+
+def _purge_tombstones():
+    """Forget deletes older than CHANGE_FEED_TOMBSTONE_DAYS"""
+    horizon = _tombstone_horizon()
+    deleted = _deleted_appointments()
+    expired = {appt_id for appt_id, deleted_at in deleted.items() if deleted_at < horizon}
+    if not expired:
+        return
+    for appt_id in expired:
+        del deleted[appt_id]
+        _change_stamps.pop(appt_id, None)
+    _change_index[:] = [entry for entry in _change_index if entry[1] not in expired]
+
+def get_appointment_changes(cursor=None, limit=100):
+    """
+    Get appointments created, updated or deleted after a cursor
+    
+    Every write moves the appointment to the end of an in-memory change log
+    ordered by updated_at, so a page costs O(log n + limit) no matter how
+    many appointments exist. Deletes are returned as tombstones.
+    
+    The cursor holds the position in the log and the time the client's sync
+    started. It is only rejected when both are older than the tombstones
+    kept, i.e. when the client may have missed a forgotten delete.
+    
+    Args:
+        cursor: next_cursor from the previous call, or None to start from the beginning
+        limit: Maximum number of changes to return
+        
+    Returns:
+        dict: 'items' (changes, oldest first), 'next_cursor', 'has_more' and
+        'reset' (True if the cursor is invalid or expired, so the client must
+        drop its copy and sync from scratch)
+    """
+    global _last_change_stamp
+    # A writer in another process stamps its change before it writes the file
+    # and bumps the shared counter, all under the shared lock. Holding that
+    # lock here keeps a "caught up" cursor from being stamped in between,
+    # which would skip the change once it lands.
+    with _shared_versions().lock():
+        _sync("appointments")
+        after = decode_cursor(cursor, 3)
+        horizon = _tombstone_horizon()
+        if cursor and (not after or (after[0] < horizon and after[2] < horizon)):
+            return {'items': [], 'next_cursor': None, 'has_more': False, 'reset': True}
+    
+        with _change_lock:
+            index = _get_change_index()
+            start = bisect.bisect_right(index, (after[0], after[1])) if after else 0
+            page = index[start:start + limit]
+            has_more = start + limit < len(index)
+        
+            items = []
+            for stamp, appt_id in page:
+                appointment = _data_cache["appointments"].get(appt_id)
+                if appointment is None:
+                    items.append({'id': appt_id, 'deleted': True, 'updated_at': stamp})
+                else:
+                    items.append({'id': appt_id, 'deleted': False, 'updated_at': stamp, 'data': dict(appointment)})
+        
+            if has_more:
+                position = list(page[-1])
+            else:
+                # Caught up: move the cursor to now, so a quiet log does not let it
+                # expire, and make every later change stamp sort after it
+                _last_change_stamp = max(_last_change_stamp, datetime.now().isoformat(timespec='microseconds'))
+                position = [_last_change_stamp, ""]
+    
+    started_at = after[2] if after else datetime.now().isoformat(timespec='microseconds')
+    next_cursor = encode_cursor(position + [started_at])
+    return {'items': items, 'next_cursor': next_cursor, 'has_more': has_more, 'reset': False}
+
+@_exclusive("appointments")
 def create_appointment(appointment_data):
     """Create a new appointment"""
     # Generate a new ID
-    appointment_id = str(int(time.time() * 1000))
+    appointment_id = _next_ids("appointments", 1)[0]
     appointment_data["id"] = appointment_id
     
     # Add to cache
-    _data_cache["appointments"][appointment_id] = appointment_data
+    with _change_lock:
+        _data_cache["appointments"][appointment_id] = appointment_data
+        _record_change(appointment_id)
     
     # Save to file
-    file_data = {"appointments": _data_cache["appointments"]}
-    if _write_file(APPOINTMENTS_FILE, file_data):
+    if _save_appointments():
         return appointment_data
     return None
 
+@_exclusive("appointments")
+def bulk_create_appointments(appointments_data):
+    """
+    Create many appointments with a single file write
+    
+    Args:
+        appointments_data: List of appointment dicts (already validated)
+        
+    Returns:
+        list: Created appointment dicts, or None if the file could not be written
+    """
+    if not appointments_data:
+        return []
+    
+    appointments = _data_cache["appointments"]
+    created = []
+    with _change_lock:
+        for appointment_id, appointment_data in zip(_next_ids("appointments", len(appointments_data)), appointments_data):
+            appointment_data["id"] = appointment_id
+            appointments[appointment_id] = appointment_data
+            _record_change(appointment_id)
+            created.append(appointment_data)
+    
+    # Save to file once for the whole batch
+    if _save_appointments():
+        return created
+    return None
+
+@_exclusive("appointments")
 def update_appointment(appointment_id, appointment_data):
     """Update an existing appointment"""
     if appointment_id not in _data_cache["appointments"]:
         return None
     
     # Update cache
-    _data_cache["appointments"][appointment_id].update(appointment_data)
+    with _change_lock:
+        _data_cache["appointments"][appointment_id].update(appointment_data)
+        _record_change(appointment_id)
     
     # Save to file
-    file_data = {"appointments": _data_cache["appointments"]}
-    if _write_file(APPOINTMENTS_FILE, file_data):
+    if _save_appointments():
         return _data_cache["appointments"][appointment_id]
     return None
 
+@_exclusive("appointments")
 def delete_appointment(appointment_id):
     """Delete an appointment"""
     if appointment_id not in _data_cache["appointments"]:
         return False
     
-    # Remove from cache
-    del _data_cache["appointments"][appointment_id]
+    # Remove from cache, leaving a tombstone for the change feed
+    with _change_lock:
+        del _data_cache["appointments"][appointment_id]
+        _record_change(appointment_id, deleted=True)
+        _purge_tombstones()
     
     # Save to file
-    file_data = {"appointments": _data_cache["appointments"]}
-    return _write_file(APPOINTMENTS_FILE, file_data)
+    return _save_appointments()
 
 # Barber CRUD operations
 def get_barbers():
     """Get all barbers"""
+    _sync("barbers")
     return _data_cache["barbers"]
 
 def get_barber(barber_id):
     """Get a barber by ID"""
+    _sync("barbers")
     return _data_cache["barbers"].get(barber_id)
 
+@_exclusive("barbers")
 def create_barber(barber_data):
     """Create a new barber"""
     # Generate a new ID
-    barber_id = str(int(time.time() * 1000))
+    barber_id = _next_ids("barbers", 1)[0]
     barber_data["id"] = barber_id
     
     # Add to cache
-    _data_cache["barbers"][barber_id] = barber_data
+    barbers = _set_catalog("barbers", {**_data_cache["barbers"], barber_id: barber_data})
     
     # Save to file
-    file_data = {"barbers": _data_cache["barbers"]}
+    file_data = {"barbers": barbers}
     if _write_file(BARBERS_FILE, file_data):
-        return barber_data
+        return barbers[barber_id]
     return None
 
+@_exclusive("barbers")
 def update_barber(barber_id, barber_data):
     """Update an existing barber"""
     if barber_id not in _data_cache["barbers"]:
         return None
     
     # Update cache
-    _data_cache["barbers"][barber_id].update(barber_data)
+    barbers = dict(_data_cache["barbers"])
+    barbers[barber_id] = {**barbers[barber_id], **barber_data}
+    barbers = _set_catalog("barbers", barbers)
     
     # Save to file
-    file_data = {"barbers": _data_cache["barbers"]}
+    file_data = {"barbers": barbers}
     if _write_file(BARBERS_FILE, file_data):
-        return _data_cache["barbers"][barber_id]
+        return barbers[barber_id]
     return None
 
+@_exclusive("barbers")
 def delete_barber(barber_id):
     """Delete a barber"""
     if barber_id not in _data_cache["barbers"]:
         return False
     
     # Remove from cache
-    del _data_cache["barbers"][barber_id]
+    barbers = _set_catalog("barbers", {key: value for key, value in _data_cache["barbers"].items() if key != barber_id})
     
     # Save to file
-    file_data = {"barbers": _data_cache["barbers"]}
+    file_data = {"barbers": barbers}
     return _write_file(BARBERS_FILE, file_data)
 
 # Service CRUD operations
 def get_services():
     """Get all services"""
+    _sync("services")
     return _data_cache["services"]
 
 def get_service(service_id):
     """Get a service by ID"""
+    _sync("services")
     return _data_cache["services"].get(service_id)
 
+@_exclusive("services")
 def create_service(service_data):
     """Create a new service"""
     # Generate a new ID
-    service_id = str(int(time.time() * 1000))
+    service_id = _next_ids("services", 1)[0]
     service_data["id"] = service_id
     
     # Add to cache
-    _data_cache["services"][service_id] = service_data
+    services = _set_catalog("services", {**_data_cache["services"], service_id: service_data})
     
     # Save to file
-    file_data = {"services": _data_cache["services"]}
+    file_data = {"services": services}
     if _write_file(SERVICES_FILE, file_data):
-        return service_data
+        return services[service_id]
     return None
 
+@_exclusive("services")
 def update_service(service_id, service_data):
     """Update an existing service"""
     if service_id not in _data_cache["services"]:
         return None
     
     # Update cache
-    _data_cache["services"][service_id].update(service_data)
+    services = dict(_data_cache["services"])
+    services[service_id] = {**services[service_id], **service_data}
+    services = _set_catalog("services", services)
     
     # Save to file
-    file_data = {"services": _data_cache["services"]}
+    file_data = {"services": services}
     if _write_file(SERVICES_FILE, file_data):
-        return _data_cache["services"][service_id]
+        return services[service_id]
     return None
 
+@_exclusive("services")
 def delete_service(service_id):
     """Delete a service"""
     if service_id not in _data_cache["services"]:
         return False
     
     # Remove from cache
-    del _data_cache["services"][service_id]
+    services = _set_catalog("services", {key: value for key, value in _data_cache["services"].items() if key != service_id})
     
     # Save to file
-    file_data = {"services": _data_cache["services"]}
+    file_data = {"services": services}
     return _write_file(SERVICES_FILE, file_data)
 
 def check_availability(date, time, barber_id=None):
@@ -2,11 +2,30 @@
 Database service for managing data storage and retrieval from PostgreSQL database
 """
 import logging
-from datetime import datetime
-from models.database import db, Customer, Barber, Service, Appointment, ConversationState
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from utils.helpers import encode_cursor, decode_cursor
+from services import search_service, version_service
+from config import CHANGE_FEED_TOMBSTONE_DAYS, CHANGE_FEED_SETTLE_SECONDS, CAMPAIGN_HEARTBEAT_TIMEOUT
+from models.database import db, Customer, Barber, Service, Appointment, AppointmentTombstone, ConversationState, MessageDelivery, Campaign, TableVersion, VERSIONED_TABLES
 
 logger = logging.getLogger(__name__)
 
+# Customer search index for this process. Writes made here update it directly.
+# It is built inline on first use or when the app's database engine changes;
+# after CUSTOMER_SEARCH_INDEX_TTL seconds a background thread rebuilds it to
+# pick up writes from other processes while searches keep using the old one.
+# Writes made during a rebuild are queued in 'pending' and replayed onto the
+# new index when it is swapped in.
+CUSTOMER_SEARCH_INDEX_TTL = 60
+_search_index = search_service.CustomerSearchIndex()
+_search_index_state = {'engine': None, 'built_at': 0.0, 'pending': None, 'thread': None}
+_search_index_lock = threading.Lock()
+
 def initialize():
     """Initialize database connection"""
     logger.info("Database service initialized")
@@ -56,7 +75,9 @@ def create_customer(customer_data):
         
         db.session.add(customer)
         db.session.commit()
+        version_service.bump('customers')
         
+        _index_customer(customer.id, customer.name, customer.phone)
         return customer.to_dict()
     except Exception as e:
         db.session.rollback()
@@ -82,7 +103,9 @@ def update_customer(customer_id, customer_data):
             customer.last_visit = customer_data.get('last_visit')
         
         db.session.commit()
+        version_service.bump('customers')
         
+        _index_customer(customer.id, customer.name, customer.phone)
         return customer.to_dict()
     except Exception as e:
         db.session.rollback()
@@ -96,15 +119,229 @@ def delete_customer(customer_id):
         if not customer:
             return False
         
+        # Appointments go with the customer; the change feed must report them
+        appointment_ids = [appt.id for appt in customer.appointments]
+        _add_tombstones(appointment_ids)
+        
         db.session.delete(customer)
         db.session.commit()
+        version_service.bump('customers')
+        if appointment_ids:
+            version_service.bump('appointments')
         
+        _index_customer(customer_id, removed=True)
         return True
     except Exception as e:
         db.session.rollback()
         logger.error(f"Error deleting customer {customer_id}: {str(e)}")
         return False
 
+def _rebuild_search_index(engine):
+    """Build a new customer search index from the database and swap it in"""
+    global _search_index
+    try:
+        rows = Customer.query.with_entities(Customer.id, Customer.name, Customer.phone).all()
+        index = search_service.CustomerSearchIndex()
+        index.rebuild(tuple(row) for row in rows)
+    except Exception:
+        with _search_index_lock:
+            _search_index_state['pending'] = None
+        raise
+    
+    with _search_index_lock:
+        for customer_id, name, phone, removed in _search_index_state['pending'] or ():
+            if removed:
+                index.remove(customer_id)
+            else:
+                index.add(customer_id, name, phone)
+        _search_index = index
+        _search_index_state.update(engine=engine, built_at=time.monotonic(), pending=None)
+
+def _refresh_search_index(app, engine):
+    """Background thread target rebuilding a stale search index"""
+    try:
+        with app.app_context():
+            _rebuild_search_index(engine)
+    except Exception as e:
+        logger.error(f"Error refreshing customer search index: {str(e)}")
+
+def _get_search_index():
+    """Get the customer search index, building or refreshing it when stale"""
+    engine = db.engine
+    if _search_index_state['engine'] is not engine:
+        with _search_index_lock:
+            _search_index_state['pending'] = []
+        _rebuild_search_index(engine)
+    elif time.monotonic() - _search_index_state['built_at'] > CUSTOMER_SEARCH_INDEX_TTL:
+        with _search_index_lock:
+            if _search_index_state['pending'] is None:
+                _search_index_state['pending'] = []
+                thread = threading.Thread(target=_refresh_search_index, name='customer-search-refresh',
+                                          args=(current_app._get_current_object(), engine), daemon=True)
+                _search_index_state['thread'] = thread
+                thread.start()
+    return _search_index
+
+def _index_customer(customer_id, name=None, phone=None, removed=False):
+    """Apply a committed customer write to the search index if it is built, and to a rebuild in progress"""
+    with _search_index_lock:
+        if _search_index_state['pending'] is not None:
+            _search_index_state['pending'].append((customer_id, name, phone, removed))
+        if _search_index_state['engine'] is db.engine:
+            if removed:
+                _search_index.remove(customer_id)
+            else:
+                _search_index.add(customer_id, name, phone)
+
+def search_customers(query, limit=20, offset=0):
+    """
+    Search customers by name prefix, fuzzy name or phone suffix
+    
+    Args:
+        query: Search text; an empty query lists customers by name
+        limit: Maximum number of customers to return
+        offset: Number of matches to skip
+        
+    Returns:
+        dict: 'items' (customer dicts), 'total' and 'next_offset' (None on the last page)
+    """
+    try:
+        customer_ids, total = _get_search_index().search(query, limit=limit, offset=offset)
+        
+        customers = {}
+        if customer_ids:
+            customers = {c.id: c for c in Customer.query.filter(Customer.id.in_(customer_ids)).all()}
+        
+        return {
+            'items': [customers[cust_id].to_dict() for cust_id in customer_ids if cust_id in customers],
+            'total': total,
+            'next_offset': offset + limit if offset + limit < total else None
+        }
+    except Exception as e:
+        logger.error(f"Error searching customers for '{query}': {str(e)}")
+        return {'items': [], 'total': 0, 'next_offset': None}
+
+def iter_customers_for_export(batch_size=1000):
+    """
+    Stream customers for export, one cursor batch in memory at a time
+    
+    Args:
+        batch_size: Number of rows fetched from the cursor at a time
+        
+    Yields:
+        dict: Customer dict ordered by name
+    """
+    query = db.session.query(
+        Customer.id,
+        Customer.name,
+        Customer.phone,
+        Customer.email,
+        Customer.notes,
+        Customer.created_at,
+        Customer.last_visit
+    ).order_by(Customer.name, Customer.id) \
+     .execution_options(stream_results=True, yield_per=batch_size)
+    
+    for row in query:
+        item = row._asdict()
+        item['created_at'] = row.created_at.isoformat() if row.created_at else None
+        item['last_visit'] = row.last_visit.isoformat() if row.last_visit else None
+        yield item
+
+def get_customer_ids_by_phone(phones):
+    """
+    Look up existing customers for a batch of phone numbers
+    
+    Args:
+        phones: Iterable of phone numbers
+        
+    Returns:
+        dict: Customer IDs keyed by phone, for the phones that exist
+    """
+    try:
+        phones = list(set(phones))
+        if not phones:
+            return {}
+        rows = db.session.query(Customer.phone, Customer.id).filter(Customer.phone.in_(phones)).all()
+        return {phone: customer_id for phone, customer_id in rows}
+    except Exception as e:
+        logger.error(f"Error looking up customers by phone: {str(e)}")
+        return {}
+
+def _bulk_insert(model, rows, name):
+    """
+    Insert rows with one executemany, falling back to per-row savepoints
+    
+    Args:
+        model: Model class to insert into
+        rows: List of column dicts, each with its own 'id'
+        name: Entity name for log messages
+        
+    Returns:
+        list: The inserted row dicts, with None for rows that failed
+    """
+    if not rows:
+        return []
+    
+    try:
+        db.session.execute(db.insert(model), rows)
+        db.session.commit()
+        return list(rows)
+    except Exception as e:
+        db.session.rollback()
+        logger.warning(f"Batch insert of {len(rows)} {name} failed, retrying row by row: {str(e)}")
+    
+    # Isolate the bad rows so the rest of the batch is still imported
+    inserted = []
+    for row in rows:
+        try:
+            with db.session.begin_nested():
+                db.session.execute(db.insert(model), [row])
+            inserted.append(row)
+        except Exception as e:
+            logger.error(f"Error inserting {name} row {row.get('id')}: {str(e)}")
+            inserted.append(None)
+    
+    try:
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error committing {name} batch: {str(e)}")
+        return [None] * len(rows)
+    return inserted
+
+def bulk_create_customers(customers_data):
+    """
+    Create many customers with a single batched insert
+    
+    Args:
+        customers_data: List of customer dicts (already validated)
+        
+    Returns:
+        list: Created customer dicts, with None for rows that could not be inserted
+    """
+    now = datetime.utcnow()
+    rows = [{
+        'id': str(uuid.uuid4()),
+        'name': customer_data.get('name'),
+        'phone': customer_data.get('phone'),
+        'email': customer_data.get('email'),
+        'notes': customer_data.get('notes'),
+        'created_at': now
+    } for customer_data in customers_data]
+    
+    created = _bulk_insert(Customer, rows, 'customers')
+    version_service.bump('customers')
+    
+    results = []
+    for row in created:
+        if row is None:
+            results.append(None)
+            continue
+        _index_customer(row['id'], row['name'], row['phone'])
+        results.append(dict(row, created_at=now.isoformat(), last_visit=None))
+    return results
+
 # Appointment operations
 def get_appointments():
     """Get all appointments"""
@@ -153,6 +390,327 @@ def get_appointments_by_barber(barber_id):
         logger.error(f"Error getting appointments for barber {barber_id}: {str(e)}")
         return {}
 
+def get_upcoming_appointments(start_date, end_date, status='scheduled', limit=None):
+    """
+    Get appointments in a date range together with customer, barber and service names
+    
+    Everything is loaded in one joined query instead of one lookup per
+    appointment. Outer joins keep appointments whose related rows were deleted.
+    
+    Args:
+        start_date: First date to include (date object)
+        end_date: Last date to include (date object)
+        status: Only include appointments with this status, or None for all
+        limit: Maximum number of appointments to return
+        
+    Returns:
+        list: Appointment dicts ordered by date and time, each with
+        customer_name, barber_name and service_name keys
+    """
+    try:
+        query = db.session.query(
+            Appointment.id,
+            Appointment.customer_id,
+            Appointment.barber_id,
+            Appointment.service_id,
+            Appointment.date,
+            Appointment.time,
+            Appointment.duration,
+            Appointment.status,
+            Customer.name.label('customer_name'),
+            Barber.name.label('barber_name'),
+            Service.name.label('service_name')
+        ).outerjoin(Customer, Appointment.customer_id == Customer.id) \
+         .outerjoin(Barber, Appointment.barber_id == Barber.id) \
+         .outerjoin(Service, Appointment.service_id == Service.id) \
+         .filter(Appointment.date >= start_date, Appointment.date <= end_date)
+        
+        if status:
+            query = query.filter(Appointment.status == status)
+        
+        query = query.order_by(Appointment.date, Appointment.time)
+        if limit:
+            query = query.limit(limit)
+        
+        appointments = []
+        for row in query.all():
+            appointment = row._asdict()
+            appointment['date'] = row.date.strftime('%Y-%m-%d') if row.date else None
+            for name_field in ('customer_name', 'barber_name', 'service_name'):
+                appointment[name_field] = appointment[name_field] or 'Unknown'
+            appointments.append(appointment)
+        
+        return appointments
+    except Exception as e:
+        logger.error(f"Error getting appointments from {start_date} to {end_date}: {str(e)}")
+        return []
+
+def get_appointment_status_counts():
+    """Get the number of appointments per status with a single GROUP BY query, or None on error"""
+    try:
+        rows = db.session.query(Appointment.status, db.func.count(Appointment.id)) \
+            .group_by(Appointment.status).all()
+        return {status: count for status, count in rows}
+    except Exception as e:
+        logger.error(f"Error getting appointment status counts: {str(e)}")
+        return None
+
+def _estimate_appointment_count(query, filtered):
+    """
+    Count the rows matched by an appointment query
+    
+    On PostgreSQL an unfiltered count uses the planner's row estimate from
+    pg_class instead of scanning the whole table.
+    """
+    if not filtered and db.engine.dialect.name == 'postgresql':
+        estimate = db.session.execute(
+            db.text("SELECT reltuples::bigint FROM pg_class WHERE relname = 'appointments'")
+        ).scalar()
+        if estimate is not None and estimate >= 0:
+            return estimate, True
+    
+    return query.order_by(None).count(), False
+
+def get_appointments_page(status=None, date=None, barber_id=None, cursor=None, limit=50):
+    """
+    Get one page of appointments, newest first, with keyset pagination
+    
+    Filters, ordering and the page limit are applied in SQL, and the
+    customer, barber and service names come from the same joined query, so
+    the cost of a page does not depend on how many appointments exist.
+    
+    Args:
+        status: Only include appointments with this status
+        date: Only include appointments on this date (YYYY-MM-DD)
+        barber_id: Only include appointments with this barber
+        cursor: next_cursor from the previous page, or None for the first page
+        limit: Maximum number of appointments on the page
+        
+    Returns:
+        dict: 'items' (appointment dicts), 'next_cursor' (None on the last page),
+        'total' and 'total_is_estimate'
+    """
+    try:
+        query = db.session.query(
+            Appointment.id,
+            Appointment.customer_id,
+            Appointment.barber_id,
+            Appointment.service_id,
+            Appointment.date,
+            Appointment.time,
+            Appointment.status,
+            Appointment.created_at,
+            Appointment.updated_at,
+            Customer.name.label('customer_name'),
+            Barber.name.label('barber_name'),
+            Service.name.label('service_name')
+        ).outerjoin(Customer, Appointment.customer_id == Customer.id) \
+         .outerjoin(Barber, Appointment.barber_id == Barber.id) \
+         .outerjoin(Service, Appointment.service_id == Service.id)
+        
+        if status:
+            query = query.filter(Appointment.status == status)
+        if date:
+            query = query.filter(Appointment.date == datetime.strptime(date, '%Y-%m-%d').date())
+        if barber_id:
+            query = query.filter(Appointment.barber_id == barber_id)
+        
+        total, total_is_estimate = _estimate_appointment_count(query, bool(status or date or barber_id))
+        
+        after = decode_cursor(cursor, 3)
+        if after:
+            after_date = datetime.strptime(after[0], '%Y-%m-%d').date()
+            after_time, after_id = after[1], after[2]
+            query = query.filter(db.or_(
+                Appointment.date < after_date,
+                db.and_(Appointment.date == after_date, Appointment.time < after_time),
+                db.and_(Appointment.date == after_date, Appointment.time == after_time, Appointment.id < after_id)
+            ))
+        
+        rows = query.order_by(Appointment.date.desc(), Appointment.time.desc(), Appointment.id.desc()) \
+            .limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        
+        items = []
+        for row in rows:
+            item = row._asdict()
+            item['date'] = row.date.strftime('%Y-%m-%d') if row.date else ''
+            item['created_at'] = row.created_at.isoformat() if row.created_at else ''
+            item['updated_at'] = row.updated_at.isoformat() if row.updated_at else ''
+            items.append(item)
+        
+        next_cursor = None
+        if has_more:
+            last = items[-1]
+            next_cursor = encode_cursor([last['date'], last['time'] or '', last['id']])
+        
+        return {
+            'items': items,
+            'next_cursor': next_cursor,
+            'total': total,
+            'total_is_estimate': total_is_estimate
+        }
+    except Exception as e:
+        logger.error(f"Error getting appointments page: {str(e)}")
+        return {'items': [], 'next_cursor': None, 'total': 0, 'total_is_estimate': False}
+
+def get_table_counts():
+    """Count customers, appointments, barbers and services in a single round trip, or None on error"""
+    try:
+        counts = db.session.query(
+            db.session.query(db.func.count(Customer.id)).scalar_subquery().label('customers'),
+            db.session.query(db.func.count(Appointment.id)).scalar_subquery().label('appointments'),
+            db.session.query(db.func.count(Barber.id)).scalar_subquery().label('barbers'),
+            db.session.query(db.func.count(Service.id)).scalar_subquery().label('services')
+        ).one()
+        return counts._asdict()
+    except Exception as e:
+        logger.error(f"Error counting tables: {str(e)}")
+        return None
+
+def table_version(collections):
+    """
+    Version of tables as every worker process sees it, for conditional GETs
+    
+    Reads the write counters in table_versions, which every ORM insert,
+    update or delete bumps in its own transaction, so this is one
+    primary-key lookup however large the tables are. Customers are not
+    versioned and are not supported.
+    
+    Args:
+        collections: Names from VERSIONED_TABLES
+        
+    Returns:
+        tuple: (version, last modified datetime or None) in the form
+        version_service.conditional expects
+    """
+    unknown = set(collections) - set(VERSIONED_TABLES)
+    if unknown:
+        raise KeyError(', '.join(sorted(unknown)))
+    
+    try:
+        rows = {row.name: row for row in TableVersion.query.filter(TableVersion.name.in_(collections))}
+        # Tables not written since the counters were added are at version 0
+        version = tuple(str(rows[name].version) if name in rows else '0' for name in collections)
+        modified = [row.updated_at for row in rows.values() if row.updated_at is not None]
+        return version, (max(modified).replace(tzinfo=timezone.utc) if modified else None)
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error reading table versions: {str(e)}")
+        # A tag that matches nothing: the view runs and answers normally
+        return uuid.uuid4().hex, None
+
+def get_appointment_counts_by_barber(status=None):
+    """
+    Count appointments per barber with a single GROUP BY query
+    
+    Args:
+        status: Only count appointments with this status
+        
+    Returns:
+        list: Dicts with barber_id, barber_name and count, busiest barber first,
+        or None if the query failed
+    """
+    try:
+        query = db.session.query(
+            Appointment.barber_id,
+            Barber.name,
+            db.func.count(Appointment.id).label('count')
+        ).outerjoin(Barber, Appointment.barber_id == Barber.id)
+        
+        if status:
+            query = query.filter(Appointment.status == status)
+        
+        rows = query.group_by(Appointment.barber_id, Barber.name) \
+            .order_by(db.func.count(Appointment.id).desc(), Barber.name).all()
+        return [
+            {'barber_id': barber_id, 'barber_name': name or 'Unknown', 'count': count}
+            for barber_id, name, count in rows
+        ]
+    except Exception as e:
+        logger.error(f"Error counting appointments by barber: {str(e)}")
+        return None
+
+def get_appointment_rows_for_analytics(start_date, end_date):
+    """
+    Get the columns analytics needs for appointments in a date range
+    
+    Args:
+        start_date: First date to include (date object)
+        end_date: Last date to include (date object)
+        
+    Returns:
+        list: (date, time, duration, status, barber_id, service_id, price) tuples,
+        with the service's duration when the appointment has none
+    """
+    try:
+        return db.session.query(
+            Appointment.date,
+            Appointment.time,
+            db.func.coalesce(Appointment.duration, Service.duration, 0),
+            Appointment.status,
+            Appointment.barber_id,
+            Appointment.service_id,
+            db.func.coalesce(Service.price, 0.0)
+        ).outerjoin(Service, Appointment.service_id == Service.id) \
+         .filter(Appointment.date >= start_date, Appointment.date <= end_date) \
+         .all()
+    except Exception as e:
+        logger.error(f"Error getting appointments for analytics: {str(e)}")
+        return []
+
+def iter_appointments_for_export(start_date=None, end_date=None, status=None, batch_size=1000):
+    """
+    Stream appointments with customer, barber and service details for export
+    
+    Rows are fetched with yield_per and a streaming cursor, so only one batch
+    is held in memory however many appointments match.
+    
+    Args:
+        start_date: First date to include (date object), or None
+        end_date: Last date to include (date object), or None
+        status: Only include appointments with this status
+        batch_size: Number of rows fetched from the cursor at a time
+        
+    Yields:
+        dict: Flat appointment row ordered by date and time
+    """
+    query = db.session.query(
+        Appointment.id,
+        Appointment.date,
+        Appointment.time,
+        Appointment.duration,
+        Appointment.status,
+        Customer.name.label('customer_name'),
+        Customer.phone.label('customer_phone'),
+        Barber.name.label('barber_name'),
+        Service.name.label('service_name'),
+        Service.price.label('service_price'),
+        Appointment.notes,
+        Appointment.created_at,
+        Appointment.updated_at
+    ).outerjoin(Customer, Appointment.customer_id == Customer.id) \
+     .outerjoin(Barber, Appointment.barber_id == Barber.id) \
+     .outerjoin(Service, Appointment.service_id == Service.id)
+    
+    if start_date:
+        query = query.filter(Appointment.date >= start_date)
+    if end_date:
+        query = query.filter(Appointment.date <= end_date)
+    if status:
+        query = query.filter(Appointment.status == status)
+    
+    query = query.order_by(Appointment.date, Appointment.time, Appointment.id) \
+        .execution_options(stream_results=True, yield_per=batch_size)
+    
+    for row in query:
+        item = row._asdict()
+        item['date'] = row.date.strftime('%Y-%m-%d') if row.date else None
+        item['created_at'] = row.created_at.isoformat() if row.created_at else None
+        item['updated_at'] = row.updated_at.isoformat() if row.updated_at else None
+        yield item
+
 def create_appointment(appointment_data):
     """Create a new appointment"""
     try:
@@ -177,6 +735,7 @@ def create_appointment(appointment_data):
         
         db.session.add(appointment)
         db.session.commit()
+        version_service.bump('appointments')
         
         return appointment.to_dict()
     except Exception as e:
@@ -184,6 +743,40 @@ def create_appointment(appointment_data):
         logger.error(f"Error creating appointment: {str(e)}")
         return None
 
+def bulk_create_appointments(appointments_data):
+    """
+    Create many appointments with a single batched insert
+    
+    Args:
+        appointments_data: List of appointment dicts (already validated)
+        
+    Returns:
+        list: Created appointment dicts, with None for rows that could not be inserted
+    """
+    now = datetime.utcnow()
+    rows = [{
+        'id': str(uuid.uuid4()),
+        'customer_id': appointment_data.get('customer_id'),
+        'barber_id': appointment_data.get('barber_id'),
+        'service_id': appointment_data.get('service_id'),
+        'date': datetime.strptime(appointment_data['date'], '%Y-%m-%d').date(),
+        'time': appointment_data.get('time'),
+        'duration': appointment_data.get('duration'),
+        'status': appointment_data.get('status', 'scheduled'),
+        'notes': appointment_data.get('notes'),
+        'created_at': now,
+        'updated_at': now
+    } for appointment_data in appointments_data]
+    
+    created = _bulk_insert(Appointment, rows, 'appointments')
+    version_service.bump('appointments')
+    
+    return [
+        dict(row, date=row['date'].strftime('%Y-%m-%d'), created_at=now.isoformat(), updated_at=now.isoformat())
+        if row else None
+        for row in created
+    ]
+
 def update_appointment(appointment_id, appointment_data):
     """Update an existing appointment"""
     try:
@@ -213,6 +806,7 @@ def update_appointment(appointment_id, appointment_data):
         appointment.updated_at = datetime.utcnow()
         
         db.session.commit()
+        version_service.bump('appointments')
         
         return appointment.to_dict()
     except Exception as e:
@@ -228,7 +822,9 @@ def delete_appointment(appointment_id):
             return False
         
         db.session.delete(appointment)
+        _add_tombstones([appointment_id])
         db.session.commit()
+        version_service.bump('appointments')
         
         return True
     except Exception as e:
@@ -236,6 +832,91 @@ def delete_appointment(appointment_id):
         logger.error(f"Error deleting appointment {appointment_id}: {str(e)}")
         return False
 
+def _add_tombstones(appointment_ids):
+    """Record deleted appointments for the change feed and forget expired tombstones"""
+    now = datetime.utcnow()
+    for appointment_id in appointment_ids:
+        db.session.merge(AppointmentTombstone(appointment_id=appointment_id, deleted_at=now))
+    AppointmentTombstone.query.filter(
+        AppointmentTombstone.deleted_at < now - timedelta(days=CHANGE_FEED_TOMBSTONE_DAYS)
+    ).delete(synchronize_session=False)
+
+def get_appointment_changes(cursor=None, limit=100):
+    """
+    Get appointments created, updated or deleted after a cursor
+    
+    Appointments are read in (updated_at, id) order from their index and
+    deletes from the tombstones table, so a page costs O(limit) no matter
+    how many appointments exist. Changes younger than
+    CHANGE_FEED_SETTLE_SECONDS are held back, so a transaction that stamped
+    an earlier updated_at but commits later is never skipped.
+    
+    The cursor holds the position in the feed and the time the client's
+    sync started. It is only rejected when both are older than the
+    tombstones kept, i.e. when the client may have missed a forgotten delete.
+    
+    Args:
+        cursor: next_cursor from the previous call, or None to start from the beginning
+        limit: Maximum number of changes to return
+        
+    Returns:
+        dict: 'items' (changes, oldest first), 'next_cursor', 'has_more' and
+        'reset' (True if the cursor is invalid or expired, so the client must
+        drop its copy and sync from scratch)
+    """
+    now = datetime.utcnow()
+    horizon = now - timedelta(days=CHANGE_FEED_TOMBSTONE_DAYS)
+    after = decode_cursor(cursor, 3)
+    try:
+        after_stamp = datetime.fromisoformat(after[0]) if after else None
+        started_at = datetime.fromisoformat(after[2]) if after else now
+    except ValueError:
+        after_stamp, started_at = None, now
+    if cursor and (not after_stamp or (after_stamp < horizon and started_at < horizon)):
+        return {'items': [], 'next_cursor': None, 'has_more': False, 'reset': True}
+    
+    try:
+        settled = now - timedelta(seconds=CHANGE_FEED_SETTLE_SECONDS)
+        
+        def after_cursor(stamp_column, id_column):
+            if not after_stamp:
+                return stamp_column <= settled
+            return db.and_(stamp_column <= settled, db.or_(
+                stamp_column > after_stamp,
+                db.and_(stamp_column == after_stamp, id_column > after[1])
+            ))
+        
+        appointments = Appointment.query \
+            .filter(after_cursor(Appointment.updated_at, Appointment.id)) \
+            .order_by(Appointment.updated_at, Appointment.id) \
+            .limit(limit + 1).all()
+        tombstones = AppointmentTombstone.query \
+            .filter(after_cursor(AppointmentTombstone.deleted_at, AppointmentTombstone.appointment_id)) \
+            .order_by(AppointmentTombstone.deleted_at, AppointmentTombstone.appointment_id) \
+            .limit(limit + 1).all()
+        
+        changes = [(appt.updated_at, appt.id, appt) for appt in appointments]
+        changes += [(tomb.deleted_at, tomb.appointment_id, None) for tomb in tombstones]
+        changes.sort(key=lambda change: (change[0], change[1]))
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+        
+        items = []
+        for stamp, appointment_id, appointment in changes:
+            if appointment is None:
+                items.append({'id': appointment_id, 'deleted': True, 'updated_at': stamp.isoformat()})
+            else:
+                items.append({'id': appointment_id, 'deleted': False, 'updated_at': stamp.isoformat(),
+                              'data': appointment.to_dict()})
+        
+        # Once caught up, everything up to the settle point has been seen
+        position = [changes[-1][0].isoformat(), changes[-1][1]] if has_more else [settled.isoformat(), ""]
+        next_cursor = encode_cursor(position + [started_at.isoformat()])
+        return {'items': items, 'next_cursor': next_cursor, 'has_more': has_more, 'reset': False}
+    except Exception as e:
+        logger.error(f"Error getting appointment changes: {str(e)}")
+        return {'items': [], 'next_cursor': cursor, 'has_more': False, 'reset': False}
+
 # Barber operations
 def get_barbers():
     """Get all barbers"""
@@ -275,6 +956,7 @@ def create_barber(barber_data):
         
         db.session.add(barber)
         db.session.commit()
+        version_service.bump('barbers')
         
         return barber.to_dict()
     except Exception as e:
@@ -309,6 +991,7 @@ def update_barber(barber_id, barber_data):
         barber.updated_at = datetime.utcnow()
         
         db.session.commit()
+        version_service.bump('barbers')
         
         return barber.to_dict()
     except Exception as e:
@@ -325,6 +1008,7 @@ def delete_barber(barber_id):
         
         db.session.delete(barber)
         db.session.commit()
+        version_service.bump('barbers')
         
         return True
     except Exception as e:
@@ -369,6 +1053,7 @@ def create_service(service_data):
         
         db.session.add(service)
         db.session.commit()
+        version_service.bump('services')
         
         return service.to_dict()
     except Exception as e:
@@ -399,6 +1084,7 @@ def update_service(service_id, service_data):
         service.updated_at = datetime.utcnow()
         
         db.session.commit()
+        version_service.bump('services')
         
         return service.to_dict()
     except Exception as e:
@@ -415,6 +1101,7 @@ def delete_service(service_id):
         
         db.session.delete(service)
         db.session.commit()
+        version_service.bump('services')
         
         return True
     except Exception as e:
@@ -469,6 +1156,298 @@ def delete_conversation_state(phone_number):
         logger.error(f"Error deleting conversation state for {phone_number}: {str(e)}")
         return False
 
+# Message delivery operations
+
+# Order of non-terminal delivery statuses; a late callback never moves a message backwards
+MESSAGE_STATUS_RANK = {'accepted': 0, 'queued': 0, 'sending': 1, 'sent': 2, 'delivered': 3, 'read': 4}
+MESSAGE_FAILED_STATUSES = ('failed', 'undelivered')
+
+def _upsert_delivery(message_sid, apply):
+    """
+    Apply a change to a message's delivery row, creating the row if needed
+    
+    The send and its status callbacks can race to create the row, so a
+    duplicate insert is retried once against the row the other side created.
+    
+    Args:
+        message_sid: Twilio message SID
+        apply: Function called with the MessageDelivery to change it
+        
+    Returns:
+        bool: True once the change is committed
+    """
+    for attempt in range(2):
+        try:
+            delivery = MessageDelivery.query.get(message_sid)
+            if delivery is None:
+                delivery = MessageDelivery(message_sid=message_sid, status='queued', sent_at=datetime.utcnow())
+                db.session.add(delivery)
+            apply(delivery)
+            db.session.commit()
+            return True
+        except IntegrityError:
+            db.session.rollback()
+            if attempt:
+                raise
+    return False
+
+def record_message_sent(message_sid, to_phone, message_type='conversation', sent_at=None):
+    """
+    Record an outbound message so later status callbacks can be joined to it
+    
+    A status callback can arrive before the send is recorded. Its row is
+    kept and only filled in, so the status it brought is not overwritten.
+    
+    Args:
+        message_sid: Twilio message SID
+        to_phone: Recipient's phone number
+        message_type: Message category used for delivery metrics
+        sent_at: Time the send started (defaults to now)
+    """
+    def apply(delivery):
+        delivery.to_phone = to_phone
+        delivery.message_type = message_type
+        delivery.sent_at = sent_at or datetime.utcnow()
+        if delivery.status not in MESSAGE_FAILED_STATUSES and MESSAGE_STATUS_RANK.get(delivery.status, -1) < MESSAGE_STATUS_RANK['sent']:
+            delivery.status = 'sent'
+    
+    try:
+        return _upsert_delivery(message_sid, apply)
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error recording sent message {message_sid}: {str(e)}")
+        return False
+
+def record_message_status(message_sid, status, error_code=None, timestamp=None):
+    """
+    Apply a delivery status callback to a sent message
+    
+    A callback for a message whose send has not been recorded yet creates
+    its row; record_message_sent fills in the rest.
+    
+    Returns:
+        bool: False if the status is not a known delivery status
+    """
+    if status not in MESSAGE_STATUS_RANK and status not in MESSAGE_FAILED_STATUSES:
+        return False
+    timestamp = timestamp or datetime.utcnow()
+    
+    def apply(delivery):
+        if status in MESSAGE_FAILED_STATUSES:
+            delivery.status = status
+            delivery.error_code = error_code
+            delivery.failed_at = delivery.failed_at or timestamp
+            return
+        if status == 'delivered':
+            delivery.delivered_at = delivery.delivered_at or timestamp
+        elif status == 'read':
+            delivery.read_at = delivery.read_at or timestamp
+            # WhatsApp can report 'read' without a separate 'delivered' callback
+            delivery.delivered_at = delivery.delivered_at or timestamp
+        
+        current_rank = MESSAGE_STATUS_RANK.get(delivery.status, -1)
+        if delivery.status not in MESSAGE_FAILED_STATUSES and MESSAGE_STATUS_RANK[status] > current_rank:
+            delivery.status = status
+    
+    try:
+        return _upsert_delivery(message_sid, apply)
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error recording status {status} for message {message_sid}: {str(e)}")
+        return False
+
+def get_message_deliveries(since=None):
+    """Get message deliveries sent since the given datetime"""
+    try:
+        query = MessageDelivery.query
+        if since:
+            query = query.filter(MessageDelivery.sent_at >= since)
+        return [delivery.to_dict() for delivery in query.all()]
+    except Exception as e:
+        logger.error(f"Error getting message deliveries: {str(e)}")
+        return []
+
+# Campaign operations
+
+# Campaign fields that update_campaign is allowed to change
+CAMPAIGN_FIELDS = ('name', 'message', 'segment', 'status', 'sent_count', 'failed_count',
+                   'skipped_count', 'last_customer_id', 'error', 'started_at', 'completed_at')
+
+def get_campaigns():
+    """Get all campaigns, newest first"""
+    try:
+        campaigns = Campaign.query.order_by(Campaign.created_at.desc()).all()
+        return [campaign.to_dict() for campaign in campaigns]
+    except Exception as e:
+        logger.error(f"Error getting campaigns: {str(e)}")
+        return []
+
+def get_campaign(campaign_id):
+    """Get a campaign by ID"""
+    try:
+        campaign = Campaign.query.get(campaign_id)
+        if campaign:
+            return campaign.to_dict()
+        return None
+    except Exception as e:
+        logger.error(f"Error getting campaign {campaign_id}: {str(e)}")
+        return None
+
+def create_campaign(campaign_data):
+    """Create a new campaign in draft status"""
+    try:
+        campaign = Campaign(
+            name=campaign_data.get('name'),
+            message=campaign_data.get('message'),
+            segment=campaign_data.get('segment') or {},
+            status='draft',
+            created_at=datetime.utcnow()
+        )
+        
+        db.session.add(campaign)
+        db.session.commit()
+        
+        return campaign.to_dict()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error creating campaign: {str(e)}")
+        return None
+
+def update_campaign(campaign_id, campaign_data):
+    """Update campaign fields such as status and progress counters"""
+    try:
+        campaign = Campaign.query.get(campaign_id)
+        if not campaign:
+            return None
+        
+        for field in CAMPAIGN_FIELDS:
+            if field in campaign_data:
+                setattr(campaign, field, campaign_data[field])
+        
+        db.session.commit()
+        
+        return campaign.to_dict()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error updating campaign {campaign_id}: {str(e)}")
+        return None
+
+def claim_campaign(campaign_id, run_token, from_statuses=('draft', 'paused', 'failed'),
+                   stale_after=CAMPAIGN_HEARTBEAT_TIMEOUT):
+    """
+    Atomically move a campaign to 'running' and make run_token its owner
+    
+    A stopped campaign can only be claimed once its previous run released
+    it, and a 'running' one only when its owner has not sent a heartbeat
+    for stale_after seconds (the sender crashed). Returns True only for the
+    caller that made the change, so two runs can never send the same
+    campaign at once.
+    """
+    try:
+        now = datetime.utcnow()
+        expired = db.or_(Campaign.heartbeat_at.is_(None),
+                         Campaign.heartbeat_at < now - timedelta(seconds=stale_after))
+        claimed = Campaign.query.filter(
+            Campaign.id == campaign_id,
+            db.or_(
+                db.and_(Campaign.status.in_(from_statuses), db.or_(Campaign.run_token.is_(None), expired)),
+                db.and_(Campaign.status == 'running', expired)
+            )
+        ).update({'status': 'running', 'error': None, 'run_token': run_token, 'heartbeat_at': now},
+                 synchronize_session=False)
+        db.session.commit()
+        return claimed == 1
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error claiming campaign {campaign_id}: {str(e)}")
+        return False
+
+def heartbeat_campaign(campaign_id, run_token):
+    """
+    Record that a run is still sending a campaign
+    
+    Returns:
+        bool: True if run_token still owns the campaign and it is still 'running'
+    """
+    try:
+        owned = Campaign.query.filter(
+            Campaign.id == campaign_id,
+            Campaign.run_token == run_token,
+            Campaign.status == 'running'
+        ).update({'heartbeat_at': datetime.utcnow()}, synchronize_session=False)
+        db.session.commit()
+        return owned == 1
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error updating heartbeat of campaign {campaign_id}: {str(e)}")
+        return False
+
+def update_campaign_run(campaign_id, run_token, campaign_data):
+    """
+    Update a campaign's progress while run_token still owns it
+    
+    Also refreshes the heartbeat. Pass run_token=None in campaign_data to
+    release the campaign.
+    
+    Returns:
+        dict: Updated campaign, or None if another run took it over
+    """
+    try:
+        values = {field: campaign_data[field] for field in CAMPAIGN_FIELDS + ('run_token',) if field in campaign_data}
+        values['heartbeat_at'] = datetime.utcnow()
+        updated = Campaign.query.filter(
+            Campaign.id == campaign_id,
+            Campaign.run_token == run_token
+        ).update(values, synchronize_session=False)
+        db.session.commit()
+        return get_campaign(campaign_id) if updated else None
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error updating campaign {campaign_id}: {str(e)}")
+        return None
+
+def iter_campaign_recipients(segment, after_customer_id=None, until_customer_id=None, batch_size=500):
+    """
+    Stream (customer_id, name, phone) tuples for a campaign segment
+    
+    Customers are read in primary key order with keyset pagination, one
+    batch per query, so the full customer table is never loaded at once and
+    a run can resume after the last processed customer.
+    
+    Args:
+        segment: Segment filter, e.g. {'inactive_days': 42, 'include_never_visited': True}
+        after_customer_id: Only yield customers with a greater ID
+        until_customer_id: Only yield customers with an ID up to and including this one
+        batch_size: Number of rows fetched per query
+    """
+    segment = segment or {}
+    query = Customer.query.with_entities(Customer.id, Customer.name, Customer.phone)
+    
+    inactive_days = segment.get('inactive_days')
+    if inactive_days:
+        cutoff = datetime.utcnow() - timedelta(days=int(inactive_days))
+        if segment.get('include_never_visited'):
+            query = query.filter(db.or_(Customer.last_visit < cutoff, Customer.last_visit.is_(None)))
+        else:
+            query = query.filter(Customer.last_visit < cutoff)
+    
+    if until_customer_id:
+        query = query.filter(Customer.id <= until_customer_id)
+    
+    last_id = after_customer_id
+    while True:
+        batch_query = query
+        if last_id:
+            batch_query = batch_query.filter(Customer.id > last_id)
+        rows = batch_query.order_by(Customer.id).limit(batch_size).all()
+        
+        for row in rows:
+            yield tuple(row)
+        
+        if len(rows) < batch_size:
+            return
+        last_id = rows[-1][0]
+
 # Availability checking
 def check_availability(date, time, barber_id=None):
     """Check if a time slot is available"""
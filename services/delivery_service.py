@@ -0,0 +1,108 @@
+"""
+Delivery service for WhatsApp message status tracking and latency metrics
+"""
+import logging
+from datetime import datetime, timedelta
+
+from services import db_service
+
+logger = logging.getLogger(__name__)
+
+PERCENTILES = (50, 90, 99)
+
+def _parse_timestamp(value):
+    """Parse an ISO timestamp from a delivery record"""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(value)
+    except (ValueError, TypeError):
+        return None
+
+def percentile(sorted_values, pct):
+    """
+    Nearest-rank percentile of an already sorted list
+
+    Args:
+        sorted_values: Values sorted in ascending order
+        pct: Percentile between 0 and 100
+
+    Returns:
+        float: Percentile value, or None for an empty list
+    """
+    if not sorted_values:
+        return None
+
+    rank = max(1, -(-pct * len(sorted_values) // 100))  # ceil(pct * n / 100)
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+def compute_delivery_metrics(deliveries):
+    """
+    Compute delivery latency percentiles and failure rates per message type
+
+    Args:
+        deliveries: Iterable of delivery dicts as returned by db_service.get_message_deliveries
+
+    Returns:
+        dict: Metrics keyed by message type, plus an 'all' entry for every message
+    """
+    groups = {}
+
+    for delivery in deliveries:
+        sent_at = _parse_timestamp(delivery.get('sent_at'))
+        delivered_at = _parse_timestamp(delivery.get('delivered_at'))
+        read_at = _parse_timestamp(delivery.get('read_at'))
+
+        for key in (delivery.get('message_type') or 'conversation', 'all'):
+            group = groups.setdefault(key, {
+                'sent': 0,
+                'delivered': 0,
+                'read': 0,
+                'failed': 0,
+                'delivery_latencies': [],
+                'read_latencies': []
+            })
+
+            group['sent'] += 1
+            if delivery.get('status') in db_service.MESSAGE_FAILED_STATUSES:
+                group['failed'] += 1
+            if delivered_at:
+                group['delivered'] += 1
+                if sent_at:
+                    group['delivery_latencies'].append((delivered_at - sent_at).total_seconds())
+            if read_at:
+                group['read'] += 1
+                if sent_at:
+                    group['read_latencies'].append((read_at - sent_at).total_seconds())
+
+    metrics = {}
+    for key, group in groups.items():
+        delivery_latencies = sorted(group['delivery_latencies'])
+        read_latencies = sorted(group['read_latencies'])
+
+        metrics[key] = {
+            'sent': group['sent'],
+            'delivered': group['delivered'],
+            'read': group['read'],
+            'failed': group['failed'],
+            'failure_rate': group['failed'] / group['sent'] if group['sent'] else 0.0,
+            'delivery_latency': {f"p{p}": percentile(delivery_latencies, p) for p in PERCENTILES},
+            'read_latency': {f"p{p}": percentile(read_latencies, p) for p in PERCENTILES}
+        }
+
+    return metrics
+
+def get_delivery_metrics(days=7):
+    """
+    Get delivery metrics for messages sent in the last N days
+
+    Args:
+        days: Number of days to include
+
+    Returns:
+        dict: Metrics keyed by message type
+    """
+    since = datetime.utcnow() - timedelta(days=days)
+    return compute_delivery_metrics(db_service.get_message_deliveries(since))
@@ -0,0 +1,141 @@
+"""
+Export service for streaming appointments and customers as CSV or NDJSON
+"""
+import csv
+import io
+import json
+import logging
+from datetime import datetime
+
+from services import data_service, db_service
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ('csv', 'ndjson')
+EXPORT_SOURCES = ('files', 'db')
+
+# Rows buffered before a chunk is handed to the HTTP response
+ROWS_PER_CHUNK = 500
+
+APPOINTMENT_FIELDS = [
+    'id', 'date', 'time', 'duration', 'status',
+    'customer_name', 'customer_phone', 'barber_name', 'service_name', 'service_price',
+    'notes', 'created_at', 'updated_at'
+]
+CUSTOMER_FIELDS = ['id', 'name', 'phone', 'email', 'notes', 'created_at', 'last_visit']
+
+def _safe_cell(value):
+    """
+    Neutralize spreadsheet formulas in a CSV cell
+
+    Cells starting with '=', '@', '+' or '-' are evaluated by spreadsheet
+    apps. Phone numbers like '+905551234567' and negative numbers are left alone.
+    """
+    if value is None:
+        return ''
+    if not isinstance(value, str) or not value:
+        return value
+    if value[0] in ('=', '@', '\t', '\r'):
+        return "'" + value
+    if value[0] in ('+', '-') and not value[1:].replace(' ', '').replace('.', '').isdigit():
+        return "'" + value
+    return value
+
+def stream_csv(rows, fields):
+    """
+    Render rows as CSV text chunks
+
+    Args:
+        rows: Iterable of dicts
+        fields: Column names, in order
+
+    Yields:
+        str: CSV text, starting with the header row
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+
+    count = 0
+    for row in rows:
+        writer.writerow([_safe_cell(row.get(field)) for field in fields])
+        count += 1
+        if count % ROWS_PER_CHUNK == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+
+    yield buffer.getvalue()
+
+def stream_ndjson(rows, fields):
+    """
+    Render rows as newline-delimited JSON chunks
+
+    Args:
+        rows: Iterable of dicts
+        fields: Keys to include, in order
+
+    Yields:
+        str: One or more JSON lines
+    """
+    lines = []
+    for row in rows:
+        lines.append(json.dumps({field: row.get(field) for field in fields}, ensure_ascii=False, default=str))
+        if len(lines) >= ROWS_PER_CHUNK:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+def _stream(rows, fields, export_format, name):
+    """Render rows in the requested format, logging instead of raising mid-stream"""
+    render = stream_csv if export_format == 'csv' else stream_ndjson
+    try:
+        yield from render(rows, fields)
+    except Exception as e:
+        # Headers are already sent, so the response can only be cut short
+        logger.error(f"Error streaming {name} export: {str(e)}")
+
+def export_appointments(export_format='csv', source='files', start_date=None, end_date=None, status=None):
+    """
+    Stream appointments with customer, barber and service names
+
+    Args:
+        export_format: 'csv' or 'ndjson'
+        source: 'files' for the JSON data files, 'db' for the database
+        start_date: First date to include (YYYY-MM-DD), or None
+        end_date: Last date to include (YYYY-MM-DD), or None
+        status: Only include appointments with this status
+
+    Returns:
+        generator: Text chunks of the export
+    """
+    if source == 'db':
+        rows = db_service.iter_appointments_for_export(
+            start_date=datetime.strptime(start_date, '%Y-%m-%d').date() if start_date else None,
+            end_date=datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else None,
+            status=status
+        )
+    else:
+        rows = data_service.iter_appointments_for_export(start_date=start_date, end_date=end_date, status=status)
+
+    return _stream(rows, APPOINTMENT_FIELDS, export_format, 'appointments')
+
+def export_customers(export_format='csv', source='files'):
+    """
+    Stream customers
+
+    Args:
+        export_format: 'csv' or 'ndjson'
+        source: 'files' for the JSON data files, 'db' for the database
+
+    Returns:
+        generator: Text chunks of the export
+    """
+    if source == 'db':
+        rows = db_service.iter_customers_for_export()
+    else:
+        rows = data_service.iter_customers_for_export()
+
+    return _stream(rows, CUSTOMER_FIELDS, export_format, 'customers')
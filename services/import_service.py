@@ -0,0 +1,404 @@
+"""
+Import service for bulk loading customers and appointments from CSV, JSON or NDJSON
+"""
+import csv
+import io
+import json
+import logging
+from datetime import datetime
+
+from services import data_service, db_service, stats_service
+from utils import validators
+from utils.helpers import sanitize_phone
+
+logger = logging.getLogger(__name__)
+
+IMPORT_FORMATS = ('csv', 'json', 'ndjson')
+IMPORT_TARGETS = ('files', 'db')
+
+# Valid rows inserted per database round trip
+IMPORT_BATCH_SIZE = 500
+# Rejected rows listed in a result; the counters still cover every row
+MAX_REPORTED_ERRORS = 1000
+
+def _text_stream(stream):
+    """Wrap a binary upload in a UTF-8 text stream, dropping any BOM"""
+    if isinstance(stream, io.TextIOBase):
+        return stream
+    return io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+
+def _clean(row):
+    """Strip keys and string values, turning empty strings into None"""
+    cleaned = {}
+    for key, value in row.items():
+        if key is None:
+            continue
+        if isinstance(value, str):
+            value = value.strip() or None
+        cleaned[str(key).strip().lower()] = value
+    return cleaned
+
+def read_rows(stream, import_format):
+    """
+    Stream rows from an uploaded file
+
+    CSV and NDJSON are read line by line. A JSON document is parsed whole and
+    may be a list of objects, or an object holding such a list or keyed by ID
+    (the layout of the data files), so NDJSON is preferable for large imports.
+
+    Args:
+        stream: Binary or text file object
+        import_format: 'csv', 'json' or 'ndjson'
+
+    Yields:
+        tuple: (row number, cleaned row dict or None, parse error or None)
+    """
+    text = _text_stream(stream)
+
+    if import_format == 'csv':
+        # Row 1 is the header
+        for row_number, row in enumerate(csv.DictReader(text), start=2):
+            yield row_number, _clean(row), None
+
+    elif import_format == 'ndjson':
+        for row_number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield row_number, None, f"Invalid JSON: {str(e)}"
+                continue
+            if not isinstance(row, dict):
+                yield row_number, None, "Each line must be a JSON object"
+                continue
+            yield row_number, _clean(row), None
+
+    elif import_format == 'json':
+        try:
+            document = json.load(text)
+        except ValueError as e:
+            yield 1, None, f"Invalid JSON: {str(e)}"
+            return
+
+        if isinstance(document, dict):
+            lists = [value for value in document.values() if isinstance(value, (list, dict))]
+            if len(document) == 1 and lists:
+                document = lists[0]
+            if isinstance(document, dict):
+                document = list(document.values())
+        if not isinstance(document, list):
+            yield 1, None, "JSON must be a list of objects"
+            return
+
+        for row_number, row in enumerate(document, start=1):
+            if not isinstance(row, dict):
+                yield row_number, None, "Each item must be a JSON object"
+                continue
+            yield row_number, _clean(row), None
+
+    else:
+        raise ValueError(f"Unsupported import format '{import_format}'")
+
+class _ImportResult:
+    """Counters and the capped list of per-row errors for one import"""
+
+    def __init__(self):
+        self.total = 0
+        self.imported = 0
+        self.duplicates = 0
+        self.failed = 0
+        self.errors = []
+
+    def reject(self, row_number, errors, duplicate=False):
+        if duplicate:
+            self.duplicates += 1
+        else:
+            self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': row_number, 'errors': errors})
+
+    def to_dict(self):
+        return {
+            'total': self.total,
+            'imported': self.imported,
+            'duplicates': self.duplicates,
+            'failed': self.failed,
+            'errors': self.errors,
+            'errors_truncated': self.duplicates + self.failed > len(self.errors)
+        }
+
+def _phone_key(phone):
+    """Compare phones by digits, so '+90 555 123 4567' and '905551234567' match"""
+    return sanitize_phone(phone).lstrip('+')
+
+def _phone_variants(phones):
+    """Stored forms a phone may have, with and without the leading '+'"""
+    variants = set()
+    for phone in phones:
+        key = _phone_key(phone)
+        variants.update((key, '+' + key))
+    return variants
+
+def _save_batch(batch, bulk_create, result, name):
+    """Insert a batch of (row number, data) pairs and record the outcome"""
+    if not batch:
+        return
+
+    created = bulk_create([data for _, data in batch])
+    if created is None:
+        created = [None] * len(batch)
+
+    for (row_number, _), item in zip(batch, created):
+        if item is None:
+            result.reject(row_number, [f"Could not save {name}"])
+        else:
+            result.imported += 1
+
+def validate_customer_row(row):
+    """
+    Validate and normalize one customer row
+
+    Args:
+        row: Cleaned row dict with name, phone and optional email and notes
+
+    Returns:
+        tuple: (customer dict, list of error messages)
+    """
+    errors = []
+    name = row.get('name')
+    phone = sanitize_phone(str(row.get('phone') or ''))
+    email = row.get('email')
+
+    if not validators.validate_name(name):
+        errors.append("Name is required and must be at least 2 characters")
+    if not phone:
+        errors.append("Phone number is required")
+    elif not validators.validate_phone(phone):
+        errors.append(f"Invalid phone number: {row.get('phone')}")
+    if email and not validators.validate_email(email):
+        errors.append(f"Invalid email: {email}")
+
+    customer_data = {
+        'name': name,
+        'phone': phone,
+        'email': email or '',
+        'notes': row.get('notes') or '',
+        'created_at': datetime.now().isoformat()
+    }
+    return customer_data, errors
+
+def import_customers(rows, target='files', batch_size=IMPORT_BATCH_SIZE):
+    """
+    Import customers, skipping phones that already exist
+
+    Phones are compared by their digits, both within the file and
+    against existing customers. Invalid and duplicate rows are reported and
+    the rest of the file is still imported. The data files are written once
+    at the end; the database gets one batched insert per batch_size rows.
+
+    Args:
+        rows: Iterable of (row number, row, parse error) tuples from read_rows
+        target: 'files' for the JSON data files, 'db' for the database
+        batch_size: Valid rows per database insert
+
+    Returns:
+        dict: total, imported, duplicates, failed and per-row errors
+    """
+    result = _ImportResult()
+    seen_phones = set()
+    batch = []
+
+    if target == 'db':
+        bulk_create = db_service.bulk_create_customers
+        existing_phones = None
+    else:
+        bulk_create = data_service.bulk_create_customers
+        existing_phones = {_phone_key(c.get('phone')) for c in data_service.get_customers().values()}
+
+    def flush():
+        if target == 'db':
+            existing = {_phone_key(phone) for phone in
+                        db_service.get_customer_ids_by_phone(_phone_variants(data['phone'] for _, data in batch))}
+            for row_number, data in batch:
+                if _phone_key(data['phone']) in existing:
+                    result.reject(row_number, [f"Customer with phone {data['phone']} already exists"], duplicate=True)
+            batch[:] = [(row_number, data) for row_number, data in batch if _phone_key(data['phone']) not in existing]
+        _save_batch(batch, bulk_create, result, 'customer')
+        batch.clear()
+
+    for row_number, row, parse_error in rows:
+        result.total += 1
+        if parse_error:
+            result.reject(row_number, [parse_error])
+            continue
+
+        customer_data, errors = validate_customer_row(row)
+        if errors:
+            result.reject(row_number, errors)
+            continue
+
+        phone = _phone_key(customer_data['phone'])
+        if phone in seen_phones or (existing_phones is not None and phone in existing_phones):
+            result.reject(row_number, [f"Customer with phone {customer_data['phone']} already exists"], duplicate=True)
+            continue
+        seen_phones.add(phone)
+
+        batch.append((row_number, customer_data))
+        if target == 'db' and len(batch) >= batch_size:
+            flush()
+
+    flush()
+    stats_service.invalidate()
+
+    logger.info(f"Imported {result.imported} of {result.total} customers into {target} "
+                f"({result.duplicates} duplicates, {result.failed} failed)")
+    return result.to_dict()
+
+def _lookup_by_name(items):
+    """Map IDs and casefolded names to IDs for barbers or services"""
+    lookup = {}
+    for item_id, item in items.items():
+        if item.get('name'):
+            lookup.setdefault(('name', item['name'].strip().casefold()), item_id)
+        lookup[('id', item_id)] = item_id
+    return lookup
+
+def _resolve(lookup, row, field):
+    """Find a barber or service ID from a row's <field>_id or <field>_name column"""
+    if row.get(f'{field}_id'):
+        return lookup.get(('id', str(row[f'{field}_id'])))
+    if row.get(f'{field}_name'):
+        return lookup.get(('name', row[f'{field}_name'].casefold()))
+    return None
+
+def import_appointments(rows, target='files', batch_size=IMPORT_BATCH_SIZE):
+    """
+    Import appointments, e.g. a shop's booking history
+
+    Customers are matched by customer_id or customer_phone, barbers and
+    services by ID or name. Duration defaults to the service's duration and
+    status to 'scheduled'. Slot availability is not checked, since imported
+    history may legitimately overlap. The data files are written once at the
+    end; the database gets one batched insert per batch_size rows.
+
+    Args:
+        rows: Iterable of (row number, row, parse error) tuples from read_rows
+        target: 'files' for the JSON data files, 'db' for the database
+        batch_size: Valid rows per database insert
+
+    Returns:
+        dict: total, imported, duplicates, failed and per-row errors
+    """
+    result = _ImportResult()
+    batch = []
+
+    if target == 'db':
+        bulk_create = db_service.bulk_create_appointments
+        barbers = db_service.get_barbers()
+        services = db_service.get_services()
+        customers_by_phone = None
+        customer_ids = None
+    else:
+        bulk_create = data_service.bulk_create_appointments
+        barbers = data_service.get_barbers()
+        services = data_service.get_services()
+        customers = data_service.get_customers()
+        customers_by_phone = {_phone_key(c.get('phone')): cust_id for cust_id, c in customers.items()}
+        customer_ids = set(customers)
+
+    barber_lookup = _lookup_by_name(barbers)
+    service_lookup = _lookup_by_name(services)
+
+    def flush():
+        if target == 'db':
+            # Customers referenced by phone are resolved for the whole batch in one query
+            by_phone = {_phone_key(phone): customer_id for phone, customer_id in db_service.get_customer_ids_by_phone(
+                _phone_variants(data['_customer_phone'] for _, data in batch if '_customer_phone' in data)).items()}
+            resolved = []
+            for row_number, data in batch:
+                if not data['customer_id']:
+                    data['customer_id'] = by_phone.get(data.get('_customer_phone'))
+                data.pop('_customer_phone', None)
+                if data['customer_id']:
+                    resolved.append((row_number, data))
+                else:
+                    result.reject(row_number, ["Customer not found"])
+            batch[:] = resolved
+        _save_batch(batch, bulk_create, result, 'appointment')
+        batch.clear()
+
+    for row_number, row, parse_error in rows:
+        result.total += 1
+        if parse_error:
+            result.reject(row_number, [parse_error])
+            continue
+
+        errors = []
+        date = str(row.get('date') or '')
+        time = str(row.get('time') or '')
+        status = row.get('status') or 'scheduled'
+
+        if not validators.validate_date(date):
+            errors.append(f"Invalid date: {row.get('date')}")
+        if not validators.validate_time(time):
+            errors.append(f"Invalid time: {row.get('time')}")
+        if not validators.validate_appointment_status(status):
+            errors.append(f"Invalid status: {status}")
+
+        customer_id = str(row['customer_id']) if row.get('customer_id') else None
+        customer_phone = _phone_key(str(row.get('customer_phone') or ''))
+        if customer_ids is not None:
+            if customer_id and customer_id not in customer_ids:
+                customer_id = None
+            if not customer_id:
+                customer_id = customers_by_phone.get(customer_phone)
+            if not customer_id:
+                errors.append("Customer not found")
+        elif not customer_id and not customer_phone:
+            errors.append("Customer is required")
+
+        barber_id = _resolve(barber_lookup, row, 'barber')
+        if not barber_id:
+            errors.append("Barber not found")
+        service_id = _resolve(service_lookup, row, 'service')
+        if not service_id:
+            errors.append("Service not found")
+
+        duration = row.get('duration')
+        if duration is None and service_id:
+            duration = services[service_id].get('duration') or 30
+        if duration is not None:
+            is_valid, error = validators.validate_duration(duration)
+            if not is_valid:
+                errors.append(error)
+
+        if errors:
+            result.reject(row_number, errors)
+            continue
+
+        appointment_data = {
+            'customer_id': customer_id,
+            'barber_id': barber_id,
+            'service_id': service_id,
+            'date': date,
+            'time': time,
+            'duration': int(duration),
+            'status': status,
+            'notes': row.get('notes') or '',
+            'created_at': datetime.now().isoformat(),
+            'updated_at': datetime.now().isoformat()
+        }
+        if target == 'db' and not customer_id:
+            appointment_data['_customer_phone'] = customer_phone
+
+        batch.append((row_number, appointment_data))
+        if target == 'db' and len(batch) >= batch_size:
+            flush()
+
+    flush()
+    stats_service.invalidate()
+
+    logger.info(f"Imported {result.imported} of {result.total} appointments into {target} "
+                f"({result.failed} failed)")
+    return result.to_dict()
@@ -0,0 +1,243 @@
+"""
+Metrics service recording request latency, status codes and in-flight requests in Prometheus format
+"""
+import logging
+import os
+import threading
+import time
+
+from flask import g, request
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# name -> (type, help) for every metric family that can appear in the output
+_families = {}
+
+class _Shard:
+    """
+    Metric values written by a single thread
+
+    Only the owning thread writes to a shard, so recording needs no lock;
+    scrapes sum all shards. Shards of finished threads are folded into
+    _retired so threads created per request do not pile up.
+    """
+
+    def __init__(self, thread):
+        self.thread = thread
+        self.counters = {}
+        self.gauges = {}
+        # (name, labels) -> [count per bucket..., +Inf count, sum]
+        self.histograms = {}
+
+    def merge_into(self, other):
+        """Add this shard's values to another shard"""
+        for key, value in list(self.counters.items()):
+            other.counters[key] = other.counters.get(key, 0) + value
+        for key, value in list(self.gauges.items()):
+            other.gauges[key] = other.gauges.get(key, 0) + value
+        for key, values in list(self.histograms.items()):
+            target = other.histograms.setdefault(key, [0] * len(values))
+            for i, value in enumerate(list(values)):
+                target[i] += value
+
+_local = threading.local()
+_shards = []
+_retired = _Shard(None)
+_shards_lock = threading.Lock()
+
+def describe(name, metric_type, help_text):
+    """
+    Declare a metric family so it is rendered with HELP and TYPE lines
+
+    Args:
+        name: Metric name, e.g. 'http_requests_total'
+        metric_type: 'counter', 'gauge' or 'histogram'
+        help_text: One-line description
+    """
+    _families[name] = (metric_type, help_text)
+
+def _retire_dead_shards():
+    """Fold shards of finished threads into _retired; call with _shards_lock held"""
+    dead = [shard for shard in _shards if not shard.thread.is_alive()]
+    for shard in dead:
+        shard.merge_into(_retired)
+    if dead:
+        _shards[:] = [shard for shard in _shards if shard.thread.is_alive()]
+
+def _shard():
+    """Get the calling thread's shard, creating and registering it on first use"""
+    shard = getattr(_local, 'shard', None)
+    if shard is None:
+        shard = _Shard(threading.current_thread())
+        with _shards_lock:
+            # Prune here too, so shards don't pile up between scrapes
+            _retire_dead_shards()
+            _shards.append(shard)
+        _local.shard = shard
+    return shard
+
+def inc(name, labels=(), amount=1):
+    """
+    Increment a counter
+
+    Args:
+        name: Metric name declared with describe()
+        labels: Tuple of (label, value) pairs
+        amount: Value to add
+    """
+    counters = _shard().counters
+    key = (name, labels)
+    counters[key] = counters.get(key, 0) + amount
+
+def gauge_add(name, labels=(), amount=1):
+    """Add to (or with a negative amount, subtract from) a gauge"""
+    gauges = _shard().gauges
+    key = (name, labels)
+    gauges[key] = gauges.get(key, 0) + amount
+
+def observe(name, labels, value):
+    """
+    Record a value (e.g. a duration in seconds) in a histogram
+
+    Args:
+        name: Metric name declared with describe()
+        labels: Tuple of (label, value) pairs
+        value: Observed value
+    """
+    histograms = _shard().histograms
+    key = (name, labels)
+    counts = histograms.get(key)
+    if counts is None:
+        counts = histograms[key] = [0] * (len(LATENCY_BUCKETS) + 2)
+    # Values are stored per bucket and accumulated when rendered
+    for i, bound in enumerate(LATENCY_BUCKETS):
+        if value <= bound:
+            counts[i] += 1
+            break
+    else:
+        counts[len(LATENCY_BUCKETS)] += 1
+    counts[-1] += value
+
+def snapshot():
+    """
+    Sum every thread's shard
+
+    Returns:
+        _Shard: Combined counters, gauges and histograms
+    """
+    total = _Shard(None)
+    with _shards_lock:
+        _retire_dead_shards()
+        _retired.merge_into(total)
+        shards = list(_shards)
+
+    for shard in shards:
+        shard.merge_into(total)
+    return total
+
+def reset():
+    """Drop all recorded values"""
+    global _retired
+    with _shards_lock:
+        for shard in _shards:
+            shard.counters.clear()
+            shard.gauges.clear()
+            shard.histograms.clear()
+        _retired = _Shard(None)
+
+def _format_labels(labels, extra=()):
+    """Render labels as {a="1",b="2"}"""
+    pairs = tuple(labels) + tuple(extra)
+    if not pairs:
+        return ''
+    escaped = (
+        (key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in pairs
+    )
+    return '{' + ','.join(f'{key}="{value}"' for key, value in escaped) + '}'
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def render():
+    """
+    Render all metrics in the Prometheus text exposition format
+
+    Values are per process; with several gunicorn workers each scrape sees
+    the worker that answered it.
+
+    Returns:
+        str: Exposition text
+    """
+    total = snapshot()
+    by_name = {}
+    for values in (total.counters, total.gauges, total.histograms):
+        for (name, labels), value in values.items():
+            by_name.setdefault(name, []).append((labels, value))
+
+    lines = []
+    for name in sorted(set(by_name) | set(_families)):
+        metric_type, help_text = _families.get(name, ('untyped', ''))
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        for labels, value in sorted(by_name.get(name, []), key=lambda item: item[0]):
+            if metric_type == 'histogram':
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS, value):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(labels, (('le', bound),))} {cumulative}")
+                cumulative += value[len(LATENCY_BUCKETS)]
+                lines.append(f"{name}_bucket{_format_labels(labels, (('le', '+Inf'),))} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(value[-1])}")
+                lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+            else:
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+    return '\n'.join(lines) + '\n'
+
+describe('http_request_duration_seconds', 'histogram', 'Request latency in seconds by endpoint')
+describe('http_requests_total', 'counter', 'Requests by endpoint, method and status code')
+describe('http_requests_in_flight', 'gauge', 'Requests currently being handled by endpoint')
+
+def _before_request():
+    """Start timing the request"""
+    # Resolve the proxies once; each proxied access costs about a microsecond
+    req = request._get_current_object()
+    labels = (('endpoint', req.endpoint or 'unmatched'), ('method', req.method))
+    g._metrics = [labels, time.perf_counter(), 500]
+    gauge_add('http_requests_in_flight', labels)
+
+def _after_request(response):
+    """Remember the status code for the teardown handler"""
+    state = g.get('_metrics')
+    if state is not None:
+        state[2] = response.status_code
+    return response
+
+def _teardown_request(exc):
+    """Record latency and status once the request is done, even if it failed"""
+    state = g.pop('_metrics', None)
+    if state is None:
+        return
+    labels, started, status = state
+    elapsed = time.perf_counter() - started
+    if exc is not None:
+        status = 500
+
+    gauge_add('http_requests_in_flight', labels, -1)
+    observe('http_request_duration_seconds', labels, elapsed)
+    inc('http_requests_total', labels + (('status', status),))
+
+def init_app(app):
+    """
+    Record metrics for every request handled by the app
+
+    Args:
+        app: Flask application
+    """
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    logger.info(f"Request metrics enabled (pid {os.getpid()})")
@@ -0,0 +1,165 @@
+"""
+Outbox service for coalescing outbound messages sent during a single conversation turn
+"""
+import logging
+import threading
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Twilio rejects WhatsApp message bodies longer than 1600 characters
+MAX_MESSAGE_LENGTH = 1600
+MESSAGE_SEPARATOR = "\n\n"
+
+# Per-thread outbox so concurrent requests never share queued messages
+_local = threading.local()
+
+def _phone_key(phone):
+    """Normalize a phone number so '+90555...' and '90555...' share one outbox entry"""
+    phone = phone or ''
+    if phone.startswith('whatsapp:'):
+        phone = phone[9:]
+    return phone.lstrip('+')
+
+def is_active():
+    """Check if an outbox turn is open on the current thread"""
+    return getattr(_local, 'depth', 0) > 0
+
+def queue_message(to_phone, message, message_type='conversation'):
+    """
+    Queue a message in the current turn's outbox
+
+    Consecutive messages of the same type for a phone are coalesced
+    together; a message of another type starts a new batch, so every sent
+    body keeps the type it is recorded under.
+
+    Args:
+        to_phone: Recipient's phone number
+        message: Message content
+        message_type: Message category passed on to the send function
+
+    Returns:
+        bool: True if the message was queued, False if no turn is open
+    """
+    if not is_active():
+        return False
+
+    key = _phone_key(to_phone)
+    if key not in _local.outbox:
+        _local.outbox[key] = {'to': to_phone, 'batches': []}
+    batches = _local.outbox[key]['batches']
+    if not batches or batches[-1][0] != message_type:
+        batches.append((message_type, []))
+    batches[-1][1].append(message)
+    return True
+
+def _split_message(message, max_length):
+    """Split a single oversized message on line boundaries, hard-wrapping long lines"""
+    chunks = []
+    current = ""
+
+    for line in message.split("\n"):
+        while len(line) > max_length:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(line[:max_length])
+            line = line[max_length:]
+
+        candidate = f"{current}\n{line}" if current else line
+        if len(candidate) <= max_length:
+            current = candidate
+        else:
+            chunks.append(current)
+            current = line
+
+    if current:
+        chunks.append(current)
+
+    return chunks
+
+def coalesce_messages(messages, max_length=MAX_MESSAGE_LENGTH):
+    """
+    Pack messages into the fewest bodies that fit within the length limit
+
+    Args:
+        messages: List of message strings, in send order
+        max_length: Maximum length of a single message body
+
+    Returns:
+        list: Message bodies to send, preserving the original order
+    """
+    bodies = []
+    current = ""
+
+    for message in messages:
+        if not message:
+            continue
+
+        parts = [message] if len(message) <= max_length else _split_message(message, max_length)
+
+        for part in parts:
+            candidate = f"{current}{MESSAGE_SEPARATOR}{part}" if current else part
+            if len(candidate) <= max_length:
+                current = candidate
+            else:
+                bodies.append(current)
+                current = part
+
+    if current:
+        bodies.append(current)
+
+    return bodies
+
+def flush(send_func):
+    """
+    Send every queued message in the current outbox and clear it
+
+    Args:
+        send_func: Function called as send_func(to_phone, body, message_type) for each coalesced body
+
+    Returns:
+        list: Results returned by send_func
+    """
+    outbox = getattr(_local, 'outbox', None) or {}
+    _local.outbox = {}
+
+    results = []
+    for entry in outbox.values():
+        for message_type, messages in entry['batches']:
+            bodies = coalesce_messages(messages)
+            if len(messages) > len(bodies):
+                logger.debug("Coalesced %s messages into %s for %s", len(messages), len(bodies), entry['to'])
+
+            for body in bodies:
+                try:
+                    results.append(send_func(entry['to'], body, message_type))
+                except Exception as e:
+                    logger.error("Error flushing outbox message to %s: %s", entry['to'], e)
+                    results.append({'status': 'error', 'error': str(e), 'to': entry['to']})
+
+    return results
+
+@contextmanager
+def turn(send_func):
+    """
+    Collect all messages queued inside the block and flush them when it exits
+
+    Nested turns are merged into the outermost one, so only the outermost
+    block sends anything. Messages are flushed even if the block raises,
+    which keeps error replies queued by the handler from being lost.
+
+    Args:
+        send_func: Function used to deliver each coalesced body
+    """
+    if not is_active():
+        _local.outbox = {}
+        _local.depth = 0
+
+    _local.depth += 1
+    try:
+        yield
+    finally:
+        _local.depth -= 1
+        if _local.depth == 0:
+            flush(send_func)
@@ -0,0 +1,238 @@
+"""
+Profiler service sampling thread stacks on demand and aggregating them as collapsed flamegraph stacks
+"""
+import logging
+import os
+import random
+import sys
+import threading
+import time
+
+from flask import request
+
+from config import PROFILER_MAX_SECONDS, PROFILER_INTERVAL_MS
+
+logger = logging.getLogger(__name__)
+
+MAX_DEPTH = 128
+
+# Innermost frames in these modules mean the thread is waiting, not working
+_IDLE_MODULES = ('threading.py', 'selectors.py', 'queue.py', 'socketserver.py', 'socket.py')
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + os.sep
+
+# The running session, or None; the request hooks only check this while idle
+_session = None
+_last = None
+_lock = threading.Lock()
+
+# code object -> frame label, shared across sessions
+_labels = {}
+
+def _label(code):
+    """Name a frame as 'function (path:line)', paths relative to the app or site-packages"""
+    label = _labels.get(code)
+    if label is None:
+        filename = code.co_filename
+        if filename.startswith(_ROOT):
+            filename = filename[len(_ROOT):]
+        elif 'site-packages' + os.sep in filename:
+            filename = filename.split('site-packages' + os.sep, 1)[1]
+        label = _labels[code] = f"{code.co_name} ({filename}:{code.co_firstlineno})"
+    return label
+
+class ProfileSession:
+    """
+    Stack samples collected by one profiling run
+
+    Args:
+        seconds: How long to sample
+        interval_ms: Time between samples
+        endpoint: Only sample threads handling requests to this endpoint or path
+        sample_rate: Fraction of matching requests to sample
+        include_idle: Also count threads blocked waiting (locks, sockets, queues)
+    """
+
+    def __init__(self, seconds, interval_ms=PROFILER_INTERVAL_MS, endpoint=None, sample_rate=1.0, include_idle=False):
+        self.seconds = seconds
+        self.interval = interval_ms / 1000
+        self.endpoint = endpoint
+        self.sample_rate = sample_rate
+        self.include_idle = include_idle
+        self.started_at = time.time()
+        self.deadline = time.monotonic() + seconds
+        self.finished_at = None
+        self.samples = 0
+        self.requests = 0
+        self.stacks = {}
+        # Thread idents currently handling a sampled request (endpoint mode)
+        self.threads = set()
+        self._stop = threading.Event()
+        self._stacks_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name='profiler', daemon=True)
+
+    @property
+    def running(self):
+        return self.finished_at is None
+
+    def matches(self, req):
+        """Whether a request is to the profiled endpoint"""
+        endpoint = req.endpoint or ''
+        target = self.endpoint
+        return (target == endpoint or target == endpoint.rsplit('.', 1)[-1]
+                or target == req.path or req.path.endswith('/' + target.strip('/')))
+
+    def _run(self):
+        own = threading.get_ident()
+        try:
+            while not self._stop.wait(self.interval) and time.monotonic() < self.deadline:
+                self._sample(own)
+        except Exception as e:
+            logger.error("Profiler stopped after an error: %s", e)
+        finally:
+            _finish(self)
+
+    def _sample(self, own):
+        frames = sys._current_frames()
+        if self.endpoint is not None:
+            idents = [ident for ident in list(self.threads) if ident in frames]
+        else:
+            idents = [ident for ident in frames if ident != own]
+
+        collected = []
+        for ident in idents:
+            frame = frames[ident]
+            if not self.include_idle and frame.f_code.co_filename.endswith(_IDLE_MODULES):
+                continue
+            labels = []
+            while frame is not None and len(labels) < MAX_DEPTH:
+                labels.append(_label(frame.f_code))
+                frame = frame.f_back
+            labels.reverse()
+            collected.append(';'.join(labels))
+        del frames
+
+        with self._stacks_lock:
+            self.samples += 1
+            for stack in collected:
+                self.stacks[stack] = self.stacks.get(stack, 0) + 1
+
+    def collapsed(self):
+        """
+        Aggregated stacks in the collapsed format read by flamegraph.pl and speedscope
+
+        Returns:
+            str: One 'frame;frame;frame count' line per distinct stack, root frame first
+        """
+        with self._stacks_lock:
+            stacks = sorted(self.stacks.items(), key=lambda item: -item[1])
+        return ''.join(f"{stack} {count}\n" for stack, count in stacks)
+
+    def to_dict(self):
+        with self._stacks_lock:
+            stack_samples = sum(self.stacks.values())
+            distinct = len(self.stacks)
+        return {
+            'running': self.running,
+            'pid': os.getpid(),
+            'started_at': self.started_at,
+            'seconds': self.seconds,
+            'remaining_seconds': round(max(0.0, self.deadline - time.monotonic()), 1) if self.running else 0,
+            'interval_ms': self.interval * 1000,
+            'endpoint': self.endpoint,
+            'sample_rate': self.sample_rate,
+            'include_idle': self.include_idle,
+            'ticks': self.samples,
+            'stack_samples': stack_samples,
+            'distinct_stacks': distinct,
+            'requests_sampled': self.requests
+        }
+
+def _finish(session):
+    global _session, _last
+    session.finished_at = time.time()
+    with _lock:
+        if _session is session:
+            _session = None
+        _last = session
+    logger.info("Profiling finished: %s ticks, %s distinct stacks", session.samples, len(session.stacks))
+
+def start(seconds, interval_ms=PROFILER_INTERVAL_MS, endpoint=None, sample_rate=1.0, include_idle=False):
+    """
+    Start sampling stacks of this process
+
+    Without an endpoint every thread is sampled; with one, only threads
+    handling a sample_rate fraction of the requests to it. Each gunicorn
+    worker profiles itself, so the profile covers the worker that handled
+    the start request.
+
+    Args:
+        seconds: How long to sample, capped at PROFILER_MAX_SECONDS
+        interval_ms: Time between samples, at least 1
+        endpoint: Endpoint name (e.g. 'get_available_slots_ajax') or path (e.g. 'get-available-slots')
+        sample_rate: Fraction of matching requests to sample, between 0 and 1
+        include_idle: Also count threads blocked waiting
+
+    Returns:
+        ProfileSession: The new session, or None if one is already running
+
+    Raises:
+        TypeError: If endpoint is not a string
+        ValueError: If a number can't be parsed
+    """
+    global _session
+    if endpoint is not None and not isinstance(endpoint, str):
+        raise TypeError("endpoint must be a string")
+    seconds = min(max(float(seconds), 0.1), PROFILER_MAX_SECONDS)
+    interval_ms = max(float(interval_ms), 1.0)
+    sample_rate = min(max(float(sample_rate), 0.0), 1.0)
+    with _lock:
+        if _session is not None:
+            return None
+        session = ProfileSession(seconds, interval_ms, endpoint or None, sample_rate, include_idle)
+        _session = session
+    session._thread.start()
+    logger.info("Profiling for %ss every %sms (endpoint=%s, sample_rate=%s)", seconds, interval_ms, endpoint, sample_rate)
+    return session
+
+def stop():
+    """
+    Stop the running session early
+
+    Returns:
+        ProfileSession: The stopped session, or None if none was running
+    """
+    session = _session
+    if session is None:
+        return None
+    session._stop.set()
+    session._thread.join()
+    return session
+
+def current():
+    """The running session, else the last finished one, or None"""
+    return _session or _last
+
+def _before_request():
+    """Mark the thread for sampling if the request is one being profiled"""
+    session = _session
+    if session is None or session.endpoint is None:
+        return
+    if session.matches(request) and (session.sample_rate >= 1 or random.random() < session.sample_rate):
+        session.requests += 1
+        session.threads.add(threading.get_ident())
+
+def _teardown_request(exc):
+    session = _session
+    if session is not None and session.endpoint is not None:
+        session.threads.discard(threading.get_ident())
+
+def init_app(app):
+    """
+    Let the app's requests be profiled on demand; costs one check per request while idle
+
+    Args:
+        app: Flask application
+    """
+    app.before_request(_before_request)
+    app.teardown_request(_teardown_request)
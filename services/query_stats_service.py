@@ -0,0 +1,189 @@
+"""
+Query stats service counting SQL queries and database time per request and flagging likely N+1 patterns
+"""
+import logging
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from flask import current_app, g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from config import N_PLUS_ONE_THRESHOLD, QUERY_STATS_HEADERS
+from services import metrics_service
+
+logger = logging.getLogger(__name__)
+
+# Trackers collecting queries in the current context (a request and/or max_queries blocks)
+_trackers = ContextVar('query_trackers', default=())
+_listening = False
+
+# Literals and expanded IN lists vary between otherwise identical statements
+_NUMBER = re.compile(r"\b\d+(\.\d+)?\b")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_PARAM_LIST = re.compile(r"\(\s*(?:\?|%\(\w+\)s|%s|:\w+)(?:\s*,\s*(?:\?|%\(\w+\)s|%s|:\w+))*\s*\)")
+_SPACE = re.compile(r"\s+")
+
+def statement_shape(statement):
+    """
+    Normalize a SQL statement so repeats of the same query compare equal
+
+    Args:
+        statement: SQL text as sent to the driver
+
+    Returns:
+        str: Statement with literals and parameter lists replaced by '?'
+    """
+    shape = _STRING.sub('?', statement)
+    shape = _NUMBER.sub('?', shape)
+    shape = _PARAM_LIST.sub('(?)', shape)
+    return _SPACE.sub(' ', shape).strip()
+
+class QueryTracker:
+    """Queries executed while the tracker is active"""
+
+    def __init__(self, threshold=N_PLUS_ONE_THRESHOLD):
+        self.threshold = threshold
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes = {}
+
+    def record(self, statement, seconds):
+        """Add one executed statement"""
+        self.count += 1
+        self.seconds += seconds
+        shape = statement_shape(statement)
+        self.shapes[shape] = self.shapes.get(shape, 0) + 1
+
+    def repeated(self):
+        """
+        Statement shapes run at least threshold times, most frequent first
+
+        Returns:
+            list: (shape, count) tuples; each is a likely N+1 query
+        """
+        repeated = [(shape, count) for shape, count in self.shapes.items() if count >= self.threshold]
+        return sorted(repeated, key=lambda item: -item[1])
+
+@contextmanager
+def track(threshold=N_PLUS_ONE_THRESHOLD):
+    """
+    Collect the queries executed inside the block
+
+    Args:
+        threshold: Repeats of one statement shape that count as N+1
+
+    Yields:
+        QueryTracker: Filled in as queries run
+    """
+    _listen()
+    tracker = QueryTracker(threshold)
+    token = _trackers.set(_trackers.get() + (tracker,))
+    try:
+        yield tracker
+    finally:
+        _trackers.reset(token)
+
+@contextmanager
+def max_queries(limit):
+    """
+    Test helper failing when the block runs more than limit queries
+
+    Example:
+        with query_stats_service.max_queries(5):
+            client.get('/admin/')
+
+    Args:
+        limit: Highest acceptable number of queries
+
+    Raises:
+        AssertionError: If more queries were executed, listing them by shape
+    """
+    with track() as tracker:
+        yield tracker
+    if tracker.count > limit:
+        shapes = '\n'.join(f"  {count}x {shape}" for shape, count in
+                           sorted(tracker.shapes.items(), key=lambda item: -item[1]))
+        raise AssertionError(f"Expected at most {limit} queries, {tracker.count} were executed:\n{shapes}")
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _trackers.get():
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    trackers = _trackers.get()
+    started = conn.info.get('query_started')
+    if not trackers or not started:
+        return
+    seconds = time.perf_counter() - started.pop()
+    for tracker in trackers:
+        tracker.record(statement, seconds)
+
+def _listen():
+    """Attach the engine event hooks once; they cover every engine"""
+    global _listening
+    if not _listening:
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        _listening = True
+
+metrics_service.describe('db_queries_total', 'counter', 'SQL queries executed by endpoint')
+metrics_service.describe('db_query_seconds_total', 'counter', 'Time spent in SQL queries by endpoint')
+metrics_service.describe('db_n_plus_one_total', 'counter', 'Requests that repeated one statement shape N_PLUS_ONE_THRESHOLD times or more')
+
+def _before_request():
+    """Start collecting the request's queries"""
+    tracker = QueryTracker()
+    g._query_stats = (tracker, _trackers.set(_trackers.get() + (tracker,)))
+
+def _after_request(response):
+    """Add the query stats to the response headers when enabled"""
+    state = g.get('_query_stats')
+    if state is not None and current_app.config.get('QUERY_STATS_HEADERS', QUERY_STATS_HEADERS):
+        tracker = state[0]
+        response.headers['X-Query-Count'] = str(tracker.count)
+        response.headers['X-Query-Time-Ms'] = f"{tracker.seconds * 1000:.1f}"
+        response.headers['X-Query-Repeated'] = str(len(tracker.repeated()))
+    return response
+
+def _teardown_request(exc):
+    """Stop collecting, record metrics and warn about likely N+1 queries"""
+    state = g.pop('_query_stats', None)
+    if state is None:
+        return
+    tracker, token = state
+    try:
+        _trackers.reset(token)
+    except ValueError:
+        # Torn down in another context (e.g. after a streamed response)
+        _trackers.set(tuple(t for t in _trackers.get() if t is not tracker))
+    if not tracker.count:
+        return
+
+    labels = (('endpoint', request.endpoint or 'unmatched'),)
+    metrics_service.inc('db_queries_total', labels, tracker.count)
+    metrics_service.inc('db_query_seconds_total', labels, tracker.seconds)
+
+    repeated = tracker.repeated()
+    if repeated:
+        metrics_service.inc('db_n_plus_one_total', labels)
+        shape, count = repeated[0]
+        logger.warning(f"Likely N+1 in {request.endpoint}: {tracker.count} queries, "
+                       f"{count}x {shape[:200]}")
+
+def init_app(app):
+    """
+    Count queries per request for the app
+
+    X-Query-Count, X-Query-Time-Ms and X-Query-Repeated response headers
+    are added when QUERY_STATS_HEADERS is set (by default in debug mode).
+
+    Args:
+        app: Flask application
+    """
+    _listen()
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
@@ -0,0 +1,219 @@
+"""
+Search service providing an in-memory customer index for type-ahead search
+"""
+import bisect
+import logging
+import re
+import threading
+import unicodedata
+
+logger = logging.getLogger(__name__)
+
+# Minimum share of the query's trigrams a name must contain to be a fuzzy match
+FUZZY_THRESHOLD = 0.5
+# Phone queries shorter than this are treated as names
+MIN_PHONE_DIGITS = 3
+
+# Letters that do not decompose under NFKD but should match their ASCII form
+_FOLD_MAP = str.maketrans({'ı': 'i', 'ø': 'o', 'ß': 'ss', 'æ': 'ae', 'đ': 'd', 'ł': 'l'})
+
+def normalize_text(text):
+    """
+    Normalize a name for matching: lowercase, strip accents, collapse spaces
+
+    Args:
+        text: Text to normalize
+
+    Returns:
+        str: Normalized text, e.g. 'Şükrü  Yılmaz' -> 'sukru yilmaz'
+    """
+    text = (text or '').casefold().translate(_FOLD_MAP)
+    text = ''.join(c for c in unicodedata.normalize('NFKD', text) if not unicodedata.combining(c))
+    return ' '.join(re.findall(r'\w+', text))
+
+def phone_digits(phone):
+    """Keep only the digits of a phone number"""
+    return ''.join(c for c in (phone or '') if c.isdigit())
+
+def _trigrams(text):
+    """Character trigrams of a normalized text, padded so short words still produce some"""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def _prefix_range(sorted_keys, prefix):
+    """Index range of the keys in a sorted list that start with prefix"""
+    start = bisect.bisect_left(sorted_keys, (prefix,))
+    end = bisect.bisect_left(sorted_keys, (prefix + '\uffff',))
+    return start, end
+
+class CustomerSearchIndex:
+    """
+    Incrementally maintained search index over customer names and phones
+
+    - Name prefixes: sorted (token, id) pairs searched with bisect, so every
+      word of a name can be matched by its beginning.
+    - Fuzzy names: trigram -> ids inverted index, ranked by trigram similarity.
+    - Phone suffixes: sorted (reversed digits, id) pairs, so '4567' finds
+      '+90 555 123 4567' with a bisect instead of a scan.
+    - Listing: sorted (normalized name, id) pairs for name-ordered pages.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.clear()
+
+    def clear(self):
+        """Remove every customer from the index"""
+        with self._lock:
+            self._entries = {}
+            self._name_tokens = []
+            self._names = []
+            self._phones = []
+            self._trigram_ids = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, customer_id):
+        return customer_id in self._entries
+
+    def rebuild(self, customers):
+        """
+        Replace the index contents
+
+        Args:
+            customers: Iterable of (customer_id, name, phone) tuples
+        """
+        with self._lock:
+            self.clear()
+            entries = {}
+            for customer_id, name, phone in customers:
+                entries[customer_id] = (normalize_text(name), phone_digits(phone)[::-1])
+
+            for customer_id, (name, reversed_phone) in entries.items():
+                self._name_tokens.extend((token, customer_id) for token in set(name.split()))
+                self._names.append((name, customer_id))
+                if reversed_phone:
+                    self._phones.append((reversed_phone, customer_id))
+                for trigram in _trigrams(name):
+                    self._trigram_ids.setdefault(trigram, set()).add(customer_id)
+
+            self._name_tokens.sort()
+            self._names.sort()
+            self._phones.sort()
+            self._entries = entries
+
+    def add(self, customer_id, name, phone):
+        """Add or replace a customer in the index"""
+        with self._lock:
+            if customer_id in self._entries:
+                self.remove(customer_id)
+
+            name = normalize_text(name)
+            reversed_phone = phone_digits(phone)[::-1]
+            self._entries[customer_id] = (name, reversed_phone)
+
+            for token in set(name.split()):
+                bisect.insort(self._name_tokens, (token, customer_id))
+            bisect.insort(self._names, (name, customer_id))
+            if reversed_phone:
+                bisect.insort(self._phones, (reversed_phone, customer_id))
+            for trigram in _trigrams(name):
+                self._trigram_ids.setdefault(trigram, set()).add(customer_id)
+
+    def remove(self, customer_id):
+        """Remove a customer from the index if present"""
+        with self._lock:
+            entry = self._entries.pop(customer_id, None)
+            if not entry:
+                return
+
+            name, reversed_phone = entry
+            for token in set(name.split()):
+                self._discard(self._name_tokens, (token, customer_id))
+            self._discard(self._names, (name, customer_id))
+            if reversed_phone:
+                self._discard(self._phones, (reversed_phone, customer_id))
+            for trigram in _trigrams(name):
+                ids = self._trigram_ids.get(trigram)
+                if ids:
+                    ids.discard(customer_id)
+                    if not ids:
+                        del self._trigram_ids[trigram]
+
+    @staticmethod
+    def _discard(sorted_list, item):
+        """Remove an item from a sorted list using bisect"""
+        position = bisect.bisect_left(sorted_list, item)
+        if position < len(sorted_list) and sorted_list[position] == item:
+            del sorted_list[position]
+
+    def _by_name(self, ids):
+        """Order customer IDs by normalized name"""
+        return sorted(ids, key=lambda customer_id: (self._entries[customer_id][0], customer_id))
+
+    def _search_phone(self, digits):
+        """IDs whose phone ends with the given digits, ordered by name"""
+        start, end = _prefix_range(self._phones, digits[::-1])
+        return self._by_name({customer_id for _, customer_id in self._phones[start:end]})
+
+    def _search_name(self, query):
+        """IDs whose name words start with every query word, then fuzzy matches"""
+        tokens = query.split()
+
+        matches = None
+        for token in tokens:
+            start, end = _prefix_range(self._name_tokens, token)
+            token_ids = {customer_id for _, customer_id in self._name_tokens[start:end]}
+            matches = token_ids if matches is None else matches & token_ids
+            if not matches:
+                break
+        matches = matches or set()
+
+        # Fuzzy matches tolerate typos and word-internal fragments
+        query_trigrams = _trigrams(query)
+        shared = {}
+        for trigram in query_trigrams:
+            for customer_id in self._trigram_ids.get(trigram, ()):
+                if customer_id not in matches:
+                    shared[customer_id] = shared.get(customer_id, 0) + 1
+
+        fuzzy = []
+        for customer_id, count in shared.items():
+            similarity = count / len(query_trigrams)
+            if similarity >= FUZZY_THRESHOLD:
+                fuzzy.append((-similarity, self._entries[customer_id][0], customer_id))
+        fuzzy.sort()
+
+        return self._by_name(matches) + [customer_id for _, _, customer_id in fuzzy]
+
+    def search(self, query, limit=20, offset=0):
+        """
+        Search customers by name prefix, fuzzy name or phone suffix
+
+        Queries made of phone characters with at least MIN_PHONE_DIGITS digits
+        are matched against phone suffixes; everything else is matched against
+        names. An empty query lists every customer ordered by name.
+
+        Args:
+            query: Search text
+            limit: Maximum number of IDs to return
+            offset: Number of matches to skip
+
+        Returns:
+            tuple: (list of customer IDs for the page, total number of matches)
+        """
+        with self._lock:
+            query = (query or '').strip()
+            digits = phone_digits(query)
+
+            if not query:
+                return [customer_id for _, customer_id in self._names[offset:offset + limit]], len(self._names)
+
+            if len(digits) >= MIN_PHONE_DIGITS and re.fullmatch(r'[\d\s()+\-.]+', query):
+                ids = self._search_phone(digits)
+            else:
+                normalized = normalize_text(query)
+                ids = self._search_name(normalized) if normalized else []
+
+            return ids[offset:offset + limit], len(ids)
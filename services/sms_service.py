@@ -4,18 +4,17 @@ SMS service for sending text messages using Twilio
 import os
 import logging
 from datetime import datetime, timedelta
-from twilio.rest import Client
 from config import BUSINESS_NAME
+from services import client_factory, template_service, tracing_service
+from utils.logger import SAMPLED
 
 logger = logging.getLogger(__name__)
 
-# Initialize Twilio client
+# Twilio configuration (the client itself is created lazily by client_factory)
 TWILIO_ACCOUNT_SID = os.environ.get("TWILIO_ACCOUNT_SID")
 TWILIO_AUTH_TOKEN = os.environ.get("TWILIO_AUTH_TOKEN")
 TWILIO_PHONE_NUMBER = os.environ.get("TWILIO_PHONE_NUMBER")
 
-client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
-
 def send_sms(to_phone, message):
     """
     Send an SMS message using Twilio
@@ -33,20 +32,21 @@ def send_sms(to_phone, message):
             to_phone = '+' + to_phone
             
         # Send the message
-        message = client.messages.create(
-            body=message,
-            from_=TWILIO_PHONE_NUMBER,
-            to=to_phone
-        )
-        
-        logger.info(f"SMS sent to {to_phone}: {message.sid}")
+        with tracing_service.span('twilio.messages.create', channel='sms'):
+            message = client_factory.get_twilio_client().messages.create(
+                body=message,
+                from_=TWILIO_PHONE_NUMBER,
+                to=to_phone
+            )
+        
+        logger.info("SMS sent to %s: %s", to_phone, message.sid, extra=SAMPLED)
         return {
             'status': 'success',
             'message_sid': message.sid,
             'to': to_phone
         }
     except Exception as e:
-        logger.error(f"Error sending SMS to {to_phone}: {str(e)}")
+        logger.error("Error sending SMS to %s: %s", to_phone, e)
         return {
             'status': 'error',
             'error': str(e),
@@ -70,22 +70,18 @@ def send_appointment_confirmation(customer_phone, customer_name, appointment_dat
         dict: Response from send_sms function
     """
     try:
-        # Format date for display
-        date_obj = datetime.strptime(appointment_date, '%Y-%m-%d')
-        formatted_date = date_obj.strftime('%A, %B %d, %Y')
-        
-        # Build message
-        message = f"Hello {customer_name}! Your appointment has been confirmed.\n\n"
-        message += f"Date: {formatted_date}\n"
-        message += f"Time: {appointment_time}\n"
-        message += f"Service: {service_name}\n"
-        message += f"Barber: {barber_name}\n\n"
-        message += f"Thank you for choosing {BUSINESS_NAME}. "
-        message += "Reply 'HELP' for assistance or 'CANCEL' to cancel your appointment."
+        message = template_service.render(
+            'confirmation', 'en',
+            customer_name=customer_name,
+            date=appointment_date,
+            time=appointment_time,
+            barber_name=barber_name,
+            service_name=service_name
+        )
         
         return send_sms(customer_phone, message)
     except Exception as e:
-        logger.error(f"Error sending confirmation SMS: {str(e)}")
+        logger.error("Error sending confirmation SMS: %s", e)
         return {
             'status': 'error',
             'error': str(e)
@@ -109,28 +105,19 @@ def send_appointment_reminder(customer_phone, customer_name, appointment_date,
         dict: Response from send_sms function
     """
     try:
-        # Format date for display
-        date_obj = datetime.strptime(appointment_date, '%Y-%m-%d')
-        formatted_date = date_obj.strftime('%A, %B %d, %Y')
-        
-        # Build message
-        message = f"Hello {customer_name}! This is a reminder about your upcoming appointment.\n\n"
-        message += f"Date: {formatted_date}\n"
-        message += f"Time: {appointment_time}\n"
-        message += f"Service: {service_name}\n"
-        message += f"Barber: {barber_name}\n\n"
-        
-        if reminder_hours == 24:
-            message += f"Your appointment is tomorrow. "
-        else:
-            message += f"Your appointment is in {reminder_hours} hours. "
-            
-        message += f"We look forward to seeing you at {BUSINESS_NAME}. "
-        message += "Reply 'HELP' for assistance or 'CANCEL' to cancel your appointment."
+        message = template_service.render(
+            'reminder', 'en',
+            customer_name=customer_name,
+            date=appointment_date,
+            time=appointment_time,
+            barber_name=barber_name,
+            service_name=service_name,
+            reminder_hours=reminder_hours
+        )
         
         return send_sms(customer_phone, message)
     except Exception as e:
-        logger.error(f"Error sending reminder SMS: {str(e)}")
+        logger.error("Error sending reminder SMS: %s", e)
         return {
             'status': 'error',
             'error': str(e)
@@ -150,20 +137,16 @@ def send_appointment_cancelled(customer_phone, customer_name, appointment_date,
         dict: Response from send_sms function
     """
     try:
-        # Format date for display
-        date_obj = datetime.strptime(appointment_date, '%Y-%m-%d')
-        formatted_date = date_obj.strftime('%A, %B %d, %Y')
-        
-        # Build message
-        message = f"Hello {customer_name}! Your appointment has been cancelled.\n\n"
-        message += f"Date: {formatted_date}\n"
-        message += f"Time: {appointment_time}\n\n"
-        message += f"Thank you for choosing {BUSINESS_NAME}. "
-        message += "Please contact us if you would like to reschedule."
+        message = template_service.render(
+            'cancellation', 'en',
+            customer_name=customer_name,
+            date=appointment_date,
+            time=appointment_time
+        )
         
         return send_sms(customer_phone, message)
     except Exception as e:
-        logger.error(f"Error sending cancellation SMS: {str(e)}")
+        logger.error("Error sending cancellation SMS: %s", e)
         return {
             'status': 'error',
             'error': str(e)
@@ -190,26 +173,20 @@ def send_appointment_rescheduled(customer_phone, customer_name,
         dict: Response from send_sms function
     """
     try:
-        # Format dates for display
-        old_date_obj = datetime.strptime(old_date, '%Y-%m-%d')
-        new_date_obj = datetime.strptime(new_date, '%Y-%m-%d')
-        
-        old_formatted_date = old_date_obj.strftime('%A, %B %d, %Y')
-        new_formatted_date = new_date_obj.strftime('%A, %B %d, %Y')
-        
-        # Build message
-        message = f"Hello {customer_name}! Your appointment has been rescheduled.\n\n"
-        message += f"Original: {old_formatted_date} at {old_time}\n\n"
-        message += f"New Date: {new_formatted_date}\n"
-        message += f"New Time: {new_time}\n"
-        message += f"Service: {service_name}\n"
-        message += f"Barber: {barber_name}\n\n"
-        message += f"Thank you for choosing {BUSINESS_NAME}. "
-        message += "Reply 'HELP' for assistance or 'CANCEL' to cancel your appointment."
+        message = template_service.render(
+            'reschedule', 'en',
+            customer_name=customer_name,
+            old_date=old_date,
+            old_time=old_time,
+            new_date=new_date,
+            new_time=new_time,
+            barber_name=barber_name,
+            service_name=service_name
+        )
         
         return send_sms(customer_phone, message)
     except Exception as e:
-        logger.error(f"Error sending rescheduled SMS: {str(e)}")
+        logger.error("Error sending rescheduled SMS: %s", e)
         return {
             'status': 'error',
             'error': str(e)
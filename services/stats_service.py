@@ -0,0 +1,113 @@
+"""
+Stats service for cached COUNT/GROUP BY aggregates shown on admin pages
+"""
+import logging
+import threading
+import time
+
+from config import STATS_CACHE_TTL
+from services import db_service
+
+logger = logging.getLogger(__name__)
+
+# Seconds the fallback for a failed query is kept, so a brief database error is
+# not shown for the full STATS_CACHE_TTL but an outage is not retried on every request
+ERROR_CACHE_TTL = 2
+
+# key -> (expires_at, value)
+_cache = {}
+_cache_lock = threading.Lock()
+
+def _cached(key, loader, fallback, ttl=None):
+    """
+    Return a cached value, calling loader() when it is missing or expired
+
+    loader() returns None when its query failed; fallback() is returned
+    instead and cached for ERROR_CACHE_TTL seconds at most.
+    """
+    ttl = STATS_CACHE_TTL if ttl is None else ttl
+    now = time.monotonic()
+
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry and entry[0] > now:
+            return entry[1]
+
+    # Load outside the lock so a slow query does not block other stats
+    value = loader()
+    if value is None:
+        value, ttl = fallback(), min(ttl, ERROR_CACHE_TTL)
+
+    with _cache_lock:
+        _cache[key] = (now + ttl, value)
+    return value
+
+def invalidate(key=None):
+    """
+    Drop cached stats so the next call recomputes them
+
+    Args:
+        key: Cache key to drop, or None to clear everything
+    """
+    with _cache_lock:
+        if key is None:
+            _cache.clear()
+        else:
+            _cache.pop(key, None)
+
+def get_totals():
+    """
+    Get the number of customers, appointments, barbers and services
+
+    Returns:
+        dict: Counts keyed by table name
+    """
+    return _cached('totals', db_service.get_table_counts,
+                   lambda: {'customers': 0, 'appointments': 0, 'barbers': 0, 'services': 0})
+
+def get_status_counts():
+    """
+    Get the number of appointments per status
+
+    Returns:
+        dict: Counts keyed by status, with every known status present
+    """
+    def with_all_statuses(counts):
+        return {
+            'scheduled': counts.get('scheduled', 0),
+            'completed': counts.get('completed', 0),
+            'cancelled': counts.get('cancelled', 0),
+            'no_show': counts.get('no-show', 0)
+        }
+
+    def query():
+        counts = db_service.get_appointment_status_counts()
+        return None if counts is None else with_all_statuses(counts)
+
+    return _cached('status_counts', query, lambda: with_all_statuses({}))
+
+def get_barber_counts(status=None):
+    """
+    Get the number of appointments per barber
+
+    Args:
+        status: Only count appointments with this status
+
+    Returns:
+        list: Dicts with barber_id, barber_name and count, busiest barber first
+    """
+    return _cached(f"barber_counts:{status or 'all'}",
+                   lambda: db_service.get_appointment_counts_by_barber(status), list)
+
+def get_summary():
+    """
+    Get every dashboard aggregate in one dict
+
+    Returns:
+        dict: 'totals', 'status_counts' and 'barber_counts'
+    """
+    return {
+        'totals': get_totals(),
+        'status_counts': get_status_counts(),
+        'barber_counts': get_barber_counts()
+    }
@@ -0,0 +1,197 @@
+"""
+Template service for pre-compiled appointment notification messages
+"""
+import logging
+from datetime import datetime
+from functools import lru_cache
+
+from config import BUSINESS_NAME
+
+logger = logging.getLogger(__name__)
+
+# Türkçe gün ve ay isimleri
+TURKISH_DAYS = ['Pazartesi', 'Salı', 'Çarşamba', 'Perşembe', 'Cuma', 'Cumartesi', 'Pazar']
+TURKISH_MONTHS = ['Ocak', 'Şubat', 'Mart', 'Nisan', 'Mayıs', 'Haziran',
+                  'Temmuz', 'Ağustos', 'Eylül', 'Ekim', 'Kasım', 'Aralık']
+
+# Raw templates per message type and language. {business_name} is resolved once
+# at compile time; every other field is filled in per message.
+_TEMPLATES = {
+    'confirmation': {
+        'en': (
+            "Hello {customer_name}! Your appointment has been confirmed.\n\n"
+            "Date: {date}\n"
+            "Time: {time}\n"
+            "Service: {service_name}\n"
+            "Barber: {barber_name}\n\n"
+            "Thank you for choosing {business_name}. "
+            "Reply 'HELP' for assistance or 'CANCEL' to cancel your appointment."
+        ),
+        'tr': (
+            "Merhaba {customer_name}! Randevunuz onaylanmıştır.\n\n"
+            "Tarih: {date}\n"
+            "Saat: {time}\n"
+            "Hizmet: {service_name}\n"
+            "Berber: {barber_name}\n\n"
+            "{business_name}'i tercih ettiğiniz için teşekkür ederiz. "
+            "Yardım için 'YARDIM' yazabilir veya randevunuzu iptal etmek için 'İPTAL' yazabilirsiniz."
+        )
+    },
+    'reminder': {
+        'en': (
+            "Hello {customer_name}! This is a reminder about your upcoming appointment.\n\n"
+            "Date: {date}\n"
+            "Time: {time}\n"
+            "Service: {service_name}\n"
+            "Barber: {barber_name}\n\n"
+            "{when}"
+            "We look forward to seeing you at {business_name}. "
+            "Reply 'HELP' for assistance or 'CANCEL' to cancel your appointment."
+        ),
+        'tr': (
+            "Merhaba {customer_name}! Yaklaşan randevunuz hakkında bir hatırlatma.\n\n"
+            "Tarih: {date}\n"
+            "Saat: {time}\n"
+            "Hizmet: {service_name}\n"
+            "Berber: {barber_name}\n\n"
+            "{when}"
+            "{business_name} olarak sizi görmekten memnuniyet duyacağız. "
+            "Yardım için 'YARDIM' yazabilir veya randevunuzu iptal etmek için 'İPTAL' yazabilirsiniz."
+        )
+    },
+    'cancellation': {
+        'en': (
+            "Hello {customer_name}! Your appointment has been cancelled.\n\n"
+            "Date: {date}\n"
+            "Time: {time}\n\n"
+            "Thank you for choosing {business_name}. "
+            "Please contact us if you would like to reschedule."
+        ),
+        'tr': (
+            "Merhaba {customer_name}! Randevunuz iptal edilmiştir.\n\n"
+            "Tarih: {date}\n"
+            "Saat: {time}\n\n"
+            "{business_name}'i tercih ettiğiniz için teşekkür ederiz. "
+            "Yeniden randevu almak isterseniz lütfen bizimle iletişime geçin."
+        )
+    },
+    'reschedule': {
+        'en': (
+            "Hello {customer_name}! Your appointment has been rescheduled.\n\n"
+            "Original: {old_date} at {old_time}\n\n"
+            "New Date: {new_date}\n"
+            "New Time: {new_time}\n"
+            "Service: {service_name}\n"
+            "Barber: {barber_name}\n\n"
+            "Thank you for choosing {business_name}. "
+            "Reply 'HELP' for assistance or 'CANCEL' to cancel your appointment."
+        ),
+        'tr': (
+            "Merhaba {customer_name}! Randevunuz yeniden planlandı.\n\n"
+            "Önceki: {old_date} saat {old_time}\n\n"
+            "Yeni Tarih: {new_date}\n"
+            "Yeni Saat: {new_time}\n"
+            "Hizmet: {service_name}\n"
+            "Berber: {barber_name}\n\n"
+            "{business_name}'i tercih ettiğiniz için teşekkür ederiz. "
+            "Yardım için 'YARDIM' yazabilir veya randevunuzu iptal etmek için 'İPTAL' yazabilirsiniz."
+        )
+    }
+}
+
+# Fields holding YYYY-MM-DD dates that are formatted for display before rendering
+_DATE_FIELDS = {
+    'confirmation': ('date',),
+    'reminder': ('date',),
+    'cancellation': ('date',),
+    'reschedule': ('old_date', 'new_date')
+}
+
+def _compile(template):
+    """Resolve constant fields once and return a bound formatter for the rest"""
+    business_name = BUSINESS_NAME.replace('{', '{{').replace('}', '}}')
+    return template.replace('{business_name}', business_name).format_map
+
+_COMPILED = {
+    (message_type, language): _compile(template)
+    for message_type, languages in _TEMPLATES.items()
+    for language, template in languages.items()
+}
+
+@lru_cache(maxsize=2048)
+def format_date(date_str, language='en'):
+    """
+    Format a YYYY-MM-DD date for display, cached per date and language
+
+    Args:
+        date_str: Date string in YYYY-MM-DD format
+        language: 'en' or 'tr'
+
+    Returns:
+        str: e.g. 'Monday, May 15, 2023' or 'Pazartesi, 15 Mayıs 2023'
+    """
+    date_obj = datetime.strptime(date_str, '%Y-%m-%d')
+
+    if language == 'tr':
+        return f"{TURKISH_DAYS[date_obj.weekday()]}, {date_obj.strftime('%d')} {TURKISH_MONTHS[date_obj.month - 1]} {date_obj.year}"
+
+    return date_obj.strftime('%A, %B %d, %Y')
+
+@lru_cache(maxsize=64)
+def _reminder_when(reminder_hours, language):
+    """Sentence telling the customer how soon the appointment is"""
+    if language == 'tr':
+        return "Randevunuz yarın. " if reminder_hours == 24 else f"Randevunuz {reminder_hours} saat içinde. "
+    return "Your appointment is tomorrow. " if reminder_hours == 24 else f"Your appointment is in {reminder_hours} hours. "
+
+def _get_renderer(message_type, language):
+    """Look up the compiled template, raising ValueError for unknown keys"""
+    try:
+        formatter = _COMPILED[(message_type, language)]
+    except KeyError:
+        raise ValueError(f"No template for message type '{message_type}' in language '{language}'")
+
+    date_fields = _DATE_FIELDS[message_type]
+    is_reminder = message_type == 'reminder'
+
+    def render_one(fields):
+        values = dict(fields)
+        for field in date_fields:
+            values[field] = format_date(values[field], language)
+        if is_reminder:
+            values['when'] = _reminder_when(values.get('reminder_hours', 24), language)
+        return formatter(values)
+
+    return render_one
+
+def render(message_type, language='en', **fields):
+    """
+    Render a single notification message
+
+    Args:
+        message_type: 'confirmation', 'reminder', 'cancellation' or 'reschedule'
+        language: 'en' or 'tr'
+        **fields: Template fields (customer_name, date, time, ...)
+
+    Returns:
+        str: Rendered message
+    """
+    return _get_renderer(message_type, language)(fields)
+
+def render_bulk(message_type, language, rows):
+    """
+    Render many notification messages of the same type in one pass
+
+    The template lookup happens once and date formatting is shared across
+    rows, so rendering thousands of reminders for the same few days is cheap.
+
+    Args:
+        message_type: 'confirmation', 'reminder', 'cancellation' or 'reschedule'
+        language: 'en' or 'tr'
+        rows: Iterable of field dicts, one per message
+
+    Returns:
+        list: Rendered messages, in the same order as rows
+    """
+    render_one = _get_renderer(message_type, language)
+    return [render_one(fields) for fields in rows]
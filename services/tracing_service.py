@@ -0,0 +1,319 @@
+"""
+Tracing service recording timed spans per request and keeping the slowest traces for inspection
+"""
+import functools
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from config import TRACE_SLOW_MS, TRACE_BUFFER_SIZE, TRACE_MAX_SPANS
+
+logger = logging.getLogger(__name__)
+
+TRACE_HEADER = 'X-Trace-Id'
+_TRACE_ID = re.compile(r'^[0-9a-f]{8,32}$')
+
+_current_span = ContextVar('current_span', default=None)
+
+# Finished traces slower than TRACE_SLOW_MS, newest last
+_slow_traces = deque(maxlen=TRACE_BUFFER_SIZE)
+_slow_lock = threading.Lock()
+_listening = False
+
+def _new_id(length=16):
+    return os.urandom(length // 2).hex()
+
+class Trace:
+    """
+    Spans sharing a trace ID
+
+    A trace is finished once every span in it has ended, including spans
+    started by background work the request handed off.
+    """
+
+    def __init__(self, trace_id=None):
+        self.trace_id = trace_id or _new_id(32)
+        self.started_at = time.time()
+        self.spans = []
+        self.dropped = 0
+        self._open = 0
+        self._lock = threading.Lock()
+
+    def _start(self, span):
+        with self._lock:
+            self._open += 1
+            if len(self.spans) < TRACE_MAX_SPANS:
+                self.spans.append(span)
+            else:
+                self.dropped += 1
+
+    def _hold(self):
+        with self._lock:
+            self._open += 1
+
+    def _end(self):
+        with self._lock:
+            self._open -= 1
+            finished = self._open == 0
+        if finished:
+            _finish_trace(self)
+
+    @property
+    def root(self):
+        return self.spans[0] if self.spans else None
+
+    @property
+    def duration_ms(self):
+        """Milliseconds from the first span's start to the last span's end"""
+        ends = [span.start + (span.duration_ms or 0) / 1000 for span in self.spans]
+        return (max(ends) - self.root.start) * 1000 if ends else 0.0
+
+    def to_dict(self):
+        """Trace with its spans, offsets relative to the first span"""
+        origin = self.root.start if self.root else 0
+        return {
+            'trace_id': self.trace_id,
+            'name': self.root.name if self.root else None,
+            'started_at': self.started_at,
+            'duration_ms': round(self.duration_ms, 2),
+            'span_count': len(self.spans),
+            'dropped_spans': self.dropped,
+            'spans': [span.to_dict(origin) for span in self.spans]
+        }
+
+class Span:
+    """A timed operation within a trace"""
+
+    def __init__(self, trace, name, parent=None, attributes=None):
+        self.trace = trace
+        self.span_id = _new_id()
+        self.parent_id = parent.span_id if parent else None
+        self.name = name
+        self.attributes = dict(attributes or {})
+        self.error = None
+        self.thread = threading.current_thread().name
+        self.start = time.perf_counter()
+        self.duration_ms = None
+
+    def set(self, **attributes):
+        """Add attributes to the span"""
+        self.attributes.update(attributes)
+
+    def finish(self, error=None):
+        """End the span; only the first call counts"""
+        if self.duration_ms is not None:
+            return
+        self.duration_ms = (time.perf_counter() - self.start) * 1000
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        self.trace._end()
+
+    def to_dict(self, origin):
+        return {
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'offset_ms': round((self.start - origin) * 1000, 2),
+            'duration_ms': round(self.duration_ms, 2) if self.duration_ms is not None else None,
+            'attributes': self.attributes,
+            'error': self.error,
+            'thread': self.thread
+        }
+
+def _finish_trace(trace):
+    """Keep the trace if it was slow"""
+    duration_ms = trace.duration_ms
+    if duration_ms >= TRACE_SLOW_MS:
+        with _slow_lock:
+            _slow_traces.append(trace)
+        logger.info(f"Slow trace {trace.trace_id} ({trace.root.name}): {duration_ms:.0f} ms, {len(trace.spans)} spans")
+
+def start_span(name, trace_id=None, **attributes):
+    """
+    Start a span as a child of the current one, or as the root of a new trace
+
+    Prefer span() unless the span must end in another callback (e.g.
+    teardown_request). The caller must pass the result to end_span().
+
+    Args:
+        name: Operation name, e.g. 'openai.chat.completions'
+        trace_id: Trace ID to join when starting a new trace (e.g. from a header)
+        **attributes: Details shown with the span
+
+    Returns:
+        tuple: (Span, token) where token restores the previous current span
+    """
+    parent = _current_span.get()
+    trace = parent.trace if parent else Trace(trace_id)
+    new_span = Span(trace, name, parent, attributes)
+    trace._start(new_span)
+    return new_span, _current_span.set(new_span)
+
+def end_span(span, token, error=None):
+    """Finish a span from start_span and make its parent current again"""
+    try:
+        _current_span.reset(token)
+    except ValueError:
+        # Ended in another context; nothing to restore there
+        pass
+    span.finish(error)
+
+@contextmanager
+def span(name, **attributes):
+    """
+    Time the block as a span of the current trace
+
+    Args:
+        name: Operation name
+        **attributes: Details shown with the span
+
+    Yields:
+        Span: The running span, for adding attributes
+    """
+    current, token = start_span(name, **attributes)
+    try:
+        yield current
+    except BaseException as e:
+        end_span(current, token, e)
+        raise
+    end_span(current, token)
+
+def traced(name=None):
+    """Decorator running the function inside a span named after it"""
+    def decorator(func):
+        span_name = name or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def wrap(func, name=None):
+    """
+    Carry the current trace into work run elsewhere, e.g. a background thread
+
+    The returned callable runs func in a copy of the caller's context inside
+    a child span. The trace stays open until the work is done, so a slow
+    background job still makes its request's trace slow.
+
+    Args:
+        func: Callable to run later
+        name: Span name, defaults to the function name
+    """
+    context = copy_context()
+    parent = _current_span.get()
+    trace = parent.trace if parent else None
+    span_name = name or f"background.{func.__name__}"
+    if trace:
+        trace._hold()
+
+    def run(*args, **kwargs):
+        def inner():
+            with span(span_name):
+                return func(*args, **kwargs)
+        try:
+            return context.run(inner)
+        finally:
+            if trace:
+                trace._end()
+    return run
+
+def current_trace_id():
+    """Trace ID of the current span, or None outside a trace"""
+    current = _current_span.get()
+    return current.trace.trace_id if current else None
+
+def get_slow_traces():
+    """
+    Slow traces kept in the ring buffer, slowest first
+
+    Returns:
+        list: Trace summaries (without spans)
+    """
+    with _slow_lock:
+        traces = list(_slow_traces)
+    summaries = []
+    for trace in sorted(traces, key=lambda t: -t.duration_ms):
+        summary = trace.to_dict()
+        summary.pop('spans')
+        summaries.append(summary)
+    return summaries
+
+def get_trace(trace_id):
+    """Get a kept trace with its spans, or None"""
+    with _slow_lock:
+        for trace in _slow_traces:
+            if trace.trace_id == trace_id:
+                return trace.to_dict()
+    return None
+
+def clear():
+    """Forget all kept traces"""
+    with _slow_lock:
+        _slow_traces.clear()
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_span.get() is not None:
+        conn.info.setdefault('trace_spans', []).append(
+            start_span('db.query', statement=statement[:200], executemany=executemany)
+        )
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    spans = conn.info.get('trace_spans')
+    if spans:
+        end_span(*spans.pop())
+
+def _handle_error(exception_context):
+    spans = exception_context.connection.info.get('trace_spans') if exception_context.connection else None
+    if spans:
+        end_span(*spans.pop(), error=exception_context.original_exception)
+
+def _before_request():
+    """Start the request's root span, joining the caller's trace if it sent one"""
+    incoming = request.headers.get(TRACE_HEADER, '').lower()
+    g._trace_span = start_span(
+        f"{request.method} {request.endpoint or request.path}",
+        trace_id=incoming if _TRACE_ID.match(incoming) else None
+    )
+
+def _after_request(response):
+    """Tell the caller which trace handled the request"""
+    state = g.get('_trace_span')
+    if state is not None:
+        response.headers[TRACE_HEADER] = state[0].trace.trace_id
+        state[0].set(status=response.status_code)
+    return response
+
+def _teardown_request(exc):
+    """End the request's root span"""
+    state = g.pop('_trace_span', None)
+    if state is not None:
+        end_span(*state, error=exc)
+
+def init_app(app):
+    """
+    Trace every request handled by the app, including its SQL queries
+
+    Args:
+        app: Flask application
+    """
+    global _listening
+    if not _listening:
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(Engine, 'handle_error', _handle_error)
+        _listening = True
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
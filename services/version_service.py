@@ -0,0 +1,117 @@
+"""
+Version service tracking per-collection write counters for conditional GET responses
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import request, make_response
+
+logger = logging.getLogger(__name__)
+
+COLLECTIONS = ('customers', 'appointments', 'barbers', 'services')
+
+# Counters restart with the process, so ETags carry a per-process epoch and
+# an old tag can never match a restarted counter by accident.
+_epoch = f"{os.getpid():x}{time.time_ns():x}"
+_versions = {collection: 0 for collection in COLLECTIONS}
+_modified_at = {collection: time.time() for collection in COLLECTIONS}
+_lock = threading.Lock()
+
+def reset_epoch():
+    """
+    Start a new epoch in a forked worker
+
+    Workers forked from a preloaded master inherit its epoch but keep their
+    own counters, so each needs an epoch of its own.
+    """
+    global _epoch
+    _epoch = f"{os.getpid():x}{time.time_ns():x}"
+
+def bump(collection):
+    """
+    Record a write to a collection
+
+    Called by data_service and db_service after every change, so that
+    ETags computed before the change no longer match.
+
+    Args:
+        collection: 'customers', 'appointments', 'barbers' or 'services'
+    """
+    with _lock:
+        _versions[collection] = _versions.get(collection, 0) + 1
+        _modified_at[collection] = time.time()
+
+def get_version(collection):
+    """Get the current write counter of a collection"""
+    return _versions.get(collection, 0)
+
+def get_last_modified(collections):
+    """Get the time of the most recent write to any of the collections"""
+    return datetime.fromtimestamp(max(_modified_at.get(c, 0) for c in collections), tz=timezone.utc)
+
+def make_etag(collections, *key_parts, shared=None):
+    """
+    Build an ETag from collection versions and request-specific parts
+
+    Args:
+        collections: Collections the response is built from
+        *key_parts: Anything else the response depends on, e.g. the query string
+        shared: Version of the collections shared by every worker process (see
+            conditional); replaces this process's counters and epoch
+
+    Returns:
+        str: Opaque ETag value (unquoted)
+    """
+    if shared is not None:
+        versions = repr(shared)
+        key = '|'.join(['shared', versions] + [str(part) for part in key_parts])
+    else:
+        with _lock:
+            versions = '.'.join(f"{c}:{_versions.get(c, 0)}" for c in collections)
+        key = '|'.join([_epoch, versions] + [str(part) for part in key_parts])
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()[:32]
+
+def conditional(*collections, version=None):
+    """
+    Decorator answering If-None-Match with 304 without calling the view
+
+    The ETag covers the collection versions, the request path and query
+    string, so it is computed before any data is read: a write racing with
+    the view makes the stored tag stale, never the other way round. Only
+    200 responses are tagged.
+
+    This process's counters only see its own writes, so views behind several
+    worker processes pass a version function reading state every worker
+    shares, e.g. data_service.shared_version or db_service.table_version.
+
+    Args:
+        *collections: Collections the view's response is built from
+        version: Optional callable taking the collections and returning
+            (hashable version, last modified datetime or None)
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            shared, last_modified = version(collections) if version else (None, None)
+            etag = make_etag(collections, request.path, request.query_string.decode('utf-8', 'replace'),
+                             shared=shared)
+
+            if request.if_none_match.contains(etag):
+                response = make_response('', 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            response.last_modified = last_modified or get_last_modified(collections)
+            # Clients may keep the body but must revalidate before reusing it
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return wrapper
+    return decorator
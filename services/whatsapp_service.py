@@ -4,29 +4,54 @@ WhatsApp messaging service using Twilio's WhatsApp API
 import os
 import logging
 from datetime import datetime, timedelta
-from twilio.rest import Client
 from config import BUSINESS_NAME
+from services import outbox_service, db_service, client_factory, template_service, tracing_service
+from utils.logger import SAMPLED
 
 logger = logging.getLogger(__name__)
 
-# Initialize Twilio client
+# Twilio configuration (the client itself is created lazily by client_factory)
 TWILIO_ACCOUNT_SID = os.environ.get("TWILIO_ACCOUNT_SID")
 TWILIO_AUTH_TOKEN = os.environ.get("TWILIO_AUTH_TOKEN")
 TWILIO_PHONE_NUMBER = os.environ.get("TWILIO_PHONE_NUMBER")
+# Public URL of /webhook/whatsapp/status; Twilio posts delivery updates there when set
+TWILIO_STATUS_CALLBACK_URL = os.environ.get("TWILIO_STATUS_CALLBACK_URL")
 
-client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
-
-def send_whatsapp_message(to_phone, message):
+def send_whatsapp_message(to_phone, message, message_type='conversation'):
     """
     Send a WhatsApp message using Twilio
     
+    If called inside message_turn(), the message is queued and sent together
+    with the other messages for the same phone when the turn ends.
+    
     Args:
         to_phone: Recipient's phone number
         message: Message content
+        message_type: Message category used for delivery metrics
         
     Returns:
-        dict: Response from Twilio
+        dict: Response from Twilio, or a 'queued' status inside a turn
+    """
+    if outbox_service.queue_message(to_phone, message, message_type):
+        return {
+            'status': 'queued',
+            'to': to_phone
+        }
+    
+    return _deliver_whatsapp_message(to_phone, message, message_type)
+
+def message_turn():
+    """
+    Coalesce every WhatsApp message sent inside the block into as few sends as possible
+    
+    Usage:
+        with whatsapp_service.message_turn():
+            handle_incoming_message(...)
     """
+    return outbox_service.turn(_deliver_whatsapp_message)
+
+def _deliver_whatsapp_message(to_phone, message, message_type='conversation'):
+    """Send a WhatsApp message immediately via Twilio, bypassing the outbox"""
     try:
         # Format the phone number if needed
         if not to_phone.startswith('+'):
@@ -34,26 +59,57 @@ def send_whatsapp_message(to_phone, message):
             
         # Send the message via WhatsApp
         # Twilio's WhatsApp API requires 'whatsapp:' prefix
-        message = client.messages.create(
-            body=message,
-            from_=f'whatsapp:{TWILIO_PHONE_NUMBER}',
-            to=f'whatsapp:{to_phone}'
-        )
+        params = {
+            'body': message,
+            'from_': f'whatsapp:{TWILIO_PHONE_NUMBER}',
+            'to': f'whatsapp:{to_phone}'
+        }
+        if TWILIO_STATUS_CALLBACK_URL:
+            params['status_callback'] = TWILIO_STATUS_CALLBACK_URL
+        
+        sent_at = datetime.utcnow()
+        with tracing_service.span('twilio.messages.create', channel='whatsapp', message_type=message_type):
+            message = client_factory.get_twilio_client().messages.create(**params)
+        
+        logger.info("WhatsApp message sent to %s: %s", to_phone, message.sid, extra=SAMPLED)
         
-        logger.info(f"WhatsApp message sent to {to_phone}: {message.sid}")
+        # Track the send so delivery callbacks can be joined to it; a callback
+        # that already arrived created the row and keeps its status
+        db_service.record_message_sent(message.sid, to_phone, message_type, sent_at=sent_at)
         return {
             'status': 'success',
             'message_sid': message.sid,
             'to': to_phone
         }
     except Exception as e:
-        logger.error(f"Error sending WhatsApp message to {to_phone}: {str(e)}")
+        logger.error("Error sending WhatsApp message to %s: %s", to_phone, e)
         return {
             'status': 'error',
             'error': str(e),
             'to': to_phone
         }
 
+def is_valid_twilio_request(url, params, signature):
+    """
+    Check the X-Twilio-Signature of a webhook request
+    
+    Args:
+        url: Full URL Twilio posted to, including the query string
+        params: Form parameters of the request
+        signature: Value of the X-Twilio-Signature header
+        
+    Returns:
+        bool: True if the request was signed with TWILIO_AUTH_TOKEN
+    """
+    if not TWILIO_AUTH_TOKEN:
+        logger.error("TWILIO_AUTH_TOKEN is not set, rejecting Twilio webhook")
+        return False
+    if not signature:
+        return False
+    
+    from twilio.request_validator import RequestValidator
+    return RequestValidator(TWILIO_AUTH_TOKEN).validate(url, params, signature)
+
 def send_appointment_confirmation(customer_phone, customer_name, appointment_date, 
                                  appointment_time, barber_name, service_name):
     """
@@ -71,58 +127,18 @@ def send_appointment_confirmation(customer_phone, customer_name, appointment_dat
         dict: Response from send_whatsapp_message function
     """
     try:
-        # Format date for display
-        date_obj = datetime.strptime(appointment_date, '%Y-%m-%d')
-        
-        # Türkçe gün ve ay isimleri
-        turkish_days = {
-            'Monday': 'Pazartesi',
-            'Tuesday': 'Salı',
-            'Wednesday': 'Çarşamba',
-            'Thursday': 'Perşembe',
-            'Friday': 'Cuma',
-            'Saturday': 'Cumartesi',
-            'Sunday': 'Pazar'
-        }
-        
-        turkish_months = {
-            'January': 'Ocak',
-            'February': 'Şubat',
-            'March': 'Mart',
-            'April': 'Nisan',
-            'May': 'Mayıs',
-            'June': 'Haziran',
-            'July': 'Temmuz',
-            'August': 'Ağustos',
-            'September': 'Eylül',
-            'October': 'Ekim',
-            'November': 'Kasım',
-            'December': 'Aralık'
-        }
-        
-        # İngilizce formatı al
-        english_date = date_obj.strftime('%A, %B %d, %Y')
-        
-        # Türkçe'ye çevir
-        day_name = english_date.split(',')[0]
-        month_name = english_date.split(' ')[1]
-        day_num = english_date.split(' ')[2].replace(',', '')
-        year = english_date.split(' ')[3]
-        
-        formatted_date = f"{turkish_days[day_name]}, {day_num} {turkish_months[month_name]} {year}"
-        
-        # Build message in Turkish
-        message = f"Merhaba {customer_name}! Randevunuz onaylanmıştır.\n\n"
-        message += f"Tarih: {formatted_date}\n"
-        message += f"Saat: {appointment_time}\n"
-        message += f"Hizmet: {service_name}\n"
-        message += f"Berber: {barber_name}\n\n"
-        message += f"{BUSINESS_NAME}'i tercih ettiğiniz için teşekkür ederiz. "
-        message += "Yardım için 'YARDIM' yazabilir veya randevunuzu iptal etmek için 'İPTAL' yazabilirsiniz."
+        message = template_service.render(
+            'confirmation', 'tr',
+            customer_name=customer_name,
+            date=appointment_date,
+            time=appointment_time,
+            barber_name=barber_name,
+            service_name=service_name
+        )
         
-        return send_whatsapp_message(customer_phone, message)
+        return send_whatsapp_message(customer_phone, message, message_type='confirmation')
     except Exception as e:
-        logger.error(f"Error sending confirmation WhatsApp message: {str(e)}")
+        logger.error("Error sending confirmation WhatsApp message: %s", e)
         return {
             'status': 'error',
             'error': str(e)
@@ -146,69 +162,54 @@ def send_appointment_reminder(customer_phone, customer_name, appointment_date,
         dict: Response from send_whatsapp_message function
     """
     try:
-        # Format date for display
-        date_obj = datetime.strptime(appointment_date, '%Y-%m-%d')
-        
-        # Türkçe gün ve ay isimleri
-        turkish_days = {
-            'Monday': 'Pazartesi',
-            'Tuesday': 'Salı',
-            'Wednesday': 'Çarşamba',
-            'Thursday': 'Perşembe',
-            'Friday': 'Cuma',
-            'Saturday': 'Cumartesi',
-            'Sunday': 'Pazar'
-        }
-        
-        turkish_months = {
-            'January': 'Ocak',
-            'February': 'Şubat',
-            'March': 'Mart',
-            'April': 'Nisan',
-            'May': 'Mayıs',
-            'June': 'Haziran',
-            'July': 'Temmuz',
-            'August': 'Ağustos',
-            'September': 'Eylül',
-            'October': 'Ekim',
-            'November': 'Kasım',
-            'December': 'Aralık'
-        }
-        
-        # İngilizce formatı al
-        english_date = date_obj.strftime('%A, %B %d, %Y')
-        
-        # Türkçe'ye çevir
-        day_name = english_date.split(',')[0]
-        month_name = english_date.split(' ')[1]
-        day_num = english_date.split(' ')[2].replace(',', '')
-        year = english_date.split(' ')[3]
-        
-        formatted_date = f"{turkish_days[day_name]}, {day_num} {turkish_months[month_name]} {year}"
-        
-        # Build message in Turkish
-        message = f"Merhaba {customer_name}! Yaklaşan randevunuz hakkında bir hatırlatma.\n\n"
-        message += f"Tarih: {formatted_date}\n"
-        message += f"Saat: {appointment_time}\n"
-        message += f"Hizmet: {service_name}\n"
-        message += f"Berber: {barber_name}\n\n"
-        
-        if reminder_hours == 24:
-            message += f"Randevunuz yarın. "
-        else:
-            message += f"Randevunuz {reminder_hours} saat içinde. "
-            
-        message += f"{BUSINESS_NAME} olarak sizi görmekten memnuniyet duyacağız. "
-        message += "Yardım için 'YARDIM' yazabilir veya randevunuzu iptal etmek için 'İPTAL' yazabilirsiniz."
+        message = template_service.render(
+            'reminder', 'tr',
+            customer_name=customer_name,
+            date=appointment_date,
+            time=appointment_time,
+            barber_name=barber_name,
+            service_name=service_name,
+            reminder_hours=reminder_hours
+        )
         
-        return send_whatsapp_message(customer_phone, message)
+        return send_whatsapp_message(customer_phone, message, message_type='reminder')
     except Exception as e:
-        logger.error(f"Error sending reminder WhatsApp message: {str(e)}")
+        logger.error("Error sending reminder WhatsApp message: %s", e)
         return {
             'status': 'error',
             'error': str(e)
         }
 
+def send_appointment_reminders(reminders):
+    """
+    Send many appointment reminders, rendering every message in one pass
+    
+    Args:
+        reminders: List of dicts with customer_phone, customer_name,
+            appointment_date, appointment_time, barber_name, service_name
+            and optionally reminder_hours (default 24)
+        
+    Returns:
+        list: Responses from send_whatsapp_message, in the same order as reminders
+    """
+    try:
+        messages = template_service.render_bulk('reminder', 'tr', [{
+            'customer_name': reminder['customer_name'],
+            'date': reminder['appointment_date'],
+            'time': reminder['appointment_time'],
+            'barber_name': reminder['barber_name'],
+            'service_name': reminder['service_name'],
+            'reminder_hours': reminder.get('reminder_hours', 24)
+        } for reminder in reminders])
+    except Exception as e:
+        logger.error("Error rendering reminder WhatsApp messages: %s", e)
+        return [{'status': 'error', 'error': str(e)} for _ in reminders]
+    
+    return [
+        send_whatsapp_message(reminder['customer_phone'], message, message_type='reminder')
+        for reminder, message in zip(reminders, messages)
+    ]
+
 def send_appointment_cancelled(customer_phone, customer_name, appointment_date, appointment_time):
     """
     Send an appointment cancellation message via WhatsApp
@@ -223,56 +224,16 @@ def send_appointment_cancelled(customer_phone, customer_name, appointment_date,
         dict: Response from send_whatsapp_message function
     """
     try:
-        # Format date for display
-        date_obj = datetime.strptime(appointment_date, '%Y-%m-%d')
-        
-        # Türkçe gün ve ay isimleri
-        turkish_days = {
-            'Monday': 'Pazartesi',
-            'Tuesday': 'Salı',
-            'Wednesday': 'Çarşamba',
-            'Thursday': 'Perşembe',
-            'Friday': 'Cuma',
-            'Saturday': 'Cumartesi',
-            'Sunday': 'Pazar'
-        }
-        
-        turkish_months = {
-            'January': 'Ocak',
-            'February': 'Şubat',
-            'March': 'Mart',
-            'April': 'Nisan',
-            'May': 'Mayıs',
-            'June': 'Haziran',
-            'July': 'Temmuz',
-            'August': 'Ağustos',
-            'September': 'Eylül',
-            'October': 'Ekim',
-            'November': 'Kasım',
-            'December': 'Aralık'
-        }
-        
-        # İngilizce formatı al
-        english_date = date_obj.strftime('%A, %B %d, %Y')
-        
-        # Türkçe'ye çevir
-        day_name = english_date.split(',')[0]
-        month_name = english_date.split(' ')[1]
-        day_num = english_date.split(' ')[2].replace(',', '')
-        year = english_date.split(' ')[3]
-        
-        formatted_date = f"{turkish_days[day_name]}, {day_num} {turkish_months[month_name]} {year}"
-        
-        # Build message in Turkish
-        message = f"Merhaba {customer_name}! Randevunuz iptal edilmiştir.\n\n"
-        message += f"Tarih: {formatted_date}\n"
-        message += f"Saat: {appointment_time}\n\n"
-        message += f"{BUSINESS_NAME}'i tercih ettiğiniz için teşekkür ederiz. "
-        message += "Yeniden randevu almak isterseniz lütfen bizimle iletişime geçin."
+        message = template_service.render(
+            'cancellation', 'tr',
+            customer_name=customer_name,
+            date=appointment_date,
+            time=appointment_time
+        )
         
-        return send_whatsapp_message(customer_phone, message)
+        return send_whatsapp_message(customer_phone, message, message_type='cancellation')
     except Exception as e:
-        logger.error(f"Error sending cancellation WhatsApp message: {str(e)}")
+        logger.error("Error sending cancellation WhatsApp message: %s", e)
         return {
             'status': 'error',
             'error': str(e)
@@ -299,69 +260,20 @@ def send_appointment_rescheduled(customer_phone, customer_name,
         dict: Response from send_whatsapp_message function
     """
     try:
-        # Format dates for display
-        old_date_obj = datetime.strptime(old_date, '%Y-%m-%d')
-        new_date_obj = datetime.strptime(new_date, '%Y-%m-%d')
-        
-        # Türkçe gün ve ay isimleri
-        turkish_days = {
-            'Monday': 'Pazartesi',
-            'Tuesday': 'Salı',
-            'Wednesday': 'Çarşamba',
-            'Thursday': 'Perşembe',
-            'Friday': 'Cuma',
-            'Saturday': 'Cumartesi',
-            'Sunday': 'Pazar'
-        }
-        
-        turkish_months = {
-            'January': 'Ocak',
-            'February': 'Şubat',
-            'March': 'Mart',
-            'April': 'Nisan',
-            'May': 'Mayıs',
-            'June': 'Haziran',
-            'July': 'Temmuz',
-            'August': 'Ağustos',
-            'September': 'Eylül',
-            'October': 'Ekim',
-            'November': 'Kasım',
-            'December': 'Aralık'
-        }
-        
-        # İngilizce formatı al
-        old_english_date = old_date_obj.strftime('%A, %B %d, %Y')
-        new_english_date = new_date_obj.strftime('%A, %B %d, %Y')
-        
-        # Türkçe'ye çevir - Eski tarih
-        day_name = old_english_date.split(',')[0]
-        month_name = old_english_date.split(' ')[1]
-        day_num = old_english_date.split(' ')[2].replace(',', '')
-        year = old_english_date.split(' ')[3]
-        
-        old_formatted_date = f"{turkish_days[day_name]}, {day_num} {turkish_months[month_name]} {year}"
-        
-        # Türkçe'ye çevir - Yeni tarih
-        day_name = new_english_date.split(',')[0]
-        month_name = new_english_date.split(' ')[1]
-        day_num = new_english_date.split(' ')[2].replace(',', '')
-        year = new_english_date.split(' ')[3]
-        
-        new_formatted_date = f"{turkish_days[day_name]}, {day_num} {turkish_months[month_name]} {year}"
-        
-        # Build message in Turkish
-        message = f"Merhaba {customer_name}! Randevunuz yeniden planlandı.\n\n"
-        message += f"Önceki: {old_formatted_date} saat {old_time}\n\n"
-        message += f"Yeni Tarih: {new_formatted_date}\n"
-        message += f"Yeni Saat: {new_time}\n"
-        message += f"Hizmet: {service_name}\n"
-        message += f"Berber: {barber_name}\n\n"
-        message += f"{BUSINESS_NAME}'i tercih ettiğiniz için teşekkür ederiz. "
-        message += "Yardım için 'YARDIM' yazabilir veya randevunuzu iptal etmek için 'İPTAL' yazabilirsiniz."
+        message = template_service.render(
+            'reschedule', 'tr',
+            customer_name=customer_name,
+            old_date=old_date,
+            old_time=old_time,
+            new_date=new_date,
+            new_time=new_time,
+            barber_name=barber_name,
+            service_name=service_name
+        )
         
-        return send_whatsapp_message(customer_phone, message)
+        return send_whatsapp_message(customer_phone, message, message_type='reschedule')
     except Exception as e:
-        logger.error(f"Error sending rescheduled WhatsApp message: {str(e)}")
+        logger.error("Error sending rescheduled WhatsApp message: %s", e)
         return {
             'status': 'error',
             'error': str(e)
@@ -420,7 +332,7 @@ def process_incoming_message(from_phone, message_body):
             return {'status': 'success', 'action': 'message_acknowledged'}
             
     except Exception as e:
-        logger.error(f"Error processing incoming WhatsApp message: {str(e)}")
+        logger.error("Error processing incoming WhatsApp message: %s", e)
         return {
             'status': 'error',
             'error': str(e)
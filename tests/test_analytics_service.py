@@ -0,0 +1,132 @@
+"""
+Tests for the analytics service module
+"""
+import unittest
+from datetime import date
+
+from flask import Flask
+
+# Import the module under test
+from models.database import db, Customer, Barber, Service, Appointment
+from services import analytics_service
+
+
+class TestAnalyticsService(unittest.TestCase):
+    """Test cases for the analytics service module"""
+
+    def setUp(self):
+        """Setup an in-memory database with a week of appointments before each test"""
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        db.init_app(self.app)
+        self.context = self.app.app_context()
+        self.context.push()
+        db.create_all()
+        analytics_service.invalidate()
+
+        weekdays = {'start': '09:00', 'end': '11:00'}
+        db.session.add_all([
+            Customer(id='c1', name='John Doe', phone='+1234567890'),
+            Barber(id='b1', name='Bob', working_hours={'monday': weekdays, 'tuesday': weekdays}),
+            Barber(id='b2', name='Ali', working_hours={'monday': weekdays}),
+            Service(id='s1', name='Haircut', price=25.0, duration=30),
+            Service(id='s2', name='Shave', price=10.0, duration=15),
+        ])
+
+        # 2023-05-15 is a Monday
+        appointments = [
+            ('b1', 's1', date(2023, 5, 15), '09:00', 30, 'completed'),
+            ('b1', 's1', date(2023, 5, 15), '09:45', 30, 'completed'),
+            ('b2', 's2', date(2023, 5, 15), '10:00', 15, 'no-show'),
+            ('b2', 's1', date(2023, 5, 16), '10:00', 30, 'cancelled'),
+            ('b1', 's2', date(2023, 5, 16), '10:30', 15, 'completed'),
+            ('b1', 's1', date(2023, 5, 22), '09:00', 30, 'scheduled'),
+        ]
+        for i, (barber_id, service_id, day, start, duration, status) in enumerate(appointments):
+            db.session.add(Appointment(id=f'a{i}', customer_id='c1', barber_id=barber_id, service_id=service_id,
+                                       date=day, time=start, duration=duration, status=status))
+        db.session.commit()
+
+    def tearDown(self):
+        """Drop the database after each test"""
+        db.session.remove()
+        db.drop_all()
+        self.context.pop()
+
+    def test_revenue_by_barber_and_service(self):
+        """Test that only completed appointments count as revenue"""
+        report = analytics_service.get_report(date(2023, 5, 15), date(2023, 5, 21))
+
+        by_barber = {row['name']: row for row in report['revenue_by_barber']}
+        self.assertEqual(by_barber['Bob']['revenue'], 60.0)
+        self.assertEqual(by_barber['Bob']['average_ticket'], 20.0)
+        self.assertEqual(by_barber['Ali']['revenue'], 0.0)
+        self.assertEqual(report['revenue_by_barber'][0]['name'], 'Bob')
+
+        by_service = {row['name']: row for row in report['revenue_by_service']}
+        self.assertEqual(by_service['Haircut']['appointments'], 3)
+        self.assertEqual(by_service['Shave']['revenue'], 10.0)
+        self.assertEqual(report['summary']['revenue'], 60.0)
+
+    def test_hourly_utilization(self):
+        """Test booked minutes spread across hours against working hours"""
+        report = analytics_service.get_report(date(2023, 5, 15), date(2023, 5, 21))
+        hours = {row['hour']: row for row in report['utilization']}
+
+        # Monday: two barbers, Tuesday: one barber, 60 minutes each per hour
+        self.assertEqual(hours[9]['available_minutes'], 180)
+        # 09:00-09:30 and 09:45-10:15 on Monday
+        self.assertEqual(hours[9]['booked_minutes'], 45)
+        # 09:45-10:15 overflow, the no-show at 10:00 and 10:30-10:45 on Tuesday
+        self.assertEqual(hours[10]['booked_minutes'], 45)
+        self.assertEqual(hours[9]['utilization'], 0.25)
+        self.assertNotIn(8, hours)
+
+    def test_rates_over_time(self):
+        """Test cancellation and no-show rates per day and per week"""
+        report = analytics_service.get_report(date(2023, 5, 15), date(2023, 5, 28))
+        days = {row['period']: row for row in report['rates']}
+
+        self.assertEqual(days['2023-05-15']['no_show_rate'], round(1 / 3, 4))
+        self.assertEqual(days['2023-05-16']['cancellation_rate'], 0.5)
+        self.assertEqual(days['2023-05-16']['no_show_rate'], 0.0)
+
+        weeks = analytics_service.get_report(date(2023, 5, 15), date(2023, 5, 28), 'week')['rates']
+        self.assertEqual([(row['period'], row['appointments']) for row in weeks],
+                         [('2023-05-15', 5), ('2023-05-22', 1)])
+
+    def test_report_is_cached(self):
+        """Test that reports are cached per date range until refreshed"""
+        first = analytics_service.get_report(date(2023, 5, 15), date(2023, 5, 21))
+        Appointment.query.filter_by(id='a0').delete()
+        db.session.commit()
+
+        self.assertIs(analytics_service.get_report(date(2023, 5, 15), date(2023, 5, 21)), first)
+        refreshed = analytics_service.get_report(date(2023, 5, 15), date(2023, 5, 21), refresh=True)
+        self.assertEqual(refreshed['summary']['appointments'], 4)
+
+    def test_empty_range(self):
+        """Test a range without appointments"""
+        report = analytics_service.get_report(date(2022, 1, 3), date(2022, 1, 3))
+
+        self.assertEqual(report['summary']['appointments'], 0)
+        self.assertEqual(report['revenue_by_barber'], [])
+        self.assertEqual(report['rates'], [])
+        self.assertEqual(report['utilization'][0]['booked_minutes'], 0)
+
+    def test_unpadded_and_invalid_times(self):
+        """Test that 'H:MM' times are parsed and unparseable ones are skipped"""
+        for i, start in enumerate(['9:15', 'soon', '25:00']):
+            db.session.add(Appointment(id=f'x{i}', customer_id='c1', barber_id='b1', service_id='s2',
+                                       date=date(2023, 5, 17), time=start, duration=15, status='completed'))
+        db.session.commit()
+
+        columns = analytics_service.load_columns(date(2023, 5, 17), date(2023, 5, 17))
+        self.assertEqual(columns['start'].tolist(), [555])
+        self.assertEqual(len(columns['date']), 1)
+        report = analytics_service.get_report(date(2023, 5, 15), date(2023, 5, 21))
+        self.assertEqual(report['summary']['appointments'], 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
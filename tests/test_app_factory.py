@@ -0,0 +1,58 @@
+"""
+Tests for the application factory
+"""
+import unittest
+
+# Import the module under test
+import app as app_module
+
+
+class TestAppFactory(unittest.TestCase):
+    """Test cases for the application factory"""
+
+    def test_import_has_no_side_effects(self):
+        """Test that importing the module does not build an app"""
+        self.assertIsNone(app_module._app)
+
+    def test_create_app_without_bootstrap(self):
+        """Test an app created without bootstrap steps"""
+        app = app_module.create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://'}, bootstrap=())
+
+        self.assertEqual(app.config['SQLALCHEMY_DATABASE_URI'], 'sqlite://')
+        self.assertIn('admin', app.blueprints)
+        self.assertIn('strptime', app.jinja_env.filters)
+
+        report = app.extensions['startup']
+        names = [step['name'] for step in report['steps']]
+        self.assertIn('init_db', names)
+        self.assertNotIn('create_tables', names)
+        self.assertGreaterEqual(report['total_ms'], 0)
+
+    def test_blueprint_subset(self):
+        """Test registering only some blueprints"""
+        app = app_module.create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://'}, bootstrap=(),
+                                    blueprints=['appointments'])
+
+        self.assertEqual(set(app.blueprints), {'appointment'})
+        with self.assertRaises(ValueError):
+            app_module.create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://'}, bootstrap=(), blueprints=['unknown'])
+
+    def test_create_tables_step(self):
+        """Test that the create_tables step creates the schema"""
+        app = app_module.create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://'}, bootstrap=['create_tables'],
+                                    blueprints=[])
+        from models.database import db
+        with app.app_context():
+            self.assertIn('appointments', db.inspect(db.engine).get_table_names())
+
+    def test_parse_bootstrap(self):
+        """Test APP_BOOTSTRAP values"""
+        self.assertEqual(app_module._parse_bootstrap(None), app_module.BOOTSTRAP_STEPS)
+        self.assertEqual(app_module._parse_bootstrap('none'), ())
+        self.assertEqual(app_module._parse_bootstrap('create_tables, migrations'), ('create_tables', 'migrations'))
+        with self.assertRaises(ValueError):
+            app_module._parse_bootstrap('everything')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,197 @@
+"""
+Tests for the campaign service module
+"""
+import time
+import unittest
+from datetime import datetime, timedelta
+
+from flask import Flask
+
+# Import the module under test
+from models.database import db, Customer, Campaign
+from services import campaign_service, db_service
+
+
+class TestCampaignService(unittest.TestCase):
+    """Test cases for the campaign service module"""
+
+    def setUp(self):
+        """Setup an in-memory database with a few customers before each test"""
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        db.init_app(self.app)
+        self.context = self.app.app_context()
+        self.context.push()
+        db.create_all()
+
+        old_visit = datetime.utcnow() - timedelta(days=60)
+        recent_visit = datetime.utcnow() - timedelta(days=3)
+        db.session.add_all([
+            Customer(id='c1', name='Ali Yilmaz', phone='+90 555 111 2233', last_visit=old_visit),
+            Customer(id='c2', name='Ali Y.', phone='+905551112233', last_visit=old_visit),
+            Customer(id='c3', name='Mehmet Kaya', phone='+905554445566', last_visit=old_visit),
+            Customer(id='c4', name='Recent Visitor', phone='+905557778899', last_visit=recent_visit),
+            Customer(id='c5', name='Never Visited', phone='+905550001122'),
+            Customer(id='c6', name='No Phone', phone='', last_visit=old_visit)
+        ])
+        db.session.commit()
+
+        self.sent = []
+
+        def send(to_phone, message):
+            self.sent.append((to_phone, message))
+            return {'status': 'success'}
+
+        self.send = send
+
+    def tearDown(self):
+        """Drop the database after each test"""
+        db.session.remove()
+        db.drop_all()
+        self.context.pop()
+
+    def _create(self, segment, message="Hi {first_name}, we miss you at {business_name}!"):
+        return db_service.create_campaign({'name': 'Win back', 'message': message, 'segment': segment})
+
+    def test_render_message(self):
+        """Test personalizing a message and leaving unknown placeholders alone"""
+        message = campaign_service.render_message("Hi {first_name} ({name}) {unknown}", "Ali Yilmaz")
+        self.assertEqual(message, "Hi Ali (Ali Yilmaz) {unknown}")
+
+    def test_validate_message(self):
+        """Test rejecting empty messages and broken placeholders"""
+        self.assertIsNone(campaign_service.validate_message("Hi {name}"))
+        self.assertIsNotNone(campaign_service.validate_message("  "))
+        self.assertIsNotNone(campaign_service.validate_message("Hi {name"))
+
+    def test_run_campaign_segment_and_dedup(self):
+        """Test that only inactive customers are messaged, once per phone"""
+        campaign = self._create({'inactive_days': 42})
+
+        progress = campaign_service.run_campaign(campaign['id'], send_func=self.send, rate=0)
+
+        self.assertEqual(progress['status'], 'completed')
+        self.assertEqual([phone for phone, _ in self.sent], ['905551112233', '905554445566'])
+        self.assertTrue(self.sent[0][1].startswith("Hi Ali, we miss you at "))
+        self.assertEqual((progress['sent'], progress['failed'], progress['skipped']), (2, 0, 2))
+
+    def test_include_never_visited(self):
+        """Test that customers without a visit can be included"""
+        campaign = self._create({'inactive_days': 42, 'include_never_visited': True})
+
+        campaign_service.run_campaign(campaign['id'], send_func=self.send, rate=0)
+
+        self.assertIn('905550001122', [phone for phone, _ in self.sent])
+
+    def test_completed_campaign_cannot_rerun(self):
+        """Test that a completed campaign is not sent twice"""
+        campaign = self._create({})
+        campaign_service.run_campaign(campaign['id'], send_func=self.send, rate=0)
+
+        result = campaign_service.run_campaign(campaign['id'], send_func=self.send, rate=0)
+
+        self.assertEqual(result['status'], 'error')
+
+    def test_pause_and_resume(self):
+        """Test that a paused campaign resumes after its checkpoint without resending"""
+        campaign = self._create({})
+
+        def send_and_pause(to_phone, message):
+            campaign_service.pause_campaign(campaign['id'])
+            return self.send(to_phone, message)
+
+        progress = campaign_service.run_campaign(campaign['id'], send_func=send_and_pause, rate=0, checkpoint_every=2)
+
+        self.assertEqual(progress['status'], 'paused')
+        self.assertEqual(progress['last_customer_id'], 'c2')
+        self.assertEqual(len(self.sent), 1)
+
+        progress = campaign_service.run_campaign(campaign['id'], send_func=self.send, rate=0, batch_size=2)
+
+        self.assertEqual(progress['status'], 'completed')
+        phones = [phone for phone, _ in self.sent]
+        self.assertEqual(len(phones), len(set(phones)))
+        self.assertEqual(progress['sent'], 4)
+
+    def test_restart_waits_for_paused_run_to_stop(self):
+        """Test that a paused campaign cannot be restarted until the old run released it"""
+        campaign = self._create({})
+        restarts = []
+
+        def send_pause_and_restart(to_phone, message):
+            campaign_service.pause_campaign(campaign['id'])
+            restarts.append(campaign_service.run_campaign(campaign['id'], send_func=self.send, rate=0))
+            return self.send(to_phone, message)
+
+        progress = campaign_service.run_campaign(campaign['id'], send_func=send_pause_and_restart, rate=0)
+
+        self.assertEqual(restarts[0]['status'], 'error')
+        self.assertEqual(progress['status'], 'paused')
+        self.assertEqual(len(self.sent), 1)
+        self.assertIsNone(Campaign.query.get(campaign['id']).run_token)
+
+    def test_run_stops_when_taken_over(self):
+        """Test that a run that lost its campaign stops without overwriting the new owner's progress"""
+        campaign = self._create({})
+
+        def send_and_lose(to_phone, message):
+            Campaign.query.filter_by(id=campaign['id']).update({'run_token': 'other-run'})
+            db.session.commit()
+            return self.send(to_phone, message)
+
+        campaign_service.run_campaign(campaign['id'], send_func=send_and_lose, rate=0)
+
+        stored = Campaign.query.get(campaign['id'])
+        self.assertEqual(len(self.sent), 1)
+        self.assertEqual((stored.status, stored.run_token, stored.sent_count), ('running', 'other-run', 0))
+
+    def test_stalled_run_is_taken_over(self):
+        """Test that a crashed run's campaign can only be claimed once its heartbeat expired"""
+        campaign = self._create({})
+        Campaign.query.filter_by(id=campaign['id']).update(
+            {'status': 'running', 'run_token': 'crashed-run', 'heartbeat_at': datetime.utcnow()})
+        db.session.commit()
+
+        self.assertFalse(campaign_service.is_stalled(db_service.get_campaign(campaign['id'])))
+        self.assertEqual(campaign_service.run_campaign(campaign['id'], send_func=self.send, rate=0)['status'], 'error')
+
+        Campaign.query.filter_by(id=campaign['id']).update({'heartbeat_at': datetime.utcnow() - timedelta(minutes=10)})
+        db.session.commit()
+
+        self.assertTrue(campaign_service.is_stalled(db_service.get_campaign(campaign['id'])))
+        progress = campaign_service.run_campaign(campaign['id'], send_func=self.send, rate=0)
+        self.assertEqual(progress['status'], 'completed')
+        self.assertEqual(progress['sent'], 4)
+
+    def test_failed_sends_are_counted(self):
+        """Test that send errors are counted without stopping the campaign"""
+        campaign = self._create({'inactive_days': 42})
+
+        def failing_send(to_phone, message):
+            raise RuntimeError("Twilio unavailable")
+
+        progress = campaign_service.run_campaign(campaign['id'], send_func=failing_send, rate=0)
+
+        self.assertEqual(progress['status'], 'completed')
+        self.assertEqual(progress['failed'], 2)
+
+    def test_throttle(self):
+        """Test that sends are spaced according to the rate"""
+        campaign = self._create({})
+        delays = []
+
+        def sleep(delay):
+            delays.append(delay)
+            time.sleep(delay)
+
+        started = time.monotonic()
+        campaign_service.run_campaign(campaign['id'], send_func=self.send, rate=20, sleep=sleep)
+        elapsed = time.monotonic() - started
+
+        self.assertEqual(len(self.sent), 4)
+        self.assertEqual(len(delays), 3)
+        self.assertGreaterEqual(elapsed, 0.15)
+
+
+if __name__ == '__main__':
+    unittest.main()
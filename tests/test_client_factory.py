@@ -0,0 +1,76 @@
+"""
+Tests for the lazy API client factories
+"""
+import os
+import threading
+import unittest
+from unittest import mock
+
+# Import the module under test
+from services import client_factory
+
+
+class TestClientFactory(unittest.TestCase):
+    """Test cases for the client factory module"""
+
+    def setUp(self):
+        """Start every test without cached clients"""
+        client_factory.reset_clients()
+        self.env = mock.patch.dict(os.environ, {
+            "TWILIO_ACCOUNT_SID": "ACtest",
+            "TWILIO_AUTH_TOKEN": "token"
+        })
+        self.env.start()
+
+    def tearDown(self):
+        """Clean up after each test"""
+        self.env.stop()
+        client_factory.reset_clients()
+
+    def test_twilio_client_is_lazy_and_cached(self):
+        """Test that the Twilio client is created once on first use"""
+        self.assertNotIn('twilio', client_factory._clients)
+
+        first = client_factory.get_twilio_client()
+        second = client_factory.get_twilio_client()
+
+        self.assertIs(first, second)
+        self.assertEqual(first.username, "ACtest")
+
+    def test_twilio_client_uses_pooled_session(self):
+        """Test that the Twilio client reuses a tuned keep-alive session"""
+        client = client_factory.get_twilio_client()
+        adapter = client.http_client.session.get_adapter("https://api.twilio.com")
+
+        self.assertEqual(adapter._pool_maxsize, client_factory.TWILIO_HTTP_POOL_SIZE)
+        self.assertEqual(client.http_client.timeout, client_factory.TWILIO_HTTP_TIMEOUT)
+
+    def test_reset_clients(self):
+        """Test that reset_clients forces a new client on next use"""
+        first = client_factory.get_twilio_client()
+        client_factory.reset_clients()
+        second = client_factory.get_twilio_client()
+
+        self.assertIsNot(first, second)
+
+    def test_concurrent_first_use_creates_one_client(self):
+        """Test that concurrent callers all receive the same client"""
+        results = []
+        barrier = threading.Barrier(8)
+
+        def worker():
+            barrier.wait()
+            results.append(client_factory.get_twilio_client())
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(results), 8)
+        self.assertEqual(len({id(client) for client in results}), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,6 +6,7 @@ import json
 import os
 import tempfile
 import shutil
+import threading
 from datetime import datetime, timedelta
 
 # Import the module under test
@@ -311,6 +312,22 @@ class TestDataService(unittest.TestCase):
         
         self.assertFalse("1" in file_data["customers"])
 
+    def test_search_customers(self):
+        """Test search_customers function"""
+        results = data_service.search_customers("ja")
+        self.assertEqual(results["total"], 1)
+        self.assertEqual(results["items"][0]["id"], "2")
+        
+        # Phone suffix search
+        results = data_service.search_customers("7890")
+        self.assertEqual([c["id"] for c in results["items"]], ["1"])
+        
+        # The index follows writes
+        data_service.update_customer("2", {"name": "Janet Brown"})
+        self.assertEqual(data_service.search_customers("brown")["items"][0]["id"], "2")
+        data_service.delete_customer("2")
+        self.assertEqual(data_service.search_customers("janet")["total"], 0)
+
     def test_get_appointments(self):
         """Test get_appointments function"""
         appointments = data_service.get_appointments()
@@ -340,6 +357,161 @@ class TestDataService(unittest.TestCase):
         no_appointments = data_service.get_appointments_by_date(past_date)
         self.assertEqual(len(no_appointments), 0)
 
+    def test_get_appointments_page(self):
+        """Test get_appointments_page function"""
+        page = data_service.get_appointments_page(limit=1)
+        self.assertEqual(page["total"], 2)
+        self.assertEqual([a["id"] for a in page["items"]], ["102"])
+        self.assertEqual(page["items"][0]["customer_name"], "Jane Smith")
+        self.assertEqual(page["items"][0]["barber_name"], "Alice Williams")
+        self.assertIsNotNone(page["next_cursor"])
+        
+        # Second page continues after the cursor
+        next_page = data_service.get_appointments_page(cursor=page["next_cursor"], limit=1)
+        self.assertEqual([a["id"] for a in next_page["items"]], ["101"])
+        self.assertIsNone(next_page["next_cursor"])
+        
+        # Filters are applied before paging
+        filtered = data_service.get_appointments_page(barber_id="201")
+        self.assertEqual(filtered["total"], 1)
+        self.assertEqual([a["id"] for a in filtered["items"]], ["101"])
+
+    def test_get_appointments_page_follows_writes(self):
+        """Test that the page index and totals follow creates, updates and deletes"""
+        tomorrow = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
+        self.assertEqual(data_service.get_appointments_page(status="scheduled")["total"], 2)
+        
+        data_service.update_appointment("101", {"status": "completed", "time": "16:00"})
+        created = data_service.create_appointment({"customer_id": "1", "barber_id": "201", "service_id": "301",
+                                                   "date": tomorrow, "time": "09:00", "status": "scheduled"})
+        
+        scheduled = data_service.get_appointments_page(status="scheduled")
+        self.assertEqual(scheduled["total"], 2)
+        self.assertEqual([a["id"] for a in scheduled["items"]], ["102", created["id"]])
+        
+        same_day = data_service.get_appointments_page(date=tomorrow, barber_id="201", limit=1)
+        self.assertEqual(same_day["total"], 2)
+        self.assertEqual([a["id"] for a in same_day["items"]], ["101"])
+        rest = data_service.get_appointments_page(date=tomorrow, barber_id="201", cursor=same_day["next_cursor"])
+        self.assertEqual([a["id"] for a in rest["items"]], [created["id"]])
+        self.assertIsNone(rest["next_cursor"])
+        
+        data_service.delete_appointment(created["id"])
+        self.assertEqual(data_service.get_appointments_page(date=tomorrow)["total"], 1)
+        self.assertEqual(data_service.get_appointments_page(status="missing")["total"], 0)
+
+    def test_get_appointment_changes(self):
+        """Test the appointment change feed with updates and tombstones"""
+        changes = data_service.get_appointment_changes(limit=1)
+        self.assertEqual([c["id"] for c in changes["items"]], ["101"])
+        self.assertTrue(changes["has_more"])
+        
+        # Old updated_at values do not expire a fresh sync
+        changes = data_service.get_appointment_changes(changes["next_cursor"])
+        self.assertEqual([c["id"] for c in changes["items"]], ["102"])
+        self.assertFalse(changes["has_more"])
+        cursor = changes["next_cursor"]
+        
+        # Caught up: nothing new
+        self.assertEqual(data_service.get_appointment_changes(cursor)["items"], [])
+        
+        data_service.update_appointment("101", {"status": "completed"})
+        data_service.delete_appointment("102")
+        
+        changes = data_service.get_appointment_changes(cursor)
+        self.assertEqual([(c["id"], c["deleted"]) for c in changes["items"]], [("101", False), ("102", True)])
+        self.assertEqual(changes["items"][0]["data"]["status"], "completed")
+        
+        # Tombstones survive a reload from disk
+        data_service._data_cache["appointments"] = {}
+        data_service.initialize()
+        changes = data_service.get_appointment_changes(cursor)
+        self.assertEqual([(c["id"], c["deleted"]) for c in changes["items"]], [("101", False), ("102", True)])
+        
+        self.assertTrue(data_service.get_appointment_changes("not-a-cursor")["reset"])
+
+    def test_freeze_catalog(self):
+        """Test that the frozen catalog is read-only but still writable through the service"""
+        try:
+            data_service.freeze_catalog()
+            barbers = data_service.get_barbers()
+            self.assertIsInstance(barbers, data_service.FrozenDict)
+            with self.assertRaises(TypeError):
+                barbers["201"]["name"] = "Changed"
+            json.dumps(barbers)
+
+            updated = data_service.update_barber("201", {"name": "Changed"})
+            self.assertEqual(updated["name"], "Changed")
+            self.assertIsInstance(data_service.get_barbers(), data_service.FrozenDict)
+            self.assertEqual(barbers["201"]["name"], "Bob Johnson")
+
+            created = data_service.create_service({"name": "Beard Trim", "price": 10.0, "duration": 15})
+            self.assertIn(created["id"], data_service.get_services())
+            self.assertTrue(data_service.delete_service(created["id"]))
+            self.assertNotIn(created["id"], data_service.get_services())
+        finally:
+            data_service._catalog_frozen = False
+
+    @unittest.skipUnless(hasattr(os, "fork"), "requires fork")
+    def test_write_from_other_process_is_visible(self):
+        """Test that a customer created in a forked worker is reloaded here"""
+        self.assertEqual(len(data_service.get_customers()), 2)
+        
+        pid = os.fork()
+        if pid == 0:
+            created = data_service.create_customer({"name": "Forked Worker", "phone": "+1555000111"})
+            os._exit(0 if created else 1)
+        _, status = os.waitpid(pid, 0)
+        self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+        
+        customer = data_service.get_customer_by_phone("+1555000111")
+        self.assertEqual(customer["name"], "Forked Worker")
+        
+        # Writes here start from the reloaded data instead of overwriting it
+        data_service.create_customer({"name": "Local Worker", "phone": "+1555000222"})
+        with open(self.test_customers_file) as f:
+            self.assertEqual(len(json.load(f)["customers"]), 4)
+
+    @unittest.skipUnless(hasattr(os, "fork"), "requires fork")
+    def test_change_feed_waits_for_write_in_other_process(self):
+        """Test that a cursor is not moved past a change another process is still writing"""
+        cursor = data_service.get_appointment_changes()["next_cursor"]
+        stamped_r, stamped_w = os.pipe()
+        resume_r, resume_w = os.pipe()
+        
+        pid = os.fork()
+        if pid == 0:
+            # Pause after the change is stamped, before the file is written
+            save = data_service._save_appointments
+            def paused_save():
+                os.write(stamped_w, b"x")
+                os.read(resume_r, 1)
+                return save()
+            data_service._save_appointments = paused_save
+            created = data_service.create_appointment({
+                "customer_id": "1", "barber_id": "201", "service_id": "301",
+                "date": "2030-01-01", "time": "10:00", "duration": 30, "status": "scheduled"
+            })
+            os._exit(0 if created else 1)
+        os.read(stamped_r, 1)
+        
+        result = {}
+        reader = threading.Thread(target=lambda: result.update(data_service.get_appointment_changes(cursor)))
+        reader.start()
+        reader.join(0.2)
+        os.write(resume_w, b"x")
+        reader.join()
+        _, status = os.waitpid(pid, 0)
+        self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+        for fd in (stamped_r, stamped_w, resume_r, resume_w):
+            os.close(fd)
+        
+        # The change is in this page, or in the next one from its cursor
+        seen = [c["id"] for c in result["items"]]
+        seen += [c["id"] for c in data_service.get_appointment_changes(result["next_cursor"])["items"]]
+        self.assertEqual(len(seen), 1)
+        self.assertEqual(data_service.get_appointments()[seen[0]]["date"], "2030-01-01")
+
     def test_check_availability(self):
         """Test check_availability function"""
         tomorrow = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
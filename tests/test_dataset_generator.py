@@ -0,0 +1,76 @@
+"""
+Tests for the synthetic dataset generator
+"""
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import date
+
+# Import the module under test
+from utils import dataset_generator
+
+
+class TestDatasetGenerator(unittest.TestCase):
+    """Test cases for the synthetic dataset generator"""
+
+    def setUp(self):
+        """Create a small dataset before each test"""
+        self.dataset = dataset_generator.Dataset(seed=7, barbers=6, customers=200, years=0.25,
+                                                 future_days=14, end_date=date(2025, 6, 30))
+
+    def test_same_seed_same_data(self):
+        """Test that generation is repeatable"""
+        again = dataset_generator.Dataset(seed=7, barbers=6, customers=200, years=0.25,
+                                          future_days=14, end_date=date(2025, 6, 30))
+        first = list(self.dataset.appointments())
+        self.assertEqual(first, list(again.appointments()))
+        self.assertEqual(first, list(self.dataset.appointments()))
+        self.assertEqual([c['phone'] for c in self.dataset.customers], [c['phone'] for c in again.customers])
+
+    def test_appointments_are_plausible(self):
+        """Test statuses, working hours and slot clashes"""
+        barbers = {barber['id']: barber for barber in self.dataset.barbers}
+        seen = set()
+        for appointment in self.dataset.appointments():
+            day = date.fromisoformat(appointment['date'])
+            expected = ('scheduled', 'cancelled') if day >= date(2025, 6, 30) else ('completed', 'cancelled', 'no-show')
+            self.assertIn(appointment['status'], expected)
+
+            hours = barbers[appointment['barber_id']]['working_hours'][dataset_generator.DAYS[day.weekday()]]
+            self.assertIsNotNone(hours)
+            self.assertTrue(hours['start'] <= appointment['time'] < hours['end'])
+            self.assertIn(appointment['time'][3:], ('00', '30'))
+
+            key = (appointment['date'], appointment['time'], appointment['barber_id'])
+            self.assertNotIn(key, seen)
+            seen.add(key)
+        self.assertGreater(len(seen), 100)
+        self.assertEqual(len({c['phone'] for c in self.dataset.customers}), 200)
+
+    def test_json_and_sql_backends_get_the_same_data(self):
+        """Test writing the dataset to data files and to a database"""
+        from app import create_app
+        from models.database import Appointment, Customer
+
+        data_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, data_dir)
+        counts = dataset_generator.write_json(self.dataset, data_dir)
+        with open(os.path.join(data_dir, 'appointments.json')) as f:
+            appointments = json.load(f)['appointments']
+        with open(os.path.join(data_dir, 'customers.json')) as f:
+            customers = json.load(f)['customers']
+        self.assertEqual(len(appointments), counts['appointments'])
+        self.assertEqual(len(customers), 200)
+
+        app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://'}, bootstrap=['create_tables'])
+        with app.app_context():
+            self.assertEqual(dataset_generator.load_sql(self.dataset, batch_size=500), counts)
+            self.assertEqual(Appointment.query.count(), counts['appointments'])
+            self.assertEqual(Customer.query.filter(Customer.last_visit.isnot(None)).count(),
+                             sum(1 for c in customers.values() if c.get('last_visit')))
+
+
+if __name__ == '__main__':
+    unittest.main()
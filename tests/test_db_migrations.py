@@ -0,0 +1,173 @@
+"""
+Tests for database migrations and the query plans they enable
+
+The plan tests run SQLite's EXPLAIN QUERY PLAN on an in-memory database.
+TestPostgresMigrations checks the concurrent index builds and PostgreSQL's
+EXPLAIN against the database in DATABASE_URL, and is skipped without one.
+"""
+import os
+import unittest
+from datetime import date, datetime
+
+from flask import Flask
+
+# Import the module under test
+from models.database import db, Customer, Appointment, MessageDelivery
+from utils import db_migrations
+
+
+class TestDbMigrations(unittest.TestCase):
+    """Test cases for the database migrations module"""
+
+    def setUp(self):
+        """Setup an in-memory database before each test"""
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        db.init_app(self.app)
+        self.context = self.app.app_context()
+        self.context.push()
+        db.create_all()
+
+    def tearDown(self):
+        """Drop the database after each test"""
+        db.session.remove()
+        db.drop_all()
+        self.context.pop()
+
+    def _index_names(self, table):
+        rows = db.session.execute(db.text(f"PRAGMA index_list({table})")).all()
+        return {row[1] for row in rows}
+
+    def _sqlite_query_plan(self, query):
+        """Return SQLite's EXPLAIN QUERY PLAN details for an ORM query"""
+        compiled = query.statement.compile(dialect=db.engine.dialect)
+        params = tuple(compiled.params[name] for name in compiled.positiontup)
+        params = tuple(p.isoformat() if isinstance(p, (date, datetime)) else p for p in params)
+        rows = db.session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).all()
+        return ' | '.join(row[-1] for row in rows)
+
+    def test_migrations_add_missing_indexes(self):
+        """Test that migrations create indexes on a database that predates them"""
+        for name in ('ix_appointments_date_time_status_barber', 'ix_appointments_customer_date',
+                     'ix_customers_last_visit', 'ix_message_deliveries_sent_at'):
+            db.session.execute(db.text(f"DROP INDEX {name}"))
+        db.session.commit()
+
+        applied = db_migrations.run_migrations()
+
+        self.assertEqual(applied, [version for version, _, _ in db_migrations.MIGRATIONS])
+        self.assertIn('ix_appointments_date_time_status_barber', self._index_names('appointments'))
+        self.assertIn('ix_appointments_customer_date', self._index_names('appointments'))
+        self.assertIn('ix_customers_last_visit', self._index_names('customers'))
+        self.assertIn('ix_message_deliveries_sent_at', self._index_names('message_deliveries'))
+
+    def test_migrations_run_once(self):
+        """Test that applied migrations are recorded and skipped afterwards"""
+        db_migrations.run_migrations()
+
+        self.assertEqual(db_migrations.run_migrations(), [])
+        self.assertEqual(set(db_migrations.get_applied_migrations()),
+                         {version for version, _, _ in db_migrations.MIGRATIONS})
+
+    def test_sqlite_availability_query_uses_index(self):
+        """Test that SQLite serves check_availability's query from the composite index"""
+        query = Appointment.query.filter_by(date=date(2023, 5, 15), time='10:00', status='scheduled', barber_id='b1')
+
+        self.assertIn('ix_appointments_date_time_status_barber', self._sqlite_query_plan(query))
+
+    def test_sqlite_date_range_query_uses_index(self):
+        """Test that SQLite plans upcoming appointment ranges without a table scan"""
+        query = Appointment.query.filter(
+            Appointment.status == 'scheduled',
+            Appointment.date >= date(2023, 5, 15),
+            Appointment.date <= date(2023, 5, 22)
+        ).order_by(Appointment.date, Appointment.time)
+
+        plan = self._sqlite_query_plan(query)
+        self.assertIn('SEARCH appointments USING INDEX ix_appointments_status_date_time', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_sqlite_customer_and_barber_queries_use_indexes(self):
+        """Test SQLite plans for the per-customer and per-barber appointment lookups"""
+        self.assertIn('ix_appointments_customer_date',
+                      self._sqlite_query_plan(Appointment.query.filter_by(customer_id='c1')))
+        self.assertIn('ix_appointments_barber_date_time',
+                      self._sqlite_query_plan(Appointment.query.filter_by(barber_id='b1')))
+
+    def test_sqlite_segment_and_metrics_queries_use_indexes(self):
+        """Test SQLite plans for the campaign segment and delivery metrics window queries"""
+        self.assertIn('ix_customers_last_visit',
+                      self._sqlite_query_plan(Customer.query.filter(Customer.last_visit < datetime(2023, 5, 1))))
+        self.assertIn('ix_message_deliveries_sent_at',
+                      self._sqlite_query_plan(MessageDelivery.query.filter(MessageDelivery.sent_at >= datetime(2023, 5, 1))))
+
+
+@unittest.skipUnless(os.environ.get('DATABASE_URL', '').startswith('postgres'), "requires a PostgreSQL DATABASE_URL")
+class TestPostgresMigrations(unittest.TestCase):
+    """Test cases for migrations and query plans on PostgreSQL"""
+
+    def setUp(self):
+        """Setup the schema in the DATABASE_URL database before each test"""
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = os.environ['DATABASE_URL'].replace('postgres://', 'postgresql://', 1)
+        db.init_app(self.app)
+        self.context = self.app.app_context()
+        self.context.push()
+        db.drop_all()
+        db.session.execute(db.text("DROP TABLE IF EXISTS schema_migrations, appointment_tombstones"))
+        db.session.commit()
+        db.create_all()
+
+    def tearDown(self):
+        """Drop the schema after each test"""
+        db.session.remove()
+        db.drop_all()
+        db.session.execute(db.text("DROP TABLE IF EXISTS schema_migrations"))
+        db.session.commit()
+        db.session.remove()
+        self.context.pop()
+
+    def _index_valid(self, name):
+        return db.session.execute(db.text(
+            "SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = :name"
+        ), {'name': name}).scalar()
+
+    def _explain(self, query):
+        """Return PostgreSQL's EXPLAIN output for an ORM query, with sequential scans discouraged"""
+        compiled = query.statement.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True})
+        db.session.execute(db.text("SET LOCAL enable_seqscan = off"))
+        rows = db.session.execute(db.text(f"EXPLAIN {compiled}")).all()
+        return ' | '.join(row[0] for row in rows)
+
+    def test_migrations_build_indexes_concurrently(self):
+        """Test that migrations recreate dropped and invalid indexes outside a transaction"""
+        visit = datetime(2023, 5, 1)
+        db.session.add_all([Customer(id='c1', name='A', phone='+1555000001', last_visit=visit),
+                            Customer(id='c2', name='B', phone='+1555000002', last_visit=visit)])
+        db.session.execute(db.text("DROP INDEX ix_appointments_customer_date"))
+        db.session.execute(db.text("DROP INDEX ix_customers_last_visit"))
+        db.session.commit()
+        # A failed concurrent build leaves an invalid index under the name
+        with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+            with self.assertRaises(Exception):
+                connection.execute(db.text("CREATE UNIQUE INDEX CONCURRENTLY ix_customers_last_visit "
+                                           "ON customers (last_visit)"))
+        self.assertFalse(self._index_valid('ix_customers_last_visit'))
+
+        applied = db_migrations.run_migrations()
+
+        self.assertEqual(applied, [version for version, _, _ in db_migrations.MIGRATIONS])
+        for name in ('ix_appointments_customer_date', 'ix_customers_last_visit'):
+            self.assertTrue(self._index_valid(name), name)
+        self.assertEqual(db_migrations.run_migrations(), [])
+
+    def test_availability_query_uses_index(self):
+        """Test that PostgreSQL serves check_availability's query from the composite index"""
+        db_migrations.run_migrations()
+        query = Appointment.query.filter_by(date=date(2023, 5, 15), time='10:00', status='scheduled', barber_id='b1')
+
+        self.assertIn('ix_appointments_date_time_status_barber', self._explain(query))
+
+
+if __name__ == '__main__':
+    unittest.main()
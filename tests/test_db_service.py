@@ -0,0 +1,213 @@
+"""
+Tests for the database service module
+"""
+import threading
+import unittest
+from datetime import date, datetime, timedelta
+from unittest import mock
+
+from flask import Flask
+
+# Import the module under test
+from models.database import db, Customer, Barber, Service, Appointment
+from services import db_service, search_service
+
+
+class TestDbService(unittest.TestCase):
+    """Test cases for the database service module"""
+
+    def setUp(self):
+        """Setup an in-memory database with sample appointments before each test"""
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        db.init_app(self.app)
+        self.context = self.app.app_context()
+        self.context.push()
+        db.create_all()
+
+        db.session.add_all([
+            Customer(id='c1', name='John Doe', phone='+1234567890'),
+            Barber(id='b1', name='Bob'),
+            Service(id='s1', name='Haircut', price=25.0, duration=30),
+            Appointment(id='a1', customer_id='c1', barber_id='b1', service_id='s1',
+                        date=date(2023, 5, 16), time='11:00', duration=30, status='scheduled'),
+            Appointment(id='a2', customer_id='c1', barber_id='b1', service_id='s1',
+                        date=date(2023, 5, 15), time='10:00', duration=30, status='scheduled'),
+            Appointment(id='a3', customer_id='c1', barber_id='b1', service_id='s1',
+                        date=date(2023, 5, 15), time='09:00', duration=30, status='cancelled'),
+            Appointment(id='a4', customer_id='missing', barber_id='b1', service_id='s1',
+                        date=date(2023, 5, 17), time='09:00', duration=30, status='scheduled'),
+            Appointment(id='a5', customer_id='c1', barber_id='b1', service_id='s1',
+                        date=date(2023, 6, 1), time='09:00', duration=30, status='scheduled')
+        ])
+        db.session.commit()
+
+    def tearDown(self):
+        """Drop the database after each test"""
+        db.session.remove()
+        db.drop_all()
+        self.context.pop()
+
+    def test_get_upcoming_appointments(self):
+        """Test the joined upcoming appointments query"""
+        appointments = db_service.get_upcoming_appointments(date(2023, 5, 15), date(2023, 5, 22))
+
+        self.assertEqual([a['id'] for a in appointments], ['a2', 'a1', 'a4'])
+        self.assertEqual(appointments[0]['date'], '2023-05-15')
+        self.assertEqual(appointments[0]['customer_name'], 'John Doe')
+        self.assertEqual(appointments[0]['barber_name'], 'Bob')
+        self.assertEqual(appointments[0]['service_name'], 'Haircut')
+        self.assertEqual(appointments[2]['customer_name'], 'Unknown')
+
+    def test_get_upcoming_appointments_limit(self):
+        """Test limiting the upcoming appointments query"""
+        appointments = db_service.get_upcoming_appointments(date(2023, 5, 1), date(2023, 6, 30), status=None, limit=2)
+
+        self.assertEqual([a['id'] for a in appointments], ['a3', 'a2'])
+
+    def test_get_appointments_page(self):
+        """Test keyset pagination of appointments, newest first"""
+        seen = []
+        cursor = None
+        while True:
+            page = db_service.get_appointments_page(cursor=cursor, limit=2)
+            self.assertEqual(page['total'], 5)
+            seen.extend(a['id'] for a in page['items'])
+            cursor = page['next_cursor']
+            if not cursor:
+                break
+
+        self.assertEqual(seen, ['a5', 'a4', 'a1', 'a2', 'a3'])
+
+    def test_get_appointments_page_filters(self):
+        """Test filtering appointments pages by status, date and barber"""
+        page = db_service.get_appointments_page(status='scheduled', date='2023-05-15', barber_id='b1')
+
+        self.assertEqual(page['total'], 1)
+        self.assertEqual(page['items'][0]['id'], 'a2')
+        self.assertEqual(page['items'][0]['customer_name'], 'John Doe')
+        self.assertIsNone(page['next_cursor'])
+
+    def test_search_customers(self):
+        """Test customer search through the database-backed index"""
+        self.assertEqual(db_service.search_customers("joh")['items'][0]['id'], 'c1')
+
+        created = db_service.create_customer({'name': 'Jane Roe', 'phone': '+905551234567'})
+        results = db_service.search_customers("1234567")
+        self.assertEqual([c['id'] for c in results['items']], [created['id']])
+
+        db_service.delete_customer(created['id'])
+        self.assertEqual(db_service.search_customers("roe")['total'], 0)
+
+    def test_stale_search_index_refreshes_in_background(self):
+        """Test that a stale index is still served while it is rebuilt, without losing writes"""
+        self.assertEqual(db_service.search_customers("")['total'], 1)
+
+        # A customer written by another process, then the TTL runs out
+        db.session.add(Customer(id='c2', name='Other Worker', phone='+1555000111'))
+        db.session.commit()
+        db_service._search_index_state['built_at'] -= db_service.CUSTOMER_SEARCH_INDEX_TTL + 1
+
+        release = threading.Event()
+        rebuild = search_service.CustomerSearchIndex.rebuild
+
+        def slow_rebuild(index, customers):
+            release.wait(5)
+            rebuild(index, customers)
+
+        with mock.patch.object(search_service.CustomerSearchIndex, 'rebuild', slow_rebuild):
+            self.assertEqual(db_service.search_customers("other")['total'], 0)
+            created = db_service.create_customer({'name': 'During Refresh', 'phone': '+1555000222'})
+            self.assertEqual(db_service.search_customers("during")['total'], 1)
+            release.set()
+            db_service._search_index_state['thread'].join()
+
+        self.assertEqual([c['id'] for c in db_service.search_customers("other")['items']], ['c2'])
+        self.assertEqual([c['id'] for c in db_service.search_customers("during")['items']], [created['id']])
+
+    def test_iter_appointments_for_export(self):
+        """Test streaming export rows with joined names and filters"""
+        rows = list(db_service.iter_appointments_for_export(
+            start_date=date(2023, 5, 15), end_date=date(2023, 5, 17), status='scheduled', batch_size=1
+        ))
+
+        self.assertEqual([row['id'] for row in rows], ['a2', 'a1', 'a4'])
+        self.assertEqual(rows[0]['customer_name'], 'John Doe')
+        self.assertEqual(rows[0]['service_price'], 25.0)
+        self.assertIsNone(rows[2]['customer_name'])
+
+    def test_get_appointment_changes(self):
+        """Test the database change feed with the settle delay and tombstones"""
+        Appointment.query.update({'updated_at': datetime.utcnow() - timedelta(hours=1)})
+        db.session.commit()
+        
+        changes = db_service.get_appointment_changes(limit=2)
+        self.assertEqual(len(changes['items']), 2)
+        self.assertTrue(changes['has_more'])
+        
+        changes = db_service.get_appointment_changes(changes['next_cursor'], limit=10)
+        self.assertEqual(len(changes['items']), 3)
+        self.assertFalse(changes['has_more'])
+        cursor = changes['next_cursor']
+        
+        db_service.delete_appointment('a1')
+        db_service.update_appointment('a2', {'status': 'completed'})
+        
+        # Changes younger than the settle delay are held back
+        self.assertEqual(db_service.get_appointment_changes(cursor)['items'], [])
+        
+        original_settle = db_service.CHANGE_FEED_SETTLE_SECONDS
+        db_service.CHANGE_FEED_SETTLE_SECONDS = 0
+        try:
+            changes = db_service.get_appointment_changes(cursor)
+        finally:
+            db_service.CHANGE_FEED_SETTLE_SECONDS = original_settle
+        self.assertEqual([(c['id'], c['deleted']) for c in changes['items']], [('a1', True), ('a2', False)])
+        self.assertEqual(changes['items'][1]['data']['status'], 'completed')
+
+    def test_get_appointment_status_counts(self):
+        """Test counting appointments per status"""
+        counts = db_service.get_appointment_status_counts()
+
+        self.assertEqual(counts, {'scheduled': 4, 'cancelled': 1})
+
+    def test_bulk_create_customers(self):
+        """Test that a failing row does not abort the rest of the batch"""
+        created = db_service.bulk_create_customers([
+            {'name': 'Existing Phone', 'phone': '+1234567890'},
+            {'name': 'Jane Roe', 'phone': '+1987654321'}
+        ])
+
+        self.assertIsNone(created[0])
+        self.assertEqual(created[1]['name'], 'Jane Roe')
+        self.assertEqual(Customer.query.count(), 2)
+        self.assertEqual(db_service.get_customer_ids_by_phone(['+1987654321', '+1000']),
+                         {'+1987654321': created[1]['id']})
+
+    def test_table_version_follows_writes(self):
+        """Test that writes bump only their own table's counter, and only when committed"""
+        version, _ = db_service.table_version(('appointments', 'barbers'))
+
+        db.session.get(Appointment, 'a1').status = 'completed'
+        db.session.commit()
+        after_update, modified = db_service.table_version(('appointments', 'barbers'))
+        self.assertNotEqual(after_update[0], version[0])
+        self.assertEqual(after_update[1], version[1])
+        self.assertIsNotNone(modified)
+
+        Appointment.query.filter_by(status='cancelled').delete(synchronize_session=False)
+        db.session.commit()
+        after_delete, _ = db_service.table_version(('appointments',))
+        self.assertNotEqual(after_delete[0], after_update[0])
+
+        db.session.get(Barber, 'b1').name = 'Robert'
+        db.session.flush()
+        db.session.rollback()
+        self.assertEqual(db_service.table_version(('barbers',))[0], (after_update[1],))
+
+        with self.assertRaises(KeyError):
+            db_service.table_version(('customers',))
+
+
+if __name__ == '__main__':
+    unittest.main()
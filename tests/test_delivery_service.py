@@ -0,0 +1,71 @@
+"""
+Tests for the delivery metrics service
+"""
+import unittest
+
+# Import the module under test
+from services import delivery_service
+
+
+class TestDeliveryService(unittest.TestCase):
+    """Test cases for delivery latency and failure metrics"""
+
+    def test_percentile(self):
+        """Test nearest-rank percentile calculation"""
+        values = list(range(1, 101))
+        self.assertEqual(delivery_service.percentile(values, 50), 50)
+        self.assertEqual(delivery_service.percentile(values, 90), 90)
+        self.assertEqual(delivery_service.percentile(values, 99), 99)
+        self.assertEqual(delivery_service.percentile([7], 99), 7)
+        self.assertIsNone(delivery_service.percentile([], 50))
+
+    def test_compute_delivery_metrics(self):
+        """Test metrics are grouped by message type with an overall entry"""
+        deliveries = [
+            {
+                "message_type": "reminder",
+                "status": "read",
+                "sent_at": "2023-05-20T10:00:00",
+                "delivered_at": "2023-05-20T10:00:02",
+                "read_at": "2023-05-20T10:01:00"
+            },
+            {
+                "message_type": "reminder",
+                "status": "delivered",
+                "sent_at": "2023-05-20T10:00:00",
+                "delivered_at": "2023-05-20T10:00:04",
+                "read_at": None
+            },
+            {
+                "message_type": "confirmation",
+                "status": "failed",
+                "sent_at": "2023-05-20T10:00:00",
+                "delivered_at": None,
+                "read_at": None
+            }
+        ]
+
+        metrics = delivery_service.compute_delivery_metrics(deliveries)
+
+        self.assertEqual(set(metrics.keys()), {"reminder", "confirmation", "all"})
+
+        reminder = metrics["reminder"]
+        self.assertEqual(reminder["sent"], 2)
+        self.assertEqual(reminder["delivered"], 2)
+        self.assertEqual(reminder["read"], 1)
+        self.assertEqual(reminder["failure_rate"], 0.0)
+        self.assertEqual(reminder["delivery_latency"]["p50"], 2.0)
+        self.assertEqual(reminder["delivery_latency"]["p99"], 4.0)
+        self.assertEqual(reminder["read_latency"]["p50"], 60.0)
+
+        confirmation = metrics["confirmation"]
+        self.assertEqual(confirmation["failed"], 1)
+        self.assertEqual(confirmation["failure_rate"], 1.0)
+        self.assertIsNone(confirmation["delivery_latency"]["p50"])
+
+        self.assertEqual(metrics["all"]["sent"], 3)
+        self.assertAlmostEqual(metrics["all"]["failure_rate"], 1 / 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+"""
+Tests for the export service module
+"""
+import csv
+import io
+import json
+import unittest
+
+# Import the module under test
+from services import export_service, data_service
+
+
+class TestExportService(unittest.TestCase):
+    """Test cases for the export service module"""
+
+    def setUp(self):
+        """Setup an in-memory data cache before each test"""
+        self.original_cache = data_service._data_cache
+        data_service._data_cache = {
+            "customers": {"1": {"id": "1", "name": "John Doe", "phone": "+1234567890"}},
+            "barbers": {"201": {"id": "201", "name": "Bob Johnson"}},
+            "services": {"301": {"id": "301", "name": "Regular Haircut", "price": 25.0}},
+            "appointments": {
+                "101": {"id": "101", "customer_id": "1", "barber_id": "201", "service_id": "301",
+                        "date": "2023-05-15", "time": "10:00", "status": "scheduled", "notes": "=HYPERLINK()"},
+                "102": {"id": "102", "customer_id": "1", "barber_id": "201", "service_id": "301",
+                        "date": "2023-05-20", "time": "11:00", "status": "cancelled"}
+            }
+        }
+
+    def tearDown(self):
+        """Restore the data cache after each test"""
+        data_service._data_cache = self.original_cache
+
+    def test_export_appointments_csv(self):
+        """Test the CSV export with joined names and formula escaping"""
+        text = "".join(export_service.export_appointments('csv'))
+        rows = list(csv.DictReader(io.StringIO(text)))
+
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]["customer_name"], "John Doe")
+        self.assertEqual(rows[0]["customer_phone"], "+1234567890")
+        self.assertEqual(rows[0]["barber_name"], "Bob Johnson")
+        self.assertEqual(rows[0]["service_name"], "Regular Haircut")
+        self.assertEqual(rows[0]["notes"], "'=HYPERLINK()")
+
+    def test_export_appointments_filters(self):
+        """Test date range and status filters"""
+        lines = "".join(export_service.export_appointments('ndjson', start_date='2023-05-16')).splitlines()
+        self.assertEqual([json.loads(line)["id"] for line in lines], ["102"])
+
+        lines = "".join(export_service.export_appointments('ndjson', status='scheduled', end_date='2023-05-31')).splitlines()
+        self.assertEqual([json.loads(line)["id"] for line in lines], ["101"])
+
+    def test_export_streams_in_chunks(self):
+        """Test that large exports are produced in several chunks"""
+        rows = ({"id": str(i), "name": f"Customer {i}"} for i in range(export_service.ROWS_PER_CHUNK * 2 + 1))
+        chunks = list(export_service.stream_csv(rows, export_service.CUSTOMER_FIELDS))
+
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual("".join(chunks).count("\n"), export_service.ROWS_PER_CHUNK * 2 + 2)
+
+    def test_export_customers_ndjson(self):
+        """Test the customers NDJSON export"""
+        lines = "".join(export_service.export_customers('ndjson')).splitlines()
+        self.assertEqual(json.loads(lines[0]), {
+            "id": "1", "name": "John Doe", "phone": "+1234567890",
+            "email": None, "notes": None, "created_at": None, "last_visit": None
+        })
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+"""
+Tests for the import service module
+"""
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+# Import the module under test
+from services import import_service, data_service
+
+
+class TestImportService(unittest.TestCase):
+    """Test cases for the import service module"""
+
+    def setUp(self):
+        """Setup an in-memory data cache backed by temporary files before each test"""
+        self.test_dir = tempfile.mkdtemp()
+        self.original_files = (data_service.CUSTOMERS_FILE, data_service.APPOINTMENTS_FILE)
+        data_service.CUSTOMERS_FILE = os.path.join(self.test_dir, "customers.json")
+        data_service.APPOINTMENTS_FILE = os.path.join(self.test_dir, "appointments.json")
+        self.original_locks = data_service._file_locks
+        data_service._file_locks = {
+            data_service.CUSTOMERS_FILE: data_service.threading.Lock(),
+            data_service.APPOINTMENTS_FILE: data_service.threading.Lock()
+        }
+
+        self.original_cache = data_service._data_cache
+        data_service._data_cache = {
+            "customers": {"1": {"id": "1", "name": "John Doe", "phone": "+1 234 567 890"}},
+            "barbers": {"201": {"id": "201", "name": "Bob Johnson"}},
+            "services": {"301": {"id": "301", "name": "Regular Haircut", "price": 25.0, "duration": 45}},
+            "appointments": {}
+        }
+
+    def tearDown(self):
+        """Restore the data cache and file paths after each test"""
+        data_service._data_cache = self.original_cache
+        data_service.CUSTOMERS_FILE, data_service.APPOINTMENTS_FILE = self.original_files
+        data_service._file_locks = self.original_locks
+        shutil.rmtree(self.test_dir)
+
+    def test_read_rows_formats(self):
+        """Test reading CSV, NDJSON and JSON uploads"""
+        csv_rows = list(import_service.read_rows(io.BytesIO(b"\xef\xbb\xbfName, Phone\nAli , 555\n"), 'csv'))
+        self.assertEqual(csv_rows, [(2, {"name": "Ali", "phone": "555"}, None)])
+
+        ndjson_rows = list(import_service.read_rows(io.BytesIO(b'{"name": "Ali"}\n\nnot json\n'), 'ndjson'))
+        self.assertEqual(ndjson_rows[0], (1, {"name": "Ali"}, None))
+        self.assertEqual(ndjson_rows[1][0], 3)
+        self.assertTrue(ndjson_rows[1][2].startswith("Invalid JSON"))
+
+        json_rows = list(import_service.read_rows(io.BytesIO(b'{"customers": {"9": {"name": "Ali"}}}'), 'json'))
+        self.assertEqual(json_rows, [(1, {"name": "Ali"}, None)])
+
+    def test_import_customers(self):
+        """Test that valid rows are imported with one write and bad rows are reported"""
+        upload = io.BytesIO(
+            "name,phone,email\n"
+            "Ayşe Yılmaz,+90 555 000 0001,ayse@example.com\n"
+            "Mehmet,+905550000001,\n"
+            "Old Customer,+1234567890,\n"
+            "X,+905550000002,\n"
+            "Zeynep,+905550000003,not-an-email\n"
+            "Can Demir,+905550000004,\n".encode('utf-8')
+        )
+        result = import_service.import_customers(import_service.read_rows(upload, 'csv'))
+
+        self.assertEqual(result["total"], 6)
+        self.assertEqual(result["imported"], 2)
+        self.assertEqual(result["duplicates"], 2)
+        self.assertEqual(result["failed"], 2)
+        self.assertEqual([error["row"] for error in result["errors"]], [3, 4, 5, 6])
+
+        with open(data_service.CUSTOMERS_FILE) as f:
+            saved = json.load(f)["customers"]
+        self.assertEqual(len(saved), 3)
+        self.assertEqual(len({c["id"] for c in saved.values()}), 3)
+        self.assertIn("+905550000001", [c["phone"] for c in saved.values()])
+        self.assertEqual(data_service.search_customers("ayse")["total"], 1)
+
+    def test_import_appointments(self):
+        """Test resolving customers, barbers and services by phone and name"""
+        rows = [
+            {"customer_phone": "+1 234 567 890", "barber_name": "bob johnson", "service_name": "Regular Haircut",
+             "date": "2023-05-15", "time": "10:00", "status": "completed"},
+            {"customer_id": "1", "barber_id": "201", "service_id": "301", "date": "2023-05-16", "time": "11:00",
+             "duration": "30"},
+            {"customer_phone": "+999", "barber_id": "201", "service_id": "301", "date": "2023-13-01", "time": "10:00"}
+        ]
+        upload = io.BytesIO("\n".join(json.dumps(row) for row in rows).encode('utf-8'))
+        result = import_service.import_appointments(import_service.read_rows(upload, 'ndjson'))
+
+        self.assertEqual(result["imported"], 2)
+        self.assertEqual(result["failed"], 1)
+        self.assertEqual(result["errors"][0]["row"], 3)
+        self.assertIn("Customer not found", result["errors"][0]["errors"])
+
+        appointments = sorted(data_service.get_appointments().values(), key=lambda a: a["date"])
+        self.assertEqual([a["customer_id"] for a in appointments], ["1", "1"])
+        self.assertEqual([a["duration"] for a in appointments], [45, 30])
+        self.assertEqual([a["status"] for a in appointments], ["completed", "scheduled"])
+
+
+if __name__ == '__main__':
+    unittest.main()
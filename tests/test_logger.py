@@ -0,0 +1,87 @@
+"""
+Tests for the logging utilities
+"""
+import logging
+import logging.handlers
+import os
+import tempfile
+import threading
+import unittest
+
+# Import the module under test
+from utils import logger as log_utils
+
+
+class _Recorder(logging.Handler):
+    """Handler keeping formatted messages and the thread that wrote them"""
+
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+        self.threads = set()
+        self.done = threading.Event()
+
+    def emit(self, record):
+        self.messages.append(self.format(record))
+        self.threads.add(threading.current_thread().name)
+        self.done.set()
+
+
+class TestLogger(unittest.TestCase):
+    """Test cases for the logging utilities"""
+
+    def test_lazy_json_formats_only_when_rendered(self):
+        """Test that LazyJson serializes on str() and tolerates odd values"""
+        self.assertEqual(str(log_utils.LazyJson({'a': 1})), '{"a": 1}')
+        self.assertIn('"when"', str(log_utils.LazyJson({'when': object()})))
+
+        logger = logging.getLogger('test_logger.lazy')
+        logger.setLevel(logging.INFO)
+
+        class Exploding:
+            def __str__(self):
+                raise AssertionError("formatted a disabled debug message")
+
+        logger.debug("Payload: %s", Exploding())
+
+    def test_sampling_filter(self):
+        """Test that only marked records are sampled, per message"""
+        sampler = log_utils.SamplingFilter(every=3)
+
+        def record(msg, sampled=True, level=logging.INFO):
+            rec = logging.LogRecord('test', level, __file__, 1, msg, (), None)
+            if sampled:
+                rec.sampled = True
+            return rec
+
+        kept = [sampler.filter(record("Received %s")) for _ in range(7)]
+        self.assertEqual(kept, [True, False, False, True, False, False, True])
+        self.assertTrue(sampler.filter(record("Other %s")))
+        self.assertTrue(all(sampler.filter(record("Plain", sampled=False)) for _ in range(5)))
+        self.assertTrue(all(sampler.filter(record("Received %s", level=logging.WARNING)) for _ in range(5)))
+
+    def test_setup_logger_writes_on_listener_thread(self):
+        """Test that records reach the file from the background listener"""
+        with tempfile.TemporaryDirectory() as tmp:
+            log_file = os.path.join(tmp, 'logs', 'app.log')
+            logger = log_utils.setup_logger('test_logger.queue', log_file)
+            self.addCleanup(logger.handlers.clear)
+
+            queue_handler = logger.handlers[-1]
+            self.assertIsInstance(queue_handler, logging.handlers.QueueHandler)
+            recorder = _Recorder()
+            listener = [l for h, l in log_utils._pipelines if h is queue_handler][0]
+            listener.handlers = listener.handlers + (recorder,)
+
+            logger.info("Hello %s", log_utils.LazyJson(['x']))
+            self.assertTrue(recorder.done.wait(5))
+            listener.stop()
+
+            self.assertEqual(recorder.messages, ['Hello ["x"]'])
+            self.assertNotIn(threading.current_thread().name, recorder.threads)
+            with open(log_file) as f:
+                self.assertIn('Hello ["x"]', f.read())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+"""
+Tests for the metrics service module
+"""
+import threading
+import unittest
+
+from flask import Flask, jsonify, abort
+
+# Import the module under test
+from services import metrics_service
+
+
+class TestMetricsService(unittest.TestCase):
+    """Test cases for the metrics service module"""
+
+    def setUp(self):
+        """Setup a small app with metrics enabled before each test"""
+        metrics_service.reset()
+        self.app = Flask(__name__)
+        metrics_service.init_app(self.app)
+
+        @self.app.route('/ok')
+        def ok():
+            return jsonify({"status": "success"})
+
+        @self.app.route('/missing')
+        def missing():
+            abort(404)
+
+        @self.app.route('/broken')
+        def broken():
+            raise RuntimeError("boom")
+
+        self.client = self.app.test_client()
+
+    def test_requests_are_recorded(self):
+        """Test latency histograms, status counters and the in-flight gauge"""
+        self.client.get('/ok')
+        self.client.get('/ok')
+        self.client.get('/missing')
+        self.client.get('/nowhere')
+        text = metrics_service.render()
+
+        self.assertIn('# TYPE http_request_duration_seconds histogram', text)
+        self.assertIn('http_request_duration_seconds_count{endpoint="ok",method="GET"} 2', text)
+        self.assertIn('http_request_duration_seconds_bucket{endpoint="ok",method="GET",le="+Inf"} 2', text)
+        self.assertIn('http_requests_total{endpoint="ok",method="GET",status="200"} 2', text)
+        self.assertIn('http_requests_total{endpoint="missing",method="GET",status="404"} 1', text)
+        self.assertIn('http_requests_total{endpoint="unmatched",method="GET",status="404"} 1', text)
+        self.assertIn('http_requests_in_flight{endpoint="ok",method="GET"} 0', text)
+
+    def test_unhandled_error_counts_as_500(self):
+        """Test that a view raising an exception is recorded as a 500"""
+        self.app.config['PROPAGATE_EXCEPTIONS'] = False
+        self.client.get('/broken')
+
+        self.assertIn('http_requests_total{endpoint="broken",method="GET",status="500"} 1', metrics_service.render())
+
+    def test_values_from_finished_threads_are_kept(self):
+        """Test that shards of finished threads are folded in, not lost"""
+        threads = [threading.Thread(target=metrics_service.inc, args=('test_events_total', (('kind', 'a'),)))
+                   for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertIn('test_events_total{kind="a"} 5', metrics_service.render())
+        self.assertIn('test_events_total{kind="a"} 5', metrics_service.render())
+
+    def test_finished_threads_are_pruned_without_scrapes(self):
+        """Test that registering a new shard retires the shards of finished threads"""
+        for _ in range(20):
+            thread = threading.Thread(target=metrics_service.inc, args=('test_pruned_total',))
+            thread.start()
+            thread.join()
+
+        self.assertLessEqual(sum(1 for shard in metrics_service._shards if not shard.thread.is_alive()), 1)
+        self.assertIn('test_pruned_total 20', metrics_service.render())
+
+
+if __name__ == '__main__':
+    unittest.main()
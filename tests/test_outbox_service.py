@@ -0,0 +1,95 @@
+"""
+Tests for the outbox service module
+"""
+import unittest
+
+# Import the module under test
+from services import outbox_service
+
+
+class TestOutboxService(unittest.TestCase):
+    """Test cases for the outbox service module"""
+
+    def setUp(self):
+        """Setup a recording send function before each test"""
+        self.sent = []
+        self.types = []
+
+        def send(to_phone, body, message_type='conversation'):
+            self.sent.append((to_phone, body))
+            self.types.append(message_type)
+            return {'status': 'success', 'to': to_phone}
+
+        self.send = send
+
+    def test_queue_without_turn(self):
+        """Test that messages are not queued outside a turn"""
+        self.assertFalse(outbox_service.is_active())
+        self.assertFalse(outbox_service.queue_message("+1234567890", "Hello"))
+
+    def test_turn_coalesces_messages_per_phone(self):
+        """Test that messages for the same phone are sent as one body"""
+        with outbox_service.turn(self.send):
+            self.assertTrue(outbox_service.queue_message("+1234567890", "Invalid time slot number."))
+            outbox_service.queue_message("1234567890", "Available slots:\n1. 10:00")
+            outbox_service.queue_message("+1987654321", "Welcome!")
+            self.assertEqual(self.sent, [])
+
+        self.assertEqual(len(self.sent), 2)
+        self.assertEqual(self.sent[0], ("+1234567890", "Invalid time slot number.\n\nAvailable slots:\n1. 10:00"))
+        self.assertEqual(self.sent[1], ("+1987654321", "Welcome!"))
+        self.assertFalse(outbox_service.is_active())
+
+    def test_nested_turns_flush_once(self):
+        """Test that only the outermost turn sends messages"""
+        with outbox_service.turn(self.send):
+            with outbox_service.turn(self.send):
+                outbox_service.queue_message("+1234567890", "First")
+            self.assertEqual(self.sent, [])
+            outbox_service.queue_message("+1234567890", "Second")
+
+        self.assertEqual(self.sent, [("+1234567890", "First\n\nSecond")])
+
+    def test_message_types_are_kept(self):
+        """Test that only consecutive messages of the same type are coalesced"""
+        with outbox_service.turn(self.send):
+            outbox_service.queue_message("+1234567890", "Booked!")
+            outbox_service.queue_message("+1234567890", "Confirmation", message_type='confirmation')
+            outbox_service.queue_message("+1234567890", "Anything else?")
+            outbox_service.queue_message("+1234567890", "Reply STOP to opt out.")
+
+        self.assertEqual([body for _, body in self.sent],
+                         ["Booked!", "Confirmation", "Anything else?\n\nReply STOP to opt out."])
+        self.assertEqual(self.types, ['conversation', 'confirmation', 'conversation'])
+
+    def test_turn_flushes_on_error(self):
+        """Test that queued messages are still sent when the handler raises"""
+        with self.assertRaises(ValueError):
+            with outbox_service.turn(self.send):
+                outbox_service.queue_message("+1234567890", "Sorry, something went wrong.")
+                raise ValueError("boom")
+
+        self.assertEqual(len(self.sent), 1)
+
+    def test_coalesce_respects_length_limit(self):
+        """Test that coalesced bodies never exceed the maximum length"""
+        messages = ["a" * 60, "b" * 60, "c" * 30]
+        bodies = outbox_service.coalesce_messages(messages, max_length=100)
+
+        self.assertEqual(bodies, ["a" * 60, "b" * 60 + "\n\n" + "c" * 30])
+        for body in bodies:
+            self.assertLessEqual(len(body), 100)
+
+    def test_coalesce_splits_oversized_message(self):
+        """Test that a single oversized message is split on line boundaries"""
+        message = "\n".join(["x" * 40] * 5)
+        bodies = outbox_service.coalesce_messages([message], max_length=100)
+
+        self.assertTrue(len(bodies) > 1)
+        for body in bodies:
+            self.assertLessEqual(len(body), 100)
+        self.assertEqual("".join(bodies).replace("\n", ""), "x" * 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
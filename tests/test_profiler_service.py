@@ -0,0 +1,95 @@
+"""
+Tests for the profiler service module
+"""
+import threading
+import time
+import unittest
+
+from flask import Flask, jsonify
+
+# Import the module under test
+from services import profiler_service
+
+
+def _busy(seconds):
+    """Spin so the sampler finds this frame on the stack"""
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+class TestProfilerService(unittest.TestCase):
+    """Test cases for the profiler service module"""
+
+    def setUp(self):
+        """Setup a small app with profiling hooks before each test"""
+        self.app = Flask(__name__)
+        profiler_service.init_app(self.app)
+
+        @self.app.route('/slots')
+        def get_available_slots():
+            _busy(0.05)
+            return jsonify({"status": "success"})
+
+        @self.app.route('/other')
+        def other():
+            _busy(0.05)
+            return jsonify({"status": "success"})
+
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        """Make sure no session keeps running"""
+        profiler_service.stop()
+
+    def test_process_profile_collapsed_output(self):
+        """Test that a timed run samples busy threads into collapsed stacks"""
+        worker = threading.Thread(target=_busy, args=(0.3,))
+        worker.start()
+        session = profiler_service.start(seconds=0.2, interval_ms=2)
+        self.assertIsNone(profiler_service.start(seconds=1))
+        worker.join()
+        session._thread.join()
+
+        self.assertFalse(session.running)
+        self.assertIs(profiler_service.current(), session)
+        self.assertGreater(session.samples, 0)
+        lines = session.collapsed().splitlines()
+        self.assertTrue(lines)
+        stack, count = lines[0].rsplit(' ', 1)
+        self.assertGreater(int(count), 0)
+        self.assertTrue(any('_busy (tests/test_profiler_service.py:' in line for line in lines))
+        self.assertNotIn('_sample', session.collapsed())
+
+    def test_endpoint_profile_only_samples_matching_requests(self):
+        """Test that endpoint mode only samples threads serving that endpoint"""
+        session = profiler_service.start(seconds=5, interval_ms=1, endpoint='get_available_slots')
+        self.client.get('/other')
+        self.assertEqual(session.stacks, {})
+
+        self.client.get('/slots')
+        profiler_service.stop()
+
+        self.assertEqual(session.requests, 1)
+        self.assertEqual(session.threads, set())
+        self.assertIn('get_available_slots', session.collapsed())
+        self.assertNotIn(';other (', session.collapsed())
+
+    def test_sample_rate_zero_skips_requests(self):
+        """Test that an unsampled request is not profiled"""
+        session = profiler_service.start(seconds=5, endpoint='/slots', sample_rate=0)
+        self.client.get('/slots')
+        profiler_service.stop()
+        self.assertEqual(session.requests, 0)
+        self.assertEqual(session.stacks, {})
+
+    def test_non_string_endpoint_is_rejected(self):
+        """Test that a non-string endpoint never starts a session"""
+        with self.assertRaises(TypeError):
+            profiler_service.start(seconds=5, endpoint=['slots'])
+        self.assertIsNone(profiler_service.stop())
+        self.assertEqual(self.client.get('/slots').status_code, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
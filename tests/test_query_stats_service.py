@@ -0,0 +1,97 @@
+"""
+Tests for the query stats service module
+"""
+import unittest
+from datetime import date, timedelta
+
+from flask import Flask, jsonify
+
+# Import the module under test
+from models.database import db, Customer, Barber, Service, Appointment
+from services import query_stats_service, db_service, stats_service
+
+
+class TestQueryStatsService(unittest.TestCase):
+    """Test cases for the query stats service module"""
+
+    def setUp(self):
+        """Setup an in-memory database with a few customers before each test"""
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        self.app.config['QUERY_STATS_HEADERS'] = True
+        db.init_app(self.app)
+        query_stats_service.init_app(self.app)
+        self.context = self.app.app_context()
+        self.context.push()
+        db.create_all()
+
+        db.session.add_all([Customer(id=f'c{i}', name=f'Customer {i}', phone=f'+1000000{i:04d}') for i in range(12)])
+        db.session.commit()
+
+        @self.app.route('/one-by-one')
+        def one_by_one():
+            return jsonify([db_service.get_customer(f'c{i}')['name'] for i in range(12)])
+
+        @self.app.route('/all')
+        def all_customers():
+            return jsonify(len(db_service.get_customers()))
+
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        """Drop the database after each test"""
+        db.session.remove()
+        db.drop_all()
+        self.context.pop()
+
+    def test_statement_shape(self):
+        """Test that literals and parameter lists are normalized"""
+        self.assertEqual(
+            query_stats_service.statement_shape("SELECT * FROM a WHERE id IN (?, ?, ?) AND n = 5\n  AND s = 'x'"),
+            "SELECT * FROM a WHERE id IN (?) AND n = ? AND s = ?"
+        )
+
+    def test_repeated_queries_are_flagged(self):
+        """Test that one lookup per row is reported as a likely N+1"""
+        response = self.client.get('/one-by-one')
+        self.assertEqual(int(response.headers['X-Query-Count']), 12)
+        self.assertEqual(response.headers['X-Query-Repeated'], '1')
+        self.assertIn('X-Query-Time-Ms', response.headers)
+
+        response = self.client.get('/all')
+        self.assertEqual(response.headers['X-Query-Count'], '1')
+        self.assertEqual(response.headers['X-Query-Repeated'], '0')
+
+    def test_max_queries(self):
+        """Test the test helper's limit"""
+        with query_stats_service.max_queries(1):
+            self.client.get('/all')
+
+        with self.assertRaises(AssertionError) as raised:
+            with query_stats_service.max_queries(5):
+                self.client.get('/one-by-one')
+        self.assertIn('12x SELECT', str(raised.exception))
+
+    def test_dashboard_query_count_does_not_grow_with_appointments(self):
+        """Test that the admin dashboard loads upcoming appointments in a bounded number of queries"""
+        from app import create_app
+        app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://'}, bootstrap=['create_tables'], blueprints=['admin'])
+        with app.app_context():
+            db.session.add_all([Customer(id='c1', name='John Doe', phone='+1234567890'),
+                                Barber(id='b1', name='Bob'), Service(id='s1', name='Haircut', price=25.0, duration=30)])
+            today = date.today()
+            db.session.add_all([Appointment(id=f'a{i}', customer_id='c1', barber_id='b1', service_id='s1',
+                                            date=today + timedelta(days=i % 7), time='10:00', duration=30, status='scheduled')
+                                for i in range(30)])
+            db.session.commit()
+        stats_service.invalidate()
+
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['admin_logged_in'] = True
+        with query_stats_service.max_queries(6):
+            self.assertEqual(client.get('/admin/').status_code, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
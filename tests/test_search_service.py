@@ -0,0 +1,69 @@
+"""
+Tests for the customer search index
+"""
+import unittest
+
+# Import the module under test
+from services import search_service
+
+
+class TestSearchService(unittest.TestCase):
+    """Test cases for the search service module"""
+
+    def setUp(self):
+        """Setup an index with a few customers before each test"""
+        self.index = search_service.CustomerSearchIndex()
+        self.index.rebuild([
+            ("1", "John Doe", "+1 (234) 567-890"),
+            ("2", "Jane Smith", "+1987654321"),
+            ("3", "Şükrü Yılmaz", "+90 555 123 4567"),
+            ("4", "Johnny Walker", "+905551119999"),
+            ("5", "Mehmet Kaya", "")
+        ])
+
+    def test_normalize_text(self):
+        """Test case folding, accent stripping and whitespace collapsing"""
+        self.assertEqual(search_service.normalize_text("  Şükrü   YILMAZ "), "sukru yilmaz")
+
+    def test_name_prefix(self):
+        """Test matching the beginning of any word in the name"""
+        self.assertEqual(self.index.search("joh")[0][:2], ["1", "4"])
+        self.assertEqual(self.index.search("smi")[0][0], "2")
+        self.assertEqual(self.index.search("sukru yil")[0][0], "3")
+        self.assertEqual(self.index.search("J D")[0][0], "1")
+
+    def test_fuzzy_name(self):
+        """Test that small typos still find the customer"""
+        ids, _ = self.index.search("mehmt")
+        self.assertEqual(ids, ["5"])
+
+    def test_phone_suffix(self):
+        """Test matching the end of a phone number regardless of formatting"""
+        self.assertEqual(self.index.search("4567"), (["3"], 1))
+        self.assertEqual(self.index.search("555 123 4567"), (["3"], 1))
+        self.assertEqual(self.index.search("5551234567"), (["3"], 1))
+        self.assertEqual(self.index.search("0000"), ([], 0))
+
+    def test_empty_query_lists_by_name(self):
+        """Test that an empty query pages through customers ordered by name"""
+        ids, total = self.index.search("", limit=2, offset=1)
+        self.assertEqual(total, 5)
+        self.assertEqual(ids, ["1", "4"])
+
+    def test_incremental_updates(self):
+        """Test adding, renaming and removing customers"""
+        self.index.add("6", "Zeynep Demir", "+905550000001")
+        self.assertEqual(self.index.search("zey")[0], ["6"])
+
+        self.index.add("6", "Zeynep Arslan", "+905550000001")
+        self.assertEqual(self.index.search("demir")[0], [])
+        self.assertEqual(self.index.search("arslan")[0], ["6"])
+
+        self.index.remove("6")
+        self.assertEqual(self.index.search("zey")[0], [])
+        self.assertEqual(self.index.search("0000001")[0], [])
+        self.assertEqual(len(self.index), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+"""
+Tests for the stats service module
+"""
+import unittest
+from datetime import date
+from unittest import mock
+
+from flask import Flask
+
+# Import the module under test
+from models.database import db, Customer, Barber, Service, Appointment
+from services import db_service, stats_service
+
+
+class TestStatsService(unittest.TestCase):
+    """Test cases for the stats service module"""
+
+    def setUp(self):
+        """Setup an in-memory database with sample rows before each test"""
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        db.init_app(self.app)
+        self.context = self.app.app_context()
+        self.context.push()
+        db.create_all()
+        stats_service.invalidate()
+
+        db.session.add_all([
+            Customer(id='c1', name='John Doe', phone='+1234567890'),
+            Customer(id='c2', name='Jane Smith', phone='+1987654321'),
+            Barber(id='b1', name='Bob'),
+            Barber(id='b2', name='Alice'),
+            Service(id='s1', name='Haircut', price=25.0, duration=30)
+        ])
+        for i, (barber_id, status) in enumerate([('b1', 'scheduled'), ('b1', 'completed'),
+                                                 ('b2', 'scheduled'), ('b1', 'no-show')]):
+            db.session.add(Appointment(id=f'a{i}', customer_id='c1', barber_id=barber_id, service_id='s1',
+                                       date=date(2023, 5, 15), time=f'1{i}:00', duration=30, status=status))
+        db.session.commit()
+
+    def tearDown(self):
+        """Drop the database after each test"""
+        stats_service.invalidate()
+        db.session.remove()
+        db.drop_all()
+        self.context.pop()
+
+    def test_get_totals(self):
+        """Test counting every table"""
+        self.assertEqual(stats_service.get_totals(),
+                         {'customers': 2, 'appointments': 4, 'barbers': 2, 'services': 1})
+
+    def test_get_status_counts(self):
+        """Test the status breakdown includes statuses with no appointments"""
+        self.assertEqual(stats_service.get_status_counts(),
+                         {'scheduled': 2, 'completed': 1, 'cancelled': 0, 'no_show': 1})
+
+    def test_get_barber_counts(self):
+        """Test per-barber counts, busiest first"""
+        self.assertEqual(stats_service.get_barber_counts(), [
+            {'barber_id': 'b1', 'barber_name': 'Bob', 'count': 3},
+            {'barber_id': 'b2', 'barber_name': 'Alice', 'count': 1}
+        ])
+        self.assertEqual([row['count'] for row in stats_service.get_barber_counts('scheduled')], [1, 1])
+
+    def test_cache_and_invalidate(self):
+        """Test that results are cached until invalidated"""
+        self.assertEqual(stats_service.get_totals()['customers'], 2)
+
+        db.session.add(Customer(id='c3', name='New Customer', phone='+1555555555'))
+        db.session.commit()
+        self.assertEqual(stats_service.get_totals()['customers'], 2)
+
+        stats_service.invalidate('totals')
+        self.assertEqual(stats_service.get_totals()['customers'], 3)
+
+    def test_failed_query_is_not_cached_for_full_ttl(self):
+        """Test that the zeroed fallback after a database error expires quickly"""
+        with mock.patch.object(db_service, 'get_table_counts', return_value=None):
+            self.assertEqual(stats_service.get_totals()['customers'], 0)
+        self.assertLessEqual(stats_service._cache['totals'][0],
+                             stats_service.time.monotonic() + stats_service.ERROR_CACHE_TTL)
+
+        with mock.patch.object(stats_service, 'ERROR_CACHE_TTL', 0), \
+                mock.patch.object(db_service, 'get_appointment_status_counts', return_value=None):
+            self.assertEqual(stats_service.get_status_counts()['scheduled'], 0)
+        self.assertEqual(stats_service.get_status_counts()['scheduled'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+"""
+Tests for the notification template service
+"""
+import unittest
+
+# Import the module under test
+from services import template_service
+from config import BUSINESS_NAME
+
+
+class TestTemplateService(unittest.TestCase):
+    """Test cases for the template service module"""
+
+    def test_format_date(self):
+        """Test English and Turkish date formatting"""
+        self.assertEqual(template_service.format_date("2023-05-15", "en"), "Monday, May 15, 2023")
+        self.assertEqual(template_service.format_date("2023-05-15", "tr"), "Pazartesi, 15 Mayıs 2023")
+        self.assertEqual(template_service.format_date("2023-08-05", "tr"), "Cumartesi, 05 Ağustos 2023")
+
+    def test_format_date_invalid(self):
+        """Test that invalid dates raise ValueError"""
+        with self.assertRaises(ValueError):
+            template_service.format_date("15/05/2023", "en")
+
+    def test_render_confirmation(self):
+        """Test rendering a confirmation message"""
+        message = template_service.render(
+            "confirmation", "en",
+            customer_name="John",
+            date="2023-05-15",
+            time="10:00",
+            barber_name="Bob",
+            service_name="Haircut"
+        )
+
+        self.assertTrue(message.startswith("Hello John! Your appointment has been confirmed.\n\n"))
+        self.assertIn("Date: Monday, May 15, 2023\n", message)
+        self.assertIn(f"Thank you for choosing {BUSINESS_NAME}. ", message)
+
+    def test_render_reminder_hours(self):
+        """Test the reminder wording for tomorrow and for a number of hours"""
+        fields = {
+            "customer_name": "Ali",
+            "date": "2023-05-15",
+            "time": "10:00",
+            "barber_name": "Mehmet",
+            "service_name": "Saç Kesimi"
+        }
+
+        tomorrow = template_service.render("reminder", "tr", **fields)
+        soon = template_service.render("reminder", "tr", reminder_hours=2, **fields)
+
+        self.assertIn("Randevunuz yarın. ", tomorrow)
+        self.assertIn("Randevunuz 2 saat içinde. ", soon)
+
+    def test_render_keeps_braces_in_values(self):
+        """Test that field values are inserted literally"""
+        message = template_service.render(
+            "cancellation", "en",
+            customer_name="{name}",
+            date="2023-05-15",
+            time="10:00"
+        )
+
+        self.assertTrue(message.startswith("Hello {name}!"))
+
+    def test_render_bulk(self):
+        """Test rendering many messages in one pass keeps the row order"""
+        rows = [
+            {
+                "customer_name": f"Customer {i}",
+                "date": "2023-05-15",
+                "time": "10:00",
+                "barber_name": "Bob",
+                "service_name": "Haircut",
+                "reminder_hours": 24
+            }
+            for i in range(1000)
+        ]
+
+        messages = template_service.render_bulk("reminder", "en", rows)
+
+        self.assertEqual(len(messages), 1000)
+        self.assertTrue(messages[0].startswith("Hello Customer 0!"))
+        self.assertTrue(messages[999].startswith("Hello Customer 999!"))
+
+    def test_unknown_template(self):
+        """Test that an unknown message type or language raises ValueError"""
+        with self.assertRaises(ValueError):
+            template_service.render("welcome", "en", customer_name="John")
+        with self.assertRaises(ValueError):
+            template_service.render("confirmation", "de", customer_name="John")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+"""
+Tests for the tracing service module
+"""
+import threading
+import unittest
+
+from flask import Flask, jsonify
+
+# Import the module under test
+from services import tracing_service
+
+
+class TestTracingService(unittest.TestCase):
+    """Test cases for the tracing service module"""
+
+    def setUp(self):
+        """Keep every trace and setup a small traced app before each test"""
+        self.original_slow_ms = tracing_service.TRACE_SLOW_MS
+        tracing_service.TRACE_SLOW_MS = 0
+        tracing_service.clear()
+
+        self.app = Flask(__name__)
+        tracing_service.init_app(self.app)
+
+        @self.app.route('/reply')
+        def reply():
+            with tracing_service.span('openai.chat.completions', model='gpt-4o'):
+                pass
+            with tracing_service.span('twilio.messages.create'):
+                pass
+            return jsonify({"trace_id": tracing_service.current_trace_id()})
+
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        """Restore the slow trace threshold"""
+        tracing_service.TRACE_SLOW_MS = self.original_slow_ms
+        tracing_service.clear()
+
+    def test_request_spans(self):
+        """Test that outbound calls are recorded as children of the request span"""
+        response = self.client.get('/reply')
+        trace_id = response.headers['X-Trace-Id']
+        self.assertEqual(response.get_json()['trace_id'], trace_id)
+
+        trace = tracing_service.get_trace(trace_id)
+        root, openai_span, twilio_span = trace['spans']
+        self.assertEqual(root['name'], 'GET reply')
+        self.assertEqual(root['attributes']['status'], 200)
+        self.assertEqual(openai_span['parent_id'], root['span_id'])
+        self.assertEqual(openai_span['attributes']['model'], 'gpt-4o')
+        self.assertEqual(twilio_span['name'], 'twilio.messages.create')
+
+    def test_incoming_trace_id_is_joined(self):
+        """Test that a valid X-Trace-Id header is propagated"""
+        response = self.client.get('/reply', headers={'X-Trace-Id': 'abcdef0123456789'})
+        self.assertEqual(response.headers['X-Trace-Id'], 'abcdef0123456789')
+
+        response = self.client.get('/reply', headers={'X-Trace-Id': '<script>'})
+        self.assertNotEqual(response.headers['X-Trace-Id'], '<script>')
+
+    def test_background_work_keeps_trace_open(self):
+        """Test that wrapped background work joins the trace and finishes it"""
+        release = threading.Event()
+
+        def background():
+            release.wait(5)
+            with tracing_service.span('twilio.messages.create'):
+                pass
+
+        with tracing_service.span('POST start_campaign'):
+            trace_id = tracing_service.current_trace_id()
+            thread = threading.Thread(target=tracing_service.wrap(background, 'campaign.run'))
+            thread.start()
+
+        # The request span ended but the background job has not
+        self.assertIsNone(tracing_service.get_trace(trace_id))
+        release.set()
+        thread.join()
+
+        trace = tracing_service.get_trace(trace_id)
+        names = [span['name'] for span in trace['spans']]
+        self.assertEqual(names, ['POST start_campaign', 'campaign.run', 'twilio.messages.create'])
+        self.assertNotEqual(trace['spans'][2]['thread'], trace['spans'][0]['thread'])
+
+    def test_errors_are_recorded(self):
+        """Test that a failing span keeps the error"""
+        with self.assertRaises(ValueError):
+            with tracing_service.span('outer'):
+                trace_id = tracing_service.current_trace_id()
+                raise ValueError("bad input")
+
+        self.assertEqual(tracing_service.get_trace(trace_id)['spans'][0]['error'], 'ValueError: bad input')
+        self.assertIsNone(tracing_service.current_trace_id())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+"""
+Tests for the version service module
+"""
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from flask import Flask, jsonify
+
+# Import the module under test
+from services import version_service, data_service
+
+
+class TestVersionService(unittest.TestCase):
+    """Test cases for the version service module"""
+
+    def setUp(self):
+        """Setup a small app with a conditional endpoint before each test"""
+        self.calls = 0
+        self.app = Flask(__name__)
+
+        @self.app.route('/items')
+        @version_service.conditional('appointments')
+        def items():
+            self.calls += 1
+            return jsonify({"status": "success", "calls": self.calls})
+
+        @self.app.route('/missing')
+        @version_service.conditional('appointments')
+        def missing():
+            return jsonify({"status": "error"}), 404
+
+        self.client = self.app.test_client()
+
+    def test_not_modified_without_calling_view(self):
+        """Test that a matching If-None-Match returns 304 and skips the view"""
+        response = self.client.get('/items?date=2023-05-15')
+        etag = response.headers['ETag']
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Cache-Control'], 'private, no-cache')
+        self.assertIn('Last-Modified', response.headers)
+
+        response = self.client.get('/items?date=2023-05-15', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers['ETag'], etag)
+        self.assertEqual(self.calls, 1)
+
+        # Other query strings have their own tag
+        response = self.client.get('/items?date=2023-05-16', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+
+    def test_write_changes_etag(self):
+        """Test that a bump makes earlier tags stale"""
+        etag = self.client.get('/items').headers['ETag']
+        version_service.bump('customers')
+        self.assertEqual(self.client.get('/items', headers={'If-None-Match': etag}).status_code, 304)
+
+        version_service.bump('appointments')
+        response = self.client.get('/items', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+    def test_data_service_write_bumps_version(self):
+        """Test that data_service writes bump the collection version"""
+        file_path = os.path.join(tempfile.mkdtemp(), "appointments.json")
+        original_locks = data_service._file_locks
+        data_service._file_locks = {file_path: data_service.threading.Lock()}
+        before = version_service.get_version('appointments')
+        try:
+            data_service._write_file(file_path, {"appointments": {}})
+        finally:
+            data_service._file_locks = original_locks
+            shutil.rmtree(os.path.dirname(file_path))
+
+        self.assertEqual(version_service.get_version('appointments'), before + 1)
+
+    @unittest.skipUnless(hasattr(os, "fork"), "requires fork")
+    def test_write_in_other_process_invalidates_shared_etag(self):
+        """Test that a tag from the shared file version goes stale on another worker's write"""
+        test_dir = tempfile.mkdtemp()
+        names = ("CUSTOMERS_FILE", "APPOINTMENTS_FILE", "BARBERS_FILE", "SERVICES_FILE")
+        originals = {name: getattr(data_service, name) for name in names}
+        original_locks = data_service._file_locks
+        self.addCleanup(shutil.rmtree, test_dir)
+        self.addCleanup(setattr, data_service, '_file_locks', original_locks)
+        for name, path in originals.items():
+            self.addCleanup(setattr, data_service, name, path)
+            setattr(data_service, name, os.path.join(test_dir, os.path.basename(path)))
+            collection = os.path.basename(path)[:-len('.json')]
+            with open(getattr(data_service, name), 'w') as f:
+                json.dump({collection: {}}, f)
+        data_service._file_locks = {getattr(data_service, name): data_service.threading.Lock() for name in names}
+        data_service.initialize()
+
+        @self.app.route('/shared')
+        @version_service.conditional('appointments', version=data_service.shared_version)
+        def shared():
+            return jsonify({"count": len(data_service.get_appointments())})
+
+        etag = self.client.get('/shared').headers['ETag']
+        self.assertEqual(self.client.get('/shared', headers={'If-None-Match': etag}).status_code, 304)
+
+        pid = os.fork()
+        if pid == 0:
+            created = data_service.create_appointment({"customer_id": "1", "date": "2030-01-01", "time": "10:00"})
+            os._exit(0 if created else 1)
+        _, status = os.waitpid(pid, 0)
+        self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+
+        response = self.client.get('/shared', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['count'], 1)
+
+    def test_table_version_sees_writes_from_any_process(self):
+        """Test that the database version changes without a local bump"""
+        from app import create_app
+        from models.database import db, Barber
+        from services import db_service
+
+        app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://'}, bootstrap=['create_tables'])
+        with app.app_context():
+            before = db_service.table_version(('appointments', 'barbers'))
+            # Written as another worker would, so no counter in this process moves
+            db.session.execute(db.insert(Barber), [{"id": "b1", "name": "Other Worker"}])
+            db.session.commit()
+            after = db_service.table_version(('appointments', 'barbers'))
+        self.assertNotEqual(before[0], after[0])
+        self.assertIsNotNone(after[1])
+
+    def test_errors_are_not_tagged(self):
+        """Test that non-200 responses carry no ETag"""
+        response = self.client.get('/missing')
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn('ETag', response.headers)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+"""
+Tests for the webhook controller
+"""
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from twilio.request_validator import RequestValidator
+
+# Import the module under test
+from app import create_app
+from models.database import db, MessageDelivery
+from services import db_service, whatsapp_service
+
+AUTH_TOKEN = 'test-auth-token'
+STATUS_URL = 'http://localhost/webhook/whatsapp/status'
+
+
+class TestWebhookController(unittest.TestCase):
+    """Test cases for the webhook controller"""
+
+    def setUp(self):
+        """Setup an app on an in-memory database before each test"""
+        self.app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'TESTING': True},
+                              bootstrap=['create_tables'], blueprints=['webhook'])
+        self.client = self.app.test_client()
+        self.context = self.app.app_context()
+        self.context.push()
+        patcher = mock.patch.object(whatsapp_service, 'TWILIO_AUTH_TOKEN', AUTH_TOKEN)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        """Drop the database after each test"""
+        db.session.remove()
+        db.drop_all()
+        self.context.pop()
+
+    def _post_status(self, form, signature=None):
+        if signature is None:
+            signature = RequestValidator(AUTH_TOKEN).compute_signature(STATUS_URL, form)
+        return self.client.post('/webhook/whatsapp/status', data=form, headers={'X-Twilio-Signature': signature})
+
+    def test_status_callback_requires_signature(self):
+        """Test that unsigned or wrongly signed status callbacks are rejected"""
+        form = {'MessageSid': 'SM1', 'MessageStatus': 'delivered'}
+
+        self.assertEqual(self.client.post('/webhook/whatsapp/status', data=form).status_code, 403)
+        self.assertEqual(self._post_status(form, signature='forged').status_code, 403)
+        self.assertIsNone(MessageDelivery.query.get('SM1'))
+
+    def test_status_callback_before_send_is_recorded(self):
+        """Test that a callback arriving before the send is recorded is kept"""
+        sent_at = datetime.utcnow() - timedelta(seconds=2)
+
+        response = self._post_status({'MessageSid': 'SM1', 'MessageStatus': 'delivered'})
+        self.assertEqual(response.status_code, 200)
+
+        self.assertTrue(db_service.record_message_sent('SM1', '+1234567890', 'reminder', sent_at=sent_at))
+
+        delivery = db_service.get_message_deliveries()[0]
+        self.assertEqual((delivery['status'], delivery['message_type']), ('delivered', 'reminder'))
+        self.assertEqual(delivery['sent_at'], sent_at.isoformat())
+        self.assertIsNotNone(delivery['delivered_at'])
+
+
+if __name__ == '__main__':
+    unittest.main()
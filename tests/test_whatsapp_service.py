@@ -0,0 +1,36 @@
+"""
+Tests for the WhatsApp service module
+"""
+import unittest
+from unittest import mock
+
+# Import the module under test
+from services import whatsapp_service
+
+
+class TestWhatsappService(unittest.TestCase):
+    """Test cases for the WhatsApp service module"""
+
+    def test_send_appointment_reminders(self):
+        """Test that bulk reminders are rendered in order and sent as reminders"""
+        reminders = [{
+            'customer_phone': f'+90555000000{i}', 'customer_name': f'Customer {i}',
+            'appointment_date': '2023-05-15', 'appointment_time': '10:00',
+            'barber_name': 'Bob', 'service_name': 'Haircut', 'reminder_hours': 2
+        } for i in range(3)]
+
+        with mock.patch.object(whatsapp_service, 'send_whatsapp_message',
+                               return_value={'status': 'success'}) as send:
+            results = whatsapp_service.send_appointment_reminders(reminders)
+
+        self.assertEqual(results, [{'status': 'success'}] * 3)
+        self.assertEqual([call.args[0] for call in send.call_args_list], [r['customer_phone'] for r in reminders])
+        first = send.call_args_list[0]
+        self.assertTrue(first.args[1].startswith("Merhaba Customer 0!"))
+        self.assertIn("Pazartesi, 15 Mayıs 2023", first.args[1])
+        self.assertIn("2 saat", first.args[1])
+        self.assertEqual(first.kwargs['message_type'], 'reminder')
+
+
+if __name__ == '__main__':
+    unittest.main()
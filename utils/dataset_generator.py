@@ -0,0 +1,405 @@
+"""
+Seeded synthetic dataset generator for scale testing the JSON and SQL backends
+
+Builds a shop with many barbers on varied working hours, a service
+catalog, customers with Turkish and English names and years of
+appointments with a realistic status mix. The same seed always gives the
+same data. Appointments are generated lazily, so they can be streamed
+into a data directory or a database without holding them all in memory.
+
+Usage: python -m utils.dataset_generator [--seed 42] [--barbers 25] [--customers 20000] [--years 3]
+       [--json DATA_DIR] [--sql [--database-url URL]]
+"""
+import argparse
+import bisect
+import json
+import logging
+import os
+import random
+import time
+import uuid
+from datetime import date, datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+DAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+# Share of a barber's slots booked on each weekday, before popularity and season
+WEEKDAY_OCCUPANCY = (0.45, 0.5, 0.55, 0.6, 0.75, 0.85, 0.6)
+# Seasonal factor by month: busy before holidays, quiet in summer
+MONTH_FACTOR = (0.9, 0.85, 0.95, 1.0, 1.0, 1.05, 0.85, 0.8, 1.0, 1.0, 1.05, 1.15)
+
+PAST_STATUSES = (("completed", 0.83), ("cancelled", 0.11), ("no-show", 0.06))
+FUTURE_STATUSES = (("scheduled", 0.91), ("cancelled", 0.09))
+
+SHIFTS = (
+    # (weight, working days, start, end)
+    (5, DAYS[:6], "09:00", "18:00"),
+    (3, DAYS[:5], "09:00", "17:00"),
+    (2, DAYS[1:6], "11:00", "20:00"),
+    (1, DAYS[3:], "10:00", "16:00"),
+    (1, ("monday", "wednesday", "friday", "saturday"), "12:00", "21:00"),
+)
+
+SERVICES = (
+    # (name, category, price, duration, weight)
+    ("Classic Haircut", "Haircuts", 25.0, 30, 30),
+    ("Fade Haircut", "Haircuts", 30.0, 45, 25),
+    ("Kids Haircut", "Haircuts", 18.0, 30, 8),
+    ("Buzz Cut", "Haircuts", 15.0, 20, 6),
+    ("Beard Trim", "Facial Hair", 15.0, 20, 12),
+    ("Hot Towel Shave", "Facial Hair", 25.0, 30, 6),
+    ("Haircut & Beard Trim", "Packages", 40.0, 60, 10),
+    ("Hair Coloring", "Color", 45.0, 60, 2),
+    ("Scalp Treatment", "Treatments", 20.0, 30, 1),
+)
+
+SPECIALTIES = ("Classic Cuts", "Fades", "Skin Fades", "Beard Trimming", "Hot Towel Shaves",
+               "Hair Coloring", "Kids Cuts", "Modern Styles", "Long Hair", "Hair Tattoos")
+
+TURKISH_FIRST = ("Ahmet", "Mehmet", "Mustafa", "Ali", "Hüseyin", "Hasan", "İbrahim", "Emre", "Burak", "Murat",
+                 "Can", "Cem", "Deniz", "Eren", "Kerem", "Yusuf", "Ömer", "Oğuz", "Serkan", "Selim",
+                 "Barış", "Uğur", "Gökhan", "Tolga", "Çağlar", "Zeynep", "Elif", "Ayşe", "Fatma", "Merve")
+TURKISH_LAST = ("Yılmaz", "Kaya", "Demir", "Şahin", "Çelik", "Yıldız", "Yıldırım", "Öztürk", "Aydın", "Özdemir",
+                "Arslan", "Doğan", "Kılıç", "Aslan", "Çetin", "Kara", "Koç", "Kurt", "Özkan", "Şimşek",
+                "Polat", "Erdoğan", "Güneş", "Aksoy", "Bulut")
+ENGLISH_FIRST = ("James", "John", "Robert", "Michael", "William", "David", "Richard", "Joseph", "Thomas", "Daniel",
+                 "Matthew", "Chris", "Andrew", "Ryan", "Liam", "Noah", "Oliver", "Jack", "Harry", "George",
+                 "Ethan", "Lucas", "Samuel", "Emma", "Olivia", "Sophie")
+ENGLISH_LAST = ("Smith", "Johnson", "Williams", "Brown", "Jones", "Miller", "Davis", "Wilson", "Taylor", "Clark",
+                "Walker", "Wright", "Hall", "Allen", "Young", "King", "Scott", "Green", "Baker", "Adams",
+                "Evans", "Turner", "Hughes", "Cooper", "Ward")
+TURKISH_MOBILE = ("532", "533", "535", "542", "505", "555", "544", "507")
+ENGLISH_MOBILE = ("1212", "1415", "1617", "1312", "447700", "447911")
+EMAIL_DOMAINS = ("gmail.com", "hotmail.com", "outlook.com", "yahoo.com", "icloud.com")
+NOTES = ("Prefers scissors over clippers", "Running 10 minutes late", "First visit, referred by a friend",
+         "Wants the same cut as last time", "Sensitive skin, no alcohol aftershave", "Bring photo of style")
+
+_ASCII = str.maketrans("çğıöşüÇĞİÖŞÜ", "cgiosuCGIOSU")
+
+def _weighted(rng, choices):
+    """Pick from (value, weight) pairs"""
+    return rng.choices([value for value, _ in choices], [weight for _, weight in choices])[0]
+
+def _uuid(rng):
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+def _minutes(hhmm):
+    hours, minutes = hhmm.split(":")
+    return int(hours) * 60 + int(minutes)
+
+class Dataset:
+    """
+    A synthetic shop: barbers, services, customers and a stream of appointments
+
+    Args:
+        seed: Random seed; the same arguments always produce the same data
+        barbers: Number of barbers, including some who have left
+        customers: Number of customers
+        years: Years of appointment history before end_date
+        future_days: Days of upcoming appointments after end_date
+        end_date: Day history runs up to (default today)
+        turkish_ratio: Share of customers and barbers with Turkish names
+    """
+
+    def __init__(self, seed=42, barbers=25, customers=20000, years=3, future_days=30,
+                 end_date=None, turkish_ratio=0.6):
+        self.seed = seed
+        self.end_date = end_date or date.today()
+        self.start_date = self.end_date - timedelta(days=int(365 * years))
+        self.future_days = future_days
+        self.turkish_ratio = turkish_ratio
+
+        rng = random.Random(seed)
+        self.services = self._services(rng)
+        self.barbers = [self._barber(rng, i) for i in range(barbers)]
+        self.customers = sorted((self._customer(rng, i) for i in range(customers)), key=lambda c: c["created_at"])
+        self._joined = [customer["created_at"][:10] for customer in self.customers]
+
+    def _name(self, rng):
+        if rng.random() < self.turkish_ratio:
+            return f"{rng.choice(TURKISH_FIRST)} {rng.choice(TURKISH_LAST)}", True
+        return f"{rng.choice(ENGLISH_FIRST)} {rng.choice(ENGLISH_LAST)}", False
+
+    def _phone(self, rng, index, turkish):
+        # The index keeps numbers unique (the customers table requires it)
+        if turkish:
+            return f"+90{rng.choice(TURKISH_MOBILE)}{index:07d}"
+        return f"+{rng.choice(ENGLISH_MOBILE)}{index:07d}"
+
+    def _email(self, name, index):
+        local = name.translate(_ASCII).lower().replace(" ", ".")
+        return f"{local}{index}@{EMAIL_DOMAINS[index % len(EMAIL_DOMAINS)]}"
+
+    def _timestamp(self, rng, first, last):
+        """Random moment between two dates, as an ISO string"""
+        span = max(1, (last - first).days) * 86400
+        return (datetime.combine(first, datetime.min.time()) + timedelta(seconds=rng.randrange(span))).isoformat()
+
+    def _services(self, rng):
+        created = self._timestamp(rng, self.start_date - timedelta(days=30), self.start_date)
+        return [{
+            "id": _uuid(rng), "name": name, "description": f"{name} ({duration} min)", "price": price,
+            "duration": duration, "category": category, "is_active": True,
+            "created_at": created, "updated_at": created, "weight": weight
+        } for name, category, price, duration, weight in SERVICES]
+
+    def _barber(self, rng, index):
+        name, turkish = self._name(rng)
+        _, days, start, end = rng.choices(SHIFTS, [shift[0] for shift in SHIFTS])[0]
+        working_hours = {day: ({"start": start, "end": end} if day in days else None) for day in DAYS}
+
+        # Most barbers work the whole period; some join later or have left
+        history = (self.end_date - self.start_date).days
+        hired = self.start_date - timedelta(days=rng.randrange(365))
+        if rng.random() < 0.3:
+            hired = self.start_date + timedelta(days=rng.randrange(max(1, history)))
+        left = None
+        if rng.random() < 0.15:
+            left = hired + timedelta(days=rng.randrange(90, 90 + max(1, history)))
+            if left >= self.end_date:
+                left = None
+
+        created = hired.isoformat() + "T09:00:00"
+        return {
+            "id": _uuid(rng), "name": name, "email": self._email(name, index), "phone": self._phone(rng, index, turkish),
+            "bio": f"Barber since {hired.year - rng.randrange(1, 15)}.",
+            "specialties": rng.sample(SPECIALTIES, rng.randint(1, 4)), "working_hours": working_hours,
+            "profile_image": None, "is_active": left is None, "created_at": created,
+            "updated_at": (left.isoformat() + "T18:00:00") if left else created,
+            # Not stored: used to place appointments
+            "hired": hired, "left": left, "popularity": rng.uniform(0.6, 1.1)
+        }
+
+    def _customer(self, rng, index):
+        name, turkish = self._name(rng)
+        return {
+            "id": _uuid(rng), "name": name, "phone": self._phone(rng, index + 1000000, turkish),
+            "email": self._email(name, index) if rng.random() < 0.4 else None,
+            "notes": rng.choice(NOTES) if rng.random() < 0.03 else None,
+            "created_at": self._timestamp(rng, self.start_date - timedelta(days=60), self.end_date),
+            "last_visit": None
+        }
+
+    def appointments(self):
+        """
+        Generate appointments day by day, barber by barber
+
+        Each call starts over with the same random sequence.
+
+        Yields:
+            dict: Appointment with ISO 'date' and 'created_at'/'updated_at' strings
+        """
+        rng = random.Random(self.seed * 1000003 + 1)
+        services = [(service, service["weight"]) for service in self.services]
+        today = self.end_date
+        day = self.start_date
+        last_day = self.end_date + timedelta(days=self.future_days)
+
+        while day <= last_day:
+            day_iso = day.isoformat()
+            weekday = day.weekday()
+            factor = WEEKDAY_OCCUPANCY[weekday] * MONTH_FACTOR[day.month - 1]
+            # Only customers who had signed up by then can book
+            joined = bisect.bisect_right(self._joined, day_iso) or 1
+            statuses = PAST_STATUSES if day < today else FUTURE_STATUSES
+
+            for barber in self.barbers:
+                hours = barber["working_hours"][DAYS[weekday]]
+                if not hours or day < barber["hired"] or (barber["left"] and day >= barber["left"]):
+                    continue
+                occupancy = min(0.95, factor * barber["popularity"])
+                minute, end = _minutes(hours["start"]), _minutes(hours["end"])
+
+                while minute < end:
+                    if rng.random() >= occupancy:
+                        minute += 30
+                        continue
+                    service = _weighted(rng, services)
+                    # Regulars (early sign-ups) book most often
+                    customer = self.customers[int(joined * rng.random() ** 1.5)]
+                    status = _weighted(rng, statuses)
+                    booked = datetime.combine(day, datetime.min.time()) + timedelta(minutes=minute)
+                    created = booked - timedelta(hours=1 + rng.expovariate(1 / 96))
+                    if status in ("completed", "no-show"):
+                        updated = booked + timedelta(minutes=service["duration"])
+                    elif status == "cancelled":
+                        updated = created + (booked - created) * rng.random()
+                    else:
+                        updated = created
+
+                    yield {
+                        "id": _uuid(rng), "customer_id": customer["id"], "barber_id": barber["id"],
+                        "service_id": service["id"], "date": day_iso, "time": f"{minute // 60:02d}:{minute % 60:02d}",
+                        "duration": service["duration"], "status": status,
+                        "notes": rng.choice(NOTES) if rng.random() < 0.05 else None,
+                        "created_at": created.isoformat(timespec="seconds"),
+                        "updated_at": updated.isoformat(timespec="seconds")
+                    }
+                    # Bookings stay on the half-hour grid availability checks use
+                    minute += -(-service["duration"] // 30) * 30
+            day += timedelta(days=1)
+
+def _public(record, private=("weight", "hired", "left", "popularity")):
+    """Record without the generator's bookkeeping fields"""
+    return {key: value for key, value in record.items() if key not in private}
+
+def _compact(record):
+    """Record without empty fields, as the JSON models store them"""
+    return {key: value for key, value in record.items() if value is not None}
+
+def _last_visits(dataset, appointments):
+    """Pass appointments through, remembering each customer's last completed visit"""
+    last_visit = {}
+    for appointment in appointments:
+        if appointment["status"] == "completed":
+            last_visit[appointment["customer_id"]] = appointment["date"]
+        yield appointment
+    for customer in dataset.customers:
+        visit = last_visit.get(customer["id"])
+        customer["last_visit"] = f"{visit}T00:00:00" if visit else None
+
+def _write_collection(path, name, records):
+    """Stream records into a data_service JSON file ({name: {id: record}}), atomically"""
+    count = 0
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(f'{{"{name}": {{')
+        for record in records:
+            f.write(("," if count else "") + json.dumps(record["id"]) + ": " + json.dumps(record, ensure_ascii=False))
+            count += 1
+        f.write("}}")
+    os.replace(temp_path, path)
+    return count
+
+def write_json(dataset, data_dir):
+    """
+    Write the dataset as data_service JSON files, replacing existing ones
+
+    Running workers pick the new files up through the shared data versions.
+
+    Args:
+        dataset: Dataset to write
+        data_dir: Directory holding customers.json, appointments.json, etc.
+
+    Returns:
+        dict: Records written per collection
+    """
+    from services import coherence_service
+
+    os.makedirs(data_dir, exist_ok=True)
+    counts = {
+        "appointments": _write_collection(os.path.join(data_dir, "appointments.json"), "appointments",
+                                          map(_compact, _last_visits(dataset, dataset.appointments()))),
+        "barbers": _write_collection(os.path.join(data_dir, "barbers.json"), "barbers",
+                                     map(_public, dataset.barbers)),
+        "services": _write_collection(os.path.join(data_dir, "services.json"), "services",
+                                      map(_public, dataset.services)),
+        "customers": _write_collection(os.path.join(data_dir, "customers.json"), "customers",
+                                       map(_compact, dataset.customers)),
+    }
+
+    versions = coherence_service.get_shared_versions(data_dir)
+    with versions.lock():
+        for collection in counts:
+            versions.bump(collection)
+    return counts
+
+def _batches(records, size):
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def load_sql(dataset, batch_size=5000):
+    """
+    Insert the dataset into the current app's database with batched executemany inserts
+
+    Must run inside an app context; the tables must exist and should be empty.
+
+    Args:
+        dataset: Dataset to load
+        batch_size: Rows per insert statement
+
+    Returns:
+        dict: Rows inserted per table
+    """
+    from models.database import db, Customer, Barber, Service, Appointment
+    from services import version_service
+
+    def parse(value):
+        return datetime.fromisoformat(value) if value else None
+
+    db.session.execute(db.insert(Service), [
+        dict(_public(s), created_at=parse(s["created_at"]), updated_at=parse(s["updated_at"])) for s in dataset.services
+    ])
+    db.session.execute(db.insert(Barber), [
+        dict(_public(b), created_at=parse(b["created_at"]), updated_at=parse(b["updated_at"])) for b in dataset.barbers
+    ])
+    for batch in _batches(dataset.customers, batch_size):
+        db.session.execute(db.insert(Customer), [
+            dict(c, created_at=parse(c["created_at"]), last_visit=None) for c in batch
+        ])
+    db.session.commit()
+
+    appointments = 0
+    for batch in _batches(_last_visits(dataset, dataset.appointments()), batch_size):
+        db.session.execute(db.insert(Appointment), [
+            dict(a, date=date.fromisoformat(a["date"]), created_at=parse(a["created_at"]),
+                 updated_at=parse(a["updated_at"])) for a in batch
+        ])
+        db.session.commit()
+        appointments += len(batch)
+
+    # Last visits are known once every appointment has been generated
+    visited = [{"id": c["id"], "last_visit": parse(c["last_visit"])} for c in dataset.customers if c["last_visit"]]
+    for batch in _batches(visited, batch_size):
+        # Bulk UPDATE by primary key
+        db.session.execute(db.update(Customer), batch)
+    db.session.commit()
+
+    for collection in ("customers", "appointments", "barbers", "services"):
+        version_service.bump(collection)
+    return {"services": len(dataset.services), "barbers": len(dataset.barbers),
+            "customers": len(dataset.customers), "appointments": appointments}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--barbers", type=int, default=25)
+    parser.add_argument("--customers", type=int, default=20000)
+    parser.add_argument("--years", type=float, default=3)
+    parser.add_argument("--future-days", type=int, default=30)
+    parser.add_argument("--end-date", type=date.fromisoformat, help="Last day of history (default today)")
+    parser.add_argument("--json", metavar="DATA_DIR", help="Write data_service JSON files to this directory")
+    parser.add_argument("--sql", action="store_true", help="Insert into the database (DATABASE_URL or --database-url)")
+    parser.add_argument("--database-url", help="SQLAlchemy URL, e.g. sqlite:///scale.db")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+    if not args.json and not args.sql:
+        parser.error("choose --json DATA_DIR and/or --sql")
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    dataset = Dataset(args.seed, args.barbers, args.customers, args.years, args.future_days, args.end_date)
+
+    if args.json:
+        started = time.perf_counter()
+        counts = write_json(dataset, args.json)
+        logger.info("Wrote %s to %s in %.1fs", counts, args.json, time.perf_counter() - started)
+
+    if args.sql:
+        from app import create_app
+        config = {"SQLALCHEMY_DATABASE_URI": args.database_url} if args.database_url else None
+        app = create_app(config, bootstrap=["create_tables"])
+        with app.app_context():
+            started = time.perf_counter()
+            counts = load_sql(dataset, args.batch_size)
+            logger.info("Inserted %s in %.1fs", counts, time.perf_counter() - started)
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
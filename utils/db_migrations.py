@@ -0,0 +1,218 @@
+"""
+Database migrations for schema changes that db.create_all() does not apply to existing tables
+"""
+import logging
+from datetime import datetime
+from models.database import db
+
+logger = logging.getLogger(__name__)
+
+def add_column(table, column, definition):
+    """
+    Migration step adding a column unless the table already has it
+
+    ALTER TABLE ... ADD COLUMN IF NOT EXISTS is PostgreSQL-only, and
+    create_all() already gives fresh databases every column.
+    """
+    def step(connection):
+        if column not in {c['name'] for c in db.inspect(connection).get_columns(table)}:
+            connection.execute(db.text(f"ALTER TABLE {table} ADD COLUMN {column} {definition}"))
+    return step
+
+class CreateIndex:
+    """
+    Migration step creating an index if it does not exist
+
+    On PostgreSQL the index is built with CREATE INDEX CONCURRENTLY, which
+    does not block writes to the table but cannot run inside a transaction,
+    so run_migrations() commits the statements before it and builds the
+    index on an autocommit connection.
+    """
+
+    def __init__(self, name, table, columns):
+        self.name = name
+        self.table = table
+        self.columns = columns
+
+    def sql(self, concurrently=False):
+        """CREATE INDEX statement for this index"""
+        keyword = "CREATE INDEX CONCURRENTLY" if concurrently else "CREATE INDEX"
+        return f"{keyword} IF NOT EXISTS {self.name} ON {self.table} ({self.columns})"
+
+    def build_concurrently(self, connection):
+        """
+        Build the index on an autocommit PostgreSQL connection
+
+        A concurrent build that failed leaves an invalid index behind, which
+        IF NOT EXISTS would skip, so it is dropped and built again.
+        """
+        invalid = connection.execute(db.text(
+            "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE c.relname = :name AND NOT i.indisvalid"
+        ), {'name': self.name}).first()
+        if invalid:
+            connection.execute(db.text(f"DROP INDEX CONCURRENTLY IF EXISTS {self.name}"))
+        connection.execute(db.text(self.sql(concurrently=True)))
+
+# Arbitrary key for the PostgreSQL advisory lock that serializes migration runs
+MIGRATION_LOCK_ID = 72010034
+
+# Ordered migrations: (version, description, steps). A step is an SQL
+# statement, a CreateIndex or a callable taking the connection. Applied
+# versions are recorded in schema_migrations, so each migration runs once per
+# database. Index names match the __table_args__ in models.database, which
+# fresh databases get from create_all().
+MIGRATIONS = [
+    (
+        '0001_appointment_indexes',
+        'Composite indexes for availability, date range, status, barber and customer lookups',
+        [
+            CreateIndex('ix_appointments_date_time_status_barber', 'appointments', 'date, time, status, barber_id'),
+            CreateIndex('ix_appointments_status_date_time', 'appointments', 'status, date, time'),
+            CreateIndex('ix_appointments_barber_date_time', 'appointments', 'barber_id, date, time'),
+            CreateIndex('ix_appointments_customer_date', 'appointments', 'customer_id, date'),
+        ]
+    ),
+    (
+        '0002_customer_and_delivery_indexes',
+        'Indexes for campaign segments and delivery metric windows',
+        [
+            CreateIndex('ix_customers_last_visit', 'customers', 'last_visit'),
+            CreateIndex('ix_message_deliveries_sent_at', 'message_deliveries', 'sent_at'),
+        ]
+    ),
+    (
+        '0003_appointment_change_feed',
+        'updated_at index and tombstones table for the appointment change feed',
+        [
+            "UPDATE appointments SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP) WHERE updated_at IS NULL",
+            "CREATE TABLE IF NOT EXISTS appointment_tombstones ("
+            "appointment_id VARCHAR(36) PRIMARY KEY, "
+            "deleted_at TIMESTAMP NOT NULL)",
+            CreateIndex('ix_appointments_updated_at_id', 'appointments', 'updated_at, id'),
+            CreateIndex('ix_appointment_tombstones_deleted_at_id', 'appointment_tombstones', 'deleted_at, appointment_id'),
+        ]
+    ),
+    (
+        '0004_campaign_run_token',
+        'Run owner and heartbeat for campaign sending',
+        [
+            add_column('campaigns', 'run_token', 'VARCHAR(36)'),
+            add_column('campaigns', 'heartbeat_at', 'TIMESTAMP'),
+        ]
+    ),
+    (
+        '0005_table_versions',
+        'Write counters read by conditional GETs instead of counting rows',
+        [
+            "CREATE TABLE IF NOT EXISTS table_versions ("
+            "name VARCHAR(30) PRIMARY KEY, "
+            "version BIGINT NOT NULL DEFAULT 0, "
+            "updated_at TIMESTAMP)",
+        ]
+    ),
+]
+
+def _ensure_migrations_table():
+    """Create the schema_migrations bookkeeping table if needed"""
+    db.session.execute(db.text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        "version VARCHAR(100) PRIMARY KEY, "
+        "description VARCHAR(255), "
+        "applied_at TIMESTAMP NOT NULL)"
+    ))
+    db.session.commit()
+
+def get_applied_migrations():
+    """
+    Get the migrations already applied to the database
+
+    Returns:
+        dict: applied_at timestamps keyed by migration version
+    """
+    _ensure_migrations_table()
+    rows = db.session.execute(db.text("SELECT version, applied_at FROM schema_migrations")).all()
+    return {version: applied_at for version, applied_at in rows}
+
+def run_migrations(migrations=None):
+    """
+    Apply every pending migration, each in its own transaction
+
+    Must be called inside an application context, after db.create_all().
+    On PostgreSQL an advisory lock keeps several workers starting at once
+    from applying the same migration concurrently, and indexes are built
+    concurrently outside the migration's transaction (see CreateIndex).
+    A migration interrupted between its transaction and an index build is
+    not recorded and runs again; every step is safe to repeat.
+
+    Args:
+        migrations: Migration list to apply (defaults to MIGRATIONS)
+
+    Returns:
+        list: Versions applied by this call
+    """
+    migrations = MIGRATIONS if migrations is None else migrations
+    applied = get_applied_migrations()
+    pending = [migration for migration in migrations if migration[0] not in applied]
+
+    if pending and db.engine.dialect.name == 'postgresql':
+        # A session-level lock on its own autocommit connection, held across
+        # the commits that concurrent index builds need
+        with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+            connection.execute(db.text("SELECT pg_advisory_lock(:lock_id)"), {'lock_id': MIGRATION_LOCK_ID})
+            try:
+                # Another worker may have applied some while we waited for the lock
+                applied = get_applied_migrations()
+                applied_now = _apply_migrations(
+                    [migration for migration in pending if migration[0] not in applied], connection)
+            finally:
+                connection.execute(db.text("SELECT pg_advisory_unlock(:lock_id)"), {'lock_id': MIGRATION_LOCK_ID})
+    else:
+        applied_now = _apply_migrations(pending)
+
+    if not applied_now:
+        logger.info("Database schema is up to date")
+
+    return applied_now
+
+def _apply_migrations(migrations, index_connection=None):
+    """
+    Apply migrations in order, recording each one once its steps succeeded
+
+    Args:
+        migrations: Pending migrations
+        index_connection: Autocommit connection for concurrent index builds, or None
+            to create indexes inside the migration's transaction
+
+    Returns:
+        list: Versions applied
+    """
+    applied_now = []
+    for version, description, statements in migrations:
+        try:
+            for statement in statements:
+                if isinstance(statement, CreateIndex):
+                    if index_connection is None:
+                        db.session.execute(db.text(statement.sql()))
+                    else:
+                        db.session.commit()
+                        statement.build_concurrently(index_connection)
+                elif callable(statement):
+                    statement(db.session.connection())
+                else:
+                    db.session.execute(db.text(statement))
+
+            db.session.execute(
+                db.text("INSERT INTO schema_migrations (version, description, applied_at) "
+                        "VALUES (:version, :description, :applied_at)"),
+                {'version': version, 'description': description, 'applied_at': datetime.utcnow()}
+            )
+            db.session.commit()
+            applied_now.append(version)
+            logger.info(f"Applied database migration {version}: {description}")
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error applying database migration {version}: {str(e)}")
+            raise
+
+    return applied_now
@@ -1,6 +1,7 @@
 """
 Helper utilities for the Barber Appointment System
 """
+import base64
 import json
 import re
 from datetime import datetime, timedelta
@@ -318,3 +319,40 @@ def clean_json(json_str):
         cleaned = cleaned.replace("'", '"')
         
         return cleaned
+
+def encode_cursor(values):
+    """
+    Encode the sort key of the last row on a page into an opaque pagination cursor
+    
+    Args:
+        values: List of JSON-serializable sort key values
+        
+    Returns:
+        str: URL-safe cursor string
+    """
+    raw = json.dumps(list(values), separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor, length):
+    """
+    Decode a pagination cursor created by encode_cursor
+    
+    Args:
+        cursor: Cursor string
+        length: Expected number of sort key values
+        
+    Returns:
+        list: Sort key values, or None if the cursor is missing or malformed
+    """
+    if not cursor:
+        return None
+    
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw.decode('utf-8'))
+    except (ValueError, TypeError):
+        return None
+    
+    if not isinstance(values, list) or len(values) != length or not all(isinstance(v, str) for v in values):
+        return None
+    return values
@@ -1,39 +1,78 @@
 """
 Logging utility for the Barber Appointment System
 """
+import atexit
+import json
 import logging
 import os
+import queue
+import threading
 from datetime import datetime
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 
-def setup_logger(name, log_file=None, level=logging.INFO):
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Pass as extra= to let SamplingFilter thin out a high-volume message
+SAMPLED = {'sampled': True}
+
+# Queue handlers and their listeners, restarted in forked children
+_pipelines = []
+_pipelines_lock = threading.Lock()
+
+class LazyJson:
     """
-    Configure a logger with specified name, log file, and level
+    Defer json.dumps until a log record is actually formatted
     
-    Args:
-        name: Logger name
-        log_file: Path to log file (optional)
-        level: Logging level
-        
-    Returns:
-        Configured logger instance
+    Usage:
+        logger.debug("Webhook data: %s", LazyJson(data))
     """
-    logger = logging.getLogger(name)
-    logger.setLevel(level)
+    __slots__ = ('value',)
     
-    # Create formatter
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    def __init__(self, value):
+        self.value = value
+    
+    def __str__(self):
+        try:
+            return json.dumps(self.value, default=str, ensure_ascii=False)
+        except (TypeError, ValueError):
+            return repr(self.value)
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep one in every N records logged with extra=SAMPLED
+    
+    Counting is per message template, so each kind of message is thinned
+    independently; the first occurrence is always kept. Unmarked records
+    and warnings or worse always pass.
+    """
+    
+    def __init__(self, every=10):
+        super().__init__()
+        self.every = max(1, int(every))
+        self._counts = {}
+        self._lock = threading.Lock()
+    
+    def filter(self, record):
+        if self.every == 1 or not getattr(record, 'sampled', False) or record.levelno >= logging.WARNING:
+            return True
+        key = (record.name, record.msg)
+        with self._lock:
+            count = self._counts.get(key, 0)
+            self._counts[key] = count + 1
+        return count % self.every == 0
+
+def _build_handlers(level, log_file):
+    """Console handler plus an optional rotating file handler"""
+    formatter = logging.Formatter(LOG_FORMAT)
     
-    # Add console handler
     console_handler = logging.StreamHandler()
     console_handler.setLevel(level)
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
+    handlers = [console_handler]
     
-    # Add file handler if log file is provided
     if log_file:
         # Create logs directory if it doesn't exist
-        os.makedirs(os.path.dirname(log_file), exist_ok=True)
+        os.makedirs(os.path.dirname(log_file) or '.', exist_ok=True)
         
         # Create rotating file handler (max 10MB per file, keep 10 backup files)
         file_handler = RotatingFileHandler(
@@ -43,8 +82,92 @@ def setup_logger(name, log_file=None, level=logging.INFO):
         )
         file_handler.setLevel(level)
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        handlers.append(file_handler)
+    
+    return handlers
+
+def _queue_pipeline(handlers, sample_every=1):
+    """
+    Create a QueueHandler whose records are written by a background listener
+    
+    The calling thread only formats the message and puts the record on a
+    queue; console and file I/O happen on the listener's thread.
+    
+    Returns:
+        QueueHandler: Handler to attach to a logger
+    """
+    log_queue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    if sample_every > 1:
+        queue_handler.addFilter(SamplingFilter(sample_every))
     
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    with _pipelines_lock:
+        _pipelines.append((queue_handler, listener))
+    return queue_handler
+
+def _stop_pipelines():
+    """Flush queued records and stop the listener threads"""
+    with _pipelines_lock:
+        pipelines = list(_pipelines)
+    for _, listener in pipelines:
+        if listener._thread is not None:
+            listener.stop()
+
+def _restart_pipelines_in_child():
+    """Listener threads do not survive fork: give the child fresh queues and threads"""
+    with _pipelines_lock:
+        for index, (queue_handler, listener) in enumerate(_pipelines):
+            queue_handler.queue = queue.SimpleQueue()
+            listener = QueueListener(queue_handler.queue, *listener.handlers, respect_handler_level=True)
+            listener.start()
+            _pipelines[index] = (queue_handler, listener)
+
+atexit.register(_stop_pipelines)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_restart_pipelines_in_child)
+
+def configure_logging(level=logging.INFO, log_file=None, sample_every=1):
+    """
+    Route all logging through a queue so request threads never block on I/O
+    
+    Replaces the root logger's handlers with a single QueueHandler; a
+    listener thread writes to the console and, if given, a rotating file.
+    
+    Args:
+        level: Root logging level
+        log_file: Path to a rotating log file (optional)
+        sample_every: Keep one in this many records logged with extra=SAMPLED
+        
+    Returns:
+        logging.Logger: The root logger
+    """
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.setLevel(level)
+    root.addHandler(_queue_pipeline(_build_handlers(level, log_file), sample_every))
+    return root
+
+def setup_logger(name, log_file=None, level=logging.INFO):
+    """
+    Configure a logger with specified name, log file, and level
+    
+    Records are handed to a background listener through a queue, so
+    logging never waits on the console or the log file.
+    
+    Args:
+        name: Logger name
+        log_file: Path to log file (optional)
+        level: Logging level
+        
+    Returns:
+        Configured logger instance
+    """
+    logger = logging.getLogger(name)
+    logger.setLevel(level)
+    logger.addHandler(_queue_pipeline(_build_handlers(level, log_file)))
     return logger
 
 def log_request(logger, request, level=logging.DEBUG):
@@ -56,11 +179,12 @@ def log_request(logger, request, level=logging.DEBUG):
         request: Flask request object
         level: Logging level for the request
     """
+    if not logger.isEnabledFor(level):
+        return
     logger.log(
         level,
-        f"Request: {request.method} {request.url} - "
-        f"Headers: {dict(request.headers)} - "
-        f"Data: {request.get_data(as_text=True)}"
+        "Request: %s %s - Headers: %s - Data: %s",
+        request.method, request.url, dict(request.headers), request.get_data(as_text=True)
     )
 
 def log_response(logger, response, level=logging.DEBUG):
@@ -72,11 +196,12 @@ def log_response(logger, response, level=logging.DEBUG):
         response: Flask response object
         level: Logging level for the response
     """
+    if not logger.isEnabledFor(level):
+        return
     logger.log(
         level,
-        f"Response: {response.status_code} - "
-        f"Headers: {dict(response.headers)} - "
-        f"Data: {response.get_data(as_text=True)}"
+        "Response: %s - Headers: %s - Data: %s",
+        response.status_code, dict(response.headers), response.get_data(as_text=True)
     )
 
 def log_error(logger, error, additional_info=None):
@@ -140,16 +265,12 @@ def log_whatsapp_message(logger, direction, phone_number, message_content, messa
         message_content: Content of the message
         message_id: Message ID (optional)
     """
-    message = f"WhatsApp {direction} message: To/From={phone_number}"
-    
-    if message_id:
-        message += f" - Message ID={message_id}"
+    if not logger.isEnabledFor(logging.INFO):
+        return
     
     # Truncate message content if too long
     if len(message_content) > 100:
-        truncated_content = message_content[:97] + "..."
-        message += f" - Content: {truncated_content}"
-    else:
-        message += f" - Content: {message_content}"
+        message_content = message_content[:97] + "..."
     
-    logger.info(message)
+    logger.info("WhatsApp %s message: To/From=%s%s - Content: %s", direction, phone_number,
+                f" - Message ID={message_id}" if message_id else "", message_content, extra=SAMPLED)